@@ -0,0 +1,165 @@
+"""
+Acumulador incremental de emociones a nivel de conversación para MindCare-AI.
+Cada mensaje nuevo actualiza el estado en O(len(mensaje)) sin volver a
+recorrer los turnos anteriores; los mensajes antiguos pesan menos gracias
+a un factor de decaimiento.
+"""
+
+import base64
+import struct
+import zlib
+from array import array
+from typing import Any, Dict, Mapping, Optional
+
+from .emotion_library import EmotionLibrary
+from .lexicon import TOKEN_RE
+
+# Cabecera: formato, total de emociones, mensajes, palabras (con decaimiento)
+# y huella de las emociones del léxico (el léxico se puede cambiar en caliente)
+_CABECERA = struct.Struct("<BHIfI")
+# Emoción presente: id, puntuación y frases detectadas (con decaimiento)
+_EMOCION = struct.Struct("<Hff")
+_FORMATO = 2
+
+
+class EmotionAccumulator:
+    """
+    Estado emocional acumulado de una conversación.
+
+    Guarda, por emoción, la puntuación y el número de frases detectadas, y el
+    total de palabras de la conversación. Antes de sumar un mensaje, el estado
+    previo se multiplica por ``decaimiento`` (1.0 = todos los mensajes pesan
+    igual). Las emociones cuyo peso cae por debajo de ``PESO_MINIMO`` se olvidan.
+    """
+
+    DECAIMIENTO = 0.7
+    PESO_MINIMO = 0.05
+
+    def __init__(self, decaimiento: float = DECAIMIENTO, lexico=None):
+        self.lexico = lexico if lexico is not None else EmotionLibrary.lexico_actual()
+        self.decaimiento = decaimiento
+        total = len(self.lexico.emociones)
+        self.puntuaciones = array("d", bytes(8 * total))
+        self.contadores = array("d", bytes(8 * total))
+        self.palabras = 0.0
+        self.mensajes = 0
+
+    def agregar(self, texto: str) -> None:
+        """Incorpora un mensaje nuevo a la conversación."""
+        palabras, cortes = EmotionLibrary.REGLAS_MODIFICADORES.tokenizar(texto.strip()) if texto else ([], ())
+        acumulados = EmotionLibrary._puntuar_tokens(palabras, self.lexico, cortes) if palabras else {}
+        self._aplicar(acumulados, len(palabras))
+
+    def agregar_analisis(self, analisis: Mapping[str, Any], texto: str) -> None:
+        """
+        Incorpora un mensaje ya analizado (el resultado de ``obtener_analisis_completo``,
+        con la cascada, la tolerancia a erratas y la caché) sin volver a puntuarlo.
+        Las emociones que no están en el léxico del acumulador se ignoran.
+        """
+        ids = {emocion: emo_id for emo_id, emocion in enumerate(self.lexico.emociones)}
+        acumulados = {
+            ids[emocion]: (detalle["puntuacion"], detalle["palabras_detectadas"])
+            for emocion, detalle in analisis["emociones"].items() if emocion in ids
+        }
+        # Solo para la confianza: contar los tokens no requiere puntuarlos
+        self._aplicar(acumulados, len(TOKEN_RE.findall(texto.lower())) if texto else 0)
+
+    def _aplicar(self, acumulados: Dict[int, list], total_palabras: int) -> None:
+        """Aplica el decaimiento al estado previo y suma las puntuaciones del mensaje."""
+        decaimiento = self.decaimiento
+        puntuaciones = self.puntuaciones
+        contadores = self.contadores
+
+        if decaimiento != 1.0:
+            for emo_id in range(len(contadores)):
+                if contadores[emo_id]:
+                    contadores[emo_id] *= decaimiento
+                    puntuaciones[emo_id] *= decaimiento
+                    if contadores[emo_id] < self.PESO_MINIMO:
+                        contadores[emo_id] = 0.0
+                        puntuaciones[emo_id] = 0.0
+
+        for emo_id, (puntuacion, contador) in acumulados.items():
+            puntuaciones[emo_id] += puntuacion
+            contadores[emo_id] += contador
+
+        self.palabras = self.palabras * decaimiento + total_palabras
+        self.mensajes += 1
+
+    def emociones(self) -> Dict[str, Dict[str, float]]:
+        """Emociones presentes en la conversación, con la forma de ``detectar_emociones``."""
+        emociones = {}
+        for emo_id, contador in enumerate(self.contadores):
+            if contador:
+                puntuacion = self.puntuaciones[emo_id]
+                emociones[self.lexico.emociones[emo_id]] = {
+                    "puntuacion": puntuacion,
+                    "palabras_detectadas": contador,
+                    "intensidad": min((puntuacion / contador) * 1.2, 10)
+                }
+        return emociones
+
+    def resumen(self) -> Dict[str, Any]:
+        """Emoción principal, estrés y confianza de la conversación completa."""
+        emociones = self.emociones()
+        if emociones:
+            emocion_principal = max(emociones, key=lambda e: abs(emociones[e]["puntuacion"]))
+        else:
+            emocion_principal = "neutral"
+
+        return {
+            "emocion_principal": emocion_principal,
+            "nivel_estres": EmotionLibrary._calcular_nivel_estres(emociones),
+            "confianza": min(EmotionLibrary._calcular_confianza(emociones, self.palabras), 100),
+            "mensajes": self.mensajes
+        }
+
+    # ------------------------------------------
+    #  Serialización compacta (para la sesión)
+    # ------------------------------------------
+
+    def _huella(self) -> int:
+        """CRC32 de los nombres de emoción, en orden: cambia si cambian los ids."""
+        return zlib.crc32("|".join(self.lexico.emociones).encode("utf-8"))
+
+    def a_bytes(self) -> bytes:
+        """Serializa el estado: 15 bytes de cabecera + 10 bytes por emoción presente."""
+        partes = [_CABECERA.pack(_FORMATO, len(self.contadores), self.mensajes, self.palabras, self._huella())]
+        for emo_id, contador in enumerate(self.contadores):
+            if contador:
+                partes.append(_EMOCION.pack(emo_id, self.puntuaciones[emo_id], contador))
+        return b"".join(partes)
+
+    @classmethod
+    def desde_bytes(cls, datos: bytes, decaimiento: float = DECAIMIENTO, lexico=None) -> "EmotionAccumulator":
+        """Reconstruye un acumulador; si el estado no es compatible, empieza de cero."""
+        acumulador = cls(decaimiento, lexico)
+        try:
+            formato, total, mensajes, palabras, huella = _CABECERA.unpack_from(datos, 0)
+            if formato != _FORMATO or total != len(acumulador.contadores) or huella != acumulador._huella():
+                return acumulador
+            for desplazamiento in range(_CABECERA.size, len(datos), _EMOCION.size):
+                emo_id, puntuacion, contador = _EMOCION.unpack_from(datos, desplazamiento)
+                acumulador.puntuaciones[emo_id] = puntuacion
+                acumulador.contadores[emo_id] = contador
+        except (struct.error, IndexError):
+            return cls(decaimiento, lexico)
+
+        acumulador.mensajes = mensajes
+        acumulador.palabras = palabras
+        return acumulador
+
+    def a_texto(self) -> str:
+        """Estado en base64, apto para guardarse en la sesión."""
+        return base64.b64encode(self.a_bytes()).decode("ascii")
+
+    @classmethod
+    def desde_texto(cls, texto: Optional[str], decaimiento: float = DECAIMIENTO, lexico=None) -> "EmotionAccumulator":
+        """Inverso de ``a_texto``; un valor ausente o corrupto da un acumulador vacío."""
+        if not texto:
+            return cls(decaimiento, lexico)
+        try:
+            datos = base64.b64decode(texto.encode("ascii"), validate=True)
+        except (ValueError, UnicodeEncodeError):
+            return cls(decaimiento, lexico)
+        return cls.desde_bytes(datos, decaimiento, lexico)
@@ -0,0 +1,176 @@
+"""
+Limitación de alertas por usuario.
+
+Un usuario angustiado que envía diez mensajes en un minuto produce diez
+eventos "analisis_estres_alto", y AlertObserver emitiría diez alertas.
+``LimitadorAlertas`` decide, para cada alerta (usuario, severidad), si se
+emite o se suprime:
+
+    - escalada: si la severidad es mayor que la de todas las alertas
+      emitidas al usuario en la ventana, se emite siempre;
+    - duplicada: si ya se emitió una alerta de esa severidad al usuario hace
+      menos de ``ventana`` segundos, se suprime;
+    - límite: cada usuario tiene un cubo de ``capacidad`` fichas que se
+      rellena a razón de una cada ``recarga`` segundos; cada alerta emitida
+      gasta una, y sin fichas se suprime.
+
+Las alertas suprimidas se cuentan y la siguiente alerta emitida al usuario
+lleva el total (``Decision.suprimidas``), de modo que no se pierden, solo se
+resumen. AlertObserver publica cada alerta emitida como "alerta_emitida", y
+el email de alerta sale de ese evento: ambos siguen la misma decisión.
+
+El estado es de los usuarios activos: un usuario sin alertas durante
+``max(ventana, capacidad * recarga)`` segundos tiene el cubo lleno y ninguna
+alerta en la ventana, igual que uno nuevo, así que se expulsa. Además hay un
+máximo de usuarios en memoria (se expulsa el usado hace más tiempo).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+MODERADA = "moderada"
+CRITICA = "critica"
+
+# Severidad -> rango (mayor es más grave)
+SEVERIDADES = {MODERADA: 1, CRITICA: 2}
+
+
+def severidad_estres(nivel_estres: Any) -> Optional[str]:
+    """Severidad de la alerta para un nivel de estrés (None si no hay alerta)."""
+    if nivel_estres >= 9:
+        return CRITICA
+    if nivel_estres >= 7:
+        return MODERADA
+    return None
+
+
+class Decision(NamedTuple):
+    emitir: bool
+    # Alertas suprimidas desde la última emitida (solo si emitir)
+    suprimidas: int = 0
+    escalada: bool = False
+
+
+class _Cubo:
+    __slots__ = ("fichas", "recargado", "emitidas", "suprimidas")
+
+    def __init__(self, fichas: float, ahora: float):
+        self.fichas = fichas
+        self.recargado = ahora
+        # Severidad -> timestamp de la última alerta emitida
+        self.emitidas: Dict[str, float] = {}
+        self.suprimidas = 0
+
+
+class LimitadorAlertas:
+    """
+    Cubo de fichas y ventana de duplicados por usuario.
+
+    Args:
+        capacidad: Alertas seguidas que puede recibir un usuario
+        recarga: Segundos para recuperar una ficha
+        ventana: Segundos en los que se suprime una alerta de la misma severidad
+        max_usuarios: Usuarios en memoria (se expulsa el usado hace más tiempo)
+        reloj: Función que da el timestamp actual (para tests)
+    """
+
+    def __init__(self, capacidad: int = 3, recarga: float = 60.0, ventana: float = 300.0,
+                 max_usuarios: int = 100_000, reloj: Callable[[], float] = time.time):
+        if capacidad < 1 or recarga <= 0:
+            raise ValueError("capacidad debe ser al menos 1 y recarga mayor que 0")
+
+        self.capacidad = capacidad
+        self.recarga = recarga
+        self.ventana = ventana
+        self.max_usuarios = max_usuarios
+        # Tras este tiempo sin alertas el estado de un usuario es el inicial
+        self.inactividad = max(ventana, capacidad * recarga)
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        # Del usado hace más tiempo al más reciente
+        self._cubos: "OrderedDict[Any, _Cubo]" = OrderedDict()
+        # Los inactivos se buscan como mucho una vez por segundo
+        self._proxima_revision = 0.0
+
+        self.emitidas = 0
+        self.suprimidas = 0
+        self.escaladas = 0
+        self.expulsados = 0
+        # Suprimidas de usuarios expulsados antes de recibir otra alerta
+        self.sin_resumen = 0
+
+    def decidir(self, usuario_id: Any, severidad: str) -> Decision:
+        """Decide si se emite la alerta y la anota."""
+        ahora = self._reloj()
+        rango = SEVERIDADES[severidad]
+
+        with self._lock:
+            cubo = self._cubos.get(usuario_id)
+            if cubo is None:
+                cubo = self._cubos[usuario_id] = _Cubo(self.capacidad, ahora)
+            else:
+                self._cubos.move_to_end(usuario_id)
+                cubo.fichas = min(self.capacidad, cubo.fichas + (ahora - cubo.recargado) / self.recarga)
+                cubo.recargado = ahora
+            self._expulsar(ahora, usuario_id)
+
+            en_ventana = [s for s, emitida in cubo.emitidas.items() if ahora - emitida < self.ventana]
+            escalada = bool(en_ventana) and rango > max(SEVERIDADES[s] for s in en_ventana)
+            if not escalada and (severidad in en_ventana or cubo.fichas < 1):
+                cubo.suprimidas += 1
+                self.suprimidas += 1
+                return Decision(False)
+
+            # Una escalada se emite aunque no queden fichas
+            cubo.fichas = max(0.0, cubo.fichas - 1)
+            cubo.emitidas[severidad] = ahora
+            suprimidas, cubo.suprimidas = cubo.suprimidas, 0
+            self.emitidas += 1
+            self.escaladas += escalada
+            return Decision(True, suprimidas, escalada)
+
+    def _expulsar(self, ahora: float, actual: Any) -> None:
+        # Se llama con el lock tomado. El orden LRU es también el de inactividad
+        cubos = self._cubos
+        if ahora >= self._proxima_revision:
+            self._proxima_revision = ahora + 1
+            while cubos:
+                usuario_id, cubo = next(iter(cubos.items()))
+                if ahora - cubo.recargado <= self.inactividad or usuario_id == actual:
+                    break
+                self._quitar(usuario_id)
+
+        while len(cubos) > self.max_usuarios:
+            self._quitar(next(iter(cubos)))
+
+    def _quitar(self, usuario_id: Any) -> None:
+        cubo = self._cubos.pop(usuario_id)
+        self.sin_resumen += cubo.suprimidas
+        self.expulsados += 1
+
+    def __len__(self) -> int:
+        return len(self._cubos)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "usuarios": len(self._cubos),
+                "emitidas": self.emitidas,
+                "suprimidas": self.suprimidas,
+                "escaladas": self.escaladas,
+                "expulsados": self.expulsados,
+                "suprimidas_sin_resumen": self.sin_resumen,
+            }
+
+
+def crear_limitador(config: Optional[Dict[str, Any]]) -> LimitadorAlertas:
+    """LimitadorAlertas según ``settings.ALERTAS``."""
+    config = config or {}
+    return LimitadorAlertas(
+        capacidad=config.get("CAPACIDAD", 3),
+        recarga=config.get("RECARGA_S", 60),
+        ventana=config.get("VENTANA_DEDUP_S", 300),
+        max_usuarios=config.get("MAX_USUARIOS", 100_000),
+    )
@@ -0,0 +1,127 @@
+"""
+Caché LRU en proceso para los análisis emocionales de MindCare-AI.
+Evita recalcular mensajes cortos y repetitivos del chatbot ("gracias",
+"estoy bien", ...). Se activa desde settings.ANALISIS_CACHE.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+def normalizar_texto(texto: str) -> str:
+    """Clave de caché: minúsculas y espacios colapsados (no cambia el análisis)."""
+    return " ".join(texto.lower().split())
+
+
+def congelar(valor: Any) -> Any:
+    """Convierte mappings (y listas) anidados en vistas de solo lectura."""
+    if isinstance(valor, Mapping):
+        return MappingProxyType({clave: congelar(v) for clave, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def estimar_bytes(valor: Any) -> int:
+    """Estimación aproximada de la memoria ocupada por un resultado."""
+    tamano = sys.getsizeof(valor)
+    if isinstance(valor, Mapping):
+        tamano += sum(estimar_bytes(k) + estimar_bytes(v) for k, v in valor.items())
+    elif isinstance(valor, (tuple, list)):
+        tamano += sum(estimar_bytes(v) for v in valor)
+    return tamano
+
+
+class AnalysisCache:
+    """
+    Caché LRU acotada por número de entradas y por memoria estimada.
+
+    Los resultados se guardan congelados, de modo que ningún llamador puede
+    modificar una entrada compartida. La caché está ligada a la versión del
+    léxico: si la versión cambia, se vacía antes de responder.
+    """
+
+    def __init__(self, max_entradas: int = 2048, max_bytes: int = 8 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.invalidaciones = 0
+
+    def obtener(self, texto: str, version: str, calcular: Callable[[str], Dict[str, Any]]) -> Mapping[str, Any]:
+        """
+        Retorna el análisis cacheado de ``texto`` o lo calcula y lo guarda.
+
+        Args:
+            texto: Texto a analizar
+            version: Versión del léxico con la que se calcularía el análisis
+            calcular: Función que analiza el texto si no está en caché
+        """
+        clave = normalizar_texto(texto)
+
+        with self._lock:
+            if version != self._version:
+                if self._entradas:
+                    self.invalidaciones += 1
+                self._vaciar()
+                self._version = version
+
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            self.fallos += 1
+
+        # Calcular fuera del lock para no serializar los análisis
+        resultado = congelar(calcular(texto))
+        tamano = estimar_bytes(clave) + estimar_bytes(resultado)
+
+        with self._lock:
+            if version == self._version and clave not in self._entradas and tamano <= self.max_bytes:
+                self._entradas[clave] = (resultado, tamano)
+                self._bytes += tamano
+                self._expulsar()
+
+        return resultado
+
+    def _expulsar(self) -> None:
+        """Expulsa las entradas menos usadas hasta respetar los límites."""
+        while self._entradas and (len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes):
+            _, (_, tamano) = self._entradas.popitem(last=False)
+            self._bytes -= tamano
+            self.expulsiones += 1
+
+    def _vaciar(self) -> None:
+        self._entradas.clear()
+        self._bytes = 0
+
+    def limpiar(self) -> None:
+        """Vacía la caché (los contadores se conservan)."""
+        with self._lock:
+            self._vaciar()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """Retorna contadores de uso y ocupación actual."""
+        with self._lock:
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "invalidaciones": self.invalidaciones,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "version_lexico": self._version,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entradas)
@@ -0,0 +1,304 @@
+"""
+Analizadores emocionales intercambiables y cascada de MindCare-AI.
+
+El léxico de ``EmotionLibrary`` es barato y basta para la mayoría de los
+mensajes. Un analizador de respaldo más caro (por ejemplo, un clasificador
+local cargado desde disco) solo recibe los textos en los que el léxico no
+está seguro: ``Cascada`` retorna el resultado del léxico si su ``confianza``
+llega al umbral y, si no, manda el texto al respaldo.
+
+El respaldo trabaja en micro-lotes: se espera a juntar ``lote_maximo`` textos
+o a que pase ``espera_maxima`` desde que llegó el primero, lo que ocurra antes,
+y el lote se analiza de una vez en un hilo aparte.
+
+Un analizador es cualquier objeto con ``nombre``, ``version`` y
+``analizar_lote(textos)``, que retorna por cada texto un resultado con las
+claves de ``detectar_emociones``. ``AnalizadorBase`` implementa
+``analizar_lote`` a partir de ``analizar`` y ayuda a construir resultados
+completos.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from django.utils.module_loading import import_string
+
+from .emotion_library import EmotionLibrary
+
+logger = logging.getLogger(__name__)
+
+# Analizadores disponibles por nombre (además de cualquier ruta "modulo.Clase")
+ANALIZADORES: Dict[str, Callable[..., Any]] = {}
+
+
+def registrar_analizador(nombre: str, fabrica: Optional[Callable[..., Any]] = None):
+    """
+    Registra una clase o función que crea un analizador. Se puede usar como
+    decorador: ``@registrar_analizador("clasificador")``.
+    """
+    if fabrica is None:
+        def decorador(fabrica):
+            ANALIZADORES[nombre] = fabrica
+            return fabrica
+        return decorador
+
+    ANALIZADORES[nombre] = fabrica
+    return fabrica
+
+
+def crear_analizador(referencia: str, **opciones):
+    """Crea un analizador a partir de un nombre registrado o una ruta "modulo.Clase"."""
+    fabrica = ANALIZADORES.get(referencia)
+    if fabrica is None:
+        fabrica = import_string(referencia)
+    return fabrica(**opciones)
+
+
+class AnalizadorBase:
+    """Base para analizadores: basta con implementar ``analizar``."""
+
+    nombre = "base"
+    version = "1"
+
+    def analizar(self, texto: str):
+        raise NotImplementedError
+
+    def analizar_lote(self, textos: Sequence[str]) -> List[Any]:
+        return [self.analizar(texto) for texto in textos]
+
+    def resultado(self, emocion: str, confianza: float, nivel_estres: float,
+                  emociones: Optional[Dict[str, Any]] = None, intensidad: float = 0) -> Dict[str, Any]:
+        """
+        Resultado con las claves de ``detectar_emociones``. La recomendación y
+        el emoji son los de EmotionLibrary para esa emoción y nivel de estrés.
+        """
+        lexico = EmotionLibrary.lexico_actual()
+        try:
+            emojis = lexico.colores[lexico.emociones.index(emocion)]
+        except ValueError:
+            emojis = "⚪"
+
+        return {
+            "emocion_principal": emocion,
+            "confianza": confianza,
+            "emociones": emociones or {},
+            "nivel_estres": nivel_estres,
+            "recomendacion": EmotionLibrary._generar_recomendacion(emocion, nivel_estres),
+            "intensidad": intensidad,
+            "emojis": emojis,
+            "version_lexico": f"{self.nombre}:{self.version}"[:40],
+        }
+
+
+@registrar_analizador("lexico")
+class AnalizadorLexico(AnalizadorBase):
+    """Analizador por léxico (``EmotionLibrary.detectar_emociones``)."""
+
+    nombre = "lexico"
+
+    @property
+    def version(self) -> str:
+        return EmotionLibrary.lexico_actual().version
+
+    def analizar(self, texto: str, lexico=None):
+        return EmotionLibrary.detectar_emociones(texto, lexico)
+
+
+class EstadisticasNivel:
+    """Contadores de uso y latencia de un nivel de la cascada."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.textos = 0
+        self.lotes = 0
+        self.resueltos = 0
+        self.errores = 0
+        self.segundos = 0.0
+        self.segundos_max = 0.0
+
+    def registrar(self, textos: int, segundos: float, error: bool = False) -> None:
+        """Registra una llamada (un texto o un lote) y lo que tardó."""
+        with self._lock:
+            self.textos += textos
+            self.lotes += 1
+            self.segundos += segundos
+            if segundos > self.segundos_max:
+                self.segundos_max = segundos
+            if error:
+                self.errores += 1
+
+    def resuelto(self) -> None:
+        """Cuenta un texto cuya respuesta final salió de este nivel."""
+        with self._lock:
+            self.resueltos += 1
+
+    def como_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "textos": self.textos,
+                "lotes": self.lotes,
+                "resueltos": self.resueltos,
+                "errores": self.errores,
+                "latencia_media_ms": self.segundos / self.lotes * 1000 if self.lotes else 0.0,
+                "latencia_max_ms": self.segundos_max * 1000,
+            }
+
+
+class MicroLotes:
+    """
+    Agrupa los textos que llegan desde varios hilos y los analiza por lotes.
+
+    Un hilo de fondo (que se crea con el primer texto) toma hasta
+    ``lote_maximo`` textos; si hay menos, espera como mucho hasta que el más
+    antiguo cumpla ``espera_maxima`` segundos en la cola.
+    """
+
+    def __init__(self, analizador, lote_maximo: int = 16, espera_maxima: float = 0.01,
+                 estadisticas: Optional[EstadisticasNivel] = None):
+        self.analizador = analizador
+        self.lote_maximo = lote_maximo
+        self.espera_maxima = espera_maxima
+        self.estadisticas = estadisticas if estadisticas is not None else EstadisticasNivel()
+        self._pendientes: List[tuple] = []
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrado = False
+
+    def enviar(self, texto: str) -> Future:
+        """Encola un texto; el futuro se resuelve con su resultado."""
+        futuro = Future()
+        with self._condicion:
+            if self._cerrado:
+                raise RuntimeError("Los micro-lotes están cerrados")
+            self._pendientes.append((time.monotonic(), texto, futuro))
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name=f"microlotes-{self.analizador.nombre}",
+                                              daemon=True)
+                self._hilo.start()
+            self._condicion.notify()
+        return futuro
+
+    def cerrar(self, timeout: Optional[float] = None) -> None:
+        """Procesa lo que queda en la cola y detiene el hilo."""
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify()
+            hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+
+    def _bucle(self) -> None:
+        while True:
+            with self._condicion:
+                while not self._pendientes and not self._cerrado:
+                    self._condicion.wait()
+                if not self._pendientes:
+                    self._hilo = None
+                    return
+
+                limite = self._pendientes[0][0] + self.espera_maxima
+                while len(self._pendientes) < self.lote_maximo and not self._cerrado:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+
+                lote = self._pendientes[:self.lote_maximo]
+                del self._pendientes[:self.lote_maximo]
+
+            self._procesar(lote)
+
+    def _procesar(self, lote: List[tuple]) -> None:
+        # Los textos cuyo llamador ya dejó de esperar no se analizan
+        vigentes = [(texto, futuro) for _, texto, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not vigentes:
+            return
+
+        inicio = time.perf_counter()
+        try:
+            resultados = self.analizador.analizar_lote([texto for texto, _ in vigentes])
+            if len(resultados) != len(vigentes):
+                raise ValueError(f"{self.analizador.nombre} retornó {len(resultados)} resultados "
+                                 f"para {len(vigentes)} textos")
+        except Exception as e:
+            self.estadisticas.registrar(len(vigentes), time.perf_counter() - inicio, error=True)
+            for _, futuro in vigentes:
+                futuro.set_exception(e)
+            return
+
+        self.estadisticas.registrar(len(vigentes), time.perf_counter() - inicio)
+        for (_, futuro), resultado in zip(vigentes, resultados):
+            futuro.set_result(resultado)
+
+
+class Cascada:
+    """
+    Léxico primero; el respaldo solo para textos con confianza baja.
+
+    Si el respaldo falla o no responde en ``tiempo_maximo`` segundos, se
+    retorna el resultado del léxico.
+
+    Args:
+        respaldo: Analizador caro (None = solo léxico)
+        umbral_confianza: Confianza (0-100) del léxico a partir de la cual no se consulta el respaldo
+        lote_maximo: Textos por lote del respaldo
+        espera_maxima: Segundos que un texto puede esperar a que se llene su lote
+        tiempo_maximo: Segundos que se espera la respuesta del respaldo
+    """
+
+    def __init__(self, respaldo=None, umbral_confianza: float = 35, lote_maximo: int = 16,
+                 espera_maxima: float = 0.01, tiempo_maximo: float = 2.0):
+        self.lexico = AnalizadorLexico()
+        self.respaldo = respaldo
+        self.umbral_confianza = umbral_confianza
+        self.tiempo_maximo = tiempo_maximo
+
+        self.estadisticas = {self.lexico.nombre: EstadisticasNivel()}
+        self._lotes = None
+        if respaldo is not None:
+            self.estadisticas[respaldo.nombre] = EstadisticasNivel()
+            self._lotes = MicroLotes(respaldo, lote_maximo, espera_maxima, self.estadisticas[respaldo.nombre])
+
+    def analizar(self, texto: str, lexico=None):
+        """
+        Analiza un texto con el léxico y, si su confianza es baja, con el respaldo.
+
+        Args:
+            texto: Texto a analizar
+            lexico: Léxico a usar (por defecto, el activo en el registro)
+        """
+        nivel_lexico = self.estadisticas[self.lexico.nombre]
+        inicio = time.perf_counter()
+        resultado = self.lexico.analizar(texto, lexico)
+        nivel_lexico.registrar(1, time.perf_counter() - inicio)
+
+        if (self._lotes is None or not texto or texto.isspace()
+                or resultado["confianza"] >= self.umbral_confianza):
+            nivel_lexico.resuelto()
+            return resultado
+
+        futuro = self._lotes.enviar(texto)
+        try:
+            respuesta = futuro.result(timeout=self.tiempo_maximo)
+        except Exception as e:
+            futuro.cancel()
+            logger.warning("Analizador %s no disponible, se usa el léxico: %r", self.respaldo.nombre, e)
+            nivel_lexico.resuelto()
+            return resultado
+
+        self.estadisticas[self.respaldo.nombre].resuelto()
+        return respuesta
+
+    def cerrar(self, timeout: Optional[float] = None) -> None:
+        if self._lotes is not None:
+            self._lotes.cerrar(timeout)
+
+    def estado(self) -> Dict[str, Any]:
+        """Umbral y contadores de cada nivel."""
+        return {
+            "umbral_confianza": self.umbral_confianza,
+            "niveles": {nombre: nivel.como_dict() for nombre, nivel in self.estadisticas.items()},
+        }
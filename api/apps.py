@@ -4,3 +4,66 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+
+        from .emotion_library import EmotionLibrary
+        from .lexicon_registry import FuenteBD, FuenteFichero
+
+        # Léxico editable en caliente: la primera carga ocurre en segundo plano
+        # con la primera petición, y después cada INTERVALO segundos
+        config = getattr(settings, "LEXICO_DINAMICO", {})
+        fuente = config.get("FUENTE")
+        if fuente == "bd":
+            EmotionLibrary.REGISTRO.configurar(FuenteBD(), config.get("INTERVALO", 60))
+        elif fuente == "fichero":
+            EmotionLibrary.REGISTRO.configurar(FuenteFichero(config["RUTA"]), config.get("INTERVALO", 60))
+
+        # Etapas del pipeline de análisis: tolerancia a erratas y cachés por etapa
+        config = getattr(settings, "PIPELINE_ANALISIS", {})
+        if config.get("CACHE_ETAPAS") or config.get("DIFUSO", {}).get("HABILITADO"):
+            from .pipeline import pipeline_desde_config
+
+            EmotionLibrary.PIPELINE = pipeline_desde_config(config)
+
+        # Pool, timeouts y circuit breakers de los observadores
+        from .observer_dispatch import crear_despacho
+        from .observers import get_event_manager
+
+        observadores = getattr(settings, "OBSERVADORES", {})
+        manager = get_event_manager()
+        manager.configurar_observadores(crear_despacho(observadores))
+        manager.latencias.umbral_lento = observadores.get("UMBRAL_LENTO_MS", 100) / 1000
+        manager.latencias.umbral_despacho = observadores.get("UMBRAL_DESPACHO_MS", 250) / 1000
+
+        # Estadísticas sumadas entre todos los workers
+        from .shared_stats import crear_estadisticas
+
+        manager.configurar_estadisticas(crear_estadisticas(getattr(settings, "ESTADISTICAS", {})))
+
+        # Detectores de tendencia de estrés por usuario
+        from .trends import crear_tendencias
+
+        manager.configurar_tendencias(crear_tendencias(getattr(settings, "TENDENCIAS", {})))
+
+        # Registro de eventos por lotes. Se configura antes que el bus: atexit
+        # cierra primero el bus, y los eventos que despacha llegan aún al escritor
+        from .event_log import crear_escritor
+
+        registro = getattr(settings, "REGISTRO_EVENTOS", {})
+        manager.configurar_registro_eventos(
+            crear_escritor(registro), espera_cierre=registro.get("ESPERA_CIERRE_MS", 5000) / 1000
+        )
+
+        # Despacho de eventos fuera de la petición (cola y hilos de fondo)
+        eventos = getattr(settings, "EVENTOS", {})
+        if eventos.get("MODO", "sincrono") == "asincrono":
+            manager.configurar_despacho(
+                "asincrono",
+                tam_cola=eventos.get("TAM_COLA", 1000),
+                hilos=eventos.get("HILOS", 1),
+                desborde=eventos.get("DESBORDE", "bloquear"),
+                espera_bloqueo=eventos.get("ESPERA_BLOQUEO_MS", 1000) / 1000,
+                espera_cierre=eventos.get("ESPERA_CIERRE_MS", 5000) / 1000,
+            )
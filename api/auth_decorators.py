@@ -29,3 +29,14 @@ def requiere_token(view_func):
         return view_func(self, request, *args, **kwargs)
 
     return wrapper
+
+
+def requiere_admin(view_func):
+    @requiere_token
+    def wrapper(self, request, *args, **kwargs):
+        if not request.usuario.es_admin:
+            return JsonResponse({"error": "Se requieren permisos de administrador"}, status=403)
+
+        return view_func(self, request, *args, **kwargs)
+
+    return wrapper
@@ -3,8 +3,30 @@ Librería de detección de emociones basada en palabras clave y análisis de tex
 Orientada a detectar estado emocional del usuario mediante patrones de lenguaje.
 """
 
-import re
-from collections import Counter
+import copy
+from collections.abc import Mapping
+from functools import lru_cache
+
+from .lexicon_registry import RegistroLexico
+from .modifiers import SIN_POSICION, ReglasModificadores
+from .packed_lexicon import cargar_lexico
+
+
+def _compilar_recomendaciones(recomendaciones):
+    """
+    Parte cada plantilla de recomendación alrededor de "{estres}".
+
+    Returns:
+        dict: {(emocion, nivel): (prefijo, sufijo)}; el sufijo es None si la
+        recomendación no depende del nivel de estrés.
+    """
+    tabla = {}
+    for emocion, niveles in recomendaciones.items():
+        for nivel, plantilla in niveles.items():
+            prefijo, marcador, sufijo = plantilla.partition("{estres}")
+            tabla[(emocion, nivel)] = (prefijo, sufijo if marcador else None)
+    return tabla
+
 
 class EmotionLibrary:
     """
@@ -307,93 +329,354 @@ class EmotionLibrary:
     # Palabras negadoras (invierten la emoción)
     NEGATORS = ["no", "ni", "nunca", "jamás", "tampoco", "nada"]
 
+    # Alcance de negadores e intensificadores (ventanas y puntuación de corte)
+    REGLAS_MODIFICADORES = ReglasModificadores()
+
+    # Emociones que contribuyen al nivel de estrés
+    EMOCIONES_ESTRESANTES = ["ansiedad", "enojo", "tristeza", "miedo", "culpa", "resentimiento", "ansiedad_anticipatoria"]
+
+    # Recomendaciones por emoción y nivel de estrés. "{estres}" se sustituye
+    # por el nivel de estrés con un decimal.
+    RECOMENDACIONES = {
+        "alegría": {
+            "bajo": "¡Qué alegría! Disfruta este momento de felicidad. Considera hacer algo especial que amplíe tu sonrisa. 😊",
+            "medio": "¡Excelente! Tu energía positiva es contagiosa. Comparte tu felicidad con quienes te rodean. 🌟",
+            "alto": "¡Estás radiante! Aprovecha esta euforia para alcanzar tus metas. ¡El mundo está a tu alcance! 🚀"
+        },
+        "tristeza": {
+            "bajo": "Parece que hay algo que pesa en tu corazón. Habla con alguien de confianza sobre lo que sientes. 💙",
+            "medio": "Atraviesas un momento difícil. Recuerda que es temporal. Busca actividades que te traigan paz y conexión. 🌸",
+            "alto": "Tu dolor es válido. Considera buscar apoyo profesional si lo necesitas. Mereces estar bien. 🤝"
+        },
+        "ansiedad": {
+            "bajo": "Algo te preocupa un poco. Respira profundamente. Inhala 4 segundos, sostén 4, exhala 4. 🧘",
+            "medio": "Detectamos ansiedad moderada (Estrés: {estres}/10). Practica técnicas de mindfulness o camina en la naturaleza. 🌿",
+            "alto": "Tu nivel de ansiedad es alto (Estrés: {estres}/10). Tómate tiempo para relajarte. Considera meditación o busca apoyo profesional. 🕯️"
+        },
+        "enojo": {
+            "bajo": "Hay algo que te molesta. Es normal. Respira y piensa en qué puedes cambiar de la situación. 💭",
+            "medio": "Siento tu frustración. Canaliza esa energía en algo productivo: ejercicio, arte o una conversación honesta. 💪",
+            "alto": "Tu rabia es comprensible. Tómate tiempo para enfriarte. Luego, verás la situación con más claridad. 🔥➡️❄️"
+        },
+        "calma": {
+            "bajo": "Mantén esta paz. Es un tesoro. Sigue con las actividades que te generan serenidad. ✨",
+            "medio": "¡Qué equilibrio! Tu bienestar es excelente. Continúa cuidándote así. 🧘‍♀️",
+            "alto": "Tu paz interior es hermosa. Comparte esta tranquilidad con otros. Eres un ejemplo de serenidad. 🕊️"
+        },
+        "esperanza": {
+            "bajo": "Pequeñas luces de esperanza siempre iluminan el camino. Alimenta esa confianza. 💡",
+            "medio": "¡Qué actitud positiva! Tu confianza es tu fortaleza. Continúa adelante con determinación. 🎯",
+            "alto": "¡Tu optimismo es inspirador! Cree en ti mismo. Los sueños se hacen realidad con fe y acción. ⭐"
+        },
+        "soledad": {
+            "bajo": "A veces necesitamos soledad para reflexionar. Eso está bien. Pero recuerda que puedes conectar cuando lo necesites. 📞",
+            "medio": "Te sientes un poco aislado. Llama a un amigo, únete a un grupo o actividad que disfrutes. 🤝",
+            "alto": "Tu soledad pesa. Busca conexión genuina. Comunidades en línea, grupos de interés, o profesionales pueden ayudarte. 💙"
+        },
+        "culpa": {
+            "bajo": "Una lección valiosa viene con la culpa. Aprende de ella y perdónate. 🌱",
+            "medio": "La culpa nos enseña. Reflexiona sobre qué pasó y cómo puedes mejorar. El perdón propio es clave. 🕯️",
+            "alto": "Tu culpa es profunda. Considera hablar con alguien de confianza o buscar asesoría. Mereces paz. 💙"
+        },
+        "confusión": {
+            "bajo": "Hay algo poco claro. Tómate tiempo para pensar. A menudo la claridad llega con la reflexión. 💭",
+            "medio": "Parece que hay incertidumbre. Divide tus preocupaciones en pasos pequeños. Habla con alguien sabio. 📝",
+            "alto": "Te sientes perdido. Es normal. Busca consejo, estructura tu pensamiento, y un paso a la vez. 🧭"
+        },
+        "amor": {
+            "bajo": "Hay amor en tu corazón. Cultívalo en ti y en tus relaciones. 💕",
+            "medio": "¡Qué hermoso! Estás en un estado de afecto y conexión. Valora esos vínculos especiales. 💑",
+            "alto": "¡Tu corazón está lleno de amor! Es el combustible más hermoso. Expresa ese sentimiento. 💖"
+        },
+        "orgullo": {
+            "bajo": "Reconoce tus logros. Mereces celebrar lo que has alcanzado. 🏅",
+            "medio": "¡Estás orgulloso de ti! Ese sentimiento es saludable. Mantén humildad también. 🏆",
+            "alto": "Tu autoestima es fuerte. Recuerda que nadie es perfecto. La humildad suma junto al orgullo. 👑"
+        },
+        "vergüenza": {
+            "bajo": "Algo te avergüenza. Recuerda que los errores nos hacen humanos. Puedes aprender de esto. 🌱",
+            "medio": "Sientes vergüenza. Es una emoción válida pero no te define. Perdónate y sigue adelante. 🤗",
+            "alto": "Tu vergüenza es intensa. Habla con alguien. No estás solo. Mereces compasión, incluso de ti mismo. 💙"
+        },
+        "admiración": {
+            "bajo": "Encuentras inspiración en otros. Eso es hermoso. Aprende y crece. 📚",
+            "medio": "Admiras profundamente. Deja que inspire tu propio crecimiento. 🌟",
+            "alto": "Tu admiración es encendida. Busca ser tú también una inspiración para otros. 🦸"
+        },
+        "disgusto": {
+            "bajo": "Algo no te agrada. Está bien alejarte de ello. Enfócate en lo que sí te importa. 🚶",
+            "medio": "Tienes una aversión clara. Honra ese instinto. Tu intuición te protege. ⚠️",
+            "alto": "Algo te repugna profundamente. Tómate distancia si es posible. Tu bienestar primero. 🛡️"
+        },
+        "sorpresa": {
+            "bajo": "Algo inesperado pasó. Tómate un momento para procesar. 🤔",
+            "medio": "¡Qué sorpresa! A menudo traen oportunidades. Mantén la mente abierta. 🎁",
+            "alto": "¡Impresionado! Los giros inesperados pueden llevar a cosas extraordinarias. Adapta y fluye. 🌀"
+        },
+        "miedo": {
+            "bajo": "Algo te asusta un poco. Es natural tener miedo. Respira y pregúntate: ¿qué es lo peor que podría pasar? 🧘",
+            "medio": "El miedo está presente. Enfrentarlo poco a poco reduce su poder. Avanza con cautela. 🪜",
+            "alto": "Tu miedo es intenso (Estrés: {estres}/10). Busca apoyo. Habla con alguien. No tienes que enfrentar esto solo. 🤝"
+        },
+        "gratitud": {
+            "bajo": "Pequeñas cosas por las que agradecer enriquecen la vida. Reconócelas. 🙏",
+            "medio": "Tu gratitud es hermosa. Cultívala. Transforma perspectivas hacia lo positivo. ✨",
+            "alto": "¡Tu gratitud es radiante! Comparte ese agradecimiento. Inspira a otros a valorar lo que tienen. 💛"
+        },
+        "frustración": {
+            "bajo": "Algo no sale como planeado. Respira. A menudo es temporal. 🌬️",
+            "medio": "La frustración es una señal. ¿Qué necesitas cambiar? Actúa o acepta lo que no puedes cambiar. 🎯",
+            "alto": "Tu frustración es profunda. Tómate un descanso. Luego busca una estrategia diferente. 🔄"
+        },
+        "nostalgia": {
+            "bajo": "Recuerdas buenos momentos. Está bien. Aprecia la memoria. 🌅",
+            "medio": "Te atrae el pasado. Valora esos recuerdos pero vive el presente también. ⏳",
+            "alto": "Estás muy apegado al pasado. Intenta crear nuevos buenos momentos ahora. El presente también merece tu atención. 📷"
+        },
+        "alivio": {
+            "bajo": "Algo mejoró un poco. Continúa adelante con esa paz. 😌",
+            "medio": "¡Qué alivio! Disfruta este descanso. Lo merecías. 🙌",
+            "alto": "¡Tu alivio es palpable! Parece que una carga se quitó. Tómate un momento para recuperarte. 🍃"
+        },
+        "resentimiento": {
+            "bajo": "Hay un poco de amargura. Considera perdonar para liberarte. 🕊️",
+            "medio": "El resentimiento te pesa. Recuerda: perdonar no es olvidar, es liberarse. 💫",
+            "alto": "Tu resentimiento es profundo. Busca ayuda profesional para sanarlo. Mereces paz. 🩹"
+        },
+        "vacío": {
+            "bajo": "Sientes un vacío pequeño. A menudo significa que falta algo significativo. Reflexiona qué. 🔍",
+            "medio": "Hay vacío en ti. Busca propósito, conexión, significado. Llena tu vida de lo que importa. 🎨",
+            "alto": "Tu vacío es profundo. Habla con un profesional. Mereces encontrar significado y luz. 🌟"
+        },
+        "compasión": {
+            "bajo": "Tu compasión es hermosa. Cultívala hacia otros y hacia ti. 🌷",
+            "medio": "¡Qué corazón compasivo tienes! Ayuda a otros sin olvidarte de ti mismo. ⚖️",
+            "alto": "Tu compasión es radiante. Recuerda: también mereces compasión de ti mismo. Autobien es cuidado. 💚"
+        },
+        "ansiedad_anticipatoria": {
+            "bajo": "Algo te preocupa del futuro. Recuerda que mañana aún no llega. Vive hoy. 🌞",
+            "medio": "Anticipas eventos futuros con ansiedad. Prepárate pero no obsesiones. Confía en tu capacidad. 🎒",
+            "alto": "Tu ansiedad por el futuro es alta. Vuelve al presente. Práctica grounding: 5 cosas que ves, 4 que tocas... 🧊"
+        },
+        "empoderamiento": {
+            "bajo": "Empiezas a creer en ti. Cultiva ese poder interno. 💪",
+            "medio": "¡Te sientes fuerte! Esa confianza es tu mayor activo. Úsala sabiamente. ⚡",
+            "alto": "¡Tu empoderamiento es inspirador! Guía a otros también. Eres más fuerte de lo que sabes. 🔥"
+        },
+        "alegría_moderada": {
+            "bajo": "Hay alegría discreta. A veces eso es más profundo. Valóralo. 😊",
+            "medio": "¡Sonríes genuinamente! Eso es verdadera felicidad sostenida. Mantén eso. 😄",
+            "alto": "Tu risa es contagiosa. Crea momentos para mantener esa ligereza. ¡Necesitamos más de esto! 🎉"
+        },
+        "neutral": {
+            "bajo": "Estás en un lugar neutral. Cuéntame más para ayudarte mejor. 👂",
+            "medio": "Parece que hay equilibrio. ¿Hay algo específico que quieras compartir? Estoy aquí. 🎧",
+            "alto": "Busco comprenderte mejor. ¿Cómo te sientes realmente? Dime más. 💬"
+        }
+    }
+
+    RECOMENDACION_GENERICA = "Estamos aquí para apoyarte en tu bienestar emocional. 💙"
+
+    # (emoción, nivel) -> (prefijo, sufijo): se construye una sola vez al importar
+    TABLA_RECOMENDACIONES = _compilar_recomendaciones(RECOMENDACIONES)
+
+    # Léxico compilado (índice + autómata de frases), construido una sola vez al importar.
+    # Si LEXICO_EMPAQUETADO apunta a un artefacto binario, se mapea en memoria en su lugar.
+    LEXICO = cargar_lexico(EMOTIONS_DICT, INTENSIFIERS, NEGATORS)
+
+    # Caracteres a partir de los cuales detectar_emociones analiza por trozos
+    LIMITE_FLUJO = 256 * 1024
+
+    # Etapas de detectar_emociones (api/pipeline.py); se crea con el primer análisis
+    PIPELINE = None
+
+    # Léxico activo; se puede cambiar en caliente desde un fichero o la BD
+    # (settings.LEXICO_DINAMICO). Parte del léxico definido en código.
+    REGISTRO = RegistroLexico(LEXICO)
+
+    @staticmethod
+    def lexico_actual():
+        """Léxico activo. Tómalo una vez por análisis y úsalo hasta el final."""
+        return EmotionLibrary.REGISTRO.actual()
+
     @staticmethod
-    def detectar_emociones(texto):
+    def detectar_emociones(texto, lexico=None):
         """
         Detecta emociones en un texto y retorna análisis detallado.
+        Ejecuta las etapas de ``PIPELINE`` (ver api/pipeline.py).
         
         Args:
             texto (str): Texto a analizar
+            lexico: Léxico a usar (por defecto, el activo en el registro)
             
         Returns:
-            dict: Análisis con emoción principal, intensidad y detalles
+            Mapping: Análisis con emoción principal, intensidad y detalles
+            (``AnalisisEmocional``; ``dict(...)`` da el dict completo)
         """
-        if not texto or len(texto.strip()) == 0:
+        if lexico is None:
+            lexico = EmotionLibrary.lexico_actual()
+
+        if not texto or texto.isspace():
             return {
                 "emocion_principal": "neutral",
                 "confianza": 0,
                 "emociones": {},
                 "nivel_estres": 5,
                 "recomendacion": "Por favor escribe algo para que analicemos tu estado emocional.",
-                "intensidad": 0
+                "intensidad": 0,
+                "version_lexico": lexico.version
             }
 
-        texto_limpio = texto.lower().strip()
-        palabras = re.findall(r'\b\w+\b', texto_limpio)
-        
-        # Contador de emociones
-        emociones_encontradas = {}
-        
-        for emocion, datos in EmotionLibrary.EMOTIONS_DICT.items():
-            puntuacion = 0
-            contador_palabras = 0
-            
-            for i, palabra in enumerate(palabras):
-                if palabra in datos["palabras"]:
-                    # Buscar intensificadores cerca
-                    intensidad = 1.0
-                    
-                    # Revisar palabras antes
-                    if i > 0 and palabras[i-1] in EmotionLibrary.INTENSIFIERS:
-                        intensidad *= EmotionLibrary.INTENSIFIERS[palabras[i-1]]
-                    
-                    # Revisar negadores
-                    if i > 0 and palabras[i-1] in EmotionLibrary.NEGATORS:
-                        intensidad *= -0.5
-                    
-                    puntuacion += intensidad * abs(datos["nivel_base"])
-                    contador_palabras += 1
-            
-            if contador_palabras > 0:
-                emociones_encontradas[emocion] = {
-                    "puntuacion": puntuacion,
-                    "palabras_detectadas": contador_palabras,
-                    "intensidad": min((puntuacion / contador_palabras) * 1.2, 10)
-                }
-        
-        # Determinar emoción principal
-        if emociones_encontradas:
-            emocion_principal = max(emociones_encontradas, 
-                                   key=lambda x: abs(emociones_encontradas[x]["puntuacion"]))
-            puntuacion_max = abs(emociones_encontradas[emocion_principal]["puntuacion"])
+        # Textos muy largos: por trozos, sin copiar el texto ni guardar todos sus tokens
+        if len(texto) > EmotionLibrary.LIMITE_FLUJO:
+            from .streaming import analizar_flujo
+            return analizar_flujo(texto, lexico)
+
+        pipeline = EmotionLibrary.PIPELINE
+        if pipeline is None:
+            pipeline = EmotionLibrary._crear_pipeline()
+        return pipeline.ejecutar(texto, lexico)
+
+    @staticmethod
+    def _crear_pipeline():
+        """Pipeline por defecto (importación local: api/pipeline.py importa este módulo)."""
+        from .pipeline import PipelineAnalisis
+        EmotionLibrary.PIPELINE = PipelineAnalisis()
+        return EmotionLibrary.PIPELINE
+
+    @staticmethod
+    def _puntuar_tokens(palabras, lexico, cortes=(), reglas=None, estado=None):
+        """Busca las frases del léxico en los tokens y las puntúa (ver ``_puntuar_coincidencias``)."""
+        return EmotionLibrary._puntuar_coincidencias(lexico.coincidencias(palabras), lexico, cortes, reglas, estado)
+
+    @staticmethod
+    def _puntuar_coincidencias(coincidencias, lexico, cortes=(), reglas=None, estado=None, descuentos=None):
+        """
+        Recorre las coincidencias una sola vez y acumula la puntuación de cada emoción.
+
+        Los negadores e intensificadores se siguen con un estado de tamaño fijo:
+        el último de cada tipo y el anterior (para las frases que contienen un
+        modificador, que no se modifican a sí mismas). No se vuelve a recorrer
+        ningún token, así que el coste es O(tokens).
+
+        Args:
+            coincidencias: (inicio, fin, patron_id) en el orden de ``lexico.coincidencias``
+            lexico: Léxico compilado
+            cortes: Índices de los tokens precedidos por puntuación de corte
+            reglas: ReglasModificadores (por defecto, REGLAS_MODIFICADORES)
+            estado: EstadoPuntuacion para continuar un análisis por trozos; se
+                ignoran las coincidencias que terminan antes de ``estado.desde``
+                y al terminar se guardan en él los registros
+            descuentos: {posición: factor} de los tokens corregidos por erratas;
+                una frase emocional que incluye alguno puntúa multiplicada por su factor
+
+        Returns:
+            dict: {id_emocion: [puntuacion, frases_detectadas]}
+        """
+        if reglas is None:
+            reglas = EmotionLibrary.REGLAS_MODIFICADORES
+        entradas_patron = lexico.entradas_patron
+        factor_patron = lexico.factor_patron
+        negador_patron = lexico.negador_patron
+        ventana_negacion = reglas.ventana_negacion
+        ventana_intensificador = reglas.ventana_intensificador
+        acumular = reglas.acumular_intensificadores
+        max_intensificacion = reglas.max_intensificacion
+
+        # Estado de los modificadores: posición donde terminan y segmento (entre
+        # cortes) del último y del anterior; SIN_POSICION queda fuera de toda ventana
+        if estado is None:
+            # Acumuladores por id de emoción: [puntuación, frases detectadas]
+            acumulados = {}
+            neg_fin = neg_ant_fin = int_fin = int_ant_fin = SIN_POSICION
+            neg_seg = neg_ant_seg = int_seg = int_ant_seg = 0
+            int_factor = int_ant_factor = 1.0
+            desde = 0
         else:
-            emocion_principal = "neutral"
-            puntuacion_max = 0
-        
-        # Calcular nivel de estrés (0-10)
-        nivel_estres = EmotionLibrary._calcular_nivel_estres(emociones_encontradas)
-        
-        # Calcular confianza (0-100)
-        confianza = EmotionLibrary._calcular_confianza(emociones_encontradas, len(palabras))
-        
-        # Generar recomendación
-        recomendacion = EmotionLibrary._generar_recomendacion(emocion_principal, nivel_estres)
-        
-        return {
-            "emocion_principal": emocion_principal,
-            "confianza": min(confianza, 100),
-            "emociones": emociones_encontradas,
-            "nivel_estres": nivel_estres,
-            "recomendacion": recomendacion,
-            "intensidad": min(puntuacion_max / 10, 10),
-            "emojis": EmotionLibrary.EMOTIONS_DICT[emocion_principal]["color"] if emocion_principal != "neutral" else "⚪"
-        }
+            acumulados = estado.acumulados
+            (neg_fin, neg_seg, neg_ant_fin, neg_ant_seg, int_fin, int_seg, int_factor,
+             int_ant_fin, int_ant_seg, int_ant_factor) = estado.registros
+            desde = estado.desde
+
+        total_cortes = len(cortes)
+        segmento = 0
+
+        for inicio, fin, patron_id in coincidencias:
+            if fin < desde:
+                continue
+
+            # Segmento del final y del inicio de la coincidencia
+            while segmento < total_cortes and cortes[segmento] <= fin:
+                segmento += 1
+            seg_inicio = segmento
+            while seg_inicio and cortes[seg_inicio - 1] > inicio:
+                seg_inicio -= 1
+
+            # Las coincidencias llegan de la más larga a la más corta: a igual
+            # final cuenta el modificador más largo
+            factor = factor_patron[patron_id]
+            if factor is not None and fin != int_fin:
+                if (acumular and int_fin < inicio and inicio - int_fin - 1 <= ventana_intensificador
+                        and int_seg == seg_inicio):
+                    factor = min(int_factor * factor, max_intensificacion)
+                int_ant_fin, int_ant_seg, int_ant_factor = int_fin, int_seg, int_factor
+                int_fin, int_seg, int_factor = fin, segmento, factor
+
+            if negador_patron[patron_id] and fin != neg_fin:
+                neg_ant_fin, neg_ant_seg = neg_fin, neg_seg
+                neg_fin, neg_seg = fin, segmento
+
+            entradas = entradas_patron[patron_id]
+            if entradas:
+                intensidad = 1.0
+
+                # Intensificador más reciente que termina antes de la frase
+                if int_fin < inicio:
+                    if inicio - int_fin - 1 <= ventana_intensificador and int_seg == seg_inicio:
+                        intensidad *= int_factor
+                elif (int_ant_fin < inicio and inicio - int_ant_fin - 1 <= ventana_intensificador
+                        and int_ant_seg == seg_inicio):
+                    intensidad *= int_ant_factor
+
+                # Negador más reciente que termina antes de la frase
+                if neg_fin < inicio:
+                    if inicio - neg_fin - 1 <= ventana_negacion and neg_seg == seg_inicio:
+                        intensidad *= -0.5
+                elif (neg_ant_fin < inicio and inicio - neg_ant_fin - 1 <= ventana_negacion
+                        and neg_ant_seg == seg_inicio):
+                    intensidad *= -0.5
+
+                if descuentos:
+                    for posicion in range(inicio, fin + 1):
+                        intensidad *= descuentos.get(posicion, 1.0)
+
+                for emo_id, peso in entradas:
+                    acumulado = acumulados.get(emo_id)
+                    if acumulado is None:
+                        acumulados[emo_id] = [intensidad * peso, 1]
+                    else:
+                        acumulado[0] += intensidad * peso
+                        acumulado[1] += 1
+
+        if estado is not None:
+            estado.registros = [neg_fin, neg_seg, neg_ant_fin, neg_ant_seg, int_fin, int_seg, int_factor,
+                                int_ant_fin, int_ant_seg, int_ant_factor]
+        return acumulados
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _ids_estresantes(emociones):
+        """Ids (en el léxico con esas emociones) de las emociones que suman estrés."""
+        return frozenset(
+            emo_id for emo_id, emocion in enumerate(emociones)
+            if emocion in EmotionLibrary.EMOCIONES_ESTRESANTES
+        )
 
     @staticmethod
     def _calcular_nivel_estres(emociones):
         """Calcula el nivel de estrés general (0-10) con mejor sensibilidad a emociones negativas."""
-        emociones_estresantes = ["ansiedad", "enojo", "tristeza", "miedo", "culpa", "resentimiento", "ansiedad_anticipatoria"]
-        
+        emociones_estresantes = EmotionLibrary.EMOCIONES_ESTRESANTES
+
         if not emociones:
             return 0
         
@@ -429,147 +712,24 @@ class EmotionLibrary:
         
         return min(confianza_base, 100)
 
+    @staticmethod
+    def recomendacion_para(emocion, nivel_estres):
+        """
+        Recomendación para una emoción y un nivel de estrés (0-10), la misma que
+        daría ``detectar_emociones``.
+
+        Args:
+            emocion (str): Emoción principal
+            nivel_estres (float): Nivel de estrés
+
+        Returns:
+            str: Recomendación
+        """
+        return EmotionLibrary._generar_recomendacion(emocion, nivel_estres)
+
     @staticmethod
     def _generar_recomendacion(emocion, nivel_estres):
         """Genera una recomendación personalizada basada en la emoción detectada y el nivel de estrés."""
-        recomendaciones = {
-            "alegría": {
-                "bajo": "¡Qué alegría! Disfruta este momento de felicidad. Considera hacer algo especial que amplíe tu sonrisa. 😊",
-                "medio": "¡Excelente! Tu energía positiva es contagiosa. Comparte tu felicidad con quienes te rodean. 🌟",
-                "alto": "¡Estás radiante! Aprovecha esta euforia para alcanzar tus metas. ¡El mundo está a tu alcance! 🚀"
-            },
-            "tristeza": {
-                "bajo": "Parece que hay algo que pesa en tu corazón. Habla con alguien de confianza sobre lo que sientes. 💙",
-                "medio": "Atraviesas un momento difícil. Recuerda que es temporal. Busca actividades que te traigan paz y conexión. 🌸",
-                "alto": "Tu dolor es válido. Considera buscar apoyo profesional si lo necesitas. Mereces estar bien. 🤝"
-            },
-            "ansiedad": {
-                "bajo": "Algo te preocupa un poco. Respira profundamente. Inhala 4 segundos, sostén 4, exhala 4. 🧘",
-                "medio": f"Detectamos ansiedad moderada (Estrés: {nivel_estres:.1f}/10). Practica técnicas de mindfulness o camina en la naturaleza. 🌿",
-                "alto": f"Tu nivel de ansiedad es alto (Estrés: {nivel_estres:.1f}/10). Tómate tiempo para relajarte. Considera meditación o busca apoyo profesional. 🕯️"
-            },
-            "enojo": {
-                "bajo": "Hay algo que te molesta. Es normal. Respira y piensa en qué puedes cambiar de la situación. 💭",
-                "medio": "Siento tu frustración. Canaliza esa energía en algo productivo: ejercicio, arte o una conversación honesta. 💪",
-                "alto": "Tu rabia es comprensible. Tómate tiempo para enfriarte. Luego, verás la situación con más claridad. 🔥➡️❄️"
-            },
-            "calma": {
-                "bajo": "Mantén esta paz. Es un tesoro. Sigue con las actividades que te generan serenidad. ✨",
-                "medio": "¡Qué equilibrio! Tu bienestar es excelente. Continúa cuidándote así. 🧘‍♀️",
-                "alto": "Tu paz interior es hermosa. Comparte esta tranquilidad con otros. Eres un ejemplo de serenidad. 🕊️"
-            },
-            "esperanza": {
-                "bajo": "Pequeñas luces de esperanza siempre iluminan el camino. Alimenta esa confianza. 💡",
-                "medio": "¡Qué actitud positiva! Tu confianza es tu fortaleza. Continúa adelante con determinación. 🎯",
-                "alto": "¡Tu optimismo es inspirador! Cree en ti mismo. Los sueños se hacen realidad con fe y acción. ⭐"
-            },
-            "soledad": {
-                "bajo": "A veces necesitamos soledad para reflexionar. Eso está bien. Pero recuerda que puedes conectar cuando lo necesites. 📞",
-                "medio": "Te sientes un poco aislado. Llama a un amigo, únete a un grupo o actividad que disfrutes. 🤝",
-                "alto": "Tu soledad pesa. Busca conexión genuina. Comunidades en línea, grupos de interés, o profesionales pueden ayudarte. 💙"
-            },
-            "culpa": {
-                "bajo": "Una lección valiosa viene con la culpa. Aprende de ella y perdónate. 🌱",
-                "medio": "La culpa nos enseña. Reflexiona sobre qué pasó y cómo puedes mejorar. El perdón propio es clave. 🕯️",
-                "alto": "Tu culpa es profunda. Considera hablar con alguien de confianza o buscar asesoría. Mereces paz. 💙"
-            },
-            "confusión": {
-                "bajo": "Hay algo poco claro. Tómate tiempo para pensar. A menudo la claridad llega con la reflexión. 💭",
-                "medio": "Parece que hay incertidumbre. Divide tus preocupaciones en pasos pequeños. Habla con alguien sabio. 📝",
-                "alto": "Te sientes perdido. Es normal. Busca consejo, estructura tu pensamiento, y un paso a la vez. 🧭"
-            },
-            "amor": {
-                "bajo": "Hay amor en tu corazón. Cultívalo en ti y en tus relaciones. 💕",
-                "medio": "¡Qué hermoso! Estás en un estado de afecto y conexión. Valora esos vínculos especiales. 💑",
-                "alto": "¡Tu corazón está lleno de amor! Es el combustible más hermoso. Expresa ese sentimiento. 💖"
-            },
-            "orgullo": {
-                "bajo": "Reconoce tus logros. Mereces celebrar lo que has alcanzado. 🏅",
-                "medio": "¡Estás orgulloso de ti! Ese sentimiento es saludable. Mantén humildad también. 🏆",
-                "alto": "Tu autoestima es fuerte. Recuerda que nadie es perfecto. La humildad suma junto al orgullo. 👑"
-            },
-            "vergüenza": {
-                "bajo": "Algo te avergüenza. Recuerda que los errores nos hacen humanos. Puedes aprender de esto. 🌱",
-                "medio": "Sientes vergüenza. Es una emoción válida pero no te define. Perdónate y sigue adelante. 🤗",
-                "alto": "Tu vergüenza es intensa. Habla con alguien. No estás solo. Mereces compasión, incluso de ti mismo. 💙"
-            },
-            "admiración": {
-                "bajo": "Encuentras inspiración en otros. Eso es hermoso. Aprende y crece. 📚",
-                "medio": "Admiras profundamente. Deja que inspire tu propio crecimiento. 🌟",
-                "alto": "Tu admiración es encendida. Busca ser tú también una inspiración para otros. 🦸"
-            },
-            "disgusto": {
-                "bajo": "Algo no te agrada. Está bien alejarte de ello. Enfócate en lo que sí te importa. 🚶",
-                "medio": "Tienes una aversión clara. Honra ese instinto. Tu intuición te protege. ⚠️",
-                "alto": "Algo te repugna profundamente. Tómate distancia si es posible. Tu bienestar primero. 🛡️"
-            },
-            "sorpresa": {
-                "bajo": "Algo inesperado pasó. Tómate un momento para procesar. 🤔",
-                "medio": "¡Qué sorpresa! A menudo traen oportunidades. Mantén la mente abierta. 🎁",
-                "alto": "¡Impresionado! Los giros inesperados pueden llevar a cosas extraordinarias. Adapta y fluye. 🌀"
-            },
-            "miedo": {
-                "bajo": "Algo te asusta un poco. Es natural tener miedo. Respira y pregúntate: ¿qué es lo peor que podría pasar? 🧘",
-                "medio": "El miedo está presente. Enfrentarlo poco a poco reduce su poder. Avanza con cautela. 🪜",
-                "alto": f"Tu miedo es intenso (Estrés: {nivel_estres:.1f}/10). Busca apoyo. Habla con alguien. No tienes que enfrentar esto solo. 🤝"
-            },
-            "gratitud": {
-                "bajo": "Pequeñas cosas por las que agradecer enriquecen la vida. Reconócelas. 🙏",
-                "medio": "Tu gratitud es hermosa. Cultívala. Transforma perspectivas hacia lo positivo. ✨",
-                "alto": "¡Tu gratitud es radiante! Comparte ese agradecimiento. Inspira a otros a valorar lo que tienen. 💛"
-            },
-            "frustración": {
-                "bajo": "Algo no sale como planeado. Respira. A menudo es temporal. 🌬️",
-                "medio": "La frustración es una señal. ¿Qué necesitas cambiar? Actúa o acepta lo que no puedes cambiar. 🎯",
-                "alto": "Tu frustración es profunda. Tómate un descanso. Luego busca una estrategia diferente. 🔄"
-            },
-            "nostalgia": {
-                "bajo": "Recuerdas buenos momentos. Está bien. Aprecia la memoria. 🌅",
-                "medio": "Te atrae el pasado. Valora esos recuerdos pero vive el presente también. ⏳",
-                "alto": "Estás muy apegado al pasado. Intenta crear nuevos buenos momentos ahora. El presente también merece tu atención. 📷"
-            },
-            "alivio": {
-                "bajo": "Algo mejoró un poco. Continúa adelante con esa paz. 😌",
-                "medio": "¡Qué alivio! Disfruta este descanso. Lo merecías. 🙌",
-                "alto": "¡Tu alivio es palpable! Parece que una carga se quitó. Tómate un momento para recuperarte. 🍃"
-            },
-            "resentimiento": {
-                "bajo": "Hay un poco de amargura. Considera perdonar para liberarte. 🕊️",
-                "medio": "El resentimiento te pesa. Recuerda: perdonar no es olvidar, es liberarse. 💫",
-                "alto": "Tu resentimiento es profundo. Busca ayuda profesional para sanarlo. Mereces paz. 🩹"
-            },
-            "vacío": {
-                "bajo": "Sientes un vacío pequeño. A menudo significa que falta algo significativo. Reflexiona qué. 🔍",
-                "medio": "Hay vacío en ti. Busca propósito, conexión, significado. Llena tu vida de lo que importa. 🎨",
-                "alto": "Tu vacío es profundo. Habla con un profesional. Mereces encontrar significado y luz. 🌟"
-            },
-            "compasión": {
-                "bajo": "Tu compasión es hermosa. Cultívala hacia otros y hacia ti. 🌷",
-                "medio": "¡Qué corazón compasivo tienes! Ayuda a otros sin olvidarte de ti mismo. ⚖️",
-                "alto": "Tu compasión es radiante. Recuerda: también mereces compasión de ti mismo. Autobien es cuidado. 💚"
-            },
-            "ansiedad_anticipatoria": {
-                "bajo": "Algo te preocupa del futuro. Recuerda que mañana aún no llega. Vive hoy. 🌞",
-                "medio": "Anticipas eventos futuros con ansiedad. Prepárate pero no obsesiones. Confía en tu capacidad. 🎒",
-                "alto": "Tu ansiedad por el futuro es alta. Vuelve al presente. Práctica grounding: 5 cosas que ves, 4 que tocas... 🧊"
-            },
-            "empoderamiento": {
-                "bajo": "Empiezas a creer en ti. Cultiva ese poder interno. 💪",
-                "medio": "¡Te sientes fuerte! Esa confianza es tu mayor activo. Úsala sabiamente. ⚡",
-                "alto": "¡Tu empoderamiento es inspirador! Guía a otros también. Eres más fuerte de lo que sabes. 🔥"
-            },
-            "alegría_moderada": {
-                "bajo": "Hay alegría discreta. A veces eso es más profundo. Valóralo. 😊",
-                "medio": "¡Sonríes genuinamente! Eso es verdadera felicidad sostenida. Mantén eso. 😄",
-                "alto": "Tu risa es contagiosa. Crea momentos para mantener esa ligereza. ¡Necesitamos más de esto! 🎉"
-            },
-            "neutral": {
-                "bajo": "Estás en un lugar neutral. Cuéntame más para ayudarte mejor. 👂",
-                "medio": "Parece que hay equilibrio. ¿Hay algo específico que quieras compartir? Estoy aquí. 🎧",
-                "alto": "Busco comprenderte mejor. ¿Cómo te sientes realmente? Dime más. 💬"
-            }
-        }
-        
         # Determinar si el nivel de estrés es bajo, medio o alto
         if nivel_estres <= 3:
             nivel = "bajo"
@@ -577,42 +737,142 @@ class EmotionLibrary:
             nivel = "medio"
         else:
             nivel = "alto"
-        
-        # Obtener recomendación personalizada
-        if emocion in recomendaciones:
-            return recomendaciones[emocion].get(nivel, "Estamos aquí para apoyarte en tu bienestar emocional. 💙")
-        else:
-            return "Estamos aquí para apoyarte en tu bienestar emocional. 💙"
+
+        # Obtener recomendación precalculada; solo se interpola el nivel de estrés
+        plantilla = EmotionLibrary.TABLA_RECOMENDACIONES.get((emocion, nivel))
+        if plantilla is None:
+            return EmotionLibrary.RECOMENDACION_GENERICA
+
+        prefijo, sufijo = plantilla
+        if sufijo is None:
+            return prefijo
+        return f"{prefijo}{nivel_estres:.1f}{sufijo}"
 
     @staticmethod
-    def analizar_multiples(textos):
+    def analizar_multiples(textos, workers=None, chunksize=1000):
         """
         Analiza múltiples textos y retorna un resumen general.
+        Usa el motor vectorizado de ``batch_scoring``; el resultado es el mismo
+        que promediar ``detectar_emociones`` texto a texto.
         
         Args:
-            textos (list): Lista de textos a analizar
+            textos (iterable): Textos a analizar (lista o generador)
+            workers (int): Procesos a usar; None o 1 analiza en el proceso actual
+            chunksize (int): Textos por tarea cuando se usa el pool de procesos
             
         Returns:
             dict: Análisis agregado
         """
-        resultados = [EmotionLibrary.detectar_emociones(t) for t in textos]
-        
-        # Promediar emociones
-        emociones_promedio = {}
-        for resultado in resultados:
-            for emocion, datos in resultado["emociones"].items():
-                if emocion not in emociones_promedio:
-                    emociones_promedio[emocion] = []
-                emociones_promedio[emocion].append(datos["intensidad"])
-        
-        for emocion in emociones_promedio:
-            emociones_promedio[emocion] = sum(emociones_promedio[emocion]) / len(emociones_promedio[emocion])
-        
-        nivel_estres_promedio = sum(r["nivel_estres"] for r in resultados) / len(resultados)
-        
-        return {
-            "analisis_total": len(resultados),
-            "emociones_promedio": emociones_promedio,
-            "nivel_estres_promedio": nivel_estres_promedio,
-            "tendencia": "positiva" if nivel_estres_promedio < 4 else "negativa" if nivel_estres_promedio > 6 else "neutral"
-        }
+        # Importación local: NumPy solo se carga en los procesos que analizan lotes
+        from .batch_scoring import puntuar_lote, puntuar_lote_paralelo
+
+        if workers is None or workers <= 1:
+            return puntuar_lote(textos).resumen()
+
+        return puntuar_lote_paralelo(textos, workers=workers, chunksize=chunksize).resumen()
+
+
+class AnalisisEmocional(Mapping):
+    """
+    Resultado compacto de ``EmotionLibrary.detectar_emociones``.
+
+    Guarda solo los acumulados por id de emoción y los valores numéricos;
+    se comporta como el dict de siempre (mismas claves y valores), pero el
+    detalle de ``emociones`` y la recomendación se construyen al pedirlos.
+    Cada acceso a ``emociones`` retorna un dict nuevo.
+    """
+
+    __slots__ = ("_lexico", "_acumulados", "_ids", "_principal", "_recomendacion",
+                 "confianza", "nivel_estres", "intensidad")
+
+    CLAVES = ("emocion_principal", "confianza", "emociones", "nivel_estres",
+              "recomendacion", "intensidad", "emojis", "version_lexico")
+
+    def __init__(self, lexico, acumulados, total_palabras):
+        self._lexico = lexico
+        self._acumulados = acumulados
+        self._ids = sorted(acumulados)
+        self._recomendacion = None
+
+        # Mismos cálculos (y en el mismo orden) que _calcular_nivel_estres y
+        # _calcular_confianza, sin construir el dict de emociones
+        estresantes = EmotionLibrary._ids_estresantes(lexico.emociones)
+        principal = -1
+        puntuacion_max = 0
+        estres_total = 0
+        emociones_estresantes = 0
+        detectadas = 0
+
+        for emo_id in self._ids:
+            puntuacion, contador = acumulados[emo_id]
+            if principal < 0 or abs(puntuacion) > puntuacion_max:
+                principal = emo_id
+                puntuacion_max = abs(puntuacion)
+            detectadas += contador
+            if emo_id in estresantes:
+                estres_total += min((puntuacion / contador) * 1.2, 10)
+                emociones_estresantes += 1
+
+        self._principal = principal
+        if principal < 0:
+            self.nivel_estres = 0
+            self.confianza = 30
+        else:
+            promedio_estres = estres_total / emociones_estresantes if emociones_estresantes else 0
+            self.nivel_estres = min(promedio_estres * 1.5, 10)
+            self.confianza = min((detectadas / max(total_palabras, 1)) * 100, 100)
+        self.intensidad = min(puntuacion_max / 10, 10)
+
+    @property
+    def emocion_principal(self):
+        return self._lexico.emociones[self._principal] if self._principal >= 0 else "neutral"
+
+    @property
+    def emociones(self):
+        emociones = {}
+        for emo_id in self._ids:
+            puntuacion, contador = self._acumulados[emo_id]
+            emociones[self._lexico.emociones[emo_id]] = {
+                "puntuacion": puntuacion,
+                "palabras_detectadas": contador,
+                "intensidad": min((puntuacion / contador) * 1.2, 10)
+            }
+        return emociones
+
+    @property
+    def recomendacion(self):
+        if self._recomendacion is None:
+            self._recomendacion = EmotionLibrary._generar_recomendacion(self.emocion_principal, self.nivel_estres)
+        return self._recomendacion
+
+    @recomendacion.setter
+    def recomendacion(self, recomendacion):
+        self._recomendacion = recomendacion
+
+    def con_recomendacion(self, recomendacion):
+        """Copia del análisis con otra recomendación; el original no cambia."""
+        copia = copy.copy(self)
+        copia._recomendacion = recomendacion
+        return copia
+
+    @property
+    def emojis(self):
+        return self._lexico.colores[self._principal] if self._principal >= 0 else "⚪"
+
+    @property
+    def version_lexico(self):
+        return self._lexico.version
+
+    def __getitem__(self, clave):
+        if clave not in self.CLAVES:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def __iter__(self):
+        return iter(self.CLAVES)
+
+    def __len__(self):
+        return len(self.CLAVES)
+
+    def __repr__(self):
+        return f"AnalisisEmocional({dict(self)!r})"
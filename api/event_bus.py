@@ -0,0 +1,208 @@
+"""
+Bus de eventos asíncrono para MindCare-AI.
+
+En modo asíncrono ``EventManager.notify`` no llama a los observadores: deja el
+evento en una cola acotada en memoria y vuelve. Uno o varios hilos de fondo
+sacan los eventos por orden de llegada y los despachan a los observadores.
+
+Cuando la cola está llena se aplica la política de desborde:
+
+    bloquear            el que publica espera hueco (como mucho ``espera_bloqueo``
+                        segundos; después el evento se descarta)
+    descartar_antiguo   se descarta el evento más antiguo de la cola
+    descartar_nuevo     se descarta el evento que se publica
+
+``cerrar`` deja de aceptar eventos en la cola, espera a que los hilos
+despachen lo pendiente y los detiene. Los eventos publicados después de
+cerrar se despachan en el hilo que los publica.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOQUEAR = "bloquear"
+DESCARTAR_ANTIGUO = "descartar_antiguo"
+DESCARTAR_NUEVO = "descartar_nuevo"
+POLITICAS_DESBORDE = (BLOQUEAR, DESCARTAR_ANTIGUO, DESCARTAR_NUEVO)
+
+
+class BusEventos:
+    """
+    Cola acotada de eventos con hilos despachadores.
+
+    Args:
+        despachar: Función (event_type, data) que entrega un evento a los observadores
+        tam_cola: Eventos que caben en la cola
+        hilos: Hilos despachadores
+        desborde: Política cuando la cola está llena (ver POLITICAS_DESBORDE)
+        espera_bloqueo: Segundos que espera quien publica con la política
+            "bloquear" (None = sin límite)
+    """
+
+    def __init__(self, despachar: Callable[[str, Dict[str, Any]], None], tam_cola: int = 1000,
+                 hilos: int = 1, desborde: str = BLOQUEAR, espera_bloqueo: Optional[float] = 1.0):
+        if desborde not in POLITICAS_DESBORDE:
+            raise ValueError(f"Política de desborde desconocida: {desborde}")
+        if tam_cola < 1 or hilos < 1:
+            raise ValueError("tam_cola e hilos deben ser al menos 1")
+
+        self.despachar = despachar
+        self.tam_cola = tam_cola
+        self.total_hilos = hilos
+        self.desborde = desborde
+        self.espera_bloqueo = espera_bloqueo
+
+        self._cola: deque = deque()
+        self._condicion = threading.Condition()
+        self._hilos: List[threading.Thread] = []
+        self._en_curso = 0
+        self._cerrado = False
+
+        self.publicados = 0
+        self.despachados = 0
+        self.descartados = 0
+        self.errores = 0
+        self.profundidad_max = 0
+        self._retraso_total = 0.0
+        self.retraso_max = 0.0
+
+    def publicar(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """
+        Encola un evento. Retorna False si se descartó por la política de
+        desborde (con "descartar_antiguo" el descartado es otro y retorna True).
+        """
+        with self._condicion:
+            if self._cerrado:
+                cerrado = True
+            else:
+                cerrado = False
+                if len(self._cola) >= self.tam_cola and not self._hacer_hueco(event_type):
+                    return False
+
+                self._cola.append((time.monotonic(), event_type, data))
+                self.publicados += 1
+                if len(self._cola) > self.profundidad_max:
+                    self.profundidad_max = len(self._cola)
+                if not self._hilos:
+                    self._arrancar()
+                self._condicion.notify()
+
+        if cerrado:
+            self.despachar(event_type, data)
+        return True
+
+    def _hacer_hueco(self, event_type: str) -> bool:
+        # Se llama con la cola llena y el lock tomado
+        if self.desborde == DESCARTAR_ANTIGUO:
+            _, descartado, _ = self._cola.popleft()
+            self._descartar(descartado)
+            return True
+
+        if self.desborde == BLOQUEAR:
+            limite = None if self.espera_bloqueo is None else time.monotonic() + self.espera_bloqueo
+            while len(self._cola) >= self.tam_cola and not self._cerrado:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    break
+                self._condicion.wait(restante)
+            if len(self._cola) < self.tam_cola:
+                return True
+
+        self._descartar(event_type)
+        return False
+
+    def _descartar(self, event_type: str) -> None:
+        self.descartados += 1
+        logger.warning("Cola de eventos llena (%d): se descarta un evento '%s'", self.tam_cola, event_type)
+
+    def _arrancar(self) -> None:
+        # Los hilos se crean con el primer evento (y no al importar), de modo
+        # que cada worker de gunicorn arranca los suyos después del fork
+        for numero in range(self.total_hilos):
+            hilo = threading.Thread(target=self._bucle, name=f"bus-eventos-{numero}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def _bucle(self) -> None:
+        while True:
+            with self._condicion:
+                while not self._cola and not self._cerrado:
+                    self._condicion.wait()
+                if not self._cola:
+                    return
+                encolado, event_type, data = self._cola.popleft()
+                self._en_curso += 1
+                retraso = time.monotonic() - encolado
+                self._retraso_total += retraso
+                if retraso > self.retraso_max:
+                    self.retraso_max = retraso
+                # Hay hueco para quien espera con la política "bloquear"
+                self._condicion.notify_all()
+
+            error = False
+            try:
+                self.despachar(event_type, data)
+            except Exception as e:
+                error = True
+                logger.error("Error despachando el evento '%s': %r", event_type, e)
+
+            with self._condicion:
+                self._en_curso -= 1
+                self.despachados += 1
+                if error:
+                    self.errores += 1
+                self._condicion.notify_all()
+
+    def esperar_vacia(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que no queden eventos en la cola ni en despacho."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicion:
+            while self._cola or self._en_curso:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+            return True
+
+    def cerrar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Despacha lo pendiente y detiene los hilos. Retorna False si quedaban
+        eventos sin despachar al agotarse ``timeout``.
+        """
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+            hilos = list(self._hilos)
+
+        limite = None if timeout is None else time.monotonic() + timeout
+        for hilo in hilos:
+            hilo.join(None if limite is None else max(limite - time.monotonic(), 0))
+
+        with self._condicion:
+            pendientes = len(self._cola) + self._en_curso
+        if pendientes:
+            logger.warning("Bus de eventos cerrado con %d eventos sin despachar", pendientes)
+        return pendientes == 0
+
+    def metricas(self) -> Dict[str, Any]:
+        """Profundidad de la cola, contadores y retraso desde que se publica hasta que se despacha."""
+        with self._condicion:
+            retirados = self.despachados + self._en_curso
+            return {
+                "profundidad": len(self._cola),
+                "profundidad_max": self.profundidad_max,
+                "capacidad": self.tam_cola,
+                "desborde": self.desborde,
+                "publicados": self.publicados,
+                "despachados": self.despachados,
+                "descartados": self.descartados,
+                "errores": self.errores,
+                "retraso_medio_ms": self._retraso_total / retirados * 1000 if retirados else 0.0,
+                "retraso_max_ms": self.retraso_max * 1000,
+                "retraso_actual_ms": (time.monotonic() - self._cola[0][0]) * 1000 if self._cola else 0.0,
+            }
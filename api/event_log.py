@@ -0,0 +1,206 @@
+"""
+Escritura por lotes del registro de eventos (modelo EventLog).
+
+DatabaseObserver no inserta cada evento: lo deja en un buffer en memoria y
+vuelve. Un hilo escritor guarda los eventos con ``bulk_create`` cuando hay
+``tam_lote`` pendientes o cuando el más antiguo lleva ``intervalo`` segundos
+esperando, lo que ocurra antes. Cada lote es un solo INSERT.
+
+El hilo escritor tiene su propia conexión a la base de datos (Django abre una
+por hilo), así que los eventos nunca entran en la transacción de la petición
+que los generó: se guardan aunque esa transacción haga rollback, y un fallo al
+guardarlos no la afecta.
+
+Con el buffer lleno (``tam_max``) los eventos nuevos se descartan. ``cerrar``
+guarda lo pendiente y detiene el hilo; los eventos que llegan después se
+descartan.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class EscritorEventos:
+    """
+    Buffer de eventos con un hilo que los guarda por lotes.
+
+    Args:
+        tam_lote: Eventos por INSERT
+        intervalo: Segundos que puede esperar un evento antes de guardarse
+        tam_max: Eventos que caben en el buffer
+        alias: Base de datos (alias de DATABASES)
+    """
+
+    def __init__(self, tam_lote: int = 100, intervalo: float = 0.5, tam_max: int = 10000,
+                 alias: str = "default"):
+        if tam_lote < 1 or tam_max < tam_lote:
+            raise ValueError("tam_lote debe ser al menos 1 y tam_max al menos tam_lote")
+
+        self.tam_lote = tam_lote
+        self.intervalo = intervalo
+        self.tam_max = tam_max
+        self.alias = alias
+
+        self._pendientes: deque = deque()
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self._en_curso = 0
+        self._forzar = False
+        self._cerrado = False
+
+        self.recibidos = 0
+        self.escritos = 0
+        self.lotes = 0
+        self.descartados = 0
+        self.perdidos = 0
+
+    def agregar(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """Deja un evento en el buffer. Retorna False si se descartó."""
+        with self._condicion:
+            if self._cerrado or len(self._pendientes) >= self.tam_max:
+                self.descartados += 1
+                descartado = True
+            else:
+                descartado = False
+                self._pendientes.append((time.monotonic(), event_type, data, timezone.now()))
+                self.recibidos += 1
+                if self._hilo is None:
+                    self._arrancar()
+                # El escritor duerme hasta que vence el intervalo del primer
+                # evento; solo hay que despertarlo si empieza un plazo o se completa un lote
+                if len(self._pendientes) in (1, self.tam_lote):
+                    self._condicion.notify()
+
+        if descartado:
+            logger.warning("Registro de eventos lleno o cerrado: se descarta un evento '%s'", event_type)
+        return not descartado
+
+    def _arrancar(self) -> None:
+        # Como en BusEventos, el hilo se crea con el primer evento y no al
+        # importar, para que cada worker de gunicorn arranque el suyo tras el fork
+        self._hilo = threading.Thread(target=self._bucle, name="escritor-eventos", daemon=True)
+        self._hilo.start()
+
+    def _siguiente_lote(self) -> Optional[List[tuple]]:
+        # Espera a que haya un lote completo, venza el intervalo del evento más
+        # antiguo o se pida vaciar; None cuando está cerrado y no queda nada
+        with self._condicion:
+            while True:
+                if self._pendientes:
+                    restante = self._pendientes[0][0] + self.intervalo - time.monotonic()
+                    if len(self._pendientes) >= self.tam_lote or restante <= 0 or self._forzar or self._cerrado:
+                        break
+                    self._condicion.wait(restante)
+                elif self._cerrado:
+                    return None
+                else:
+                    self._forzar = False
+                    self._condicion.notify_all()
+                    self._condicion.wait()
+
+            cuantos = min(self.tam_lote, len(self._pendientes))
+            lote = [self._pendientes.popleft() for _ in range(cuantos)]
+            self._en_curso = cuantos
+            return lote
+
+    def _bucle(self) -> None:
+        try:
+            while True:
+                lote = self._siguiente_lote()
+                if lote is None:
+                    return
+                escritos = self._escribir(lote)
+                with self._condicion:
+                    self._en_curso = 0
+                    self.escritos += escritos
+                    self.perdidos += len(lote) - escritos
+                    self.lotes += 1
+                    self._condicion.notify_all()
+        finally:
+            connections[self.alias].close()
+
+    def _escribir(self, lote: List[tuple]) -> int:
+        # Importación local: este módulo se importa antes de que los modelos estén listos
+        from .models import EventLog
+
+        try:
+            EventLog.objects.using(self.alias).bulk_create([
+                EventLog(tipo=event_type, datos=data, fecha=fecha)
+                for _, event_type, data, fecha in lote
+            ])
+            return len(lote)
+        except Exception as e:
+            logger.error("No se pudieron guardar %d eventos: %r", len(lote), e)
+            # La conexión puede haber quedado inutilizable: el siguiente lote abre otra
+            connections[self.alias].close()
+            return 0
+
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Guarda ya los eventos pendientes, sin esperar al lote ni al intervalo.
+        Retorna False si quedaban eventos sin guardar al agotarse ``timeout``.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicion:
+            if self._pendientes:
+                self._forzar = True
+                self._condicion.notify_all()
+            while self._pendientes or self._en_curso:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._condicion.wait(restante)
+            return True
+
+    def cerrar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Guarda lo pendiente y detiene el hilo escritor. Retorna False si
+        quedaban eventos sin guardar al agotarse ``timeout``.
+        """
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+            hilo = self._hilo
+
+        if hilo is not None:
+            hilo.join(timeout)
+
+        with self._condicion:
+            pendientes = len(self._pendientes) + self._en_curso
+        if pendientes:
+            logger.warning("Registro de eventos cerrado con %d eventos sin guardar", pendientes)
+        return pendientes == 0
+
+    def metricas(self) -> Dict[str, Any]:
+        """Eventos en el buffer y contadores."""
+        with self._condicion:
+            return {
+                "pendientes": len(self._pendientes) + self._en_curso,
+                "capacidad": self.tam_max,
+                "tam_lote": self.tam_lote,
+                "recibidos": self.recibidos,
+                "escritos": self.escritos,
+                "lotes": self.lotes,
+                "descartados": self.descartados,
+                "perdidos": self.perdidos,
+            }
+
+
+def crear_escritor(config: Optional[Dict[str, Any]]) -> Optional[EscritorEventos]:
+    """EscritorEventos según ``settings.REGISTRO_EVENTOS`` (None si no está habilitado)."""
+    config = config or {}
+    if not config.get("HABILITADO"):
+        return None
+    return EscritorEventos(
+        tam_lote=config.get("TAM_LOTE", 100),
+        intervalo=config.get("INTERVALO_MS", 500) / 1000,
+        tam_max=config.get("TAM_MAX", 10000),
+    )
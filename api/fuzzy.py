@@ -0,0 +1,144 @@
+"""
+Búsqueda tolerante a erratas en el vocabulario del léxico (estilo SymSpell).
+
+Con la primera corrección se indexan, para cada palabra del vocabulario, todas
+las variantes que resultan de borrarle hasta ``distancia_maxima`` letras (el
+índice es caro y la corrección está desactivada por defecto: compilar un
+léxico no lo construye).
+Dos palabras a distancia de edición d comparten alguna variante con como
+mucho d borrados en cada una, así que para corregir un token basta generar
+sus propios borrados y consultar el índice: unas decenas de búsquedas en un
+dict en lugar de comparar con todo el vocabulario. Los candidatos se
+confirman con la distancia real (Damerau-Levenshtein restringida).
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Palabras frecuentes que están a una errata de alguna palabra del léxico
+# ("tengo" -> "tenso") y nunca se corrigen
+PALABRAS_COMUNES = frozenset("""
+    algo algún alguna alguno algunos antes aquí bastante casa casi cada como cosa cosas creo cuando
+    cuanto debo decir desde después dice digo donde ella ellos entre esta estaba estar este esto
+    estoy fuera gente hablar hace hacer hacia hago hasta hola hora horas luego mamá mañana mejor
+    menos mientras mismo mucho mucha muchos nada nadie noche nosotros nunca otra otro otros padre
+    papá para pasa pasó pero poco poder porque puede puedo pues quiero sabe saber sido siempre
+    siento sino sobre solo también tanto tarde tener tengo tenía tiene tienen tiempo toda todas
+    todo todos trabajo tuve vamos veces vida voy
+""".split())
+
+
+def _borrados(palabra: str, distancia: int) -> Set[str]:
+    """La palabra y todas las variantes con hasta ``distancia`` letras borradas."""
+    variantes = {palabra}
+    for borrar in range(1, min(distancia, len(palabra)) + 1):
+        for posiciones in combinations(range(len(palabra)), borrar):
+            variantes.add("".join(letra for i, letra in enumerate(palabra) if i not in posiciones))
+    return variantes
+
+
+def distancia_edicion(a: str, b: str, maximo: int) -> int:
+    """
+    Distancia de Damerau-Levenshtein restringida (inserción, borrado,
+    sustitución y transposición de letras contiguas). Deja de calcular en
+    cuanto supera ``maximo`` y retorna ``maximo + 1``.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+
+    anterior_2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            coste = 0 if a[i - 1] == b[j - 1] else 1
+            valor = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + coste)
+            if (anterior_2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                valor = min(valor, anterior_2[j - 2] + 1)
+            actual[j] = valor
+            if valor < minimo_fila:
+                minimo_fila = valor
+        if minimo_fila > maximo:
+            return maximo + 1
+        anterior_2, anterior = anterior, actual
+
+    return min(anterior[len(b)], maximo + 1)
+
+
+class IndiceDifuso:
+    """
+    Índice de borrados sobre el vocabulario de un léxico.
+
+    Args:
+        vocabulario: Palabras (tokens) del léxico
+        distancia_maxima: Mayor distancia de edición que se podrá consultar
+        largo_minimo: Las palabras más cortas no se indexan ni se corrigen
+        tam_cache: Correcciones memorizadas (los tokens se repiten mucho)
+    """
+
+    def __init__(self, vocabulario: Iterable[str], distancia_maxima: int = 2,
+                 largo_minimo: int = 4, tam_cache: int = 65536):
+        self.vocabulario = frozenset(vocabulario)
+        self.distancia_maxima = distancia_maxima
+        self.largo_minimo = largo_minimo
+        self.tam_cache = tam_cache
+        # Se construye la primera vez que se corrige algo
+        self._indice: Optional[Dict[str, Tuple[str, ...]]] = None
+        self.corregir = lru_cache(maxsize=tam_cache)(self._corregir)
+
+    def _construido(self) -> Dict[str, Tuple[str, ...]]:
+        indice = self._indice
+        if indice is None:
+            # Dos hilos pueden construirlo a la vez; el resultado es el mismo
+            indice = self._indice = self._construir()
+        return indice
+
+    def _construir(self) -> Dict[str, Tuple[str, ...]]:
+        indice: Dict[str, list] = {}
+        for palabra in self.vocabulario:
+            if len(palabra) < self.largo_minimo:
+                continue
+            for variante in _borrados(palabra, self.distancia_maxima):
+                indice.setdefault(variante, []).append(palabra)
+        return {variante: tuple(palabras) for variante, palabras in indice.items()}
+
+    def _corregir(self, token: str, distancia: int = 1) -> Optional[str]:
+        """
+        Palabra del vocabulario más cercana a ``token`` (hasta ``distancia``),
+        o None. Los tokens que ya están en el vocabulario no se corrigen. A
+        igual distancia gana la más corta y, después, la primera alfabéticamente.
+        """
+        if token in self.vocabulario or len(token) < self.largo_minimo:
+            return None
+        distancia = min(distancia, self.distancia_maxima)
+        indice = self._construido()
+
+        mejor = None
+        mejor_orden = (distancia + 1,)
+        vistas = set()
+        for variante in _borrados(token, distancia):
+            for palabra in indice.get(variante, ()):
+                if palabra in vistas:
+                    continue
+                vistas.add(palabra)
+                d = distancia_edicion(token, palabra, distancia)
+                if d <= distancia and (d, len(palabra), palabra) < mejor_orden:
+                    mejor, mejor_orden = palabra, (d, len(palabra), palabra)
+        return mejor
+
+    def __getstate__(self):
+        # El índice ocupa mucho más que el vocabulario: no se copia a otros
+        # procesos, se reconstruye allí la primera vez que se corrige algo
+        return {"vocabulario": self.vocabulario, "distancia_maxima": self.distancia_maxima,
+                "largo_minimo": self.largo_minimo, "tam_cache": self.tam_cache}
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._indice = None
+        self.corregir = lru_cache(maxsize=self.tam_cache)(self._corregir)
+
+    def __len__(self) -> int:
+        return len(self._construido())
@@ -1,11 +1,82 @@
+from functools import partial
+
+from django.conf import settings
+
+from .analysis_cache import AnalysisCache
+from .analyzers import Cascada, crear_analizador
 from .emotion_library import EmotionLibrary
 
+_cache = None
+_cascada = None
+
+
+def obtener_cache():
+    """
+    Retorna la caché de análisis si está habilitada en settings.ANALISIS_CACHE,
+    o None si no lo está.
+    """
+    global _cache
+    config = getattr(settings, "ANALISIS_CACHE", {})
+    if not config.get("HABILITADO", False):
+        return None
+
+    if _cache is None:
+        _cache = AnalysisCache(
+            max_entradas=config.get("MAX_ENTRADAS", 2048),
+            max_bytes=config.get("MAX_BYTES", 8 * 1024 * 1024)
+        )
+    return _cache
+
+
+def obtener_cascada():
+    """
+    Retorna la cascada de analizadores si settings.ANALIZADORES define un
+    analizador de respaldo, o None si solo se usa el léxico.
+    """
+    global _cascada
+    config = getattr(settings, "ANALIZADORES", {})
+    if not config.get("RESPALDO"):
+        return None
+
+    if _cascada is None:
+        _cascada = Cascada(
+            crear_analizador(config["RESPALDO"], **config.get("OPCIONES", {})),
+            umbral_confianza=config.get("UMBRAL_CONFIANZA", 35),
+            lote_maximo=config.get("LOTE_MAXIMO", 16),
+            espera_maxima=config.get("ESPERA_MAXIMA_MS", 10) / 1000,
+            tiempo_maximo=config.get("TIEMPO_MAXIMO_MS", 2000) / 1000
+        )
+    return _cascada
+
+
+def _analizar(texto):
+    """
+    Analiza el texto pasando por la caché cuando está habilitada, y por la
+    cascada de analizadores cuando hay un respaldo configurado.
+    El léxico se toma una sola vez: un cambio en caliente no afecta a este análisis.
+    """
+    lexico = EmotionLibrary.lexico_actual()
+    cascada = obtener_cascada()
+    if cascada is None:
+        version = lexico.version
+        calcular = partial(EmotionLibrary.detectar_emociones, lexico=lexico)
+    else:
+        version = f"{lexico.version}+{cascada.respaldo.nombre}:{cascada.respaldo.version}"
+        calcular = partial(cascada.analizar, lexico=lexico)
+
+    cache = obtener_cache()
+    if cache is None:
+        return calcular(texto)
+
+    return cache.obtener(texto, version, calcular)
+
+
 def analizar_texto(texto):
     """
     Analiza el texto y retorna emoción, nivel de estrés y recomendación.
     Utiliza la librería avanzada de emociones.
     """
-    resultado = EmotionLibrary.detectar_emociones(texto)
+    resultado = _analizar(texto)
     
     return (
         resultado["emocion_principal"],
@@ -16,5 +87,16 @@ def analizar_texto(texto):
 def obtener_analisis_completo(texto):
     """
     Retorna análisis completo con todos los detalles de emociones.
+    Con la caché habilitada el resultado es de solo lectura.
     """
-    return EmotionLibrary.detectar_emociones(texto)
+    return _analizar(texto)
+
+def estadisticas_cache():
+    """Retorna aciertos, fallos y expulsiones de la caché (None si está deshabilitada)."""
+    cache = obtener_cache()
+    return cache.estadisticas() if cache is not None else None
+
+def estadisticas_analizadores():
+    """Retorna uso y latencia de cada nivel de la cascada (None si solo se usa el léxico)."""
+    cascada = obtener_cascada()
+    return cascada.estado() if cascada is not None else None
@@ -0,0 +1,110 @@
+"""
+Léxico emocional compilado para MindCare-AI.
+Convierte EMOTIONS_DICT, INTENSIFIERS y NEGATORS en estructuras de búsqueda
+que se construyen una sola vez al importar la librería.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Any
+
+from .fuzzy import IndiceDifuso
+from .phrase_matcher import PhraseAutomaton
+
+# Tokenizador común para textos y frases del léxico. Equivale a r'\b\w+\b'
+# (findall siempre toma la secuencia completa de caracteres de palabra) y es más rápido.
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Normaliza un texto (minúsculas) y lo divide en tokens."""
+    return TOKEN_RE.findall(texto.lower())
+
+
+class CompiledLexicon:
+    """
+    Léxico emocional compilado.
+
+    - ``indice``: frase normalizada -> ((id_emocion, peso), ...), donde el peso
+      es el valor absoluto de ``nivel_base``. Las entradas repetidas dentro de
+      la lista de una misma emoción se eliminan al compilar.
+    - ``automata``: autómata Aho-Corasick sobre tokens con todas las frases
+      del léxico, los intensificadores y los negadores.
+    - ``indice_difuso``: índice de borrados sobre las palabras de esas frases,
+      para corregir erratas (ver ``api/fuzzy.py``); se construye con la
+      primera corrección.
+
+    Cada patrón del autómata tiene asociados, por id, sus entradas emocionales,
+    su factor de intensificación (o None) y si es un negador.
+    """
+
+    def __init__(self, emotions_dict: Dict[str, Dict[str, Any]],
+                 intensifiers: Dict[str, float], negators: List[str]):
+        self.emociones: Tuple[str, ...] = tuple(emotions_dict)
+        self.pesos: Tuple[int, ...] = tuple(
+            abs(datos["nivel_base"]) for datos in emotions_dict.values()
+        )
+        self.colores: Tuple[str, ...] = tuple(
+            datos["color"] for datos in emotions_dict.values()
+        )
+        self.intensificadores: Dict[str, float] = {
+            " ".join(tokenizar(frase)): factor for frase, factor in intensifiers.items()
+        }
+        self.negadores = frozenset(" ".join(tokenizar(frase)) for frase in negators)
+        self.indice = self._construir_indice(emotions_dict)
+        self._construir_patrones()
+        self.version = self._calcular_version(emotions_dict, intensifiers, negators)
+
+    def _construir_indice(self, emotions_dict: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[Tuple[int, int], ...]]:
+        """Construye el índice frase -> ((id_emocion, peso), ...) sin duplicados."""
+        indice: Dict[str, List[Tuple[int, int]]] = {}
+
+        for emo_id, datos in enumerate(emotions_dict.values()):
+            peso = self.pesos[emo_id]
+            frases = dict.fromkeys(" ".join(tokenizar(frase)) for frase in datos["palabras"])
+            for frase in frases:
+                if frase:
+                    indice.setdefault(frase, []).append((emo_id, peso))
+
+        return {frase: tuple(entradas) for frase, entradas in indice.items()}
+
+    def _construir_patrones(self) -> None:
+        """Asigna un id a cada frase distinta y construye el autómata."""
+        frases = list(dict.fromkeys(
+            [*self.indice, *self.intensificadores, *self.negadores]
+        ))
+
+        self.patrones: Tuple[str, ...] = tuple(frases)
+        self.entradas_patron: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+            self.indice.get(frase, ()) for frase in frases
+        )
+        self.factor_patron: Tuple[Optional[float], ...] = tuple(
+            self.intensificadores.get(frase) for frase in frases
+        )
+        self.negador_patron: Tuple[bool, ...] = tuple(
+            frase in self.negadores for frase in frases
+        )
+        self.automata = PhraseAutomaton(frase.split(" ") for frase in frases)
+        # Tokens de la frase más larga (contexto necesario al analizar por trozos)
+        self.longitud_maxima = max((frase.count(" ") + 1 for frase in frases), default=1)
+        self.indice_difuso = IndiceDifuso(token for frase in frases for token in frase.split(" "))
+
+    @staticmethod
+    def _calcular_version(emotions_dict: Dict[str, Dict[str, Any]],
+                          intensifiers: Dict[str, float], negators: List[str]) -> str:
+        """Huella del contenido del léxico: cambia si cambia cualquier palabra o peso."""
+        # Sin ordenar claves: el orden de las emociones afecta a los desempates
+        contenido = json.dumps([emotions_dict, intensifiers, negators], ensure_ascii=False)
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()[:12]
+
+    def buscar(self, frase: str) -> Tuple[Tuple[int, int], ...]:
+        """Retorna las entradas asociadas a una frase (tupla vacía si no existe)."""
+        return self.indice.get(" ".join(tokenizar(frase)), ())
+
+    def coincidencias(self, tokens: Sequence[str]) -> Iterator[Tuple[int, int, int]]:
+        """Genera (inicio, fin, patron_id) para cada frase encontrada en los tokens."""
+        return self.automata.buscar(tokens)
+
+    def __len__(self) -> int:
+        return len(self.indice)
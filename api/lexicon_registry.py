@@ -0,0 +1,219 @@
+"""
+Registro del léxico activo de MindCare-AI, con recarga en caliente.
+
+El léxico puede venir del código (EmotionLibrary), de un fichero (JSON fuente o
+artefacto empaquetado) o de la tabla ``Lexico``. Cada versión se compila en un
+objeto nuevo que no se modifica después; el registro solo cambia la referencia
+al léxico activo. Un análisis toma el léxico una vez al empezar, de modo que
+las peticiones en curso terminan con la versión con la que empezaron.
+
+La fuente configurada se comprueba como mucho cada ``intervalo`` segundos, y
+la compilación se hace en un hilo aparte: las peticiones nunca esperan a que
+termine, siguen usando la versión anterior hasta el cambio.
+
+Un fichero vigilado se actualiza siempre sustituyéndolo (``os.replace``, como
+hace ``compilar_lexico``), nunca reescribiéndolo en su sitio: los artefactos
+empaquetados están mapeados en memoria y truncarlos tumba a los procesos que
+los leen. Un ``PackedLexicon`` reemplazado libera su mapeo cuando termina el
+último análisis que lo usaba.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from .lexicon import CompiledLexicon
+from .packed_lexicon import MAGIC, PackedLexicon
+
+logger = logging.getLogger(__name__)
+
+
+def lexico_desde_fuente(fuente: Dict[str, Any]) -> CompiledLexicon:
+    """Compila un léxico desde un dict con 'emociones', 'intensificadores' y 'negadores'."""
+    return CompiledLexicon(fuente["emociones"], fuente["intensificadores"], fuente["negadores"])
+
+
+def leer_fichero(ruta: str):
+    """
+    Carga un léxico desde un fichero: un artefacto empaquetado (se mapea en
+    memoria) o un JSON fuente (se compila).
+    """
+    with open(ruta, "rb") as fichero:
+        cabecera = fichero.read(len(MAGIC))
+    if cabecera == MAGIC:
+        return PackedLexicon(ruta)
+
+    with open(ruta, encoding="utf-8") as fichero:
+        return lexico_desde_fuente(json.load(fichero))
+
+
+class FuenteFichero:
+    """
+    Léxico en un fichero; cambia cuando cambian su fecha de modificación o su
+    tamaño. El fichero se debe sustituir (``os.replace``), no reescribir.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+
+    def version(self) -> Optional[Hashable]:
+        try:
+            estado = os.stat(self.ruta)
+        except OSError:
+            return None
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def cargar(self):
+        return leer_fichero(self.ruta)
+
+    def liberar_hilo(self) -> None:
+        pass
+
+    def __str__(self) -> str:
+        return f"fichero:{self.ruta}"
+
+
+class FuenteBD:
+    """
+    Léxico en la tabla ``Lexico``: se usa la fila activa más reciente.
+    La comprobación de versión es una consulta por clave primaria.
+    """
+
+    def version(self) -> Optional[Hashable]:
+        from .models import Lexico
+        return Lexico.objects.filter(activo=True).order_by("-id").values_list("id", flat=True).first()
+
+    def cargar(self):
+        from .models import Lexico
+        fila = Lexico.objects.filter(activo=True).order_by("-id").first()
+        if fila is None:
+            raise LookupError("No hay ningún léxico activo en la base de datos")
+        return lexico_desde_fuente(fila.contenido)
+
+    def liberar_hilo(self) -> None:
+        # Cada hilo abre su propia conexión; se cierra al terminar el refresco
+        from django.db import connection
+        connection.close()
+
+    def __str__(self) -> str:
+        return "bd"
+
+
+class RegistroLexico:
+    """
+    Referencia atómica al léxico activo.
+
+    Uso típico:
+
+        lexico = registro.actual()   # una vez por análisis
+        ...                          # todo el análisis usa ``lexico``
+    """
+
+    def __init__(self, inicial, fuente=None, intervalo: float = 60.0):
+        self._actual = inicial
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._fuente = None
+        self._version_fuente: Optional[Hashable] = None
+        self._version_fallida: Optional[Hashable] = None
+        self._proxima_comprobacion = 0.0
+        self.intervalo = intervalo
+        self.cambios = 0
+        self.errores = 0
+        if fuente is not None:
+            self.configurar(fuente, intervalo)
+
+    def configurar(self, fuente, intervalo: float = 60.0) -> None:
+        """Fija la fuente a vigilar; la primera comprobación se hace en el próximo ``actual()``."""
+        with self._lock:
+            self._fuente = fuente
+            self._version_fuente = None
+            self._version_fallida = None
+            self.intervalo = intervalo
+            self._proxima_comprobacion = 0.0
+
+    def actual(self):
+        """Léxico activo. Si toca, lanza en segundo plano la comprobación de la fuente."""
+        if self._fuente is not None and time.monotonic() >= self._proxima_comprobacion:
+            self._programar_refresco()
+        return self._actual
+
+    def instalar(self, lexico, version_fuente: Optional[Hashable] = None) -> None:
+        """
+        Cambia el léxico activo. Los análisis en curso conservan el anterior;
+        el registro no guarda ninguna referencia a él, de modo que un
+        ``PackedLexicon`` se cierra en cuanto el último de ellos lo suelta.
+        """
+        with self._lock:
+            anterior = self._actual
+            self._actual = lexico
+            self._version_fuente = version_fuente
+            self.cambios += 1
+        logger.info("Léxico activo: %s -> %s (%s)", anterior.version, lexico.version, self._fuente)
+
+    def refrescar(self) -> bool:
+        """
+        Comprueba la fuente y, si cambió, compila e instala la nueva versión
+        en el hilo actual. Una versión que no se pudo cargar no se reintenta
+        hasta que la fuente vuelva a cambiar.
+
+        Returns:
+            bool: True si se instaló un léxico nuevo
+        """
+        fuente = self._fuente
+        if fuente is None:
+            return False
+
+        self._proxima_comprobacion = time.monotonic() + self.intervalo
+        version = fuente.version()
+        if version is None or version in (self._version_fuente, self._version_fallida):
+            return False
+
+        try:
+            lexico = fuente.cargar()
+        except Exception:
+            self._version_fallida = version
+            raise
+        self.instalar(lexico, version)
+        return True
+
+    def esperar(self, timeout: Optional[float] = None) -> None:
+        """Espera a que termine el refresco en segundo plano (si hay uno)."""
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+
+    def _programar_refresco(self) -> None:
+        with self._lock:
+            ahora = time.monotonic()
+            if self._hilo is not None or ahora < self._proxima_comprobacion:
+                return
+            self._proxima_comprobacion = ahora + self.intervalo
+            self._hilo = threading.Thread(target=self._refrescar_en_hilo, name="lexico-refresco", daemon=True)
+            self._hilo.start()
+
+    def _refrescar_en_hilo(self) -> None:
+        fuente = self._fuente
+        try:
+            self.refrescar()
+        except Exception as e:
+            # Un léxico roto no debe tumbar el servicio: se sigue con el anterior
+            self.errores += 1
+            logger.error("No se pudo recargar el léxico desde %s: %s", fuente, e)
+        finally:
+            try:
+                fuente.liberar_hilo()
+            finally:
+                self._hilo = None
+
+    def estado(self) -> Dict[str, Any]:
+        """Versión activa, fuente y contadores de cambios y errores."""
+        return {
+            "version": self._actual.version,
+            "fuente": str(self._fuente) if self._fuente is not None else "codigo",
+            "cambios": self.cambios,
+            "errores": self.errores,
+        }
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.emotion_library import EmotionLibrary
+from api.lexicon import CompiledLexicon
+from api.lexicon_registry import lexico_desde_fuente
+from api.packed_lexicon import escribir_artefacto
+
+
+class Command(BaseCommand):
+    help = (
+        "Compila el léxico emocional en un artefacto binario mapeable en memoria. "
+        "Para usarlo, define LEXICO_EMPAQUETADO=<ruta> antes de arrancar los workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("salida", help="Ruta del fichero binario a generar")
+        parser.add_argument(
+            "--fuente",
+            help="JSON con claves 'emociones', 'intensificadores' y 'negadores' "
+                 "(por defecto, los diccionarios de EmotionLibrary)"
+        )
+
+    def handle(self, *args, **options):
+        if options["fuente"]:
+            try:
+                with open(options["fuente"], encoding="utf-8") as fichero:
+                    lexico = lexico_desde_fuente(json.load(fichero))
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"No se pudo leer la fuente del léxico: {e}")
+        else:
+            lexico = CompiledLexicon(
+                EmotionLibrary.EMOTIONS_DICT, EmotionLibrary.INTENSIFIERS, EmotionLibrary.NEGATORS
+            )
+
+        resumen = escribir_artefacto(lexico, options["salida"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Léxico {lexico.version} escrito en {options['salida']}: "
+            f"{resumen['frases']} frases, {resumen['registros']} registros, {resumen['bytes']} bytes"
+        ))
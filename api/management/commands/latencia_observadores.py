@@ -0,0 +1,102 @@
+import json
+import urllib.request
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.alert_limiter import LimitadorAlertas
+from api.observer_metrics import informe_latencias
+from api.observers import (
+    AlertObserver, DatabaseObserver, EmailNotificationObserver, LoggingObserver, RecommendationObserver,
+    EventManager, StatisticsObserver, Subject, get_event_manager,
+)
+from api.trends import TendenciasUsuarios
+from api.user_history import HistorialUsuarios
+
+USUARIO_PRUEBA = {"id": 0, "nombre": "Prueba", "correo": "prueba@example.com"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Informe de latencia por observador y tipo de evento. Con --url lee las "
+        "métricas de un servidor en marcha; si no, despacha eventos de prueba a "
+        "copias aisladas de los observadores por defecto (sin emails, EventLog ni "
+        "estadísticas compartidas) y las mide. --en-vivo usa el EventManager del "
+        "proceso, con todo lo que tenga configurado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="URL de /api/observadores/latencias/ de un servidor en marcha")
+        parser.add_argument("--token", default="", help="Token JWT para --url")
+        parser.add_argument("--eventos", type=int, default=200,
+                            help="Eventos de prueba de cada tipo (sin --url)")
+        parser.add_argument("--en-vivo", action="store_true",
+                            help="Despachar los eventos de prueba por el EventManager configurado: "
+                                 "envía los emails, guarda EventLog y suma en las estadísticas compartidas")
+        parser.add_argument("--umbral-ms", type=float, default=None,
+                            help="Marca como lentas las filas con p99 mayor que este valor")
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            datos = self._leer(options["url"], options["token"])["latencias"]
+        else:
+            datos = self._medir(options["eventos"], options["en_vivo"])
+
+        if not datos["observadores"]:
+            self.stdout.write("Sin llamadas registradas")
+            return
+        self.stdout.write(informe_latencias(datos, options["umbral_ms"]))
+        for event_type, fila in datos["despachos"].items():
+            self.stdout.write(f"despacho '{event_type}': {fila['llamadas']} eventos, "
+                              f"p50 {fila['p50_ms']:.3f} ms, p99 {fila['p99_ms']:.3f} ms")
+
+    def _leer(self, url, token):
+        peticion = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+        try:
+            with urllib.request.urlopen(peticion, timeout=10) as respuesta:
+                return json.load(respuesta)
+        except (URLError, ValueError) as e:
+            raise CommandError(f"No se pudieron leer las métricas de {url}: {e}")
+
+    def _medir(self, eventos, en_vivo=False):
+        if not en_vivo:
+            subject = _SubjectAislado()
+            self._publicar(subject, eventos)
+            return subject.latencias.como_dict()
+
+        manager = get_event_manager()
+        manager.latencias.reiniciar()
+        self._publicar(manager, eventos)
+        manager.esperar_eventos(30)
+        return manager.latencias_observadores()
+
+    def _publicar(self, subject, eventos):
+        for i in range(eventos):
+            subject.usuario_registrado(USUARIO_PRUEBA)
+            subject.usuario_login(USUARIO_PRUEBA)
+            subject.evaluacion_completada(USUARIO_PRUEBA["id"], USUARIO_PRUEBA, "ansiedad",
+                                          3 + i % 7, "Respira profundo")
+
+
+class _SubjectAislado(Subject):
+    """
+    Los observadores por defecto sin efectos fuera del proceso: sin envío de
+    emails, sin EventLog, sin estadísticas compartidas ni tendencias
+    persistidas, y con su propio historial y limitador de alertas.
+    """
+
+    # Los mismos eventos, con los mismos datos, que publica el EventManager
+    usuario_registrado = EventManager.usuario_registrado
+    usuario_login = EventManager.usuario_login
+    evaluacion_completada = EventManager.evaluacion_completada
+
+    def __init__(self):
+        super().__init__()
+        email = EmailNotificationObserver()
+        # Se mide todo salvo el envío por SMTP
+        email._enviar = lambda correo, asunto, cuerpo: None
+        for observer in (LoggingObserver(), StatisticsObserver(), email, DatabaseObserver(),
+                         RecommendationObserver(HistorialUsuarios(cargar=None), TendenciasUsuarios(),
+                                                publicar=self.notify),
+                         AlertObserver(LimitadorAlertas(), publicar=self.notify)):
+            self.attach(observer)
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.emotion_library import EmotionLibrary
+from api.lexicon_registry import lexico_desde_fuente
+from api.models import Lexico
+
+
+class Command(BaseCommand):
+    help = (
+        "Publica una versión del léxico en la tabla Lexico. Con LEXICO_FUENTE=bd, "
+        "los workers la cargan en segundo plano sin reiniciarse."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fuente",
+            help="JSON con claves 'emociones', 'intensificadores' y 'negadores' "
+                 "(por defecto, los diccionarios de EmotionLibrary)"
+        )
+        parser.add_argument("--descripcion", default="", help="Nota para identificar la versión")
+
+    def handle(self, *args, **options):
+        if options["fuente"]:
+            try:
+                with open(options["fuente"], encoding="utf-8") as fichero:
+                    contenido = json.load(fichero)
+                # Compilar antes de publicar: una fuente inválida no llega a la tabla
+                lexico = lexico_desde_fuente(contenido)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"No se pudo leer la fuente del léxico: {e}")
+        else:
+            contenido = {
+                "emociones": EmotionLibrary.EMOTIONS_DICT,
+                "intensificadores": EmotionLibrary.INTENSIFIERS,
+                "negadores": EmotionLibrary.NEGATORS,
+            }
+            lexico = lexico_desde_fuente(contenido)
+
+        fila = Lexico.objects.create(contenido=contenido, descripcion=options["descripcion"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Léxico {lexico.version} publicado como versión {fila.id} ({len(lexico)} frases)"
+        ))
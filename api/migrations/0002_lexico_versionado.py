@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lexico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descripcion', models.CharField(blank=True, default='', max_length=200)),
+                ('contenido', models.JSONField()),
+                ('activo', models.BooleanField(default=True)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='evaluacionemocional',
+            name='version_lexico',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+    ]
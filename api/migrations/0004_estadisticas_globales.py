@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_eventlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaGlobal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='es_admin',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_estadisticas_globales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CubetaEstres',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancho', models.PositiveIntegerField()),
+                ('inicio', models.BigIntegerField()),
+                ('emocion', models.CharField(max_length=50)),
+                ('nivel', models.PositiveSmallIntegerField()),
+                ('cuenta', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancho', 'inicio', 'emocion', 'nivel'), name='cubeta_estres_unica')],
+            },
+        ),
+    ]
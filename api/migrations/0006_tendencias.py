@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_cubetas_estres'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TendenciaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ewma', models.FloatField()),
+                ('cusum', models.FloatField(default=0)),
+                ('emocion', models.CharField(blank=True, default='', max_length=50)),
+                ('racha', models.PositiveIntegerField(default=0)),
+                ('racha_alta', models.PositiveIntegerField(default=0)),
+                ('eventos', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tendencia', to='api.usuario')),
+            ],
+        ),
+    ]
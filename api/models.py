@@ -1,6 +1,7 @@
 from django.db import models
 from django.db import models
 from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
 class Usuario(models.Model):
@@ -8,6 +9,7 @@ class Usuario(models.Model):
     correo = models.EmailField(unique=True)
     contraseña = models.CharField(max_length=255)
     fecha_creacion = models.DateTimeField(default=timezone.now)
+    es_admin = models.BooleanField(default=False)
 
     def save(self, *args, **kwargs):
         if not self.contraseña.startswith("pbkdf2_"):
@@ -20,7 +22,75 @@ class EvaluacionEmocional(models.Model):
     emocion = models.CharField(max_length=50)
     nivel_estres = models.IntegerField()
     recomendacion = models.TextField()
+    version_lexico = models.CharField(max_length=40, blank=True, default="")
     fecha = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.usuario.nombre} - {self.emocion}"
+
+
+class Lexico(models.Model):
+    """Versión del léxico emocional editable sin redesplegar (ver api/lexicon_registry.py)."""
+    descripcion = models.CharField(max_length=200, blank=True, default="")
+    # {"emociones": {...}, "intensificadores": {...}, "negadores": [...]}
+    contenido = models.JSONField()
+    activo = models.BooleanField(default=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Léxico {self.id} ({self.descripcion})"
+
+
+class EventLog(models.Model):
+    """Evento del sistema guardado por DatabaseObserver (ver api/event_log.py)."""
+    tipo = models.CharField(max_length=50, db_index=True)
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    fecha = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.tipo} ({self.fecha:%Y-%m-%d %H:%M:%S})"
+
+
+class EstadisticaGlobal(models.Model):
+    """Contador de StatisticsObserver sumado entre todos los workers (ver api/shared_stats.py)."""
+    clave = models.CharField(max_length=100, unique=True)
+    valor = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.clave} = {self.valor}"
+
+
+class CubetaEstres(models.Model):
+    """
+    Evaluaciones de un intervalo de tiempo por emoción y nivel de estrés,
+    sumadas entre todos los workers (ver api/stress_stats.py).
+    """
+    # Segundos por intervalo (uno por ventana) y número de intervalo desde el epoch
+    ancho = models.PositiveIntegerField()
+    inicio = models.BigIntegerField()
+    emocion = models.CharField(max_length=50)
+    nivel = models.PositiveSmallIntegerField()
+    cuenta = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ancho", "inicio", "emocion", "nivel"], name="cubeta_estres_unica"),
+        ]
+
+    def __str__(self):
+        return f"{self.ancho}s #{self.inicio} {self.emocion}/{self.nivel}: {self.cuenta}"
+
+
+class TendenciaUsuario(models.Model):
+    """Estado de los detectores de tendencia de estrés de un usuario (ver api/trends.py)."""
+    usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='tendencia')
+    ewma = models.FloatField()
+    cusum = models.FloatField(default=0)
+    emocion = models.CharField(max_length=50, blank=True, default="")
+    racha = models.PositiveIntegerField(default=0)
+    racha_alta = models.PositiveIntegerField(default=0)
+    eventos = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Tendencia de {self.usuario_id}: ewma {self.ewma:.1f}, cusum {self.cusum:.1f}"
@@ -0,0 +1,118 @@
+"""
+Reglas de negación e intensificación para la puntuación de MindCare-AI.
+
+Un negador afecta a las frases emocionales que empiezan hasta
+``ventana_negacion`` tokens después de él ("no me siento feliz"), y varios
+negadores seguidos cuentan como una sola negación ("no me siento nada feliz").
+Un intensificador afecta a las frases que empiezan hasta
+``ventana_intensificador`` tokens después, y los intensificadores encadenados
+se multiplican hasta ``max_intensificacion`` ("muy pero muy triste").
+La puntuación de ``puntuacion_corte`` cierra el alcance de ambos.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from .lexicon import TOKEN_RE
+
+# Posición de un modificador que no ha aparecido: queda fuera de cualquier ventana
+SIN_POSICION = -(1 << 30)
+
+
+class ReglasModificadores:
+    """
+    Configuración del alcance de negadores e intensificadores.
+
+    Args:
+        ventana_negacion: Tokens que puede haber entre un negador y la frase
+        ventana_intensificador: Tokens que puede haber entre un intensificador y la frase
+        max_intensificacion: Tope del factor de intensificadores encadenados
+        acumular_intensificadores: Si False, solo cuenta el último intensificador
+        puntuacion_corte: Caracteres que cierran el alcance de los modificadores
+    """
+
+    __slots__ = ("ventana_negacion", "ventana_intensificador", "max_intensificacion",
+                 "acumular_intensificadores", "puntuacion_corte", "_corte_re", "_token_re", "_signos")
+
+    def __init__(self, ventana_negacion: int = 3, ventana_intensificador: int = 1,
+                 max_intensificacion: float = 3.0, acumular_intensificadores: bool = True,
+                 puntuacion_corte: str = ".,;:!?¡¿…"):
+        self.ventana_negacion = ventana_negacion
+        self.ventana_intensificador = ventana_intensificador
+        self.max_intensificacion = max_intensificacion
+        self.acumular_intensificadores = acumular_intensificadores
+        self.puntuacion_corte = puntuacion_corte
+        self._signos = frozenset(puntuacion_corte)
+        if puntuacion_corte:
+            self._corte_re = re.compile("[%s]" % re.escape(puntuacion_corte))
+            self._token_re = re.compile(r"%s|[%s]" % (TOKEN_RE.pattern, re.escape(puntuacion_corte)))
+        else:
+            self._corte_re = self._token_re = None
+
+    def tokenizar(self, texto: str) -> Tuple[List[str], Sequence[int]]:
+        """
+        Tokeniza como ``tokenizar`` y además retorna los cortes: los índices de
+        los tokens que van justo después de un signo de ``puntuacion_corte``.
+        """
+        return self.separar(texto.lower())
+
+    def separar(self, normalizado: str) -> Tuple[List[str], Sequence[int]]:
+        """Como ``tokenizar``, para un texto que ya está en minúsculas."""
+        if self._corte_re is None or not self._corte_re.search(normalizado):
+            return TOKEN_RE.findall(normalizado), ()
+
+        # Una sola pasada que devuelve palabras y signos de corte intercalados
+        palabras: List[str] = []
+        cortes: List[int] = []
+        signos = self._signos
+        for token in self._token_re.findall(normalizado):
+            if token in signos:
+                if palabras and (not cortes or cortes[-1] != len(palabras)):
+                    cortes.append(len(palabras))
+            else:
+                palabras.append(token)
+        return palabras, cortes
+
+    def __repr__(self) -> str:
+        return (f"ReglasModificadores(ventana_negacion={self.ventana_negacion}, "
+                f"ventana_intensificador={self.ventana_intensificador}, "
+                f"max_intensificacion={self.max_intensificacion}, "
+                f"acumular_intensificadores={self.acumular_intensificadores}, "
+                f"puntuacion_corte={self.puntuacion_corte!r})")
+
+
+# Comportamiento anterior: solo cuenta el modificador justo antes de la frase
+REGLAS_ADYACENTES = ReglasModificadores(
+    ventana_negacion=0, ventana_intensificador=0,
+    acumular_intensificadores=False, puntuacion_corte=""
+)
+
+
+class EstadoPuntuacion:
+    """
+    Estado del puntuador entre dos trozos de un mismo texto.
+
+    ``registros`` son las posiciones, segmentos y factores de los últimos
+    negadores e intensificadores; ``desde`` es el primer token del trozo que
+    aún no se ha puntuado (los anteriores se repiten solo como contexto), y
+    ``acumulados`` las puntuaciones por id de emoción. Su tamaño no depende de
+    la longitud del texto.
+    """
+
+    __slots__ = ("registros", "desde", "acumulados")
+
+    def __init__(self):
+        self.registros: List[float] = [SIN_POSICION, 0, SIN_POSICION, 0, SIN_POSICION, 0, 1.0,
+                                       SIN_POSICION, 0, 1.0]
+        self.desde = 0
+        self.acumulados: Dict[int, list] = {}
+
+    def desplazar(self, posiciones: int, segmentos: int) -> None:
+        """
+        Pasa los registros a las coordenadas del trozo siguiente, que empieza
+        ``posiciones`` tokens y ``segmentos`` cortes más adelante.
+        """
+        registros = self.registros
+        for indice in (0, 2, 4, 7):
+            registros[indice] -= posiciones
+            registros[indice + 1] -= segmentos
@@ -0,0 +1,218 @@
+"""
+Despacho de un evento a sus observadores con timeouts y circuit breakers.
+
+Los observadores con ``concurrente = True`` (los que hacen E/S, como el de
+email) se ejecutan a la vez en un pool de hilos compartido; el resto, uno
+detrás de otro en el hilo que despacha, mientras los del pool avanzan. Cada
+observador tiene un timeout (``Observer.timeout`` o el del despacho): si un
+observador del pool no termina a tiempo se deja de esperarlo, y si uno
+síncrono tarda más, cuenta igualmente como fallo (no se puede interrumpir).
+
+Cada observador tiene además un ``Circuito``: tras ``fallos_max`` fallos o
+timeouts seguidos se abre y el observador deja de recibir eventos; pasados
+``reintento`` segundos se deja pasar un evento de prueba (semiabierto) y,
+según el resultado, el circuito se cierra o vuelve a abrirse.
+
+Como antes, el error de un observador se registra y no afecta a los demás.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturoTimeout
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from .observer_metrics import LatenciasObservadores
+
+logger = logging.getLogger(__name__)
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class Circuito:
+    """
+    Circuit breaker de un observador.
+
+    Args:
+        nombre: Nombre del observador (para los logs)
+        fallos_max: Fallos seguidos que abren el circuito
+        reintento: Segundos con el circuito abierto antes de probar otra vez
+        reloj: Función que da el tiempo en segundos (para tests)
+    """
+
+    def __init__(self, nombre: str, fallos_max: int = 5, reintento: float = 30.0,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.nombre = nombre
+        self.fallos_max = fallos_max
+        self.reintento = reintento
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self.estado = CERRADO
+        self.fallos_seguidos = 0
+        self.abierto_desde = 0.0
+        self.omitidos = 0
+        self.aperturas = 0
+        self._sondeando = False
+
+    def permitir(self) -> bool:
+        """True si el observador debe recibir el evento."""
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and self._reloj() - self.abierto_desde >= self.reintento:
+                self.estado = SEMIABIERTO
+                self._sondeando = False
+            if self.estado == SEMIABIERTO and not self._sondeando:
+                # Un solo evento de prueba hasta conocer su resultado
+                self._sondeando = True
+                return True
+            self.omitidos += 1
+            return False
+
+    def exito(self) -> None:
+        with self._lock:
+            if self.estado != CERRADO:
+                logger.info("Circuito de %s cerrado", self.nombre)
+            self.estado = CERRADO
+            self.fallos_seguidos = 0
+            self._sondeando = False
+
+    def fallo(self) -> None:
+        with self._lock:
+            self.fallos_seguidos += 1
+            self._sondeando = False
+            if self.estado == SEMIABIERTO or (self.estado == CERRADO and self.fallos_seguidos >= self.fallos_max):
+                self.estado = ABIERTO
+                self.abierto_desde = self._reloj()
+                self.aperturas += 1
+                logger.error("Circuito de %s abierto tras %d fallos seguidos; se reintentará en %g s",
+                             self.nombre, self.fallos_seguidos, self.reintento)
+
+    def como_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "fallos_seguidos": self.fallos_seguidos,
+                "omitidos": self.omitidos,
+                "aperturas": self.aperturas,
+            }
+
+
+class DespachoParalelo:
+    """
+    Despacha eventos a observadores con pool compartido, timeouts y circuitos.
+
+    Args:
+        hilos: Hilos del pool para los observadores concurrentes
+        timeout: Segundos por observador, si el observador no define el suyo
+        fallos_max, reintento: Opciones de los circuitos (ver Circuito)
+    """
+
+    def __init__(self, hilos: int = 4, timeout: float = 2.0, fallos_max: int = 5, reintento: float = 30.0):
+        self.timeout = timeout
+        self.fallos_max = fallos_max
+        self.reintento = reintento
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="observadores")
+        self._circuitos: Dict[Any, Circuito] = {}
+        self._lock = threading.Lock()
+
+    def circuito(self, observer) -> Circuito:
+        """Circuito de un observador (se crea la primera vez)."""
+        circuito = self._circuitos.get(observer)
+        if circuito is None:
+            with self._lock:
+                circuito = self._circuitos.setdefault(
+                    observer, Circuito(observer.__class__.__name__, self.fallos_max, self.reintento)
+                )
+        return circuito
+
+    def despachar(self, observers: Sequence[Any], event_type: str, data: Dict[str, Any],
+                  latencias: Optional[LatenciasObservadores] = None) -> None:
+        """
+        Entrega el evento a cada observador con el circuito cerrado (o en
+        prueba) y registra en ``latencias`` lo que tarda cada update().
+        """
+        inicio = time.monotonic()
+        en_pool = []
+        for observer in observers:
+            circuito = self.circuito(observer)
+            if not circuito.permitir():
+                continue
+            timeout = observer.timeout if observer.timeout is not None else self.timeout
+            if observer.concurrente:
+                futuro = self._pool.submit(self._cronometrar, observer, event_type, data, latencias)
+                en_pool.append((inicio + timeout, observer, circuito, futuro))
+            else:
+                self._ejecutar(observer, circuito, timeout, event_type, data, latencias)
+
+        # Todos empezaron a la vez: se espera a cada uno hasta su propio límite
+        en_pool.sort(key=lambda pendiente: pendiente[0])
+        for limite, observer, circuito, futuro in en_pool:
+            try:
+                futuro.result(timeout=max(limite - time.monotonic(), 0))
+            except FuturoTimeout:
+                circuito.fallo()
+                logger.error("Timeout en observador %s (%g s) con el evento '%s'",
+                             observer.__class__.__name__, limite - inicio, event_type)
+            except Exception as e:
+                circuito.fallo()
+                logger.error("Error en observador %s: %s", observer.__class__.__name__, e)
+            else:
+                circuito.exito()
+
+    @staticmethod
+    def _cronometrar(observer, event_type: str, data: Dict[str, Any],
+                     latencias: Optional[LatenciasObservadores]) -> None:
+        # En el hilo del pool: se registra lo que tarda aunque ya no se le espere
+        inicio = time.perf_counter()
+        try:
+            observer.update(event_type, data)
+        finally:
+            if latencias is not None:
+                latencias.registrar(observer.__class__.__name__, event_type, time.perf_counter() - inicio)
+
+    def _ejecutar(self, observer, circuito: Circuito, timeout: float, event_type: str, data: Dict[str, Any],
+                  latencias: Optional[LatenciasObservadores]) -> None:
+        inicio = time.perf_counter()
+        try:
+            observer.update(event_type, data)
+        except Exception as e:
+            circuito.fallo()
+            logger.error("Error en observador %s: %s", observer.__class__.__name__, e)
+            return
+        finally:
+            duracion = time.perf_counter() - inicio
+            if latencias is not None:
+                latencias.registrar(observer.__class__.__name__, event_type, duracion)
+
+        if duracion > timeout:
+            circuito.fallo()
+            logger.error("Observador %s tardó %.3f s (timeout %g s) con el evento '%s'",
+                         observer.__class__.__name__, duracion, timeout, event_type)
+        else:
+            circuito.exito()
+
+    def estado(self) -> Dict[str, Dict[str, Any]]:
+        """Estado del circuito de cada observador que ha recibido eventos."""
+        with self._lock:
+            circuitos = list(self._circuitos.values())
+        return {circuito.nombre: circuito.como_dict() for circuito in circuitos}
+
+    def cerrar(self, esperar: bool = True) -> None:
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+
+def crear_despacho(config: Optional[Dict[str, Any]]) -> Optional[DespachoParalelo]:
+    """DespachoParalelo según ``settings.OBSERVADORES`` (None si HILOS es 0)."""
+    config = config or {}
+    if not config.get("HILOS"):
+        return None
+    return DespachoParalelo(
+        hilos=config["HILOS"],
+        timeout=config.get("TIMEOUT_MS", 2000) / 1000,
+        fallos_max=config.get("FALLOS_MAX", 5),
+        reintento=config.get("REINTENTO_S", 30),
+    )
@@ -0,0 +1,163 @@
+"""
+Latencia de los observadores de MindCare-AI.
+
+Cada llamada a ``observer.update`` se cronometra y se acumula en un
+histograma por (observador, tipo de evento); cada despacho completo de un
+evento, en otro por tipo de evento. Los histogramas tienen cubetas fijas en
+escala logarítmica (de 10 µs a 10 s), así que registrar una llamada cuesta lo
+mismo siempre y la memoria no crece con el número de eventos. Los percentiles
+se estiman con el límite superior de la cubeta que los contiene.
+
+Las llamadas y los despachos que superan su umbral se registran además como
+warning en el log.
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de las cubetas, en segundos (la última cubeta no tiene límite)
+LIMITES = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _etiqueta(limite: float) -> str:
+    if limite < 0.001:
+        return f"<={limite * 1e6:g}us"
+    if limite < 1:
+        return f"<={limite * 1e3:g}ms"
+    return f"<={limite:g}s"
+
+
+ETIQUETAS = tuple(_etiqueta(limite) for limite in LIMITES) + (f">{LIMITES[-1]:g}s",)
+
+
+class HistogramaLatencia:
+    """Histograma de duraciones con cubetas fijas."""
+
+    __slots__ = ("cuentas", "total", "suma", "maximo")
+
+    def __init__(self):
+        self.cuentas: List[int] = [0] * (len(LIMITES) + 1)
+        self.total = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float) -> None:
+        self.cuentas[bisect_left(LIMITES, segundos)] += 1
+        self.total += 1
+        self.suma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        """Estimación del percentil ``p`` (0-100) en segundos."""
+        if not self.total:
+            return 0.0
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for indice, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo and cuenta:
+                return min(LIMITES[indice], self.maximo) if indice < len(LIMITES) else self.maximo
+        return self.maximo
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "llamadas": self.total,
+            "media_ms": self.suma / self.total * 1000 if self.total else 0.0,
+            "p50_ms": self.percentil(50) * 1000,
+            "p90_ms": self.percentil(90) * 1000,
+            "p99_ms": self.percentil(99) * 1000,
+            "max_ms": self.maximo * 1000,
+            "cubetas": {ETIQUETAS[i]: cuenta for i, cuenta in enumerate(self.cuentas) if cuenta},
+        }
+
+
+class LatenciasObservadores:
+    """
+    Histogramas de latencia por (observador, tipo de evento) y por despacho.
+
+    Args:
+        umbral_lento: Segundos a partir de los que una llamada a update() se avisa en el log
+        umbral_despacho: Segundos a partir de los que un despacho completo se avisa en el log
+    """
+
+    def __init__(self, umbral_lento: Optional[float] = 0.1, umbral_despacho: Optional[float] = 0.25):
+        self.umbral_lento = umbral_lento
+        self.umbral_despacho = umbral_despacho
+        self._lock = threading.Lock()
+        self._observadores: Dict[Tuple[str, str], HistogramaLatencia] = {}
+        self._despachos: Dict[str, HistogramaLatencia] = {}
+
+    def registrar(self, observador: str, event_type: str, segundos: float) -> None:
+        """Registra lo que tardó una llamada a update()."""
+        clave = (observador, event_type)
+        with self._lock:
+            histograma = self._observadores.get(clave)
+            if histograma is None:
+                histograma = self._observadores[clave] = HistogramaLatencia()
+            histograma.registrar(segundos)
+
+        if self.umbral_lento is not None and segundos > self.umbral_lento:
+            logger.warning("Observador lento: %s tardó %.1f ms con el evento '%s'",
+                           observador, segundos * 1000, event_type)
+
+    def registrar_despacho(self, event_type: str, segundos: float, observadores: int) -> None:
+        """Registra lo que tardó entregar un evento a todos sus observadores."""
+        with self._lock:
+            histograma = self._despachos.get(event_type)
+            if histograma is None:
+                histograma = self._despachos[event_type] = HistogramaLatencia()
+            histograma.registrar(segundos)
+
+        if self.umbral_despacho is not None and segundos > self.umbral_despacho:
+            logger.warning("Despacho lento: el evento '%s' tardó %.1f ms en %d observadores",
+                           event_type, segundos * 1000, observadores)
+
+    def como_dict(self) -> Dict[str, Any]:
+        """{"observadores": {observador: {evento: histograma}}, "despachos": {evento: histograma}}"""
+        with self._lock:
+            observadores: Dict[str, Dict[str, Any]] = {}
+            for (observador, event_type), histograma in sorted(self._observadores.items()):
+                observadores.setdefault(observador, {})[event_type] = histograma.como_dict()
+            despachos = {event_type: histograma.como_dict()
+                         for event_type, histograma in sorted(self._despachos.items())}
+        return {"observadores": observadores, "despachos": despachos}
+
+    def informe(self) -> str:
+        """Tabla por (observador, evento), de mayor a menor p99."""
+        return informe_latencias(self.como_dict())
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._observadores.clear()
+            self._despachos.clear()
+
+
+def informe_latencias(datos: Dict[str, Any], umbral_ms: Optional[float] = None) -> str:
+    """
+    Tabla por (observador, evento) a partir de ``LatenciasObservadores.como_dict()``,
+    de mayor a menor p99. Con ``umbral_ms`` se marcan las filas cuyo p99 lo supera.
+    """
+    filas = [
+        (observador, event_type, fila)
+        for observador, eventos in datos["observadores"].items()
+        for event_type, fila in eventos.items()
+    ]
+    filas.sort(key=lambda fila: (-fila[2]["p99_ms"], fila[0], fila[1]))
+
+    lineas = [f"{'observador':<28}{'evento':<24}{'llamadas':>9}{'media ms':>10}"
+              f"{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}"]
+    for observador, event_type, fila in filas:
+        lento = umbral_ms is not None and fila["p99_ms"] > umbral_ms
+        lineas.append(f"{observador:<28}{event_type:<24}{fila['llamadas']:>9}{fila['media_ms']:>10.3f}"
+                      f"{fila['p50_ms']:>9.3f}{fila['p99_ms']:>9.3f}{fila['max_ms']:>9.3f}"
+                      f"{'  LENTO' if lento else ''}")
+    return "\n".join(lineas)
@@ -4,9 +4,21 @@ Permite notificar a múltiples observadores cuando ocurren eventos en el sistema
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, FrozenSet, Optional, Tuple
 from datetime import datetime
+import atexit
 import logging
+import time
+
+from .alert_limiter import CRITICA, Decision, LimitadorAlertas, crear_limitador, severidad_estres
+from .event_bus import BLOQUEAR, BusEventos
+from .event_log import EscritorEventos
+from .observer_dispatch import DespachoParalelo
+from .observer_metrics import LatenciasObservadores
+from .shared_stats import PREFIJO_EMOCION, PREFIJO_ESTRES, EstadisticasCompartidas, resumen_estadisticas
+from .stress_stats import HistogramaEstres, VentanasEstres, nivel_discreto
+from .trends import TendenciasUsuarios
+from .user_history import HistorialUsuarios, crear_historial
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -20,8 +32,19 @@ class Observer(ABC):
     """
     Interfaz base para todos los observadores.
     Los observadores concretos deben implementar el método update().
+    
+    event_types declara los tipos de evento que recibe el observador; None
+    (por defecto) los recibe todos. Se lee al hacer attach().
+    
+    Con un DespachoParalelo (api/observer_dispatch.py), los observadores con
+    concurrente = True se ejecutan en el pool de hilos compartido, y timeout
+    (segundos) sustituye al timeout general para este observador.
     """
     
+    event_types: Optional[FrozenSet[str]] = None
+    concurrente: bool = False
+    timeout: Optional[float] = None
+    
     @abstractmethod
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """
@@ -38,22 +61,53 @@ class Subject:
     """
     Clase base para objetos observables (Subject).
     Mantiene una lista de observadores y los notifica cuando ocurren cambios.
+    
+    Cada tipo de evento se despacha solo a los observadores suscritos a él
+    (más los que reciben todos), según una tabla que se reconstruye en
+    attach() y detach(). Un evento sin suscriptores no llama a nadie.
+    
+    Cada llamada a update() y cada despacho se cronometran en latencias
+    (api/observer_metrics.py).
     """
     
     def __init__(self):
         self._observers: List[Observer] = []
+        # tipo de evento -> observadores, en orden de registro; los tipos que
+        # no están en la tabla van solo a los que reciben todos (_comodines)
+        self._tabla: Dict[str, Tuple[Observer, ...]] = {}
+        self._comodines: Tuple[Observer, ...] = ()
+        # Pool, timeouts y circuit breakers (None = uno detrás de otro, sin más)
+        self._despacho: Optional[DespachoParalelo] = None
+        self.latencias = LatenciasObservadores()
     
     def attach(self, observer: Observer) -> None:
         """Agrega un observador a la lista."""
         if observer not in self._observers:
             self._observers.append(observer)
-            logger.info(f"Observador {observer.__class__.__name__} agregado")
+            self._reconstruir_tabla()
+            logger.info("Observador %s agregado", observer.__class__.__name__)
     
     def detach(self, observer: Observer) -> None:
         """Remueve un observador de la lista."""
         if observer in self._observers:
             self._observers.remove(observer)
-            logger.info(f"Observador {observer.__class__.__name__} removido")
+            self._reconstruir_tabla()
+            logger.info("Observador %s removido", observer.__class__.__name__)
+    
+    def _reconstruir_tabla(self) -> None:
+        # Se reemplazan enteras: los hilos que despachan ven la tabla anterior
+        # o la nueva, nunca una a medias
+        comodines = tuple(o for o in self._observers if o.event_types is None)
+        tipos = {tipo for o in self._observers if o.event_types is not None for tipo in o.event_types}
+        self._tabla = {
+            tipo: tuple(o for o in self._observers if o.event_types is None or tipo in o.event_types)
+            for tipo in tipos
+        }
+        self._comodines = comodines
+    
+    def observadores_de(self, event_type: str) -> Tuple[Observer, ...]:
+        """Observadores que reciben un tipo de evento."""
+        return self._tabla.get(event_type, self._comodines)
     
     def notify(self, event_type: str, data: Dict[str, Any]) -> None:
         """
@@ -63,13 +117,29 @@ class Subject:
             event_type: Tipo de evento (ej: 'usuario_registrado', 'analisis_completado')
             data: Datos del evento
         """
-        logger.info(f"Notificando evento '{event_type}' a {len(self._observers)} observadores")
+        self._despachar(event_type, data)
+    
+    def _despachar(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Llama a update() de cada observador suscrito; los errores se registran y no se propagan."""
+        observers = self._tabla.get(event_type, self._comodines)
+        if not observers:
+            return
+        logger.info("Notificando evento '%s' a %d observadores", event_type, len(observers))
         
-        for observer in self._observers:
-            try:
-                observer.update(event_type, data)
-            except Exception as e:
-                logger.error(f"Error en observador {observer.__class__.__name__}: {str(e)}")
+        latencias = self.latencias
+        inicio_despacho = time.perf_counter()
+        despacho = self._despacho
+        if despacho is not None:
+            despacho.despachar(observers, event_type, data, latencias)
+        else:
+            for observer in observers:
+                inicio = time.perf_counter()
+                try:
+                    observer.update(event_type, data)
+                except Exception as e:
+                    logger.error("Error en observador %s: %s", observer.__class__.__name__, e)
+                latencias.registrar(observer.__class__.__name__, event_type, time.perf_counter() - inicio)
+        latencias.registrar_despacho(event_type, time.perf_counter() - inicio_despacho, len(observers))
 
 
 # ==========================================
@@ -79,37 +149,69 @@ class Subject:
 class EmailNotificationObserver(Observer):
     """
     Observador que envía notificaciones por email cuando ocurren eventos importantes.
+    
+    Los emails solo se envían de verdad (con send_mail de Django, por SMTP) si
+    settings.NOTIFICACIONES_EMAIL["HABILITADO"] es True; si no, se registran
+    en el log. Es un observador de E/S: con DespachoParalelo va al pool.
+    
+    La alerta por estrés alto se envía con "alerta_emitida", que AlertObserver
+    publica solo para las alertas que su LimitadorAlertas deja pasar: los
+    emails se limitan con la misma decisión que las alertas.
     """
     
+    event_types = frozenset({"usuario_registrado", "alerta_emitida", "evaluacion_completada"})
+    concurrente = True
+    
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """Envía notificación por email según el tipo de evento."""
         
         if event_type == "usuario_registrado":
             self._enviar_email_bienvenida(data)
         
-        elif event_type == "analisis_estres_alto":
+        elif event_type == "alerta_emitida":
             self._enviar_alerta_estres(data)
         
         elif event_type == "evaluacion_completada":
             self._enviar_resumen_evaluacion(data)
     
     def _enviar_email_bienvenida(self, data: Dict[str, Any]) -> None:
-        """Simula envío de email de bienvenida."""
+        """Envía el email de bienvenida."""
         usuario = data.get('usuario')
-        logger.info(f"📧 EMAIL: Enviando bienvenida a {usuario.get('correo', 'N/A')}")
-        # Aquí integrarías un servicio real de email (SendGrid, AWS SES, etc.)
+        logger.info("📧 EMAIL: Enviando bienvenida a %s", usuario.get('correo', 'N/A'))
+        self._enviar(usuario.get('correo'), "Bienvenido a MindCare",
+                     f"Hola {usuario.get('nombre', '')}, gracias por registrarte en MindCare.")
     
     def _enviar_alerta_estres(self, data: Dict[str, Any]) -> None:
-        """Simula envío de alerta por estrés alto."""
+        """Envía la alerta por estrés alto."""
         usuario = data.get('usuario')
         nivel_estres = data.get('nivel_estres')
-        logger.warning(f"⚠️ EMAIL: Alerta de estrés alto ({nivel_estres}/10) para {usuario.get('correo', 'N/A')}")
+        logger.warning("⚠️ EMAIL: Alerta de estrés alto (%s/10) para %s", nivel_estres, usuario.get('correo', 'N/A'))
+        suprimidas = data.get('suprimidas', 0)
+        resumen = (f"Desde nuestro último aviso, {suprimidas} evaluación(es) más indicaron estrés alto.\n\n"
+                   if suprimidas else "")
+        self._enviar(usuario.get('correo'), "MindCare: estamos contigo",
+                     f"Tu última evaluación indica un nivel de estrés de {nivel_estres}/10.\n\n"
+                     f"{resumen}{data.get('recomendacion', '')}")
     
     def _enviar_resumen_evaluacion(self, data: Dict[str, Any]) -> None:
-        """Simula envío de resumen de evaluación."""
+        """Envía el resumen de la evaluación."""
         usuario = data.get('usuario')
         emocion = data.get('emocion')
-        logger.info(f"📊 EMAIL: Resumen de evaluación ({emocion}) para {usuario.get('correo', 'N/A')}")
+        logger.info("📊 EMAIL: Resumen de evaluación (%s) para %s", emocion, usuario.get('correo', 'N/A'))
+        self._enviar(usuario.get('correo'), "MindCare: resumen de tu evaluación",
+                     f"Emoción principal: {emocion}\nNivel de estrés: {data.get('nivel_estres')}/10\n\n"
+                     f"{data.get('recomendacion', '')}")
+    
+    def _enviar(self, correo: Optional[str], asunto: str, cuerpo: str) -> None:
+        """Envía un email si están habilitados; los errores de SMTP se propagan."""
+        from django.conf import settings
+        
+        config = getattr(settings, "NOTIFICACIONES_EMAIL", {})
+        if not config.get("HABILITADO") or not correo:
+            return
+        
+        from django.core.mail import send_mail
+        send_mail(asunto, cuerpo, config.get("REMITENTE") or settings.DEFAULT_FROM_EMAIL, [correo])
 
 
 class LoggingObserver(Observer):
@@ -119,6 +221,10 @@ class LoggingObserver(Observer):
     
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """Registra el evento en los logs."""
+        # Sin INFO habilitado no se construye ni se formatea la entrada
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         log_entry = {
@@ -127,7 +233,7 @@ class LoggingObserver(Observer):
             "data": data
         }
         
-        logger.info(f"📝 LOG: {log_entry}")
+        logger.info("📝 LOG: %s", log_entry)
         
         # Aquí podrías guardar en una base de datos o archivo
         # Por ejemplo: guardar en tabla de auditoría
@@ -136,9 +242,19 @@ class LoggingObserver(Observer):
 class StatisticsObserver(Observer):
     """
     Observador que recopila estadísticas sobre los eventos del sistema.
+    
+    stats cuenta solo los eventos de este proceso. Con EstadisticasCompartidas
+    (api/shared_stats.py) cada evento se suma también en contadores que se
+    vuelcan a la base de datos y se suman entre todos los workers.
+    
+    La distribución del nivel de estrés se guarda en histograma_estres, y la
+    de las últimas 5 min, 1 h y 24 h en ventanas (api/stress_stats.py).
     """
     
-    def __init__(self):
+    event_types = frozenset({"usuario_registrado", "evaluacion_completada", "analisis_estres_alto"})
+    
+    def __init__(self, compartidas: Optional[EstadisticasCompartidas] = None):
+        self.compartidas = compartidas
         self.stats = {
             "total_usuarios": 0,
             "total_analisis": 0,
@@ -146,12 +262,18 @@ class StatisticsObserver(Observer):
             "nivel_estres_promedio": 0,
             "alertas_estres_alto": 0
         }
+        self._suma_estres = 0
+        self.histograma_estres = HistogramaEstres()
+        self.ventanas = VentanasEstres()
     
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """Actualiza estadísticas según el evento."""
+        compartidas = self.compartidas
         
         if event_type == "usuario_registrado":
             self.stats["total_usuarios"] += 1
+            if compartidas is not None:
+                compartidas.sumar("total_usuarios")
         
         elif event_type == "evaluacion_completada":
             self.stats["total_analisis"] += 1
@@ -161,15 +283,29 @@ class StatisticsObserver(Observer):
                 self.stats["emociones_detectadas"][emocion] = 0
             self.stats["emociones_detectadas"][emocion] += 1
             
-            # Calcular promedio de estrés
+            # Promedio como suma / total: actualizarlo incrementalmente acumula error
             nivel_estres = data.get("nivel_estres", 0)
-            total_prev = self.stats["nivel_estres_promedio"] * (self.stats["total_analisis"] - 1)
-            self.stats["nivel_estres_promedio"] = (total_prev + nivel_estres) / self.stats["total_analisis"]
+            self._suma_estres += nivel_estres
+            self.stats["nivel_estres_promedio"] = self._suma_estres / self.stats["total_analisis"]
+            
+            nivel = nivel_discreto(nivel_estres)
+            self.histograma_estres.registrar(nivel)
+            self.ventanas.registrar(emocion, nivel)
+            
+            if compartidas is not None:
+                # Se suma el estrés, no el promedio: las sumas de los workers se pueden sumar
+                compartidas.sumar("total_analisis")
+                compartidas.sumar(PREFIJO_EMOCION + emocion)
+                compartidas.sumar("suma_estres", nivel_estres)
+                compartidas.sumar(f"{PREFIJO_ESTRES}{nivel}")
+                compartidas.ventanas.registrar(emocion, nivel)
         
         elif event_type == "analisis_estres_alto":
             self.stats["alertas_estres_alto"] += 1
+            if compartidas is not None:
+                compartidas.sumar("alertas_estres_alto")
         
-        logger.info(f"📊 STATS: {self.stats}")
+        logger.info("📊 STATS: %s", self.stats)
     
     def get_stats(self) -> Dict[str, Any]:
         """Retorna las estadísticas actuales."""
@@ -178,96 +314,172 @@ class StatisticsObserver(Observer):
 
 class DatabaseObserver(Observer):
     """
-    Observador que persiste eventos importantes en la base de datos.
+    Observador que persiste los eventos del sistema en la base de datos.
+    
+    Con un EscritorEventos (api/event_log.py) cada evento se deja en su buffer
+    y se guarda como EventLog en lotes, desde el hilo escritor y su propia
+    conexión; sin él, solo se registra en el log.
     """
     
+    def __init__(self, escritor: Optional[EscritorEventos] = None):
+        self.escritor = escritor
+    
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
-        """Guarda el evento en la base de datos."""
-        
-        try:
-            # Importación local para evitar dependencias circulares
-            from .models import EvaluacionEmocional
-            
-            if event_type == "evaluacion_completada":
-                # Ya se guarda en la vista, pero aquí podrías agregar metadata adicional
-                logger.info(f"💾 DB: Evaluación guardada correctamente")
-            
-            # Aquí podrías crear un modelo EventLog para guardar todos los eventos
-            # EventLog.objects.create(event_type=event_type, data=data, timestamp=datetime.now())
-            
-        except Exception as e:
-            logger.error(f"Error guardando en base de datos: {str(e)}")
+        """Deja el evento en el buffer del escritor."""
+        escritor = self.escritor
+        if escritor is not None:
+            escritor.agregar(event_type, data)
+        elif event_type == "evaluacion_completada":
+            # La evaluación ya se guarda en la vista
+            logger.info("💾 DB: Evaluación guardada correctamente")
 
 
 class RecommendationObserver(Observer):
     """
     Observador que genera recomendaciones personalizadas basadas en patrones de uso.
+    
+    Los patrones se detectan de forma incremental (TendenciasUsuarios,
+    api/trends.py), sin recorrer el historial; cada tendencia detectada se
+    publica como evento "tendencia_detectada" con publicar (el notify del
+    EventManager), junto con las últimas evaluaciones del usuario.
+    
+    Esas evaluaciones salen de un historial acotado en memoria
+    (HistorialUsuarios, api/user_history.py). Cada evento solo lo anota en
+    memoria; la base de datos se consulta al detectar una tendencia de un
+    usuario cuyo historial no se ha recargado desde que entró en memoria.
     """
     
-    def __init__(self):
-        self.user_history = {}  # {usuario_id: [evaluaciones]}
+    event_types = frozenset({"evaluacion_completada"})
+    
+    def __init__(self, historial: Optional[HistorialUsuarios] = None,
+                 tendencias: Optional[TendenciasUsuarios] = None,
+                 publicar: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        if historial is None:
+            from django.conf import settings
+            
+            historial = crear_historial(getattr(settings, "HISTORIAL_USUARIOS", {}))
+        self.historial = historial
+        self.tendencias = tendencias if tendencias is not None else TendenciasUsuarios()
+        self.publicar = publicar
     
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """Analiza patrones y genera recomendaciones."""
         
         if event_type == "evaluacion_completada":
             usuario_id = data.get("usuario_id")
-            
-            if usuario_id not in self.user_history:
-                self.user_history[usuario_id] = []
-            
-            self.user_history[usuario_id].append({
-                "emocion": data.get("emocion"),
-                "nivel_estres": data.get("nivel_estres"),
-                "fecha": datetime.now()
-            })
+            self.historial.agregar(usuario_id, data.get("emocion"), data.get("nivel_estres"), rehidratar=False)
             
             # Detectar patrones
-            self._detectar_patrones(usuario_id)
+            self._detectar_patrones(usuario_id, data)
     
-    def _detectar_patrones(self, usuario_id: int) -> None:
-        """Detecta patrones en el historial del usuario."""
-        historial = self.user_history.get(usuario_id, [])
+    def _detectar_patrones(self, usuario_id: int, data: Dict[str, Any]) -> None:
+        """Actualiza los detectores del usuario y publica las tendencias detectadas."""
+        nivel_estres = data.get("nivel_estres")
+        if nivel_estres is None:
+            return
         
-        if len(historial) >= 3:
-            # Analizar últimas 3 evaluaciones
-            ultimas_3 = historial[-3:]
-            niveles_estres = [e["nivel_estres"] for e in ultimas_3]
-            
-            if all(n > 7 for n in niveles_estres):
-                logger.warning(f"🔔 PATRÓN DETECTADO: Usuario {usuario_id} tiene estrés alto consistente")
-                # Aquí podrías generar una recomendación especial o alertar a un profesional
+        emocion = data.get("emocion")
+        detectadas = self.tendencias.procesar(usuario_id, emocion, nivel_estres)
+        if not detectadas:
+            return
+        
+        estado = self.tendencias.estado(usuario_id)
+        historial = [
+            {"emocion": emocion_previa, "nivel_estres": nivel, "timestamp": datetime.fromtimestamp(momento).isoformat()}
+            for emocion_previa, nivel, momento in self.historial.historial(usuario_id, completar=True)
+        ]
+        for tendencia in detectadas:
+            logger.warning("🔔 PATRÓN DETECTADO: Usuario %s: %s", usuario_id, tendencia)
+            if self.publicar is not None:
+                self.publicar("tendencia_detectada", {
+                    "usuario_id": usuario_id,
+                    "usuario": data.get("usuario", {}),
+                    "tendencia": tendencia,
+                    "emocion": emocion,
+                    "nivel_estres": nivel_estres,
+                    "estado": estado.como_dict() if estado is not None else None,
+                    "historial": historial,
+                    "timestamp": datetime.now().isoformat()
+                })
 
 
 class AlertObserver(Observer):
     """
     Observador que genera alertas cuando se detectan situaciones críticas.
+    
+    Cada alerta pasa por un LimitadorAlertas (api/alert_limiter.py): las
+    repetidas de la misma severidad y las que superan el límite del usuario
+    se suprimen, y la siguiente alerta emitida indica cuántas fueron. Una
+    alerta de mayor severidad (escalada) se emite siempre. Cada alerta
+    emitida se publica como "alerta_emitida" con publicar (el notify del
+    EventManager), para que los demás canales, como el email, sigan la misma
+    decisión.
     """
     
+    event_types = frozenset({"analisis_estres_alto"})
+    
+    def __init__(self, limitador: Optional[LimitadorAlertas] = None,
+                 publicar: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        if limitador is None:
+            from django.conf import settings
+            
+            limitador = crear_limitador(getattr(settings, "ALERTAS", {}))
+        self.limitador = limitador
+        self.publicar = publicar
+    
     def update(self, event_type: str, data: Dict[str, Any]) -> None:
         """Genera alertas para situaciones críticas."""
         
         if event_type == "analisis_estres_alto":
             nivel_estres = data.get("nivel_estres")
             usuario = data.get("usuario", {})
+            severidad = severidad_estres(nivel_estres)
+            if severidad is None:
+                return
             
-            if nivel_estres >= 9:
-                self._alerta_critica(usuario, nivel_estres)
-            elif nivel_estres >= 7:
-                self._alerta_moderada(usuario, nivel_estres)
+            usuario_id = data.get("usuario_id", usuario.get("id"))
+            if usuario_id is None:
+                # Sin usuario no hay a quién limitar
+                decision = Decision(True)
+            else:
+                decision = self.limitador.decidir(usuario_id, severidad)
+                if not decision.emitir:
+                    logger.debug("Alerta %s suprimida: Usuario %s - Estrés: %s/10",
+                                 severidad, usuario_id, nivel_estres)
+                    return
+            
+            if severidad == CRITICA:
+                self._alerta_critica(usuario, nivel_estres, decision)
+            else:
+                self._alerta_moderada(usuario, nivel_estres, decision)
+            
+            if self.publicar is not None:
+                self.publicar("alerta_emitida", {**data, "severidad": severidad,
+                                                 "suprimidas": decision.suprimidas, "escalada": decision.escalada})
     
-    def _alerta_critica(self, usuario: Dict, nivel_estres: int) -> None:
+    def _alerta_critica(self, usuario: Dict, nivel_estres: int, decision: Decision = Decision(True)) -> None:
         """Genera alerta crítica."""
-        logger.critical(f"🚨 ALERTA CRÍTICA: Usuario {usuario.get('nombre')} - Estrés: {nivel_estres}/10")
+        logger.critical("🚨 ALERTA CRÍTICA: Usuario %s - Estrés: %s/10%s", usuario.get('nombre'), nivel_estres,
+                        self._resumen(decision))
         # Aquí podrías:
         # - Enviar notificación push
         # - Notificar a un profesional de salud mental
         # - Ofrecer recursos de ayuda inmediata
     
-    def _alerta_moderada(self, usuario: Dict, nivel_estres: int) -> None:
+    def _alerta_moderada(self, usuario: Dict, nivel_estres: int, decision: Decision = Decision(True)) -> None:
         """Genera alerta moderada."""
-        logger.warning(f"⚠️ ALERTA MODERADA: Usuario {usuario.get('nombre')} - Estrés: {nivel_estres}/10")
+        logger.warning("⚠️ ALERTA MODERADA: Usuario %s - Estrés: %s/10%s", usuario.get('nombre'), nivel_estres,
+                       self._resumen(decision))
         # Enviar sugerencias de técnicas de relajación
+    
+    @staticmethod
+    def _resumen(decision: Decision) -> str:
+        partes = []
+        if decision.escalada:
+            partes.append("escalada")
+        if decision.suprimidas:
+            partes.append(f"{decision.suprimidas} alerta(s) suprimida(s) desde la anterior")
+        return f" ({', '.join(partes)})" if partes else ""
 
 
 # ==========================================
@@ -278,6 +490,10 @@ class EventManager(Subject):
     """
     Gestor central de eventos (Singleton).
     Coordina la notificación de eventos a todos los observadores registrados.
+    
+    Por defecto notify() llama a los observadores en el hilo que publica el
+    evento. Con configurar_despacho("asincrono") los eventos pasan por un
+    BusEventos (api/event_bus.py) y las vistas no esperan a los observadores.
     """
     
     _instance = None
@@ -293,6 +509,10 @@ class EventManager(Subject):
             return
         
         super().__init__()
+        self._bus: Optional[BusEventos] = None
+        self._escritor: Optional[EscritorEventos] = None
+        self._compartidas: Optional[EstadisticasCompartidas] = None
+        self._tendencias: Optional[TendenciasUsuarios] = None
         self._initialized = True
         
         # Registrar observadores por defecto
@@ -304,11 +524,160 @@ class EventManager(Subject):
         self.attach(StatisticsObserver())
         self.attach(EmailNotificationObserver())
         self.attach(DatabaseObserver())
-        self.attach(RecommendationObserver())
-        self.attach(AlertObserver())
+        self.attach(RecommendationObserver(publicar=self.notify))
+        self.attach(AlertObserver(publicar=self.notify))
         
         logger.info("✅ Observadores predeterminados registrados")
     
+    # Modo de despacho
+    
+    def configurar_despacho(self, modo: str = "sincrono", tam_cola: int = 1000, hilos: int = 1,
+                            desborde: str = BLOQUEAR, espera_bloqueo: Optional[float] = 1.0,
+                            espera_cierre: Optional[float] = 5.0) -> None:
+        """
+        Elige cómo se despachan los eventos.
+        
+        Args:
+            modo: "sincrono" (en el hilo que publica) o "asincrono" (cola y hilos de fondo)
+            tam_cola, hilos, desborde, espera_bloqueo: Opciones de BusEventos
+            espera_cierre: Segundos para despachar lo pendiente al terminar el proceso
+        """
+        if modo not in ("sincrono", "asincrono"):
+            raise ValueError(f"Modo de despacho desconocido: {modo}")
+        
+        anterior, self._bus = self._bus, None
+        if anterior is not None:
+            atexit.unregister(anterior.cerrar)
+            anterior.cerrar(espera_cierre)
+        
+        if modo == "asincrono":
+            self._bus = BusEventos(self._despachar, tam_cola, hilos, desborde, espera_bloqueo)
+            atexit.register(self._bus.cerrar, espera_cierre)
+            logger.info("Despacho de eventos asíncrono: cola de %d, %d hilo(s), desborde '%s'", tam_cola, hilos, desborde)
+    
+    def configurar_observadores(self, despacho: Optional[DespachoParalelo]) -> None:
+        """
+        Usa un DespachoParalelo (pool compartido, timeouts y circuit breakers)
+        para entregar cada evento a sus observadores; None vuelve al despacho
+        uno detrás de otro.
+        """
+        anterior, self._despacho = self._despacho, despacho
+        if anterior is not None:
+            anterior.cerrar(esperar=False)
+    
+    def configurar_registro_eventos(self, escritor: Optional[EscritorEventos],
+                                    espera_cierre: Optional[float] = 5.0) -> None:
+        """
+        Guarda los eventos como EventLog, por lotes, con el escritor dado
+        (None deja de guardarlos). Al terminar el proceso se guarda lo
+        pendiente durante espera_cierre segundos.
+        """
+        anterior, self._escritor = self._escritor, escritor
+        if anterior is not None:
+            atexit.unregister(anterior.cerrar)
+            anterior.cerrar(espera_cierre)
+        
+        for observer in self._observers:
+            if isinstance(observer, DatabaseObserver):
+                observer.escritor = escritor
+        if escritor is not None:
+            atexit.register(escritor.cerrar, espera_cierre)
+            logger.info("Registro de eventos en lotes de %d (cada %g s como mucho)",
+                        escritor.tam_lote, escritor.intervalo)
+    
+    def metricas_registro_eventos(self) -> Optional[Dict[str, Any]]:
+        """Buffer y contadores del registro de eventos (None si no se guardan)."""
+        escritor = self._escritor
+        return escritor.metricas() if escritor is not None else None
+    
+    def configurar_estadisticas(self, compartidas: Optional[EstadisticasCompartidas],
+                                espera_cierre: Optional[float] = 5.0) -> None:
+        """
+        Suma las estadísticas de todos los workers en la base de datos con
+        compartidas (None las deja solo en cada proceso). Al terminar el
+        proceso se vuelca lo pendiente.
+        """
+        anterior, self._compartidas = self._compartidas, compartidas
+        if anterior is not None:
+            atexit.unregister(anterior.cerrar)
+            anterior.cerrar(espera_cierre)
+        
+        for observer in self._observers:
+            if isinstance(observer, StatisticsObserver):
+                observer.compartidas = compartidas
+        if compartidas is not None:
+            atexit.register(compartidas.cerrar, espera_cierre)
+    
+    def configurar_tendencias(self, tendencias: TendenciasUsuarios,
+                              espera_cierre: Optional[float] = 5.0) -> None:
+        """
+        Usa tendencias para los detectores de RecommendationObserver. Si
+        persiste los estados, los pendientes se escriben al terminar el proceso.
+        """
+        anterior, self._tendencias = self._tendencias, tendencias
+        if anterior is not None:
+            atexit.unregister(anterior.cerrar)
+            anterior.cerrar(espera_cierre)
+        
+        for observer in self._observers:
+            if isinstance(observer, RecommendationObserver):
+                observer.tendencias = tendencias
+        if tendencias.persistir:
+            atexit.register(tendencias.cerrar, espera_cierre)
+    
+    def configurar_alertas(self, limitador: LimitadorAlertas) -> None:
+        """Usa limitador para decidir qué alertas emite AlertObserver."""
+        for observer in self._observers:
+            if isinstance(observer, AlertObserver):
+                observer.limitador = limitador
+    
+    def estadisticas_globales(self) -> Dict[str, Any]:
+        """
+        Estadísticas de todo el despliegue (alcance "despliegue"), con lo
+        pendiente de este proceso ya volcado, incluidas la distribución del
+        estrés y las ventanas de 5 min, 1 h y 24 h. Sin estadísticas
+        compartidas, las de este proceso (alcance "proceso").
+        """
+        compartidas = self._compartidas
+        if compartidas is not None:
+            compartidas.volcar()
+            return {"alcance": "despliegue", **resumen_estadisticas(compartidas.leer()),
+                    "ventanas": compartidas.leer_ventanas()}
+        
+        for observer in self._observers:
+            if isinstance(observer, StatisticsObserver):
+                return {"alcance": "proceso", **observer.get_stats(),
+                        "estres": observer.histograma_estres.como_dict(),
+                        "ventanas": observer.ventanas.resumenes()}
+        return {"alcance": "proceso", **resumen_estadisticas({}), "ventanas": VentanasEstres().resumenes()}
+    
+    def latencias_observadores(self) -> Dict[str, Any]:
+        """Histogramas de latencia por observador y tipo de evento, y por despacho."""
+        return self.latencias.como_dict()
+    
+    def estado_observadores(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Estado del circuit breaker de cada observador (None sin DespachoParalelo)."""
+        despacho = self._despacho
+        return despacho.estado() if despacho is not None else None
+    
+    def notify(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Despacha el evento ahora o lo deja en la cola del bus, según el modo."""
+        bus = self._bus
+        if bus is None:
+            self._despachar(event_type, data)
+        elif self._tabla.get(event_type, self._comodines):
+            bus.publicar(event_type, data)
+    
+    def metricas_despacho(self) -> Optional[Dict[str, Any]]:
+        """Métricas de la cola de eventos (None en modo síncrono)."""
+        bus = self._bus
+        return bus.metricas() if bus is not None else None
+    
+    def esperar_eventos(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que se hayan despachado los eventos encolados (inmediato en modo síncrono)."""
+        bus = self._bus
+        return bus.esperar_vacia(timeout) if bus is not None else True
+    
     # Métodos de conveniencia para eventos específicos
     
     def usuario_registrado(self, usuario_data: Dict[str, Any]) -> None:
@@ -0,0 +1,331 @@
+"""
+Léxico empaquetado y mapeable en memoria para MindCare-AI.
+
+Un paso de build (``python manage.py compilar_lexico``) escribe el léxico en un
+fichero binario compacto. En tiempo de ejecución ``PackedLexicon`` lo lee con
+``mmap``: todos los workers de gunicorn comparten las mismas páginas físicas y
+el arranque no necesita construir diccionarios ni el autómata de frases.
+
+Formato (little-endian):
+
+    cabecera   "<4sHHIIIII"  magic, formato, reservado, n_frases, n_registros,
+                             tam_meta, tam_cadenas, reservado
+    meta       JSON UTF-8 con emociones, pesos, colores, versión y longitud
+               máxima de frase (en tokens)
+    offsets    (n_frases + 1) × u32, posición de cada frase en la tabla de cadenas
+    frases     n_frases × "<IHH"  (primer registro, cantidad, banderas)
+    registros  n_registros × "<HHd" (id de emoción, reservado, peso)
+    cadenas    frases UTF-8 ordenadas por bytes, concatenadas
+
+Las frases incluyen todos los prefijos (en tokens) de las frases del léxico,
+marcados con la bandera PREFIJO, para poder extender coincidencias de varias
+palabras sin un autómata en memoria. Los intensificadores y negadores se
+guardan como registros con ids de emoción reservados.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import weakref
+from functools import cached_property, lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .fuzzy import IndiceDifuso
+from .lexicon import CompiledLexicon, tokenizar
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MCLX"
+FORMATO = 1
+
+CABECERA = struct.Struct("<4sHHIIIII")
+FRASE = struct.Struct("<IHH")
+REGISTRO = struct.Struct("<HHd")
+
+# Ids de emoción reservados para modificadores
+ID_INTENSIFICADOR = 0xFFFF
+ID_NEGADOR = 0xFFFE
+
+# Bandera: la frase es prefijo de otra más larga
+PREFIJO = 0x1
+
+
+def escribir_artefacto(lexico: CompiledLexicon, ruta: str) -> Dict[str, int]:
+    """
+    Serializa un léxico compilado en el formato binario empaquetado.
+
+    El fichero se sustituye de forma atómica (``os.replace``): los
+    ``PackedLexicon`` que ya lo tienen abierto siguen leyendo la versión anterior.
+
+    Returns:
+        dict: Número de frases, registros y bytes escritos
+    """
+    registros_por_frase: Dict[str, List[Tuple[int, float]]] = {}
+    prefijos = set()
+
+    frases = set(lexico.indice) | set(lexico.intensificadores) | set(lexico.negadores)
+    for frase in frases:
+        registros = [(emo_id, float(peso)) for emo_id, peso in lexico.indice.get(frase, ())]
+        if frase in lexico.intensificadores:
+            registros.append((ID_INTENSIFICADOR, float(lexico.intensificadores[frase])))
+        if frase in lexico.negadores:
+            registros.append((ID_NEGADOR, 0.0))
+        registros_por_frase[frase] = registros
+
+        tokens = frase.split(" ")
+        for longitud in range(1, len(tokens)):
+            prefijos.add(" ".join(tokens[:longitud]))
+
+    for prefijo in prefijos:
+        registros_por_frase.setdefault(prefijo, [])
+
+    ordenadas = sorted(registros_por_frase, key=lambda f: f.encode("utf-8"))
+
+    offsets = [0]
+    cadenas = bytearray()
+    tabla_frases = bytearray()
+    tabla_registros = bytearray()
+    total_registros = 0
+
+    for frase in ordenadas:
+        cadenas += frase.encode("utf-8")
+        offsets.append(len(cadenas))
+
+        registros = registros_por_frase[frase]
+        banderas = PREFIJO if frase in prefijos else 0
+        tabla_frases += FRASE.pack(total_registros, len(registros), banderas)
+        for emo_id, peso in registros:
+            tabla_registros += REGISTRO.pack(emo_id, 0, peso)
+        total_registros += len(registros)
+
+    meta = json.dumps({
+        "emociones": list(lexico.emociones),
+        "pesos": list(lexico.pesos),
+        "colores": list(lexico.colores),
+        "version": lexico.version,
+        "longitud_maxima": lexico.longitud_maxima,
+    }, ensure_ascii=False).encode("utf-8")
+
+    cabecera = CABECERA.pack(MAGIC, FORMATO, 0, len(ordenadas), total_registros,
+                             len(meta), len(cadenas), 0)
+
+    # Se escribe en un temporal del mismo directorio y se reemplaza: truncar
+    # el fichero en su sitio haría fallar (SIGBUS) a los procesos que lo
+    # tienen mapeado, que así conservan el inodo anterior
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(ruta)),
+                                    prefix=os.path.basename(ruta) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fichero:
+            fichero.write(cabecera)
+            fichero.write(meta)
+            fichero.write(struct.pack("<%dI" % len(offsets), *offsets))
+            fichero.write(tabla_frases)
+            fichero.write(tabla_registros)
+            fichero.write(cadenas)
+            total_bytes = fichero.tell()
+            fichero.flush()
+            os.fsync(fichero.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+    return {"frases": len(ordenadas), "registros": total_registros, "bytes": total_bytes}
+
+
+def _liberar_mapeo(mm: mmap.mmap, offsets: memoryview) -> None:
+    offsets.release()
+    mm.close()
+
+
+class _VistaPatrones:
+    """Secuencia perezosa indexada por id de frase (entradas, factor o negador)."""
+
+    def __init__(self, lexico: "PackedLexicon", campo: int):
+        # Referencia débil: el léxico no forma ciclos y se libera al soltarlo
+        self._lexico = weakref.proxy(lexico)
+        self._campo = campo
+
+    def __getitem__(self, patron_id: int):
+        return self._lexico._registros(patron_id)[self._campo]
+
+    def __len__(self) -> int:
+        return self._lexico.total_frases
+
+
+class PackedLexicon:
+    """
+    Léxico leído desde un artefacto binario mediante ``mmap``.
+
+    Expone la misma interfaz que ``CompiledLexicon`` para la puntuación
+    (``emociones``, ``pesos``, ``colores``, ``version``, ``longitud_maxima``,
+    ``entradas_patron``, ``factor_patron``, ``negador_patron`` y
+    ``coincidencias``), de modo que
+    ``EmotionLibrary`` puede usar cualquiera de los dos. El ``indice_difuso``
+    no está en el artefacto: se construye la primera vez que se usa.
+
+    El mapeo se libera con ``cerrar()`` o, si no, en cuanto nadie tiene ya una
+    referencia al léxico (p. ej. al reemplazarlo en el registro y terminar los
+    análisis que lo usaban).
+    """
+
+    def __init__(self, ruta: str, tam_cache: int = 65536):
+        if sys.byteorder != "little":
+            raise ValueError("El léxico empaquetado requiere una plataforma little-endian")
+
+        self.ruta = ruta
+        with open(ruta, "rb") as fichero:
+            self._mm = mmap.mmap(fichero.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, formato, _, self.total_frases, self.total_registros,
+         tam_meta, tam_cadenas, _) = CABECERA.unpack_from(self._mm, 0)
+        if magic != MAGIC or formato != FORMATO:
+            raise ValueError(f"Artefacto de léxico no válido: {ruta}")
+
+        posicion = CABECERA.size
+        meta = json.loads(self._mm[posicion:posicion + tam_meta].decode("utf-8"))
+        posicion += tam_meta
+
+        self.emociones: Tuple[str, ...] = tuple(meta["emociones"])
+        self.pesos: Tuple[int, ...] = tuple(meta["pesos"])
+        self.colores: Tuple[str, ...] = tuple(meta["colores"])
+        self.version: str = meta["version"]
+
+        with memoryview(self._mm) as vista:
+            self._offsets = vista[posicion:posicion + 4 * (self.total_frases + 1)].cast("I")
+        posicion += 4 * (self.total_frases + 1)
+        self._inicio_frases = posicion
+        posicion += FRASE.size * self.total_frases
+        self._inicio_registros = posicion
+        posicion += REGISTRO.size * self.total_registros
+        self._inicio_cadenas = posicion
+
+        # Los artefactos anteriores no guardan la longitud máxima: se calcula
+        self.longitud_maxima: int = meta.get("longitud_maxima") or max(
+            (self._frase(i).count(b" ") + 1 for i in range(self.total_frases)), default=1
+        )
+
+        self.entradas_patron = _VistaPatrones(self, 0)
+        self.factor_patron = _VistaPatrones(self, 1)
+        self.negador_patron = _VistaPatrones(self, 2)
+
+        # Cachés pequeñas por proceso para el vocabulario más frecuente. Llaman
+        # a través de una referencia débil para no retener el léxico en un ciclo
+        yo = weakref.proxy(self)
+        self._id_frase = lru_cache(maxsize=tam_cache)(lambda frase: yo._buscar_id(frase))
+        self._registros = lru_cache(maxsize=tam_cache)(lambda patron_id: yo._leer_registros(patron_id))
+
+        self._finalizador = weakref.finalize(self, _liberar_mapeo, self._mm, self._offsets)
+
+    @cached_property
+    def indice_difuso(self) -> IndiceDifuso:
+        return IndiceDifuso(
+            token for i in range(self.total_frases) for token in self._frase(i).decode("utf-8").split(" ")
+        )
+
+    def cerrar(self) -> None:
+        """Libera el mapeo del fichero."""
+        self._id_frase.cache_clear()
+        self._registros.cache_clear()
+        self._finalizador()
+
+    @property
+    def cerrado(self) -> bool:
+        return not self._finalizador.alive
+
+    def __reduce__(self):
+        # Los procesos worker reabren el fichero en lugar de copiar el mmap
+        return (PackedLexicon, (self.ruta,))
+
+    def _frase(self, patron_id: int) -> bytes:
+        inicio = self._inicio_cadenas
+        return self._mm[inicio + self._offsets[patron_id]:inicio + self._offsets[patron_id + 1]]
+
+    def _buscar_id(self, frase: str) -> int:
+        """Búsqueda binaria en la tabla de cadenas ordenada (-1 si no existe)."""
+        objetivo = frase.encode("utf-8")
+        bajo, alto = 0, self.total_frases
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._frase(medio) < objetivo:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self.total_frases and self._frase(bajo) == objetivo:
+            return bajo
+        return -1
+
+    def _leer_registros(self, patron_id: int) -> Tuple[Tuple[Tuple[int, float], ...], Optional[float], bool, bool]:
+        """Decodifica (entradas, factor, es_negador, es_prefijo) de una frase."""
+        primero, cantidad, banderas = FRASE.unpack_from(self._mm, self._inicio_frases + FRASE.size * patron_id)
+        entradas = []
+        factor = None
+        negador = False
+        for i in range(primero, primero + cantidad):
+            emo_id, _, peso = REGISTRO.unpack_from(self._mm, self._inicio_registros + REGISTRO.size * i)
+            if emo_id == ID_INTENSIFICADOR:
+                factor = peso
+            elif emo_id == ID_NEGADOR:
+                negador = True
+            else:
+                entradas.append((emo_id, self.pesos[emo_id]))
+        return tuple(entradas), factor, negador, bool(banderas & PREFIJO)
+
+    def buscar(self, frase: str) -> Tuple[Tuple[int, int], ...]:
+        """Retorna las entradas asociadas a una frase (tupla vacía si no existe)."""
+        patron_id = self._id_frase(" ".join(tokenizar(frase)))
+        return self._registros(patron_id)[0] if patron_id >= 0 else ()
+
+    def coincidencias(self, tokens: Sequence[str]) -> Iterator[Tuple[int, int, int]]:
+        """
+        Genera (inicio, fin, patron_id) para cada frase encontrada en los tokens,
+        en el mismo orden que el autómata: por ``fin`` y de la más larga a la más corta.
+        """
+        encontradas = []
+        total = len(tokens)
+
+        for inicio in range(total):
+            fin = inicio
+            frase = tokens[inicio]
+            while True:
+                patron_id = self._id_frase(frase)
+                if patron_id < 0:
+                    break
+                entradas, factor, negador, prefijo = self._registros(patron_id)
+                if entradas or factor is not None or negador:
+                    encontradas.append((fin, inicio, patron_id))
+                fin += 1
+                if not prefijo or fin >= total:
+                    break
+                frase = frase + " " + tokens[fin]
+
+        encontradas.sort()
+        return ((inicio, fin, patron_id) for fin, inicio, patron_id in encontradas)
+
+    def __len__(self) -> int:
+        return self.total_frases
+
+
+def cargar_lexico(emotions_dict: Dict[str, Dict[str, Any]],
+                  intensifiers: Dict[str, float], negators: List[str]):
+    """
+    Retorna el léxico empaquetado indicado en la variable de entorno
+    LEXICO_EMPAQUETADO o, si no está definida o no se puede leer, el léxico
+    compilado a partir de los diccionarios en código.
+    """
+    ruta = os.environ.get("LEXICO_EMPAQUETADO")
+    if ruta:
+        try:
+            return PackedLexicon(ruta)
+        except (OSError, ValueError) as e:
+            logger.error("No se pudo cargar el léxico empaquetado %s: %s", ruta, e)
+
+    return CompiledLexicon(emotions_dict, intensifiers, negators)
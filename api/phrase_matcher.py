@@ -0,0 +1,97 @@
+"""
+Autómata Aho-Corasick a nivel de tokens para MindCare-AI.
+Encuentra todas las frases del léxico (incluidas las que se solapan) en una
+sola pasada lineal sobre la lista de tokens del texto.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class PhraseAutomaton:
+    """
+    Autómata de Aho-Corasick cuyo alfabeto son tokens en lugar de caracteres.
+
+    Cada frase es una tupla de tokens y se identifica por su posición en la
+    secuencia recibida al construir el autómata. Trabajar sobre tokens hace que
+    las coincidencias respeten siempre los límites de palabra y permite
+    reportar posiciones en tokens para la lógica de intensificadores y negadores.
+    """
+
+    def __init__(self, frases: Iterable[Sequence[str]]):
+        # Nodo 0 = raíz. Transiciones, enlace de fallo y salidas por nodo.
+        self._transiciones: List[Dict[str, int]] = [{}]
+        self._fallo: List[int] = [0]
+        self._salidas: List[Tuple[Tuple[int, int], ...]] = [()]
+        self.total_frases = 0
+
+        propias: List[List[Tuple[int, int]]] = [[]]
+        for patron_id, frase in enumerate(frases):
+            nodo = 0
+            for token in frase:
+                siguiente = self._transiciones[nodo].get(token)
+                if siguiente is None:
+                    siguiente = len(self._transiciones)
+                    self._transiciones[nodo][token] = siguiente
+                    self._transiciones.append({})
+                    self._fallo.append(0)
+                    propias.append([])
+                nodo = siguiente
+            if frase:
+                propias[nodo].append((patron_id, len(frase)))
+            self.total_frases += 1
+
+        self._construir_fallos(propias)
+
+    def _construir_fallos(self, propias: List[List[Tuple[int, int]]]) -> None:
+        """Calcula enlaces de fallo y salidas (frase propia + sufijos) por BFS."""
+        salidas: List[Tuple[Tuple[int, int], ...]] = [()] * len(self._transiciones)
+        cola = deque()
+
+        for hijo in self._transiciones[0].values():
+            self._fallo[hijo] = 0
+            salidas[hijo] = tuple(propias[hijo])
+            cola.append(hijo)
+
+        while cola:
+            nodo = cola.popleft()
+            for token, hijo in self._transiciones[nodo].items():
+                fallo = self._fallo[nodo]
+                while fallo and token not in self._transiciones[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._transiciones[fallo].get(token, 0)
+                self._fallo[hijo] = destino
+                # Las frases propias son más largas que las heredadas del sufijo
+                salidas[hijo] = tuple(propias[hijo]) + salidas[destino]
+                cola.append(hijo)
+
+        self._salidas = salidas
+
+    def buscar(self, tokens: Sequence[str]) -> Iterator[Tuple[int, int, int]]:
+        """
+        Recorre los tokens una sola vez y genera todas las coincidencias.
+
+        Args:
+            tokens: Secuencia de tokens normalizados
+
+        Yields:
+            tuple: (inicio, fin, patron_id) con posiciones de token inclusivas,
+            ordenadas por ``fin`` y, para un mismo ``fin``, de la más larga a la más corta
+        """
+        transiciones = self._transiciones
+        fallo = self._fallo
+        salidas = self._salidas
+        nodo = 0
+
+        for fin, token in enumerate(tokens):
+            siguiente = transiciones[nodo].get(token)
+            while siguiente is None and nodo:
+                nodo = fallo[nodo]
+                siguiente = transiciones[nodo].get(token)
+            nodo = siguiente or 0
+
+            for patron_id, longitud in salidas[nodo]:
+                yield fin - longitud + 1, fin, patron_id
+
+    def __len__(self) -> int:
+        return self.total_frases
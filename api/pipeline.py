@@ -0,0 +1,356 @@
+"""
+Pipeline de análisis emocional de MindCare-AI.
+
+``detectar_emociones`` ejecuta estas etapas, en este orden:
+
+    normalizar   texto -> texto en minúsculas
+    tokenizar    texto normalizado -> (palabras, cortes)
+    emparejar    (palabras, cortes) -> (coincidencias, cortes, total de palabras, descuentos)
+    puntuar      (coincidencias, cortes, total, descuentos) -> (acumulados por emoción, total)
+    agregar      (acumulados, total) -> AnalisisEmocional (emoción principal, estrés, confianza)
+    recomendar   AnalisisEmocional -> el mismo análisis con su recomendación
+
+Cada etapa recibe la salida de la anterior y el contexto del análisis (léxico
+y reglas de modificadores). Cualquiera se puede sustituir (``reemplazar``),
+cachear (``cachear``) o cronometrar (``perfilar``) por separado. Las salidas
+cacheadas se comparten entre análisis, así que ninguna etapa debe modificar
+su entrada: ``recomendar`` retorna una copia del análisis con la recomendación.
+El perfil de ``perfilar`` es de cada llamada; el pipeline no guarda estado y
+se puede perfilar mientras atiende peticiones.
+
+Los descuentos ({posición: factor}) son de los tokens que ``emparejar`` ha
+corregido por erratas; ``Emparejar`` no corrige nada (None) y
+``EmparejarDifuso`` es la alternativa tolerante a erratas.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+from .emotion_library import AnalisisEmocional, EmotionLibrary
+from .fuzzy import PALABRAS_COMUNES
+
+
+class ContextoAnalisis:
+    """Lo que las etapas comparten durante un análisis."""
+
+    __slots__ = ("lexico", "reglas")
+
+    def __init__(self, lexico, reglas):
+        self.lexico = lexico
+        self.reglas = reglas
+
+
+class Etapa:
+    """
+    Interfaz común de las etapas.
+
+    ``clave`` convierte la entrada en una clave de caché (None = no cacheable).
+    """
+
+    nombre = ""
+
+    def __call__(self, entrada, contexto: ContextoAnalisis):
+        raise NotImplementedError
+
+    def clave(self, entrada) -> Optional[Hashable]:
+        return entrada
+
+
+class Normalizar(Etapa):
+    nombre = "normalizar"
+
+    def __call__(self, texto, contexto):
+        return texto.lower()
+
+
+class Tokenizar(Etapa):
+    nombre = "tokenizar"
+
+    def __call__(self, normalizado, contexto):
+        return contexto.reglas.separar(normalizado)
+
+
+class Emparejar(Etapa):
+    nombre = "emparejar"
+
+    def __call__(self, tokens, contexto):
+        palabras, cortes = tokens
+        return list(contexto.lexico.coincidencias(palabras)), cortes, len(palabras), None
+
+    def clave(self, tokens):
+        palabras, cortes = tokens
+        return tuple(palabras), tuple(cortes)
+
+
+class EmparejarDifuso(Emparejar):
+    """
+    Emparejar tolerante a erratas ("ansiosoo", "tristesa").
+
+    Los tokens que no están en el vocabulario del léxico se sustituyen por la
+    palabra más cercana del ``indice_difuso`` (distancia 1, o 2 a partir de
+    ``largo_distancia_2`` letras) y las frases emocionales que usan alguna
+    corrección puntúan multiplicadas por ``peso``. Las palabras exactas
+    siempre ganan: un token del vocabulario nunca se corrige.
+
+    Args:
+        peso: Factor (0-1] de las frases con tokens corregidos
+        largo_distancia_2: Letras a partir de las que se admiten dos ediciones
+        comunes: Palabras que nunca se corrigen
+    """
+
+    def __init__(self, peso: float = 0.7, largo_distancia_2: int = 8,
+                 comunes: frozenset = PALABRAS_COMUNES):
+        self.peso = peso
+        self.largo_distancia_2 = largo_distancia_2
+        self.comunes = comunes
+
+    def __call__(self, tokens, contexto):
+        palabras, cortes = tokens
+        indice = contexto.lexico.indice_difuso
+        vocabulario = indice.vocabulario
+        largo_minimo = indice.largo_minimo
+
+        corregidas = descuentos = None
+        for posicion, palabra in enumerate(palabras):
+            if len(palabra) < largo_minimo or palabra in vocabulario or palabra in self.comunes:
+                continue
+            correccion = indice.corregir(palabra, 2 if len(palabra) >= self.largo_distancia_2 else 1)
+            if correccion is None:
+                continue
+            if corregidas is None:
+                corregidas, descuentos = list(palabras), {}
+            corregidas[posicion] = correccion
+            descuentos[posicion] = self.peso
+
+        if corregidas is None:
+            return list(contexto.lexico.coincidencias(palabras)), cortes, len(palabras), None
+        return list(contexto.lexico.coincidencias(corregidas)), cortes, len(palabras), descuentos
+
+
+class Puntuar(Etapa):
+    nombre = "puntuar"
+
+    def __call__(self, emparejado, contexto):
+        coincidencias, cortes, total_palabras, descuentos = emparejado
+        acumulados = EmotionLibrary._puntuar_coincidencias(coincidencias, contexto.lexico, cortes, contexto.reglas,
+                                                           descuentos=descuentos)
+        return acumulados, total_palabras
+
+    def clave(self, emparejado):
+        coincidencias, cortes, total_palabras, descuentos = emparejado
+        return (tuple(coincidencias), tuple(cortes), total_palabras,
+                tuple(sorted(descuentos.items())) if descuentos else None)
+
+
+class Agregar(Etapa):
+    nombre = "agregar"
+
+    def __call__(self, puntuado, contexto):
+        acumulados, total_palabras = puntuado
+        return AnalisisEmocional(contexto.lexico, acumulados, total_palabras)
+
+    def clave(self, puntuado):
+        return None
+
+
+class Recomendar(Etapa):
+    nombre = "recomendar"
+
+    def __call__(self, analisis, contexto):
+        return analisis.con_recomendacion(
+            EmotionLibrary._generar_recomendacion(analisis.emocion_principal, analisis.nivel_estres)
+        )
+
+    def clave(self, analisis):
+        return None
+
+
+ORDEN = ("normalizar", "tokenizar", "emparejar", "puntuar", "agregar", "recomendar")
+
+ETAPAS_POR_DEFECTO = (Normalizar, Tokenizar, Emparejar, Puntuar, Agregar, Recomendar)
+
+
+class EtapaCacheada(Etapa):
+    """
+    Caché LRU delante de una etapa. La clave incluye la versión del léxico, de
+    modo que un cambio de léxico no reutiliza salidas anteriores.
+    """
+
+    def __init__(self, etapa: Etapa, max_entradas: int = 1024):
+        self.etapa = etapa
+        self.nombre = etapa.nombre
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __call__(self, entrada, contexto):
+        clave = self.etapa.clave(entrada)
+        if clave is None:
+            return self.etapa(entrada, contexto)
+        clave = (contexto.lexico.version, clave)
+
+        with self._lock:
+            salida = self._entradas.get(clave)
+            if salida is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return salida
+            self.fallos += 1
+
+        salida = self.etapa(entrada, contexto)
+        with self._lock:
+            self._entradas[clave] = salida
+            if len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return salida
+
+    def clave(self, entrada):
+        return self.etapa.clave(entrada)
+
+    def __getstate__(self):
+        # Para los procesos de analizar_multiples: la caché no viaja, el worker empieza vacío
+        return {"etapa": self.etapa, "max_entradas": self.max_entradas}
+
+    def __setstate__(self, estado):
+        self.__init__(estado["etapa"], estado["max_entradas"])
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self._entradas)}
+
+
+class PerfilEtapas:
+    """Llamadas y tiempo acumulado por etapa."""
+
+    def __init__(self, nombres: Iterable[str]):
+        self.nombres = tuple(nombres)
+        self.llamadas = dict.fromkeys(self.nombres, 0)
+        self.nanosegundos = dict.fromkeys(self.nombres, 0)
+        self.maximo = dict.fromkeys(self.nombres, 0)
+
+    def registrar(self, nombre: str, nanosegundos: int) -> None:
+        self.llamadas[nombre] += 1
+        self.nanosegundos[nombre] += nanosegundos
+        if nanosegundos > self.maximo[nombre]:
+            self.maximo[nombre] = nanosegundos
+
+    def como_dict(self) -> Dict[str, Dict[str, float]]:
+        total = sum(self.nanosegundos.values()) or 1
+        return {
+            nombre: {
+                "llamadas": self.llamadas[nombre],
+                "total_ms": self.nanosegundos[nombre] / 1e6,
+                "media_us": self.nanosegundos[nombre] / max(self.llamadas[nombre], 1) / 1e3,
+                "max_us": self.maximo[nombre] / 1e3,
+                "porcentaje": self.nanosegundos[nombre] * 100 / total,
+            }
+            for nombre in self.nombres
+        }
+
+    def informe(self) -> str:
+        """Tabla de tiempos por etapa, con el porcentaje del total."""
+        lineas = [f"{'etapa':<12}{'llamadas':>10}{'total ms':>12}{'media µs':>11}{'máx µs':>11}{'%':>7}"]
+        for nombre, datos in self.como_dict().items():
+            lineas.append(f"{nombre:<12}{datos['llamadas']:>10}{datos['total_ms']:>12.2f}"
+                          f"{datos['media_us']:>11.2f}{datos['max_us']:>11.1f}{datos['porcentaje']:>7.1f}")
+        return "\n".join(lineas)
+
+
+class PipelineAnalisis:
+    """
+    Secuencia de etapas de análisis.
+
+    Args:
+        etapas: Etapas que sustituyen a las de por defecto, por nombre
+        reglas: ReglasModificadores (por defecto, EmotionLibrary.REGLAS_MODIFICADORES
+            en el momento de cada análisis)
+    """
+
+    def __init__(self, etapas: Optional[Dict[str, Etapa]] = None, reglas=None):
+        self.etapas: Dict[str, Etapa] = {clase.nombre: clase() for clase in ETAPAS_POR_DEFECTO}
+        if etapas:
+            desconocidas = set(etapas) - set(ORDEN)
+            if desconocidas:
+                raise ValueError(f"Etapas desconocidas: {', '.join(sorted(desconocidas))}")
+            self.etapas.update(etapas)
+        self.reglas = reglas
+        self._cadena: List[Etapa] = [self.etapas[nombre] for nombre in ORDEN]
+
+    def reemplazar(self, nombre: str, etapa: Etapa) -> "PipelineAnalisis":
+        """Pipeline nuevo con ``etapa`` en lugar de la etapa ``nombre``."""
+        return PipelineAnalisis({**self.etapas, nombre: etapa}, self.reglas)
+
+    def cachear(self, nombre: str, max_entradas: int = 1024) -> "PipelineAnalisis":
+        """Pipeline nuevo con una caché LRU delante de la etapa ``nombre``."""
+        return self.reemplazar(nombre, EtapaCacheada(self.etapas[nombre], max_entradas))
+
+    def ejecutar(self, texto: str, lexico=None, perfil: Optional[PerfilEtapas] = None):
+        """
+        Ejecuta todas las etapas sobre un texto no vacío. Con ``perfil``,
+        registra en él el tiempo de cada etapa.
+        """
+        contexto = ContextoAnalisis(
+            lexico if lexico is not None else EmotionLibrary.lexico_actual(),
+            self.reglas if self.reglas is not None else EmotionLibrary.REGLAS_MODIFICADORES
+        )
+
+        valor = texto
+        if perfil is None:
+            for etapa in self._cadena:
+                valor = etapa(valor, contexto)
+            return valor
+
+        for nombre, etapa in zip(ORDEN, self._cadena):
+            inicio = time.perf_counter_ns()
+            valor = etapa(valor, contexto)
+            perfil.registrar(nombre, time.perf_counter_ns() - inicio)
+        return valor
+
+    def puntuar(self, texto: str, lexico=None):
+        """
+        Ejecuta las etapas hasta ``puntuar`` sobre un texto no vacío y retorna
+        (acumulados por emoción, total de palabras). Es lo que usa el motor por
+        lotes (api/batch_scoring.py) para calcular lo demás con arrays.
+        """
+        contexto = ContextoAnalisis(
+            lexico if lexico is not None else EmotionLibrary.lexico_actual(),
+            self.reglas if self.reglas is not None else EmotionLibrary.REGLAS_MODIFICADORES
+        )
+
+        valor = texto
+        for etapa in self._cadena[:ORDEN.index("puntuar") + 1]:
+            valor = etapa(valor, contexto)
+        return valor
+
+    def perfilar(self, textos: Iterable[str], lexico=None) -> PerfilEtapas:
+        """
+        Analiza ``textos`` cronometrando cada etapa y retorna el perfil. Solo
+        se cronometran estos análisis, no los que ejecuten otros hilos a la vez.
+        """
+        perfil = PerfilEtapas(ORDEN)
+        for texto in textos:
+            if texto and not texto.isspace():
+                self.ejecutar(texto, lexico, perfil)
+        return perfil
+
+    def estadisticas_cache(self) -> Dict[str, Dict[str, int]]:
+        """Aciertos y fallos de las etapas cacheadas."""
+        return {nombre: etapa.estadisticas() for nombre, etapa in self.etapas.items()
+                if isinstance(etapa, EtapaCacheada)}
+
+
+def pipeline_desde_config(config: Dict[str, Any]) -> PipelineAnalisis:
+    """Pipeline según ``settings.PIPELINE_ANALISIS`` (claves DIFUSO y CACHE_ETAPAS)."""
+    pipeline = PipelineAnalisis()
+    difuso = config.get("DIFUSO", {})
+    if difuso.get("HABILITADO"):
+        pipeline = pipeline.reemplazar("emparejar", EmparejarDifuso(
+            difuso.get("PESO", 0.7), difuso.get("LARGO_DISTANCIA_2", 8)
+        ))
+    for nombre, max_entradas in config.get("CACHE_ETAPAS", {}).items():
+        pipeline = pipeline.cachear(nombre, max_entradas)
+    return pipeline
@@ -5,6 +5,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = '__all__'
+        read_only_fields = ('es_admin',)
 
 class EvaluacionEmocionalSerializer(serializers.ModelSerializer):
     class Meta:
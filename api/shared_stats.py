@@ -0,0 +1,229 @@
+"""
+Estadísticas de StatisticsObserver compartidas entre los workers.
+
+Con gunicorn cada worker es un proceso con su propio StatisticsObserver, así
+que sus ``stats`` solo cuentan los eventos de ese proceso. Para tener cifras
+de todo el despliegue, cada proceso suma además en unos contadores locales
+y un hilo de fondo vuelca cada ``intervalo`` segundos lo sumado desde el
+último volcado a filas compartidas de la base de datos (modelo
+EstadisticaGlobal), con ``UPDATE ... SET valor = valor + delta``. Leer las
+filas da ya la suma de todos los workers; como solo se envían diferencias,
+un worker que se reinicia no cuenta nada dos veces.
+
+Sumar no toma ningún lock: cada hilo escribe en su propio diccionario
+(``ContadoresProceso``) y solo el volcado los recorre. Si un volcado falla,
+las diferencias se reenvían en el siguiente.
+
+Las ventanas de estrés (api/stress_stats.py) se vuelcan igual, intervalo a
+intervalo, a filas CubetaEstres; en cada volcado se borran los intervalos
+que ya han salido de su ventana.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Sum
+
+from .stress_stats import NIVELES, HistogramaEstres, VentanasEstres, resumen_ventana
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_EMOCION = "emocion:"
+PREFIJO_ESTRES = "estres:"
+
+
+class ContadoresProceso:
+    """Contadores acumulados de un proceso, con un diccionario por hilo."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hilos: List[Tuple[threading.Thread, Dict[str, int]]] = []
+        # Lo sumado por hilos que ya terminaron
+        self._terminados: Dict[str, int] = {}
+        # Lo ya volcado a la base de datos
+        self._enviado: Dict[str, int] = {}
+
+    def sumar(self, clave: str, valor: int = 1) -> None:
+        try:
+            propios = self._local.contadores
+        except AttributeError:
+            propios = self._registrar()
+        propios[clave] = propios.get(clave, 0) + valor
+
+    def _registrar(self) -> Dict[str, int]:
+        propios = self._local.contadores = {}
+        with self._lock:
+            self._hilos.append((threading.current_thread(), propios))
+        return propios
+
+    def totales(self) -> Dict[str, int]:
+        """Todo lo sumado en el proceso."""
+        with self._lock:
+            vivos = []
+            for hilo, propios in self._hilos:
+                if hilo.is_alive():
+                    vivos.append((hilo, propios))
+                else:
+                    # Un hilo terminado ya no escribe: se pliega y se olvida su diccionario
+                    for clave, valor in propios.items():
+                        self._terminados[clave] = self._terminados.get(clave, 0) + valor
+            self._hilos = vivos
+
+            totales = dict(self._terminados)
+            for _, propios in vivos:
+                # copy() es atómico con el GIL; el hilo dueño puede estar sumando
+                for clave, valor in propios.copy().items():
+                    totales[clave] = totales.get(clave, 0) + valor
+        return totales
+
+    def pendientes(self) -> Dict[str, int]:
+        """Lo sumado desde el último volcado confirmado."""
+        enviado = self._enviado
+        return {clave: valor - enviado.get(clave, 0)
+                for clave, valor in self.totales().items() if valor != enviado.get(clave, 0)}
+
+    def confirmar(self, deltas: Dict[str, int]) -> None:
+        """Marca como volcadas las diferencias de ``pendientes()``."""
+        for clave, delta in deltas.items():
+            self._enviado[clave] = self._enviado.get(clave, 0) + delta
+
+
+class EstadisticasCompartidas:
+    """
+    Contadores del proceso volcados periódicamente a la base de datos.
+
+    Args:
+        intervalo: Segundos entre volcados
+        alias: Base de datos (alias de DATABASES)
+    """
+
+    def __init__(self, intervalo: float = 5.0, alias: str = "default"):
+        self.intervalo = intervalo
+        self.alias = alias
+        self.contadores = ContadoresProceso()
+        self.ventanas = VentanasEstres()
+        self._lock_volcado = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock_hilo = threading.Lock()
+        self.volcados = 0
+        self.errores = 0
+
+    def sumar(self, clave: str, valor: int = 1) -> None:
+        self.contadores.sumar(clave, valor)
+        if self._hilo is None:
+            self._arrancar()
+
+    def _arrancar(self) -> None:
+        # Como en BusEventos: el hilo se crea con el primer evento, ya en el worker
+        with self._lock_hilo:
+            if self._hilo is None and not self._parar.is_set():
+                self._hilo = threading.Thread(target=self._bucle, name="estadisticas", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        try:
+            while not self._parar.wait(self.intervalo):
+                self.volcar()
+        finally:
+            connections[self.alias].close()
+
+    def volcar(self) -> bool:
+        """Suma en la base de datos lo pendiente de este proceso. Retorna False si falló."""
+        from .models import CubetaEstres, EstadisticaGlobal
+
+        with self._lock_volcado:
+            deltas = self.contadores.pendientes()
+            cubetas = self.ventanas.pendientes()
+            if not deltas and not cubetas:
+                return True
+            try:
+                with transaction.atomic(using=self.alias):
+                    # Siempre en el mismo orden, para que dos workers no se bloqueen mutuamente
+                    filas = EstadisticaGlobal.objects.using(self.alias)
+                    for clave, delta in sorted(deltas.items()):
+                        self._sumar_fila(filas, {"clave": clave}, "valor", delta)
+
+                    filas = CubetaEstres.objects.using(self.alias)
+                    for ancho, inicio, emocion, nivel, delta in sorted(cubetas):
+                        self._sumar_fila(filas, {"ancho": ancho, "inicio": inicio, "emocion": emocion,
+                                                 "nivel": nivel}, "cuenta", delta)
+                    for nombre, (duracion, ancho) in self.ventanas.ventanas.items():
+                        primero = self.ventanas.actual(nombre) - duracion // ancho
+                        filas.filter(ancho=ancho, inicio__lte=primero).delete()
+            except Exception as e:
+                self.errores += 1
+                logger.error("No se pudieron volcar las estadísticas: %r", e)
+                return False
+
+            self.contadores.confirmar(deltas)
+            self.ventanas.confirmar(cubetas)
+            self.volcados += 1
+            return True
+
+    def _sumar_fila(self, filas, clave: Dict[str, Any], campo: str, delta: int) -> None:
+        if filas.filter(**clave).update(**{campo: F(campo) + delta}):
+            return
+        try:
+            with transaction.atomic(using=self.alias):
+                filas.create(**clave, **{campo: delta})
+        except IntegrityError:
+            # Otro worker creó la fila entre el UPDATE y el INSERT
+            filas.filter(**clave).update(**{campo: F(campo) + delta})
+
+    def leer(self) -> Dict[str, int]:
+        """Contadores de todos los workers (lo que cada uno haya volcado)."""
+        from .models import EstadisticaGlobal
+
+        return dict(EstadisticaGlobal.objects.using(self.alias).values_list("clave", "valor"))
+
+    def leer_ventanas(self) -> Dict[str, Dict[str, Any]]:
+        """Resumen de cada ventana de estrés con los intervalos de todos los workers."""
+        from .models import CubetaEstres
+
+        resumenes = {}
+        for nombre, (duracion, ancho) in self.ventanas.ventanas.items():
+            primero = self.ventanas.actual(nombre) - duracion // ancho
+            filas = (CubetaEstres.objects.using(self.alias)
+                     .filter(ancho=ancho, inicio__gt=primero)
+                     .values_list("emocion", "nivel")
+                     .annotate(Sum("cuenta")))
+            resumenes[nombre] = resumen_ventana(filas, duracion)
+        return resumenes
+
+    def cerrar(self, timeout: Optional[float] = None) -> bool:
+        """Detiene el hilo y vuelca lo pendiente."""
+        self._parar.set()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+        return self.volcar()
+
+
+def resumen_estadisticas(contadores: Dict[str, int]) -> Dict[str, Any]:
+    """Contadores sumados con la forma de ``StatisticsObserver.stats``."""
+    total_analisis = contadores.get("total_analisis", 0)
+    return {
+        "total_usuarios": contadores.get("total_usuarios", 0),
+        "total_analisis": total_analisis,
+        "emociones_detectadas": {
+            clave[len(PREFIJO_EMOCION):]: valor
+            for clave, valor in sorted(contadores.items()) if clave.startswith(PREFIJO_EMOCION)
+        },
+        "nivel_estres_promedio": contadores.get("suma_estres", 0) / total_analisis if total_analisis else 0,
+        "alertas_estres_alto": contadores.get("alertas_estres_alto", 0),
+        "estres": HistogramaEstres(
+            contadores.get(f"{PREFIJO_ESTRES}{nivel}", 0) for nivel in range(NIVELES)
+        ).como_dict(),
+    }
+
+
+def crear_estadisticas(config: Optional[Dict[str, Any]]) -> Optional[EstadisticasCompartidas]:
+    """EstadisticasCompartidas según ``settings.ESTADISTICAS`` (None si no están habilitadas)."""
+    config = config or {}
+    if not config.get("COMPARTIDAS"):
+        return None
+    return EstadisticasCompartidas(intervalo=config.get("INTERVALO_S", 5))
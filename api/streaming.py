@@ -0,0 +1,283 @@
+"""
+Análisis por trozos de textos largos para MindCare-AI.
+
+``detectar_emociones`` necesita el texto completo en memoria, además de su
+versión en minúsculas y la lista de todos sus tokens. ``AnalizadorFlujo``
+recibe el texto por trozos (un fichero abierto o un iterable de cadenas o
+bytes) y entre un trozo y el siguiente solo conserva un estado de tamaño fijo:
+la palabra que puede continuar en el trozo siguiente, los últimos tokens (que
+aún pueden formar parte de una frase del léxico), los registros de negadores
+e intensificadores y las puntuaciones por emoción.
+
+Sin unidades, el resultado es el mismo que el de ``detectar_emociones`` sobre
+el texto completo. Con ``unidad="frase"`` o ``unidad="parrafo"`` se obtiene
+además un análisis por cada frase o párrafo; cada unidad se puntúa como un
+texto aparte (ni las frases del léxico ni los modificadores cruzan su límite).
+"""
+
+import codecs
+import re
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional
+
+from .emotion_library import AnalisisEmocional, EmotionLibrary
+from .lexicon import TOKEN_RE
+from .modifiers import EstadoPuntuacion
+
+# Caracteres por trozo al leer de un fichero o partir una cadena
+TAM_BLOQUE = 64 * 1024
+
+# Ninguna palabra del léxico es tan larga: una palabra que supere este tamaño
+# se cuenta como token sin guardarla entera para el trozo siguiente
+LARGO_MAXIMO_TOKEN = 256
+
+# Signos que terminan una frase (unidad="frase")
+FIN_FRASE = ".!?…"
+
+UNIDADES = (None, "frase", "parrafo")
+
+# Una línea en blanco separa párrafos
+_SALTO_PARRAFO = r"\n[^\S\n]*\n"
+_PALABRA_FINAL_RE = re.compile(r"\w+\Z")
+
+
+class AnalizadorFlujo:
+    """
+    Analizador incremental de un texto que llega por trozos.
+
+    Uso típico:
+
+        analizador = AnalizadorFlujo(unidad="frase")
+        for trozo in trozos(fichero):
+            for frase in analizador.alimentar(trozo):
+                ...                          # análisis de cada frase completa
+        ultimas = analizador.terminar()
+        total = analizador.resultado()       # análisis del texto completo
+
+    Args:
+        lexico: Léxico a usar (por defecto, el activo en el registro)
+        unidad: None, "frase" o "parrafo"
+        reglas: ReglasModificadores (por defecto, las de EmotionLibrary)
+    """
+
+    def __init__(self, lexico=None, unidad: Optional[str] = None, reglas=None):
+        if unidad not in UNIDADES:
+            raise ValueError(f"Unidad no soportada: {unidad!r}")
+
+        self.lexico = lexico if lexico is not None else EmotionLibrary.lexico_actual()
+        self.reglas = reglas if reglas is not None else EmotionLibrary.REGLAS_MODIFICADORES
+        self.unidad = unidad
+        self.unidades = 0
+
+        # Tokens ya puntuados que se repiten al principio del trozo siguiente
+        self._contexto = max(self.lexico.longitud_maxima - 1, 0)
+        self._signos = frozenset(self.reglas.puntuacion_corte)
+        self._fin_unidad = frozenset(FIN_FRASE) if unidad == "frase" else frozenset()
+
+        partes = [TOKEN_RE.pattern]
+        if unidad is not None:
+            partes.append(_SALTO_PARRAFO)
+        signos = "".join(sorted(self._signos | self._fin_unidad))
+        if signos:
+            partes.append("[%s]" % re.escape(signos))
+        self._token_re = re.compile("|".join(partes))
+
+        self._pendiente = ""
+        self._en_token_largo = False
+        self._decodificador = None
+
+        self._estado = EstadoPuntuacion()
+        self._ventana: List[str] = []
+        self._cortes: List[int] = []
+        self._palabras = 0
+
+        # Suma de las unidades ya cerradas
+        self._total: Dict[int, list] = {}
+        self._total_palabras = 0
+
+    def alimentar(self, trozo) -> List[AnalisisEmocional]:
+        """
+        Procesa un trozo de texto (str o bytes UTF-8).
+
+        Returns:
+            list: Análisis de las unidades que se completan en este trozo
+            (siempre vacía si no se analiza por unidades)
+        """
+        if isinstance(trozo, (bytes, bytearray, memoryview)):
+            if self._decodificador is None:
+                self._decodificador = codecs.getincrementaldecoder("utf-8")()
+            trozo = self._decodificador.decode(trozo)
+
+        texto = self._pendiente + trozo if self._pendiente else trozo
+        self._pendiente = ""
+
+        if self._en_token_largo:
+            # Resto de una palabra demasiado larga que ya se contó
+            continuacion = TOKEN_RE.match(texto)
+            if continuacion is not None:
+                if continuacion.end() == len(texto):
+                    return []
+                texto = texto[continuacion.end():]
+            self._en_token_largo = False
+
+        # Lo que puede continuar en el trozo siguiente se procesa con él
+        inicio = max(len(texto) - LARGO_MAXIMO_TOKEN, 0)
+        palabra_final = _PALABRA_FINAL_RE.search(texto, inicio)
+        if palabra_final is not None:
+            if palabra_final.start() == inicio and inicio and TOKEN_RE.match(texto, inicio - 1):
+                self._en_token_largo = True
+            else:
+                self._pendiente = texto[palabra_final.start():]
+                texto = texto[:palabra_final.start()]
+        elif self.unidad is not None:
+            # Un salto de línea al final puede ser la mitad de una línea en blanco
+            fin = len(texto.rstrip())
+            if texto.count("\n", fin) == 1:
+                self._pendiente = "\n"
+                texto = texto[:fin]
+
+        return self._procesar(texto)
+
+    def terminar(self) -> List[AnalisisEmocional]:
+        """
+        Procesa lo que quedaba pendiente al final del texto.
+
+        Returns:
+            list: Análisis de la última unidad (vacía si no se analiza por unidades)
+        """
+        texto = self._pendiente
+        if self._decodificador is not None:
+            texto += self._decodificador.decode(b"", final=True)
+        self._pendiente = ""
+        self._en_token_largo = False
+
+        completadas = self._procesar(texto)
+        if self.unidad is None:
+            self._puntuar()
+        else:
+            analisis = self._cerrar_unidad()
+            if analisis is not None:
+                completadas.append(analisis)
+        return completadas
+
+    def resultado(self):
+        """
+        Análisis de todo lo procesado hasta ahora, con la forma de
+        ``detectar_emociones``. Tras ``terminar``, el del texto completo.
+        """
+        acumulados = {emo_id: list(valores) for emo_id, valores in self._total.items()}
+        self._sumar(acumulados, self._estado.acumulados)
+        total_palabras = self._total_palabras + self._palabras
+        if not total_palabras:
+            return EmotionLibrary.detectar_emociones("", self.lexico)
+        return AnalisisEmocional(self.lexico, acumulados, total_palabras)
+
+    def _procesar(self, texto: str) -> List[AnalisisEmocional]:
+        """Tokeniza un texto sin palabras a medias y lo puntúa."""
+        completadas = []
+        ventana = self._ventana
+        cortes = self._cortes
+        signos = self._signos
+        fin_unidad = self._fin_unidad
+
+        for token in self._token_re.findall(texto.lower()):
+            if token in fin_unidad or token[0] == "\n":
+                analisis = self._cerrar_unidad()
+                if analisis is not None:
+                    completadas.append(analisis)
+            elif token in signos:
+                # Mismo criterio que ReglasModificadores.tokenizar
+                if (ventana or self._palabras) and (not cortes or cortes[-1] != len(ventana)):
+                    cortes.append(len(ventana))
+            else:
+                ventana.append(token)
+
+        self._puntuar()
+        return completadas
+
+    def _puntuar(self) -> None:
+        """Puntúa los tokens nuevos de la ventana y deja solo el contexto necesario."""
+        ventana = self._ventana
+        cortes = self._cortes
+        estado = self._estado
+
+        nuevas = len(ventana) - estado.desde
+        if nuevas <= 0:
+            return
+
+        EmotionLibrary._puntuar_tokens(ventana, self.lexico, cortes, self.reglas, estado)
+        self._palabras += nuevas
+
+        desplazamiento = len(ventana) - self._contexto
+        if desplazamiento > 0:
+            segmentos = bisect_left(cortes, desplazamiento)
+            del ventana[:desplazamiento]
+            cortes[:] = [corte - desplazamiento for corte in cortes[segmentos:]]
+            estado.desplazar(desplazamiento, segmentos)
+        estado.desde = len(ventana)
+
+    def _cerrar_unidad(self) -> Optional[AnalisisEmocional]:
+        """Termina la unidad actual y retorna su análisis (None si no tenía palabras)."""
+        self._puntuar()
+        palabras = self._palabras
+        acumulados = self._estado.acumulados
+
+        self._estado = EstadoPuntuacion()
+        self._ventana.clear()
+        self._cortes.clear()
+        self._palabras = 0
+        if not palabras:
+            return None
+
+        self._sumar(self._total, acumulados)
+        self._total_palabras += palabras
+        self.unidades += 1
+        return AnalisisEmocional(self.lexico, acumulados, palabras)
+
+    @staticmethod
+    def _sumar(destino: Dict[int, list], acumulados: Dict[int, list]) -> None:
+        for emo_id, (puntuacion, contador) in acumulados.items():
+            acumulado = destino.get(emo_id)
+            if acumulado is None:
+                destino[emo_id] = [puntuacion, contador]
+            else:
+                acumulado[0] += puntuacion
+                acumulado[1] += contador
+
+
+def trozos(fuente, tam_bloque: int = TAM_BLOQUE) -> Iterator:
+    """Trozos de ``fuente``: un fichero abierto (texto o binario), una cadena o un iterable de trozos."""
+    if hasattr(fuente, "read"):
+        while True:
+            trozo = fuente.read(tam_bloque)
+            if not trozo:
+                return
+            yield trozo
+    elif isinstance(fuente, (str, bytes)):
+        for inicio in range(0, len(fuente), tam_bloque):
+            yield fuente[inicio:inicio + tam_bloque]
+    else:
+        yield from fuente
+
+
+def analizar_flujo(fuente, lexico=None, tam_bloque: int = TAM_BLOQUE):
+    """
+    Analiza un texto por trozos con memoria constante.
+
+    Returns:
+        Mapping: El mismo análisis que ``detectar_emociones`` sobre el texto completo
+    """
+    analizador = AnalizadorFlujo(lexico)
+    for trozo in trozos(fuente, tam_bloque):
+        analizador.alimentar(trozo)
+    analizador.terminar()
+    return analizador.resultado()
+
+
+def analizar_por_unidades(fuente, unidad: str = "frase", lexico=None,
+                          tam_bloque: int = TAM_BLOQUE) -> Iterator[AnalisisEmocional]:
+    """Genera el análisis de cada frase o párrafo a medida que se completan."""
+    analizador = AnalizadorFlujo(lexico, unidad)
+    for trozo in trozos(fuente, tam_bloque):
+        yield from analizador.alimentar(trozo)
+    yield from analizador.terminar()
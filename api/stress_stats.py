@@ -0,0 +1,192 @@
+"""
+Distribución del nivel de estrés y de las emociones en ventanas de tiempo.
+
+El nivel de estrés de una evaluación es un entero de 0 a 10, así que su
+distribución cabe exacta en un histograma de 11 cubetas (``HistogramaEstres``):
+los percentiles son exactos, la memoria es fija y dos histogramas se fusionan
+sumando cubeta a cubeta, de modo que los de varios workers se pueden sumar.
+
+Para las ventanas (últimos 5 min, 1 h y 24 h) cada una es un anillo de
+intervalos de tiempo fijos (``VENTANAS``: 30 de 10 s, 60 de 1 min y 96 de
+15 min). Cada intervalo guarda, por (emoción, nivel), cuántas evaluaciones
+hubo; al pasar el tiempo el intervalo más antiguo se reutiliza. Consultar una
+ventana recorre sus intervalos, nunca los eventos. Los intervalos se numeran
+desde el epoch, así que son los mismos en todos los workers y se pueden sumar
+en la base de datos (modelo CubetaEstres, ver api/shared_stats.py).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+NIVELES = 11
+
+# nombre -> (segundos de la ventana, segundos por intervalo)
+VENTANAS: Dict[str, Tuple[int, int]] = {
+    "5m": (300, 10),
+    "1h": (3600, 60),
+    "24h": (86400, 900),
+}
+
+
+def nivel_discreto(nivel_estres: Any) -> int:
+    """Nivel de estrés como entero de 0 a 10."""
+    return min(max(int(round(float(nivel_estres))), 0), NIVELES - 1)
+
+
+class HistogramaEstres:
+    """Evaluaciones por nivel de estrés (0-10)."""
+
+    __slots__ = ("cuentas",)
+
+    def __init__(self, cuentas: Optional[Iterable[int]] = None):
+        self.cuentas: List[int] = list(cuentas) if cuentas is not None else [0] * NIVELES
+
+    def registrar(self, nivel: int, veces: int = 1) -> None:
+        self.cuentas[nivel] += veces
+
+    def fusionar(self, otro: "HistogramaEstres") -> None:
+        for nivel, cuenta in enumerate(otro.cuentas):
+            self.cuentas[nivel] += cuenta
+
+    @property
+    def total(self) -> int:
+        return sum(self.cuentas)
+
+    def percentil(self, p: float) -> Optional[int]:
+        """Menor nivel con al menos el p % de las evaluaciones en él o por debajo (None si está vacío)."""
+        total = self.total
+        if not total:
+            return None
+        objetivo = p / 100 * total
+        acumulado = 0
+        for nivel, cuenta in enumerate(self.cuentas):
+            acumulado += cuenta
+            if cuenta and acumulado >= objetivo:
+                return nivel
+        return NIVELES - 1
+
+    def media(self) -> Optional[float]:
+        total = self.total
+        if not total:
+            return None
+        return sum(nivel * cuenta for nivel, cuenta in enumerate(self.cuentas)) / total
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "media": self.media(),
+            "p50": self.percentil(50),
+            "p90": self.percentil(90),
+            "p99": self.percentil(99),
+            "distribucion": list(self.cuentas),
+        }
+
+
+def resumen_ventana(filas: Iterable[Tuple[str, int, int]], segundos: int) -> Dict[str, Any]:
+    """
+    Resumen de una ventana a partir de filas (emoción, nivel, cuenta): percentiles
+    de estrés y, por emoción, cuántas evaluaciones hubo y a qué ritmo por minuto.
+    """
+    histograma = HistogramaEstres()
+    emociones: Dict[str, int] = {}
+    for emocion, nivel, cuenta in filas:
+        histograma.registrar(nivel, cuenta)
+        emociones[emocion] = emociones.get(emocion, 0) + cuenta
+
+    minutos = segundos / 60
+    return {
+        "segundos": segundos,
+        "estres": histograma.como_dict(),
+        "emociones": {
+            emocion: {"evaluaciones": cuenta, "por_minuto": cuenta / minutos}
+            for emocion, cuenta in sorted(emociones.items(), key=lambda item: (-item[1], item[0]))
+        },
+    }
+
+
+class _Intervalo:
+    __slots__ = ("inicio", "cuentas", "enviadas")
+
+    def __init__(self):
+        self.inicio = -1
+        # (emoción, nivel) -> evaluaciones; enviadas: las ya volcadas a la base de datos
+        self.cuentas: Dict[Tuple[str, int], int] = {}
+        self.enviadas: Dict[Tuple[str, int], int] = {}
+
+
+class VentanasEstres:
+    """
+    Anillos de intervalos para cada ventana de ``VENTANAS``.
+
+    Args:
+        ventanas: nombre -> (segundos de la ventana, segundos por intervalo)
+        reloj: Función que da el tiempo en segundos desde el epoch (para tests)
+    """
+
+    def __init__(self, ventanas: Optional[Dict[str, Tuple[int, int]]] = None,
+                 reloj: Callable[[], float] = time.time):
+        self.ventanas = dict(ventanas or VENTANAS)
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._anillos: Dict[str, List[_Intervalo]] = {
+            nombre: [_Intervalo() for _ in range(duracion // ancho)]
+            for nombre, (duracion, ancho) in self.ventanas.items()
+        }
+
+    def registrar(self, emocion: str, nivel: int) -> None:
+        ahora = self._reloj()
+        clave = (emocion, nivel)
+        with self._lock:
+            for nombre, (_, ancho) in self.ventanas.items():
+                anillo = self._anillos[nombre]
+                inicio = int(ahora // ancho)
+                intervalo = anillo[inicio % len(anillo)]
+                if intervalo.inicio != inicio:
+                    # El intervalo se reutiliza: lo que tenía ya está fuera de la ventana
+                    intervalo.inicio = inicio
+                    intervalo.cuentas = {}
+                    intervalo.enviadas = {}
+                intervalo.cuentas[clave] = intervalo.cuentas.get(clave, 0) + 1
+
+    def actual(self, nombre: str) -> int:
+        """Número del intervalo en curso de una ventana."""
+        return int(self._reloj() // self.ventanas[nombre][1])
+
+    def resumen(self, nombre: str) -> Dict[str, Any]:
+        duracion, ancho = self.ventanas[nombre]
+        primero = self.actual(nombre) - duracion // ancho
+        with self._lock:
+            filas = [
+                (emocion, nivel, cuenta)
+                for intervalo in self._anillos[nombre] if intervalo.inicio > primero
+                for (emocion, nivel), cuenta in intervalo.cuentas.items()
+            ]
+        return resumen_ventana(filas, duracion)
+
+    def resumenes(self) -> Dict[str, Dict[str, Any]]:
+        return {nombre: self.resumen(nombre) for nombre in self.ventanas}
+
+    def pendientes(self) -> List[Tuple[int, int, str, int, int]]:
+        """(segundos por intervalo, intervalo, emoción, nivel, delta) aún no volcados."""
+        deltas = []
+        with self._lock:
+            for nombre, (_, ancho) in self.ventanas.items():
+                for intervalo in self._anillos[nombre]:
+                    for clave, cuenta in intervalo.cuentas.items():
+                        delta = cuenta - intervalo.enviadas.get(clave, 0)
+                        if delta:
+                            deltas.append((ancho, intervalo.inicio) + clave + (delta,))
+        return deltas
+
+    def confirmar(self, deltas: List[Tuple[int, int, str, int, int]]) -> None:
+        """Marca como volcados los deltas de ``pendientes()``."""
+        anchos = {ancho: nombre for nombre, (_, ancho) in self.ventanas.items()}
+        with self._lock:
+            for ancho, inicio, emocion, nivel, delta in deltas:
+                anillo = self._anillos[anchos[ancho]]
+                intervalo = anillo[inicio % len(anillo)]
+                # Si el intervalo se reutilizó entre tanto, sus enviadas ya empezaron de cero
+                if intervalo.inicio == inicio:
+                    clave = (emocion, nivel)
+                    intervalo.enviadas[clave] = intervalo.enviadas.get(clave, 0) + delta
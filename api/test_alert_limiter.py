@@ -0,0 +1,163 @@
+"""
+Tests unitarios para la limitación de alertas por usuario
+"""
+
+import unittest
+from unittest import mock
+
+from django.test import override_settings
+
+from api.alert_limiter import CRITICA, MODERADA, Decision, LimitadorAlertas, crear_limitador, severidad_estres
+from api.observers import AlertObserver, EmailNotificationObserver, Subject, get_event_manager
+
+
+class Reloj:
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestLimitadorAlertas(unittest.TestCase):
+
+    def setUp(self):
+        self.reloj = Reloj()
+        self.limitador = LimitadorAlertas(capacidad=2, recarga=60, ventana=120, reloj=self.reloj)
+
+    def test_severidad_estres(self):
+        self.assertEqual([severidad_estres(n) for n in (5, 7, 8, 9, 10)], [None, MODERADA, MODERADA, CRITICA, CRITICA])
+
+    def test_duplicadas_en_la_ventana(self):
+        self.assertEqual(self.limitador.decidir(1, MODERADA), Decision(True))
+        self.reloj.ahora += 119
+        self.assertFalse(self.limitador.decidir(1, MODERADA).emitir)
+        # Otro usuario no se ve afectado
+        self.assertTrue(self.limitador.decidir(2, MODERADA).emitir)
+
+        self.reloj.ahora += 1
+        self.assertEqual(self.limitador.decidir(1, MODERADA), Decision(True, suprimidas=1))
+
+    def test_cubo_de_fichas(self):
+        limitador = LimitadorAlertas(capacidad=2, recarga=60, ventana=0, reloj=self.reloj)
+        decisiones = [limitador.decidir(1, MODERADA).emitir for _ in range(5)]
+        self.assertEqual(decisiones, [True, True, False, False, False])
+
+        self.reloj.ahora += 60
+        self.assertEqual(limitador.decidir(1, MODERADA), Decision(True, suprimidas=3))
+        self.assertFalse(limitador.decidir(1, MODERADA).emitir)
+
+    def test_escalada(self):
+        self.limitador.decidir(1, MODERADA)
+        self.limitador.decidir(1, MODERADA)
+        self.assertEqual(self.limitador.decidir(1, CRITICA), Decision(True, suprimidas=1, escalada=True))
+        # La misma severidad ya no es escalada
+        self.assertFalse(self.limitador.decidir(1, CRITICA).emitir)
+        # Ni tampoco bajar de severidad
+        self.assertFalse(self.limitador.decidir(1, MODERADA).emitir)
+
+    def test_escalada_sin_fichas(self):
+        limitador = LimitadorAlertas(capacidad=1, recarga=60, ventana=120, reloj=self.reloj)
+        limitador.decidir(1, MODERADA)
+        self.assertTrue(limitador.decidir(1, CRITICA).escalada)
+        self.assertEqual(limitador.metricas()["escaladas"], 1)
+
+    def test_expulsa_a_los_inactivos(self):
+        self.limitador.decidir(1, MODERADA)
+        self.limitador.decidir(1, MODERADA)
+        self.limitador.decidir(2, MODERADA)
+        self.reloj.ahora += 121  # max(ventana, capacidad * recarga) = 120
+        self.limitador.decidir(3, MODERADA)
+
+        self.assertEqual(len(self.limitador), 1)
+        self.assertEqual(self.limitador.metricas()["suprimidas_sin_resumen"], 1)
+        # Expulsado con el mismo estado que un usuario nuevo
+        self.assertEqual(self.limitador.decidir(1, MODERADA), Decision(True))
+
+    def test_max_usuarios(self):
+        limitador = LimitadorAlertas(max_usuarios=100, reloj=self.reloj)
+        for usuario_id in range(1000):
+            limitador.decidir(usuario_id, CRITICA)
+        self.assertEqual(len(limitador), 100)
+        self.assertEqual(limitador.metricas()["expulsados"], 900)
+
+    def test_crear_limitador(self):
+        limitador = crear_limitador({"CAPACIDAD": 5, "RECARGA_S": 10, "VENTANA_DEDUP_S": 30})
+        self.assertEqual((limitador.capacidad, limitador.recarga, limitador.ventana, limitador.inactividad),
+                         (5, 10, 30, 50))
+        with self.assertRaises(ValueError):
+            LimitadorAlertas(capacidad=0)
+
+
+class TestAlertObserverLimitado(unittest.TestCase):
+
+    def setUp(self):
+        self.reloj = Reloj()
+        self.observer = AlertObserver(LimitadorAlertas(capacidad=3, recarga=60, ventana=300, reloj=self.reloj))
+
+    def alerta(self, nivel_estres, usuario_id=1):
+        self.observer.update("analisis_estres_alto", {"usuario_id": usuario_id, "usuario": {"nombre": "Ana"},
+                                                      "nivel_estres": nivel_estres})
+
+    def test_tormenta_de_alertas(self):
+        """Diez mensajes en un minuto producen una alerta, más la escalada"""
+        with self.assertLogs("api.observers", level="WARNING") as logs:
+            for _ in range(10):
+                self.alerta(8)
+                self.reloj.ahora += 6
+            self.alerta(9)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(logs.records[0].levelname, "WARNING")
+        self.assertEqual(logs.records[1].levelname, "CRITICAL")
+        self.assertIn("escalada, 9 alerta(s) suprimida(s)", logs.output[1])
+
+    def test_resumen_en_la_siguiente_alerta(self):
+        with self.assertLogs("api.observers", level="WARNING") as logs:
+            self.alerta(9)
+            self.alerta(9)
+            self.alerta(10)
+            self.reloj.ahora += 300
+            self.alerta(9)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("2 alerta(s) suprimida(s)", logs.output[1])
+
+    def test_sin_usuario_no_se_limita(self):
+        with self.assertLogs("api.observers", level="WARNING") as logs:
+            for _ in range(3):
+                self.observer.update("analisis_estres_alto", {"usuario": {"nombre": "Ana"}, "nivel_estres": 7})
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual(len(self.observer.limitador), 0)
+
+
+class TestEmailLimitado(unittest.TestCase):
+    """El email de alerta sigue la misma decisión que AlertObserver"""
+
+    def setUp(self):
+        self.reloj = Reloj()
+        self.subject = Subject()
+        self.subject.attach(EmailNotificationObserver())
+        self.subject.attach(AlertObserver(LimitadorAlertas(capacidad=3, recarga=60, ventana=300, reloj=self.reloj),
+                                          publicar=self.subject.notify))
+
+    def test_tormenta_de_emails(self):
+        with mock.patch("django.core.mail.send_mail") as send_mail, \
+                override_settings(NOTIFICACIONES_EMAIL={"HABILITADO": True}), \
+                self.assertLogs("api.observers", level="WARNING"):
+            for nivel in [8] * 10 + [9]:
+                self.subject.notify("analisis_estres_alto", {
+                    "usuario_id": 1, "usuario": {"nombre": "Ana", "correo": "ana@example.com"},
+                    "nivel_estres": nivel, "recomendacion": "Respira"})
+                self.reloj.ahora += 6
+
+        self.assertEqual(send_mail.call_count, 2)
+        asunto, cuerpo, remitente, destinatarios = send_mail.call_args.args
+        self.assertIn("9 evaluación(es) más", cuerpo)
+        self.assertEqual(destinatarios, ["ana@example.com"])
+
+    def test_event_manager(self):
+        """Por defecto el email no recibe analisis_estres_alto, sino las alertas emitidas"""
+        manager = get_event_manager()
+        emails = [o for o in manager.observadores_de("alerta_emitida") if isinstance(o, EmailNotificationObserver)]
+        self.assertEqual(len(emails), 1)
+        self.assertNotIn(emails[0], manager.observadores_de("analisis_estres_alto"))
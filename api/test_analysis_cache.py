@@ -0,0 +1,104 @@
+"""
+Tests unitarios para la caché de análisis
+"""
+
+from collections.abc import Mapping
+
+from django.test import SimpleTestCase, override_settings
+
+from api import ia
+from api.analysis_cache import AnalysisCache
+from api.emotion_library import EmotionLibrary
+
+
+class ContadorLlamadas:
+    """Función de análisis de prueba que cuenta sus llamadas"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __call__(self, texto):
+        self.llamadas += 1
+        return EmotionLibrary.detectar_emociones(texto)
+
+
+class TestAnalysisCache(SimpleTestCase):
+    """Tests para AnalysisCache"""
+
+    def setUp(self):
+        self.cache = AnalysisCache(max_entradas=2)
+        self.calcular = ContadorLlamadas()
+
+    def test_acierto_con_texto_normalizado(self):
+        """Mayúsculas y espacios extra reutilizan la misma entrada"""
+        self.cache.obtener("Estoy bien", "v1", self.calcular)
+        self.cache.obtener("  estoy   BIEN ", "v1", self.calcular)
+
+        self.assertEqual(self.calcular.llamadas, 1)
+        self.assertEqual(self.cache.aciertos, 1)
+        self.assertEqual(self.cache.fallos, 1)
+
+    def test_expulsion_lru(self):
+        """Se expulsa la entrada usada hace más tiempo"""
+        self.cache.obtener("gracias", "v1", self.calcular)
+        self.cache.obtener("estoy bien", "v1", self.calcular)
+        self.cache.obtener("gracias", "v1", self.calcular)
+        self.cache.obtener("me siento solo", "v1", self.calcular)
+
+        self.assertEqual(self.cache.expulsiones, 1)
+        self.cache.obtener("gracias", "v1", self.calcular)
+        self.assertEqual(self.calcular.llamadas, 3)
+
+    def test_limite_de_memoria(self):
+        """Las entradas no superan el presupuesto de bytes"""
+        cache = AnalysisCache(max_entradas=100, max_bytes=6000)
+        for texto in ["gracias", "estoy bien", "me siento solo", "tengo miedo", "feliz"]:
+            cache.obtener(texto, "v1", self.calcular)
+
+        self.assertLessEqual(cache.estadisticas()["bytes"], 6000)
+        self.assertGreater(cache.expulsiones, 0)
+
+    def test_resultado_inmutable(self):
+        """Un llamador no puede modificar una entrada cacheada"""
+        resultado = self.cache.obtener("estoy triste", "v1", self.calcular)
+
+        with self.assertRaises(TypeError):
+            resultado["emocion_principal"] = "alegría"
+        with self.assertRaises(TypeError):
+            resultado["emociones"]["tristeza"]["puntuacion"] = 0
+        self.assertEqual(self.cache.obtener("estoy triste", "v1", self.calcular)["emocion_principal"], "tristeza")
+
+    def test_invalidacion_por_version_del_lexico(self):
+        """Un cambio de versión del léxico descarta las entradas anteriores"""
+        self.cache.obtener("gracias", "v1", self.calcular)
+        self.cache.obtener("gracias", "v2", self.calcular)
+
+        self.assertEqual(self.calcular.llamadas, 2)
+        self.assertEqual(self.cache.invalidaciones, 1)
+
+
+class TestCacheEnIA(SimpleTestCase):
+    """Tests de la caché detrás de api/ia.py"""
+
+    def setUp(self):
+        ia._cache = None
+
+    def tearDown(self):
+        ia._cache = None
+
+    @override_settings(ANALISIS_CACHE={"HABILITADO": False})
+    def test_deshabilitada_por_defecto(self):
+        """Sin habilitarla, ia analiza siempre y no expone estadísticas"""
+        self.assertIsNone(ia.estadisticas_cache())
+        self.assertIsInstance(ia.obtener_analisis_completo("gracias"), Mapping)
+
+    @override_settings(ANALISIS_CACHE={"HABILITADO": True, "MAX_ENTRADAS": 10})
+    def test_habilitada(self):
+        """Con la caché activa, los mensajes repetidos son aciertos"""
+        primero = ia.analizar_texto("me siento solo")
+        segundo = ia.analizar_texto("Me siento solo")
+
+        self.assertEqual(primero, segundo)
+        estadisticas = ia.estadisticas_cache()
+        self.assertEqual(estadisticas["aciertos"], 1)
+        self.assertEqual(estadisticas["version_lexico"], EmotionLibrary.LEXICO.version)
@@ -0,0 +1,183 @@
+"""
+Tests unitarios para la cascada de analizadores
+"""
+
+import threading
+import time
+import unittest
+
+from django.test import SimpleTestCase, override_settings
+
+from api import ia
+from api.analyzers import (ANALIZADORES, AnalizadorBase, AnalizadorLexico, Cascada, MicroLotes,
+                           crear_analizador, registrar_analizador)
+from api.emotion_library import EmotionLibrary
+
+# Confianza del léxico: 100 (todas las palabras detectadas) y 30 (ninguna)
+TEXTO_CLARO = "triste"
+TEXTO_AMBIGUO = "hoy fue un día raro en el trabajo"
+
+
+class AnalizadorLocal(AnalizadorBase):
+    """Analizador de prueba: responde siempre "calma" y guarda los lotes recibidos."""
+
+    nombre = "local"
+    version = "prueba"
+
+    def __init__(self, demora=0.0, fallar=False):
+        self.demora = demora
+        self.fallar = fallar
+        self.lotes = []
+
+    def analizar_lote(self, textos):
+        self.lotes.append(list(textos))
+        if self.demora:
+            time.sleep(self.demora)
+        if self.fallar:
+            raise RuntimeError("modelo no disponible")
+        return [self.resultado("calma", 90, 1.0) for _ in textos]
+
+
+class TestCascada(unittest.TestCase):
+
+    def crear(self, respaldo, **opciones):
+        cascada = Cascada(respaldo, **opciones)
+        self.addCleanup(cascada.cerrar, 5)
+        return cascada
+
+    def test_confianza_alta_no_consulta_el_respaldo(self):
+        respaldo = AnalizadorLocal()
+        cascada = self.crear(respaldo, umbral_confianza=50)
+
+        resultado = cascada.analizar(TEXTO_CLARO)
+        self.assertEqual(resultado["emocion_principal"], "tristeza")
+        self.assertEqual(respaldo.lotes, [])
+
+        niveles = cascada.estado()["niveles"]
+        self.assertEqual(niveles["lexico"]["resueltos"], 1)
+        self.assertEqual(niveles["local"]["textos"], 0)
+
+    def test_confianza_baja_usa_el_respaldo(self):
+        respaldo = AnalizadorLocal()
+        cascada = self.crear(respaldo, umbral_confianza=50)
+
+        resultado = cascada.analizar(TEXTO_AMBIGUO)
+        self.assertEqual(resultado["emocion_principal"], "calma")
+        self.assertEqual(resultado["version_lexico"], "local:prueba")
+        self.assertEqual(resultado["emojis"], EmotionLibrary.EMOTIONS_DICT["calma"]["color"])
+        self.assertEqual(respaldo.lotes, [[TEXTO_AMBIGUO]])
+
+        niveles = cascada.estado()["niveles"]
+        self.assertEqual(niveles["lexico"]["textos"], 1)
+        self.assertEqual(niveles["lexico"]["resueltos"], 0)
+        self.assertEqual(niveles["local"]["resueltos"], 1)
+        self.assertGreater(niveles["local"]["latencia_max_ms"], 0)
+
+    def test_texto_vacio_no_va_al_respaldo(self):
+        respaldo = AnalizadorLocal()
+        cascada = self.crear(respaldo, umbral_confianza=50)
+        self.assertEqual(cascada.analizar("   ")["emocion_principal"], "neutral")
+        self.assertEqual(respaldo.lotes, [])
+
+    def test_fallo_del_respaldo_retorna_el_lexico(self):
+        cascada = self.crear(AnalizadorLocal(fallar=True), umbral_confianza=50)
+        with self.assertLogs("api.analyzers", level="WARNING"):
+            resultado = cascada.analizar(TEXTO_AMBIGUO)
+
+        self.assertEqual(dict(resultado), dict(EmotionLibrary.detectar_emociones(TEXTO_AMBIGUO)))
+        niveles = cascada.estado()["niveles"]
+        self.assertEqual(niveles["local"]["errores"], 1)
+        self.assertEqual(niveles["lexico"]["resueltos"], 1)
+
+    def test_respaldo_lento_retorna_el_lexico(self):
+        cascada = self.crear(AnalizadorLocal(demora=0.5), umbral_confianza=50, tiempo_maximo=0.05)
+        with self.assertLogs("api.analyzers", level="WARNING"):
+            resultado = cascada.analizar(TEXTO_AMBIGUO)
+        self.assertEqual(resultado["emocion_principal"], EmotionLibrary.detectar_emociones(TEXTO_AMBIGUO)["emocion_principal"])
+
+
+class TestMicroLotes(unittest.TestCase):
+
+    def test_agrupa_textos_de_varios_hilos(self):
+        """Los textos que llegan a la vez se analizan en lotes de hasta lote_maximo"""
+        respaldo = AnalizadorLocal()
+        lotes = MicroLotes(respaldo, lote_maximo=4, espera_maxima=0.5)
+        self.addCleanup(lotes.cerrar, 5)
+
+        inicio = threading.Barrier(8)
+        resultados = []
+
+        def enviar(i):
+            inicio.wait()
+            resultados.append(lotes.enviar(f"texto {i}").result(5))
+
+        hilos = [threading.Thread(target=enviar, args=(i,)) for i in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(5)
+
+        self.assertEqual(len(resultados), 8)
+        self.assertTrue(all(len(lote) <= 4 for lote in respaldo.lotes))
+        self.assertLess(len(respaldo.lotes), 8)
+        self.assertEqual(sorted(t for lote in respaldo.lotes for t in lote), sorted(f"texto {i}" for i in range(8)))
+        self.assertEqual(lotes.estadisticas.textos, 8)
+
+    def test_espera_maxima(self):
+        """Un texto solo no espera a que se llene el lote más allá de espera_maxima"""
+        lotes = MicroLotes(AnalizadorLocal(), lote_maximo=100, espera_maxima=0.05)
+        self.addCleanup(lotes.cerrar, 5)
+
+        inicio = time.monotonic()
+        lotes.enviar("texto").result(5)
+        self.assertLess(time.monotonic() - inicio, 1.0)
+
+    def test_cerrar_procesa_lo_pendiente(self):
+        respaldo = AnalizadorLocal()
+        lotes = MicroLotes(respaldo, lote_maximo=100, espera_maxima=10)
+        futuro = lotes.enviar("texto")
+        lotes.cerrar(5)
+        self.assertEqual(futuro.result(0)["emocion_principal"], "calma")
+        with self.assertRaises(RuntimeError):
+            lotes.enviar("otro")
+
+
+class TestRegistroAnalizadores(unittest.TestCase):
+
+    def test_por_nombre_y_por_ruta(self):
+        registrar_analizador("local_prueba", AnalizadorLocal)
+        self.addCleanup(ANALIZADORES.pop, "local_prueba")
+
+        self.assertIsInstance(crear_analizador("lexico"), AnalizadorLexico)
+        self.assertEqual(crear_analizador("local_prueba", demora=0.1).demora, 0.1)
+        self.assertIsInstance(crear_analizador("api.test_analyzers.AnalizadorLocal"), AnalizadorLocal)
+
+
+class TestCascadaEnIA(SimpleTestCase):
+    """Tests de la cascada detrás de api/ia.py"""
+
+    def setUp(self):
+        ia._cascada = None
+        ia._cache = None
+
+    def tearDown(self):
+        if ia._cascada is not None:
+            ia._cascada.cerrar(5)
+        ia._cascada = None
+        ia._cache = None
+
+    def test_sin_respaldo_solo_lexico(self):
+        self.assertIsNone(ia.estadisticas_analizadores())
+        self.assertEqual(ia.analizar_texto(TEXTO_AMBIGUO)[0], EmotionLibrary.detectar_emociones(TEXTO_AMBIGUO)["emocion_principal"])
+
+    @override_settings(ANALIZADORES={"RESPALDO": "api.test_analyzers.AnalizadorLocal", "UMBRAL_CONFIANZA": 50},
+                       ANALISIS_CACHE={"HABILITADO": True})
+    def test_con_respaldo_y_cache(self):
+        self.assertEqual(ia.analizar_texto(TEXTO_AMBIGUO)[0], "calma")
+        self.assertEqual(ia.analizar_texto(TEXTO_AMBIGUO)[0], "calma")
+        self.assertEqual(ia.analizar_texto(TEXTO_CLARO)[0], "tristeza")
+
+        niveles = ia.estadisticas_analizadores()["niveles"]
+        self.assertEqual(niveles["local"]["resueltos"], 1)
+        self.assertEqual(niveles["lexico"]["resueltos"], 1)
+        self.assertEqual(ia.estadisticas_cache()["aciertos"], 1)
@@ -0,0 +1,517 @@
+"""
+Tests unitarios para EmotionLibrary
+"""
+
+import io
+import os
+import pickle
+import re
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from api.accumulator import EmotionAccumulator
+from api.batch_scoring import ResultadoLote, puntuar_lote, puntuar_lote_paralelo
+from api.emotion_library import AnalisisEmocional, EmotionLibrary
+from api.lexicon import CompiledLexicon
+from api.modifiers import REGLAS_ADYACENTES, ReglasModificadores
+from api.packed_lexicon import PackedLexicon, cargar_lexico, escribir_artefacto
+from api.phrase_matcher import PhraseAutomaton
+from api.streaming import AnalizadorFlujo, analizar_flujo, analizar_por_unidades
+
+
+def detectar_emociones_referencia(texto):
+    """Implementación original (emoción × token × lista) usada como referencia."""
+    palabras = re.findall(r'\b\w+\b', texto.lower().strip())
+    emociones_encontradas = {}
+
+    for emocion, datos in EmotionLibrary.EMOTIONS_DICT.items():
+        puntuacion = 0
+        contador_palabras = 0
+
+        for i, palabra in enumerate(palabras):
+            if palabra in datos["palabras"]:
+                intensidad = 1.0
+                if i > 0 and palabras[i-1] in EmotionLibrary.INTENSIFIERS:
+                    intensidad *= EmotionLibrary.INTENSIFIERS[palabras[i-1]]
+                if i > 0 and palabras[i-1] in EmotionLibrary.NEGATORS:
+                    intensidad *= -0.5
+                puntuacion += intensidad * abs(datos["nivel_base"])
+                contador_palabras += 1
+
+        if contador_palabras > 0:
+            emociones_encontradas[emocion] = {
+                "puntuacion": puntuacion,
+                "palabras_detectadas": contador_palabras,
+                "intensidad": min((puntuacion / contador_palabras) * 1.2, 10)
+            }
+
+    return emociones_encontradas
+
+
+TEXTOS = [
+    "Estoy muy estresado con el trabajo",
+    "Hoy me siento feliz y contento, ¡qué día tan bonito!",
+    "No estoy triste, solo un poco cansado",
+    "Tengo miedo, pánico y ansiedad; no puedo dormir por la preocupación",
+    "Estoy solo, vacío y sin esperanza. Nunca feliz.",
+    "Extremadamente agradecido y orgulloso de mi familia",
+    "mal mal mal, muy mal, demasiado mal",
+    "Lágrimas y más lágrimas, melancolía y nostalgia",
+    "texto sin emociones reconocibles",
+]
+
+
+class TestCompiledLexicon(unittest.TestCase):
+    """Tests para el índice invertido del léxico"""
+
+    def test_indice_sin_duplicados(self):
+        """Una palabra repetida en la lista de una emoción se indexa una sola vez"""
+        tristeza = EmotionLibrary.LEXICO.emociones.index("tristeza")
+        entradas = EmotionLibrary.LEXICO.buscar("lágrimas")
+        self.assertEqual(sum(1 for emo_id, _ in entradas if emo_id == tristeza), 1)
+
+    def test_palabra_en_varias_emociones(self):
+        """Una palabra compartida apunta a todas sus emociones"""
+        lexico = EmotionLibrary.LEXICO
+        emociones = {lexico.emociones[emo_id] for emo_id, _ in lexico.buscar("pánico")}
+        esperadas = {e for e, d in EmotionLibrary.EMOTIONS_DICT.items() if "pánico" in d["palabras"]}
+        self.assertEqual(emociones, esperadas)
+
+    @mock.patch.object(EmotionLibrary, "REGLAS_MODIFICADORES", REGLAS_ADYACENTES)
+    def test_equivalencia_con_implementacion_original(self):
+        """Con modificadores adyacentes, el resultado es idéntico al recorrido original"""
+        for texto in TEXTOS + [" ".join(TEXTOS) * 20]:
+            with self.subTest(texto=texto[:40]):
+                resultado = EmotionLibrary.detectar_emociones(texto)
+                esperado = detectar_emociones_referencia(texto)
+                self.assertEqual(resultado["emociones"], esperado)
+                self.assertEqual(list(resultado["emociones"]), list(esperado))
+
+
+class TestPhraseAutomaton(unittest.TestCase):
+    """Tests para el autómata de frases"""
+
+    def test_coincidencias_solapadas(self):
+        """Reporta todas las frases, incluidas las que se solapan"""
+        automata = PhraseAutomaton([("mal",), ("mal", "presagio"), ("presagio",), ("un", "mal")])
+        encontradas = sorted(automata.buscar(["un", "mal", "presagio"]))
+        self.assertEqual(encontradas, [(0, 1, 3), (1, 1, 0), (1, 2, 1), (2, 2, 2)])
+
+    def test_reinicio_tras_fallo(self):
+        """Un prefijo incompleto no impide encontrar la frase que empieza después"""
+        automata = PhraseAutomaton([("de", "pronto"), ("pronto",)])
+        encontradas = list(automata.buscar(["de", "de", "pronto"]))
+        self.assertEqual(encontradas, [(1, 2, 0), (2, 2, 1)])
+
+    def test_lexico_grande(self):
+        """Construir y recorrer con decenas de miles de frases sigue siendo rápido"""
+        frases = [("palabra%d" % i, "frase%d" % (i % 97)) for i in range(30000)]
+        automata = PhraseAutomaton(frases)
+        tokens = ["palabra123", "frase26", "otro"] * 1000
+        self.assertEqual(len(list(automata.buscar(tokens))), 1000)
+
+
+class TestDeteccionFrases(unittest.TestCase):
+    """Tests para la detección de frases de varias palabras"""
+
+    def test_frase_compuesta_detectada(self):
+        """'me encanta' suma a alegría aunque ninguna de sus palabras esté sola en el léxico"""
+        resultado = EmotionLibrary.detectar_emociones("me encanta este lugar")
+        self.assertEqual(resultado["emocion_principal"], "alegría")
+        self.assertEqual(resultado["emociones"]["alegría"]["palabras_detectadas"], 1)
+
+    def test_frase_y_palabra_solapadas(self):
+        """'mal presagio' cuenta para su emoción y 'mal' sigue contando para la suya"""
+        emociones = EmotionLibrary.detectar_emociones("tengo un mal presagio")["emociones"]
+        self.assertIn("ansiedad_anticipatoria", emociones)
+        self.assertIn("tristeza", emociones)
+
+    def test_intensificador_compuesto(self):
+        """'un montón' actúa como intensificador de la frase siguiente"""
+        normal = EmotionLibrary.detectar_emociones("triste")["emociones"]["tristeza"]
+        intensa = EmotionLibrary.detectar_emociones("un montón triste")["emociones"]["tristeza"]
+        self.assertEqual(intensa["puntuacion"], normal["puntuacion"] * EmotionLibrary.INTENSIFIERS["un montón"])
+
+    def test_negador_antes_de_frase(self):
+        """Un negador justo antes de una frase compuesta la invierte"""
+        emociones = EmotionLibrary.detectar_emociones("nunca me encanta")["emociones"]
+        self.assertLess(emociones["alegría"]["puntuacion"], 0)
+
+    def test_negador_dentro_de_frase(self):
+        """El 'no' que forma parte de 'no debería' no niega la propia frase"""
+        emociones = EmotionLibrary.detectar_emociones("no debería")["emociones"]
+        self.assertGreater(emociones["culpa"]["puntuacion"], 0)
+
+
+class TestModificadores(unittest.TestCase):
+    """Tests para el alcance de negadores e intensificadores"""
+
+    def puntuacion(self, texto, emocion, reglas=None):
+        palabras, cortes = (reglas or EmotionLibrary.REGLAS_MODIFICADORES).tokenizar(texto)
+        acumulados = EmotionLibrary._puntuar_tokens(palabras, EmotionLibrary.LEXICO, cortes, reglas)
+        return acumulados[EmotionLibrary.LEXICO.emociones.index(emocion)][0]
+
+    def test_negacion_con_palabras_intermedias(self):
+        """'no me siento feliz' niega alegría aunque el negador no esté pegado"""
+        self.assertEqual(self.puntuacion("no me siento feliz", "alegría"), -0.5 * self.puntuacion("feliz", "alegría"))
+
+    def test_doble_negacion_cuenta_una_vez(self):
+        """'no me siento nada feliz' es una sola negación, no una afirmación"""
+        self.assertEqual(self.puntuacion("no me siento nada feliz", "alegría"), self.puntuacion("no feliz", "alegría"))
+
+    def test_intensificadores_encadenados(self):
+        """'muy pero muy triste' pesa más que 'muy triste'"""
+        muy = EmotionLibrary.INTENSIFIERS["muy"]
+        self.assertEqual(self.puntuacion("muy pero muy triste", "tristeza"), self.puntuacion("triste", "tristeza") * muy * muy)
+
+    def test_tope_de_intensificacion(self):
+        reglas = ReglasModificadores(max_intensificacion=2.0)
+        self.assertEqual(self.puntuacion("muy muy muy triste", "tristeza", reglas), self.puntuacion("triste", "tristeza") * 2.0)
+
+    def test_puntuacion_corta_el_alcance(self):
+        """'No, estoy feliz' no niega alegría"""
+        self.assertGreater(self.puntuacion("No, estoy feliz", "alegría"), 0)
+        self.assertGreater(self.puntuacion("muy. triste", "tristeza"), 0)
+        self.assertEqual(self.puntuacion("muy. triste", "tristeza"), self.puntuacion("triste", "tristeza"))
+
+    def test_fuera_de_la_ventana(self):
+        reglas = ReglasModificadores(ventana_negacion=1)
+        self.assertGreater(self.puntuacion("no me siento feliz", "alegría", reglas), 0)
+        self.assertLess(self.puntuacion("no me feliz", "alegría", reglas), 0)
+
+    def test_cortes_no_cambian_los_tokens(self):
+        """La tokenización con cortes produce los mismos tokens que tokenizar"""
+        for texto in TEXTOS:
+            palabras, _ = EmotionLibrary.REGLAS_MODIFICADORES.tokenizar(texto)
+            self.assertEqual(palabras, re.findall(r'\b\w+\b', texto.lower()))
+
+
+class TestAnalisisEmocional(unittest.TestCase):
+    """Tests para el resultado compacto de detectar_emociones"""
+
+    def test_igual_al_dict_calculado_con_los_helpers(self):
+        """Claves y valores coinciden con el dict construido a partir de las emociones"""
+        for texto in TEXTOS:
+            with self.subTest(texto=texto[:40]):
+                resultado = EmotionLibrary.detectar_emociones(texto)
+                emociones = resultado["emociones"]
+                palabras = len(re.findall(r'\b\w+\b', texto.lower()))
+                nivel_estres = EmotionLibrary._calcular_nivel_estres(emociones)
+                principal = max(emociones, key=lambda e: abs(emociones[e]["puntuacion"])) if emociones else "neutral"
+
+                self.assertEqual(list(resultado), list(AnalisisEmocional.CLAVES))
+                self.assertEqual(resultado["emocion_principal"], principal)
+                self.assertEqual(resultado["nivel_estres"], nivel_estres)
+                self.assertEqual(resultado["confianza"], EmotionLibrary._calcular_confianza(emociones, palabras))
+                self.assertEqual(resultado["recomendacion"], EmotionLibrary._generar_recomendacion(principal, nivel_estres))
+
+    def test_emociones_es_una_copia(self):
+        """Modificar el detalle de emociones no altera el resultado"""
+        resultado = EmotionLibrary.detectar_emociones("estoy triste")
+        resultado["emociones"]["tristeza"]["puntuacion"] = 0
+        self.assertGreater(resultado["emociones"]["tristeza"]["puntuacion"], 0)
+
+    def test_clave_inexistente(self):
+        resultado = EmotionLibrary.detectar_emociones("estoy triste")
+        self.assertNotIn("otra", resultado)
+        with self.assertRaises(KeyError):
+            resultado["otra"]
+
+    def test_recomendacion_interpola_estres(self):
+        """Solo el nivel de estrés se inserta en la recomendación precalculada"""
+        self.assertIn("(Estrés: 5.4/10)", EmotionLibrary._generar_recomendacion("ansiedad", 5.44))
+        self.assertEqual(EmotionLibrary._generar_recomendacion("desconocida", 2), EmotionLibrary.RECOMENDACION_GENERICA)
+
+    def test_recomendacion_para(self):
+        """recomendacion_para da la misma recomendación que el análisis"""
+        resultado = EmotionLibrary.detectar_emociones("tengo mucha ansiedad y nervios")
+        self.assertEqual(EmotionLibrary.recomendacion_para(resultado["emocion_principal"], resultado["nivel_estres"]),
+                         resultado["recomendacion"])
+
+
+class TestPuntuacionLote(unittest.TestCase):
+    """Tests para el motor vectorizado de analizar_multiples"""
+
+    def setUp(self):
+        self.textos = TEXTOS + ["", "   ", "me encanta un montón, nunca me duele"]
+
+    def test_resultados_por_texto_identicos(self):
+        """Cada fila del lote produce el mismo dict que detectar_emociones"""
+        lote = puntuar_lote(self.textos)
+        for i, texto in enumerate(self.textos):
+            with self.subTest(texto=texto[:40]):
+                esperado = EmotionLibrary.detectar_emociones(texto)
+                self.assertEqual(lote.a_dict(i), esperado)
+                self.assertEqual(list(lote.a_dict(i)["emociones"]), list(esperado["emociones"]))
+
+    def test_resumen_igual_al_promedio_por_texto(self):
+        """analizar_multiples coincide con promediar los resultados texto a texto"""
+        resultados = [EmotionLibrary.detectar_emociones(t) for t in self.textos]
+        intensidades = {}
+        for resultado in resultados:
+            for emocion, datos in resultado["emociones"].items():
+                intensidades.setdefault(emocion, []).append(datos["intensidad"])
+
+        resumen = EmotionLibrary.analizar_multiples(self.textos)
+
+        self.assertEqual(resumen["analisis_total"], len(self.textos))
+        self.assertEqual(list(resumen["emociones_promedio"]), list(intensidades))
+        for emocion, valores in intensidades.items():
+            self.assertAlmostEqual(resumen["emociones_promedio"][emocion], sum(valores) / len(valores))
+        self.assertAlmostEqual(
+            resumen["nivel_estres_promedio"],
+            sum(r["nivel_estres"] for r in resultados) / len(resultados)
+        )
+
+    def test_concatenar_lotes(self):
+        """Unir lotes parciales equivale a puntuar todos los textos juntos"""
+        completo = puntuar_lote(self.textos)
+        partes = ResultadoLote.concatenar([puntuar_lote(self.textos[:4]), puntuar_lote(self.textos[4:])])
+        self.assertEqual(partes.resumen(), completo.resumen())
+
+
+class TestPuntuacionParalela(unittest.TestCase):
+    """Tests para la variante con pool de procesos"""
+
+    def setUp(self):
+        self.textos = (TEXTOS + ["", "me encanta un montón, nunca me duele"]) * 5
+
+    def test_lote_pequeno_en_serie(self):
+        """Por debajo del umbral no se arranca ningún pool"""
+        with mock.patch("api.batch_scoring.ProcessPoolExecutor") as pool:
+            resumen = EmotionLibrary.analizar_multiples(self.textos, workers=4)
+        pool.assert_not_called()
+        self.assertEqual(resumen, EmotionLibrary.analizar_multiples(self.textos))
+
+    def test_workers_none_en_serie(self):
+        """workers=None puntúa en serie también en puntuar_lote_paralelo"""
+        with mock.patch("api.batch_scoring.UMBRAL_PARALELO", 10), \
+                mock.patch("api.batch_scoring.ProcessPoolExecutor") as pool:
+            lote = puntuar_lote_paralelo(self.textos)
+        pool.assert_not_called()
+        self.assertEqual(lote.resumen(), EmotionLibrary.analizar_multiples(self.textos))
+
+    def test_bloques_serializados_sin_lexico(self):
+        """Un bloque devuelto por un worker no lleva el léxico ni los derivados"""
+        lote = puntuar_lote(self.textos)
+        datos = pickle.dumps(lote)
+        self.assertNotIn(pickle.dumps(lote.lexico), datos)
+        self.assertLess(len(datos), len(pickle.dumps(lote.lexico)))
+
+        copia = pickle.loads(datos)
+        self.assertIsNone(copia.lexico)
+        self.assertEqual(ResultadoLote.concatenar([copia], lote.lexico).resumen(), lote.resumen())
+        self.assertEqual(copia.asociar(lote.lexico).a_dict(0), lote.a_dict(0))
+
+    def test_resultados_en_orden_con_generador(self):
+        """Con pool y un generador de entrada, las filas conservan el orden original"""
+        with mock.patch("api.batch_scoring.UMBRAL_PARALELO", 10):
+            lote = puntuar_lote_paralelo((t for t in self.textos), workers=2, chunksize=7)
+
+        self.assertEqual(len(lote), len(self.textos))
+        for i, texto in enumerate(self.textos):
+            self.assertEqual(lote.a_dict(i), EmotionLibrary.detectar_emociones(texto))
+        self.assertEqual(lote.resumen(), puntuar_lote(self.textos).resumen())
+
+
+class TestPackedLexicon(unittest.TestCase):
+    """Tests para el léxico empaquetado en mmap"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.TemporaryDirectory()
+        cls.ruta = os.path.join(cls.directorio.name, "lexicon.bin")
+        escribir_artefacto(
+            CompiledLexicon(EmotionLibrary.EMOTIONS_DICT, EmotionLibrary.INTENSIFIERS, EmotionLibrary.NEGATORS),
+            cls.ruta
+        )
+        cls.lexico = PackedLexicon(cls.ruta)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.lexico.cerrar()
+        cls.directorio.cleanup()
+
+    def test_mismos_resultados_que_el_lexico_en_memoria(self):
+        """Puntuar con el artefacto da los mismos resultados que el léxico compilado"""
+        textos = TEXTOS + ["me encanta un montón, nunca me duele", "tengo un mal presagio, fuera de sí"]
+        lote = puntuar_lote(textos, self.lexico)
+        for i, texto in enumerate(textos):
+            with self.subTest(texto=texto[:40]):
+                self.assertEqual(lote.a_dict(i), EmotionLibrary.detectar_emociones(texto))
+
+    def test_metadatos(self):
+        """El artefacto conserva emociones, colores y versión del léxico"""
+        self.assertEqual(self.lexico.emociones, EmotionLibrary.LEXICO.emociones)
+        self.assertEqual(self.lexico.colores, EmotionLibrary.LEXICO.colores)
+        self.assertEqual(self.lexico.version, EmotionLibrary.LEXICO.version)
+        self.assertEqual(self.lexico.longitud_maxima, EmotionLibrary.LEXICO.longitud_maxima)
+        self.assertEqual(self.lexico.buscar("Pánico"), EmotionLibrary.LEXICO.buscar("pánico"))
+
+    def test_serializable_para_workers(self):
+        """Al serializarse, un worker reabre el mismo fichero"""
+        copia = pickle.loads(pickle.dumps(self.lexico))
+        self.assertEqual(copia.ruta, self.ruta)
+        self.assertEqual(copia.buscar("feliz"), self.lexico.buscar("feliz"))
+
+    def test_reescribir_con_el_artefacto_mapeado(self):
+        """Reescribir el artefacto no altera a un PackedLexicon que lo tiene mapeado"""
+        ruta = os.path.join(self.directorio.name, "reescrito.bin")
+        escribir_artefacto(EmotionLibrary.LEXICO, ruta)
+        mapeado = PackedLexicon(ruta)
+        self.addCleanup(mapeado.cerrar)
+        inodo = os.stat(ruta).st_ino
+
+        # Un léxico mucho más pequeño: truncar el fichero mapeado daría SIGBUS
+        escribir_artefacto(CompiledLexicon({"alegría": {"palabras": ["feliz"], "color": "🟢", "nivel_base": 2}}, {}, []), ruta)
+
+        self.assertNotEqual(os.stat(ruta).st_ino, inodo)
+        self.assertEqual(mapeado.buscar("pánico"), EmotionLibrary.LEXICO.buscar("pánico"))
+        self.assertEqual(puntuar_lote(TEXTOS, mapeado).resumen(), puntuar_lote(TEXTOS).resumen())
+        nuevo = PackedLexicon(ruta)
+        self.addCleanup(nuevo.cerrar)
+        self.assertEqual(len(nuevo), 1)
+        self.assertEqual(os.listdir(self.directorio.name).count("reescrito.bin"), 1)
+        self.assertFalse([f for f in os.listdir(self.directorio.name) if f.endswith(".tmp")])
+
+    def test_respaldo_al_lexico_en_codigo(self):
+        """Si el artefacto no existe se usa el léxico compilado en código"""
+        with mock.patch.dict(os.environ, {"LEXICO_EMPAQUETADO": os.path.join(self.directorio.name, "no_existe.bin")}):
+            with self.assertLogs("api.packed_lexicon", level="ERROR"):
+                lexico = cargar_lexico(EmotionLibrary.EMOTIONS_DICT, EmotionLibrary.INTENSIFIERS, EmotionLibrary.NEGATORS)
+        self.assertIsInstance(lexico, CompiledLexicon)
+
+
+class TestEmotionAccumulator(unittest.TestCase):
+    """Tests para el acumulador de conversación"""
+
+    def test_un_mensaje_equivale_al_analisis_individual(self):
+        """Con un solo mensaje, el resumen coincide con detectar_emociones"""
+        texto = "Estoy muy estresado y tengo miedo"
+        acumulador = EmotionAccumulator()
+        acumulador.agregar(texto)
+        analisis = EmotionLibrary.detectar_emociones(texto)
+
+        resumen = acumulador.resumen()
+        self.assertEqual(resumen["emocion_principal"], analisis["emocion_principal"])
+        self.assertAlmostEqual(resumen["nivel_estres"], analisis["nivel_estres"])
+        self.assertAlmostEqual(resumen["confianza"], analisis["confianza"])
+
+    def test_agregar_analisis_equivale_a_agregar(self):
+        """Un análisis ya hecho da el mismo estado que volver a puntuar el texto"""
+        por_texto = EmotionAccumulator()
+        por_analisis = EmotionAccumulator()
+        for texto in TEXTOS:
+            por_texto.agregar(texto)
+            por_analisis.agregar_analisis(EmotionLibrary.detectar_emociones(texto), texto)
+
+        self.assertEqual(por_analisis.resumen(), por_texto.resumen())
+        self.assertEqual(por_analisis.a_bytes(), por_texto.a_bytes())
+
+    def test_decaimiento_favorece_mensajes_recientes(self):
+        """Los mensajes antiguos pierden peso frente a los nuevos"""
+        acumulador = EmotionAccumulator(decaimiento=0.5)
+        acumulador.agregar("estoy triste, triste y deprimido")
+        for _ in range(3):
+            acumulador.agregar("me siento feliz")
+
+        self.assertEqual(acumulador.resumen()["emocion_principal"], "alegría")
+        self.assertEqual(acumulador.resumen()["mensajes"], 4)
+
+    def test_sin_decaimiento_suma_todo(self):
+        """Con decaimiento 1.0 el estado es la suma exacta de los mensajes"""
+        acumulador = EmotionAccumulator(decaimiento=1.0)
+        acumulador.agregar("triste")
+        acumulador.agregar("muy triste")
+        tristeza = acumulador.emociones()["tristeza"]
+        self.assertEqual(tristeza["palabras_detectadas"], 2)
+        self.assertEqual(tristeza["puntuacion"], EmotionLibrary.detectar_emociones("triste muy triste")["emociones"]["tristeza"]["puntuacion"])
+
+    def test_serializacion_compacta(self):
+        """El estado serializado ocupa unos cientos de bytes y se recupera"""
+        acumulador = EmotionAccumulator()
+        for texto in TEXTOS:
+            acumulador.agregar(texto)
+
+        datos = acumulador.a_bytes()
+        self.assertLess(len(datos), 300)
+        copia = EmotionAccumulator.desde_texto(acumulador.a_texto())
+        self.assertEqual(copia.resumen()["emocion_principal"], acumulador.resumen()["emocion_principal"])
+        self.assertAlmostEqual(copia.resumen()["nivel_estres"], acumulador.resumen()["nivel_estres"], places=4)
+
+    def test_estado_corrupto(self):
+        """Un estado ilegible empieza una conversación nueva"""
+        self.assertEqual(EmotionAccumulator.desde_texto("no es base64!").mensajes, 0)
+        self.assertEqual(EmotionAccumulator.desde_bytes(b"\x01\x02").mensajes, 0)
+
+
+class TestAnalisisFlujo(unittest.TestCase):
+    """Tests para el análisis por trozos"""
+
+    TEXTO = ("Hoy no me siento nada feliz, la verdad. Estoy muy pero muy triste y me encanta "
+             "llorar… ¿Tengo ansiedad? ¡No estoy tranquilo!\n\nMañana será otro día, estoy contento.")
+
+    def test_mismo_resultado_que_el_texto_completo(self):
+        """Con cualquier tamaño de trozo (incluso a media palabra o frase) el resultado es el mismo"""
+        for texto in TEXTOS + [self.TEXTO]:
+            esperado = dict(EmotionLibrary.detectar_emociones(texto))
+            for tam_bloque in (1, 2, 5, 13, 4096):
+                with self.subTest(texto=texto[:40], tam_bloque=tam_bloque):
+                    self.assertEqual(dict(analizar_flujo(texto, tam_bloque=tam_bloque)), esperado)
+
+    def test_bytes_con_caracteres_partidos(self):
+        """Los trozos binarios pueden partir un carácter UTF-8"""
+        datos = io.BytesIO(self.TEXTO.encode("utf-8"))
+        self.assertEqual(dict(analizar_flujo(datos, tam_bloque=3)), dict(EmotionLibrary.detectar_emociones(self.TEXTO)))
+
+    def test_por_frases_y_parrafos(self):
+        """Cada unidad se analiza como un texto aparte"""
+        frases = ["Hoy no me siento nada feliz, la verdad", " Estoy muy pero muy triste y me encanta llorar",
+                  " ¿Tengo ansiedad", " ¡No estoy tranquilo", "Mañana será otro día, estoy contento"]
+        unidades = [dict(a) for a in analizar_por_unidades(self.TEXTO, "frase", tam_bloque=7)]
+        self.assertEqual(unidades, [dict(EmotionLibrary.detectar_emociones(f)) for f in frases])
+
+        parrafos = self.TEXTO.split("\n\n")
+        unidades = [dict(a) for a in analizar_por_unidades(self.TEXTO, "parrafo", tam_bloque=7)]
+        self.assertEqual(unidades, [dict(EmotionLibrary.detectar_emociones(p)) for p in parrafos])
+
+    def test_total_por_unidades(self):
+        """El resultado total suma las unidades"""
+        analizador = AnalizadorFlujo(unidad="parrafo")
+        self.assertEqual(analizador.alimentar("Estoy triste.\n"), [])
+        self.assertEqual(len(analizador.alimentar("\nEstoy feliz")), 1)
+        self.assertEqual(len(analizador.terminar()), 1)
+        self.assertEqual(analizador.unidades, 2)
+        self.assertEqual(analizador.resultado()["emociones"],
+                         EmotionLibrary.detectar_emociones("Estoy triste. Estoy feliz")["emociones"])
+
+    def test_palabra_muy_larga(self):
+        """Una palabra enorme cuenta como un token sin guardarse entera entre trozos"""
+        texto = "me siento triste " + "a" * 5000 + " y feliz"
+        self.assertEqual(dict(analizar_flujo(texto, tam_bloque=100)), dict(EmotionLibrary.detectar_emociones(texto)))
+
+    def test_texto_largo_se_analiza_por_trozos(self):
+        """detectar_emociones usa el análisis por trozos por encima de LIMITE_FLUJO"""
+        esperado = dict(EmotionLibrary.detectar_emociones(self.TEXTO))
+        with mock.patch.object(EmotionLibrary, "LIMITE_FLUJO", 10), \
+                mock.patch("api.streaming.TAM_BLOQUE", 16):
+            self.assertEqual(dict(EmotionLibrary.detectar_emociones(self.TEXTO)), esperado)
+
+    def test_memoria_constante(self):
+        """El pico de memoria no crece con la longitud del texto"""
+        def pico(repeticiones):
+            tracemalloc.start()
+            try:
+                analizar_flujo(self.TEXTO for _ in range(repeticiones))
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        pico(10)
+        self.assertLess(pico(20000), pico(2000) * 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Tests unitarios para el registro de eventos por lotes
+"""
+
+import time
+
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from api.event_log import EscritorEventos, crear_escritor
+from api.models import EventLog
+from api.observers import DatabaseObserver, Subject, get_event_manager
+
+
+def esperar(condicion, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        if time.monotonic() > limite:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class TestEscritorEventos(TransactionTestCase):
+    """El hilo escritor usa su propia conexión: hace falta TransactionTestCase"""
+
+    def escritor(self, **opciones):
+        escritor = EscritorEventos(**opciones)
+        self.addCleanup(escritor.cerrar, 5)
+        return escritor
+
+    def test_lote_completo(self):
+        escritor = self.escritor(tam_lote=10, intervalo=60)
+        for numero in range(25):
+            escritor.agregar("evento", {"numero": numero})
+
+        self.assertTrue(esperar(lambda: escritor.lotes == 2))
+        self.assertEqual(EventLog.objects.count(), 20)
+        self.assertEqual(escritor.metricas()["pendientes"], 5)
+
+        self.assertTrue(escritor.vaciar(2))
+        self.assertEqual(EventLog.objects.count(), 25)
+        self.assertEqual(escritor.lotes, 3)
+        self.assertEqual(sorted(EventLog.objects.values_list("datos__numero", flat=True)), list(range(25)))
+
+    def test_intervalo(self):
+        """Un lote incompleto se guarda cuando su primer evento cumple el intervalo"""
+        escritor = self.escritor(tam_lote=100, intervalo=0.05)
+        for _ in range(3):
+            escritor.agregar("evento", {})
+
+        self.assertTrue(esperar(lambda: EventLog.objects.count() == 3))
+        self.assertEqual(escritor.lotes, 1)
+
+    def test_fuera_de_la_transaccion_de_la_peticion(self):
+        escritor = self.escritor(tam_lote=10, intervalo=60)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                escritor.agregar("usuario_login", {"usuario": {"nombre": "Ana"}})
+                escritor.vaciar(2)
+                raise RuntimeError("rollback de la petición")
+
+        self.assertEqual(EventLog.objects.get().tipo, "usuario_login")
+
+    def test_cerrar_guarda_lo_pendiente(self):
+        escritor = self.escritor(tam_lote=100, intervalo=60)
+        for _ in range(7):
+            escritor.agregar("evento", {})
+
+        self.assertTrue(escritor.cerrar(2))
+        self.assertEqual(EventLog.objects.count(), 7)
+        with self.assertLogs("api.event_log", level="WARNING"):
+            self.assertFalse(escritor.agregar("evento", {}))
+        self.assertEqual(escritor.descartados, 1)
+
+    def test_buffer_lleno(self):
+        escritor = EscritorEventos(tam_lote=5, intervalo=60, tam_max=5)
+        escritor._arrancar = lambda: None  # sin hilo escritor el buffer no se vacía
+        for _ in range(5):
+            self.assertTrue(escritor.agregar("evento", {}))
+        with self.assertLogs("api.event_log", level="WARNING"):
+            self.assertFalse(escritor.agregar("evento", {}))
+        self.assertEqual(escritor.metricas()["descartados"], 1)
+
+    def test_lote_fallido_no_detiene_al_escritor(self):
+        escritor = self.escritor(tam_lote=10, intervalo=60)
+        with self.assertLogs("api.event_log", level="ERROR"):
+            escritor.agregar("evento", {"dato": object()})
+            escritor.vaciar(2)
+        escritor.agregar("evento", {"dato": 1})
+        escritor.vaciar(2)
+
+        self.assertEqual(EventLog.objects.count(), 1)
+        self.assertEqual((escritor.perdidos, escritor.escritos), (1, 1))
+
+    def test_rendimiento_crece_con_el_lote(self):
+        """Con lotes de 100 hay 100 veces menos INSERT y se guardan muchos más eventos por segundo"""
+        eventos = 500
+        rendimiento = {}
+        for tam_lote in (1, 100):
+            escritor = self.escritor(tam_lote=tam_lote, intervalo=60, tam_max=eventos)
+            inicio = time.perf_counter()
+            for numero in range(eventos):
+                escritor.agregar("evaluacion_completada", {"usuario_id": 1, "nivel_estres": numero % 10})
+            self.assertTrue(escritor.vaciar(30))
+            rendimiento[tam_lote] = eventos / (time.perf_counter() - inicio)
+            self.assertEqual(escritor.lotes, eventos // tam_lote)
+
+        self.assertEqual(EventLog.objects.count(), 2 * eventos)
+        self.assertGreater(rendimiento[100], 2 * rendimiento[1])
+
+    def test_crear_escritor(self):
+        self.assertIsNone(crear_escritor({"HABILITADO": False}))
+        escritor = crear_escritor({"HABILITADO": True, "TAM_LOTE": 50, "INTERVALO_MS": 200})
+        self.assertEqual((escritor.tam_lote, escritor.intervalo), (50, 0.2))
+
+
+class TestDatabaseObserver(TransactionTestCase):
+
+    def test_guarda_todos_los_eventos(self):
+        escritor = EscritorEventos(tam_lote=10, intervalo=60)
+        self.addCleanup(escritor.cerrar, 5)
+        subject = Subject()
+        subject.attach(DatabaseObserver(escritor))
+
+        subject.notify("usuario_registrado", {"usuario": {"nombre": "Ana"}})
+        subject.notify("evaluacion_completada", {"usuario_id": 1, "nivel_estres": 8})
+        escritor.vaciar(2)
+
+        self.assertEqual(list(EventLog.objects.order_by("id").values_list("tipo", flat=True)),
+                         ["usuario_registrado", "evaluacion_completada"])
+        self.assertEqual(EventLog.objects.get(tipo="evaluacion_completada").datos["nivel_estres"], 8)
+
+    def test_configurar_registro_eventos(self):
+        manager = get_event_manager()
+        escritor = EscritorEventos(tam_lote=10, intervalo=60)
+        manager.configurar_registro_eventos(escritor)
+        self.addCleanup(manager.configurar_registro_eventos, None)
+
+        manager.usuario_login({"nombre": "Ana"})
+        escritor.vaciar(2)
+        self.assertEqual(EventLog.objects.get().tipo, "usuario_login")
+        self.assertEqual(manager.metricas_registro_eventos()["escritos"], 1)
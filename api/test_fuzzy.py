@@ -0,0 +1,144 @@
+"""
+Tests unitarios para la tolerancia a erratas
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from api.batch_scoring import puntuar_lote, puntuar_lote_paralelo
+from api.emotion_library import EmotionLibrary
+from api.fuzzy import IndiceDifuso, distancia_edicion
+from api.lexicon import CompiledLexicon
+from api.packed_lexicon import PackedLexicon, escribir_artefacto
+from api.pipeline import EmparejarDifuso, PipelineAnalisis, pipeline_desde_config
+
+
+class TestDistanciaEdicion(unittest.TestCase):
+
+    def test_operaciones(self):
+        self.assertEqual(distancia_edicion("triste", "triste", 2), 0)
+        self.assertEqual(distancia_edicion("tristeza", "tristesa", 2), 1)
+        self.assertEqual(distancia_edicion("ansioso", "ansiosoo", 2), 1)
+        self.assertEqual(distancia_edicion("preocupado", "preocupao", 2), 1)
+        # Transposición de letras contiguas: una sola edición
+        self.assertEqual(distancia_edicion("miedo", "mideo", 2), 1)
+
+    def test_maximo(self):
+        self.assertEqual(distancia_edicion("kitten", "sitting", 3), 3)
+        self.assertEqual(distancia_edicion("kitten", "sitting", 2), 3)
+        self.assertEqual(distancia_edicion("ira", "alegría", 1), 2)
+
+
+class TestIndiceDifuso(unittest.TestCase):
+
+    def setUp(self):
+        self.indice = IndiceDifuso(["triste", "tristeza", "ansioso", "ansiosa", "miedo", "mal"])
+
+    def test_corregir(self):
+        self.assertEqual(self.indice.corregir("tristesa"), "tristeza")
+        self.assertEqual(self.indice.corregir("mideo"), "miedo")
+        self.assertEqual(self.indice.corregir("tristezzaa", 2), "tristeza")
+        self.assertIsNone(self.indice.corregir("tristezzaa", 1))
+        self.assertIsNone(self.indice.corregir("ventana", 2))
+
+    def test_exactas_y_cortas_no_se_corrigen(self):
+        self.assertIsNone(self.indice.corregir("triste"))
+        self.assertIsNone(self.indice.corregir("mak"))
+
+    def test_desempate_estable(self):
+        """A igual distancia gana la palabra más corta y luego la primera alfabéticamente"""
+        self.assertEqual(self.indice.corregir("ansiosx"), "ansiosa")
+        self.assertEqual(self.indice.corregir("trist"), "triste")
+
+    def test_indice_perezoso(self):
+        """Compilar un léxico no construye el índice; la primera corrección sí"""
+        lexico = CompiledLexicon(EmotionLibrary.EMOTIONS_DICT, EmotionLibrary.INTENSIFIERS, EmotionLibrary.NEGATORS)
+        self.assertIsNone(lexico.indice_difuso._indice)
+        self.assertEqual(lexico.indice_difuso.corregir("tristesa"), "tristeza")
+        self.assertIsNotNone(lexico.indice_difuso._indice)
+
+    def test_serializable(self):
+        """Se copia solo el vocabulario; el índice se reconstruye al usarlo"""
+        copia = pickle.loads(pickle.dumps(self.indice))
+        self.assertIsNone(copia._indice)
+        self.assertEqual(copia.corregir("tristesa"), "tristeza")
+        self.assertEqual(len(copia), len(self.indice))
+
+
+class TestEmparejarDifuso(unittest.TestCase):
+
+    def setUp(self):
+        self.difuso = PipelineAnalisis().reemplazar("emparejar", EmparejarDifuso(peso=0.5))
+        self.exacto = PipelineAnalisis()
+
+    def test_detecta_erratas(self):
+        for texto, correcto in (("me siento ansiosoo", "me siento ansioso"), ("cuanta tristesa", "cuanta tristeza"),
+                                ("estoy muy preocupao", "estoy muy preocupado")):
+            with self.subTest(texto=texto):
+                self.assertEqual(self.exacto.ejecutar(texto)["emocion_principal"], "neutral")
+                self.assertEqual(self.difuso.ejecutar(texto)["emocion_principal"],
+                                 self.exacto.ejecutar(correcto)["emocion_principal"])
+
+    def test_descuento(self):
+        """Una frase con una palabra corregida puntúa multiplicada por el peso"""
+        exacto = self.exacto.ejecutar("me siento ansioso")["emociones"]["ansiedad"]["puntuacion"]
+        corregido = self.difuso.ejecutar("me siento ansiosoo")["emociones"]["ansiedad"]["puntuacion"]
+        self.assertAlmostEqual(corregido, exacto * 0.5)
+
+    def test_exactas_sin_cambios(self):
+        """Sin erratas el resultado es idéntico al del emparejado exacto"""
+        for texto in ("Hoy me siento muy ansioso y preocupado por el trabajo",
+                      "No estoy triste. Estoy muy pero muy feliz", "tengo tiempo"):
+            with self.subTest(texto=texto):
+                self.assertEqual(dict(self.difuso.ejecutar(texto)), dict(self.exacto.ejecutar(texto)))
+
+    def test_palabras_comunes(self):
+        """'tengo' está a una errata de 'tenso' pero nunca se corrige"""
+        self.assertEqual(EmotionLibrary.LEXICO.indice_difuso.corregir("tengo"), "tenso")
+        self.assertEqual(self.difuso.ejecutar("tengo")["emocion_principal"], "neutral")
+
+    def test_lexico_empaquetado(self):
+        """El léxico empaquetado construye su índice al usarlo, con el mismo vocabulario"""
+        lexico = CompiledLexicon({"tristeza": {"palabras": ["muy triste", "tristeza"], "color": "🔵",
+                                               "nivel_base": -2}}, {"muy": 1.5}, ["no"])
+        ruta = os.path.join(tempfile.mkdtemp(), "lexico.bin")
+        escribir_artefacto(lexico, ruta)
+        empaquetado = PackedLexicon(ruta)
+        self.addCleanup(empaquetado.cerrar)
+
+        self.assertEqual(empaquetado.indice_difuso.vocabulario, lexico.indice_difuso.vocabulario)
+        self.assertEqual(dict(self.difuso.ejecutar("cuanta tristesa", empaquetado)),
+                         dict(self.difuso.ejecutar("cuanta tristesa", lexico)))
+
+    def test_desde_config(self):
+        pipeline = pipeline_desde_config({"DIFUSO": {"HABILITADO": True, "PESO": 0.9},
+                                          "CACHE_ETAPAS": {"emparejar": 16}})
+        self.assertEqual(pipeline.etapas["emparejar"].etapa.peso, 0.9)
+        self.assertEqual(pipeline.ejecutar("tristesa")["emocion_principal"], "tristeza")
+        self.assertIsInstance(pipeline_desde_config({}).etapas["emparejar"], type(PipelineAnalisis().etapas["emparejar"]))
+
+
+class TestLoteDifuso(unittest.TestCase):
+    """analizar_multiples pasa por las etapas del pipeline configurado"""
+
+    def setUp(self):
+        self.textos = ["me siento muy tristesa", "estoy ansiosoo y con mideo", "hoy estoy feliz", ""] * 3
+        pipeline = pipeline_desde_config({"DIFUSO": {"HABILITADO": True}, "CACHE_ETAPAS": {"emparejar": 16}})
+        parche = mock.patch.object(EmotionLibrary, "PIPELINE", pipeline)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_igual_que_texto_a_texto(self):
+        lote = puntuar_lote(self.textos)
+        for i, texto in enumerate(self.textos):
+            self.assertEqual(lote.a_dict(i), dict(EmotionLibrary.detectar_emociones(texto)))
+        self.assertEqual(lote.a_dict(0)["emocion_principal"], "tristeza")
+
+    def test_pool_de_procesos(self):
+        with mock.patch("api.batch_scoring.UMBRAL_PARALELO", 4):
+            lote = puntuar_lote_paralelo(self.textos, workers=2, chunksize=4)
+        self.assertEqual(lote.resumen(), puntuar_lote(self.textos).resumen())
+        self.assertNotEqual(lote.resumen(), puntuar_lote(self.textos, pipeline=PipelineAnalisis()).resumen())
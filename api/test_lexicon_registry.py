@@ -0,0 +1,172 @@
+"""
+Tests unitarios para el registro de léxico con recarga en caliente
+"""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+import weakref
+
+from django.test import TestCase
+
+from api.emotion_library import EmotionLibrary
+from api.lexicon_registry import FuenteBD, FuenteFichero, RegistroLexico, leer_fichero, lexico_desde_fuente
+from api.models import Lexico
+from api.packed_lexicon import PackedLexicon, escribir_artefacto
+
+
+def fuente_con(palabras_tristeza):
+    """Léxico mínimo de dos emociones para los tests."""
+    return {
+        "emociones": {
+            "alegría": {"palabras": ["feliz"], "color": "🟢", "nivel_base": 2},
+            "tristeza": {"palabras": palabras_tristeza, "color": "🔵", "nivel_base": -2},
+        },
+        "intensificadores": {"muy": 1.5},
+        "negadores": ["no"],
+    }
+
+
+class FuenteLenta:
+    """Fuente de prueba cuya carga espera a que el test la libere."""
+
+    def __init__(self, lexico):
+        self.lexico = lexico
+        self.liberar = threading.Event()
+
+    def version(self):
+        return "v2"
+
+    def cargar(self):
+        self.liberar.wait(5)
+        return self.lexico
+
+    def liberar_hilo(self):
+        pass
+
+
+class TestRegistroLexico(unittest.TestCase):
+
+    def setUp(self):
+        self.inicial = EmotionLibrary.LEXICO
+        self.registro = RegistroLexico(self.inicial)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, "lexico.json")
+
+    def tearDown(self):
+        self.registro.esperar(5)
+        self.directorio.cleanup()
+
+    def escribir(self, fuente):
+        with open(self.ruta, "w", encoding="utf-8") as fichero:
+            json.dump(fuente, fichero, ensure_ascii=False)
+
+    def test_analisis_en_curso_conserva_su_version(self):
+        """Un análisis que ya tomó el léxico no ve el cambio"""
+        lexico = self.registro.actual()
+        self.registro.instalar(lexico_desde_fuente(fuente_con(["apagado"])))
+
+        resultado = EmotionLibrary.detectar_emociones("me siento triste", lexico)
+        self.assertEqual(resultado["emocion_principal"], "tristeza")
+        self.assertEqual(resultado["version_lexico"], self.inicial.version)
+        self.assertNotEqual(self.registro.actual().version, self.inicial.version)
+
+    def test_recarga_en_segundo_plano_desde_fichero(self):
+        """El cambio de fichero se detecta y se instala sin bloquear a quien pide el léxico"""
+        self.escribir(fuente_con(["apagado"]))
+        self.registro.configurar(FuenteFichero(self.ruta), intervalo=0)
+
+        self.registro.actual()
+        self.registro.esperar(5)
+        nuevo = self.registro.actual()
+        self.registro.esperar(5)
+        self.assertEqual(EmotionLibrary.detectar_emociones("muy apagado", nuevo)["emocion_principal"], "tristeza")
+        self.assertEqual(self.registro.cambios, 1)
+
+        self.escribir(fuente_con(["apagado", "gris"]))
+        self.registro.actual()
+        self.registro.esperar(5)
+        self.assertEqual(EmotionLibrary.detectar_emociones("gris", self.registro.actual())["emocion_principal"], "tristeza")
+        self.assertEqual(self.registro.cambios, 2)
+
+    def test_compilacion_no_bloquea(self):
+        """Mientras se compila la nueva versión se sigue sirviendo la anterior"""
+        fuente = FuenteLenta(lexico_desde_fuente(fuente_con(["apagado"])))
+        self.registro.configurar(fuente, intervalo=0)
+
+        self.assertIs(self.registro.actual(), self.inicial)
+        self.assertIs(self.registro.actual(), self.inicial)
+        fuente.liberar.set()
+        self.registro.esperar(5)
+        self.assertIs(self.registro.actual(), fuente.lexico)
+
+    def test_fuente_invalida_conserva_el_lexico(self):
+        """Un fichero roto se registra como error y no cambia el léxico activo"""
+        with open(self.ruta, "w", encoding="utf-8") as fichero:
+            fichero.write("{no es json")
+        self.registro.configurar(FuenteFichero(self.ruta), intervalo=0)
+
+        with self.assertLogs("api.lexicon_registry", level="ERROR"):
+            self.registro.actual()
+            self.registro.esperar(5)
+        self.assertIs(self.registro.actual(), self.inicial)
+        self.assertEqual(self.registro.errores, 1)
+
+    def test_fichero_empaquetado(self):
+        """leer_fichero reconoce los artefactos binarios"""
+        ruta = os.path.join(self.directorio.name, "lexico.bin")
+        escribir_artefacto(self.inicial, ruta)
+        lexico = leer_fichero(ruta)
+        try:
+            self.assertIsInstance(lexico, PackedLexicon)
+            self.assertEqual(lexico.version, self.inicial.version)
+        finally:
+            lexico.cerrar()
+
+    def test_empaquetado_reemplazado_se_cierra(self):
+        """El artefacto reemplazado sigue abierto para su análisis y se cierra al soltarlo"""
+        ruta = os.path.join(self.directorio.name, "lexico.bin")
+        escribir_artefacto(self.inicial, ruta)
+        self.registro.configurar(FuenteFichero(ruta), intervalo=0)
+        self.registro.refrescar()
+        lexico = self.registro.actual()
+        self.registro.esperar(5)
+        self.assertIsInstance(lexico, PackedLexicon)
+
+        escribir_artefacto(lexico_desde_fuente(fuente_con(["apagado"])), ruta)
+        self.assertTrue(self.registro.refrescar())
+        self.assertIsNot(self.registro.actual(), lexico)
+        self.registro.esperar(5)
+
+        # El análisis en curso sigue leyendo su versión
+        self.assertFalse(lexico.cerrado)
+        resultado = EmotionLibrary.detectar_emociones("me siento triste", lexico)
+        self.assertEqual(resultado["emocion_principal"], "tristeza")
+
+        referencia = weakref.ref(lexico)
+        mapeo = lexico._mm
+        del lexico, resultado
+        self.assertIsNone(referencia())
+        self.assertTrue(mapeo.closed)
+        self.registro.actual().cerrar()
+
+
+class TestFuenteBD(TestCase):
+
+    def test_fila_activa_mas_reciente(self):
+        registro = RegistroLexico(EmotionLibrary.LEXICO, FuenteBD(), intervalo=3600)
+        Lexico.objects.create(contenido=fuente_con(["apagado"]))
+        reciente = Lexico.objects.create(contenido=fuente_con(["gris"]))
+        Lexico.objects.create(contenido=fuente_con(["otro"]), activo=False)
+
+        self.assertTrue(registro.refrescar())
+        self.assertFalse(registro.refrescar())
+        self.assertEqual(registro.actual().version, lexico_desde_fuente(fuente_con(["gris"])).version)
+        self.assertEqual(registro._version_fuente, reciente.id)
+
+    def test_sin_filas_no_cambia(self):
+        registro = RegistroLexico(EmotionLibrary.LEXICO, FuenteBD())
+        self.assertFalse(registro.refrescar())
+        self.assertIs(registro.actual(), EmotionLibrary.LEXICO)
@@ -0,0 +1,253 @@
+"""
+Tests unitarios para el despacho paralelo de observadores
+"""
+
+import socketserver
+import threading
+import time
+import unittest
+
+from django.test import SimpleTestCase, override_settings
+
+from api.observer_dispatch import ABIERTO, CERRADO, SEMIABIERTO, Circuito, DespachoParalelo, crear_despacho
+from api.observers import EmailNotificationObserver, Observer, Subject
+
+
+class ManejadorSMTP(socketserver.StreamRequestHandler):
+    """Lo mínimo del protocolo SMTP para que send_mail entregue un mensaje."""
+
+    def escribir(self, linea):
+        self.wfile.write(linea.encode() + b"\r\n")
+
+    def handle(self):
+        servidor = self.server
+        if not servidor.responder.wait(10):
+            return
+        self.escribir("220 smtp.prueba ESMTP")
+        datos = None
+        for linea in self.rfile:
+            linea = linea.decode("utf-8", "replace").rstrip("\r\n")
+            if datos is not None:
+                if linea == ".":
+                    servidor.mensajes.append("\n".join(datos))
+                    datos = None
+                    self.escribir("250 OK")
+                else:
+                    datos.append(linea)
+                continue
+            comando = linea[:4].upper()
+            if comando == "DATA":
+                datos = []
+                self.escribir("354 Fin con <CRLF>.<CRLF>")
+            elif comando == "QUIT":
+                self.escribir("221 Adios")
+                return
+            else:
+                self.escribir("250 OK")
+
+
+class ServidorSMTP(socketserver.ThreadingTCPServer):
+    """Servidor SMTP falso en localhost. Sin ``responder`` no saluda (servidor colgado)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ManejadorSMTP)
+        self.mensajes = []
+        self.responder = threading.Event()
+        self.responder.set()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def puerto(self):
+        return self.server_address[1]
+
+    def parar(self):
+        self.responder.set()
+        self.shutdown()
+        self.server_close()
+
+
+class ObservadorPrueba(Observer):
+
+    def __init__(self, concurrente=False, demora=0.0, fallar=False, timeout=None):
+        self.concurrente = concurrente
+        self.demora = demora
+        self.fallar = fallar
+        self.timeout = timeout
+        self.eventos = []
+
+    def update(self, event_type, data):
+        if self.demora:
+            time.sleep(self.demora)
+        if self.fallar:
+            raise RuntimeError("fallo de prueba")
+        self.eventos.append(event_type)
+
+
+class TestCircuito(unittest.TestCase):
+
+    def setUp(self):
+        self.ahora = 0.0
+        self.circuito = Circuito("prueba", fallos_max=3, reintento=10, reloj=lambda: self.ahora)
+
+    def test_abre_tras_fallos_seguidos(self):
+        self.circuito.fallo()
+        self.circuito.fallo()
+        self.circuito.exito()
+        self.circuito.fallo()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, CERRADO)
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.assertFalse(self.circuito.permitir())
+        self.assertEqual(self.circuito.como_dict()["omitidos"], 1)
+
+    def test_semiabierto_deja_pasar_una_prueba(self):
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            for _ in range(3):
+                self.circuito.fallo()
+
+        self.ahora = 10
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estado, SEMIABIERTO)
+        self.assertFalse(self.circuito.permitir())
+
+        # La prueba falla: vuelve a abrirse durante otros 10 s
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.ahora = 15
+        self.assertFalse(self.circuito.permitir())
+
+        # La siguiente prueba sale bien: se cierra
+        self.ahora = 20
+        self.assertTrue(self.circuito.permitir())
+        self.circuito.exito()
+        self.assertEqual(self.circuito.estado, CERRADO)
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.como_dict()["aperturas"], 2)
+
+
+class TestDespachoParalelo(unittest.TestCase):
+
+    def setUp(self):
+        self.subject = Subject()
+        self.despacho = DespachoParalelo(hilos=4, timeout=2.0, fallos_max=2, reintento=60)
+        self.addCleanup(self.despacho.cerrar, False)
+        self.subject._despacho = self.despacho
+
+    def test_concurrentes_en_paralelo(self):
+        lentos = [ObservadorPrueba(concurrente=True, demora=0.2) for _ in range(3)]
+        for observador in lentos:
+            self.subject.attach(observador)
+
+        inicio = time.monotonic()
+        self.subject.notify("evento", {})
+        self.assertLess(time.monotonic() - inicio, 0.5)
+        self.assertTrue(all(observador.eventos == ["evento"] for observador in lentos))
+
+    def test_errores_aislados(self):
+        """Un observador que falla no impide que los demás reciban el evento"""
+        fallido = ObservadorPrueba(fallar=True)
+        concurrente = ObservadorPrueba(concurrente=True, fallar=True)
+        normal = ObservadorPrueba()
+        for observador in (fallido, concurrente, normal):
+            self.subject.attach(observador)
+
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            self.subject.notify("evento", {})
+        self.assertEqual(normal.eventos, ["evento"])
+        self.assertEqual(self.despacho.circuito(fallido).fallos_seguidos, 1)
+        self.assertEqual(self.despacho.circuito(concurrente).fallos_seguidos, 1)
+
+    def test_timeout_y_circuito(self):
+        """Un observador colgado se deja de esperar y, tras fallos_max timeouts, se omite"""
+        colgado = ObservadorPrueba(concurrente=True, demora=0.5, timeout=0.05)
+        normal = ObservadorPrueba()
+        self.subject.attach(colgado)
+        self.subject.attach(normal)
+
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            for _ in range(3):
+                inicio = time.monotonic()
+                self.subject.notify("evento", {})
+                self.assertLess(time.monotonic() - inicio, 0.4)
+
+        self.assertEqual(normal.eventos, ["evento"] * 3)
+        self.assertEqual(self.despacho.circuito(colgado).estado, ABIERTO)
+        self.assertEqual(self.despacho.circuito(colgado).omitidos, 1)
+        self.assertEqual(self.despacho.circuito(normal).estado, CERRADO)
+
+    def test_sincrono_lento_cuenta_como_fallo(self):
+        lento = ObservadorPrueba(demora=0.05, timeout=0.01)
+        self.subject.attach(lento)
+        with self.assertLogs("api.observer_dispatch", level="ERROR"):
+            self.subject.notify("evento", {})
+        self.assertEqual(lento.eventos, ["evento"])
+        self.assertEqual(self.despacho.circuito(lento).fallos_seguidos, 1)
+
+    def test_crear_despacho(self):
+        self.assertIsNone(crear_despacho({"HILOS": 0}))
+        despacho = crear_despacho({"HILOS": 2, "TIMEOUT_MS": 500, "FALLOS_MAX": 3})
+        self.addCleanup(despacho.cerrar)
+        self.assertEqual((despacho.timeout, despacho.fallos_max), (0.5, 3))
+
+
+class TestEmailSMTP(SimpleTestCase):
+    """EmailNotificationObserver contra un servidor SMTP falso en localhost"""
+
+    USUARIO = {"usuario": {"nombre": "Ana", "correo": "ana@example.com"}}
+
+    def setUp(self):
+        self.servidor = ServidorSMTP()
+        self.addCleanup(self.servidor.parar)
+
+    def configuracion(self, **extra):
+        return override_settings(**{
+            "EMAIL_BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+            "EMAIL_HOST": "127.0.0.1", "EMAIL_PORT": self.servidor.puerto, "EMAIL_USE_TLS": False,
+            "EMAIL_HOST_USER": "", "EMAIL_HOST_PASSWORD": "",
+            "NOTIFICACIONES_EMAIL": {"HABILITADO": True, "REMITENTE": "mindcare@example.com"},
+            **extra
+        })
+
+    def test_envia_por_smtp(self):
+        with self.configuracion():
+            EmailNotificationObserver().update("usuario_registrado", self.USUARIO)
+
+        self.assertEqual(len(self.servidor.mensajes), 1)
+        self.assertIn("Subject: Bienvenido a MindCare", self.servidor.mensajes[0])
+        self.assertIn("To: ana@example.com", self.servidor.mensajes[0])
+
+    def test_deshabilitado_no_conecta(self):
+        with self.configuracion(NOTIFICACIONES_EMAIL={"HABILITADO": False}):
+            EmailNotificationObserver().update("usuario_registrado", self.USUARIO)
+        self.assertEqual(self.servidor.mensajes, [])
+
+    def test_smtp_colgado_no_bloquea_a_los_demas(self):
+        """Con el servidor sin responder, el email agota su timeout y se abre su circuito"""
+        self.servidor.responder.clear()
+        subject = Subject()
+        despacho = DespachoParalelo(hilos=2, timeout=0.1, fallos_max=2, reintento=60)
+        self.addCleanup(despacho.cerrar, False)
+        subject._despacho = despacho
+        email = EmailNotificationObserver()
+        otro = ObservadorPrueba()
+        subject.attach(email)
+        subject.attach(otro)
+
+        with self.configuracion(EMAIL_TIMEOUT=5), self.assertLogs("api.observer_dispatch", level="ERROR"):
+            for _ in range(3):
+                inicio = time.monotonic()
+                subject.notify("usuario_registrado", self.USUARIO)
+                self.assertLess(time.monotonic() - inicio, 1)
+
+        self.assertEqual(otro.eventos, ["usuario_registrado"] * 3)
+        self.assertEqual(despacho.estado()["EmailNotificationObserver"]["estado"], ABIERTO)
+        self.assertEqual(despacho.estado()["EmailNotificationObserver"]["omitidos"], 1)
+
+        # Cuando el servidor vuelve, los envíos pendientes terminan
+        self.servidor.responder.set()
@@ -0,0 +1,169 @@
+"""
+Tests unitarios para la latencia de los observadores
+"""
+
+import logging
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.auth_utils import crear_token_acceso
+from api.models import Usuario
+from api.observer_dispatch import DespachoParalelo
+from api.observer_metrics import HistogramaLatencia, LatenciasObservadores, informe_latencias
+from api.observers import LoggingObserver, Observer, StatisticsObserver, Subject, get_event_manager
+
+
+class ObservadorPrueba(Observer):
+
+    def __init__(self, concurrente=False):
+        self.concurrente = concurrente
+
+    def update(self, event_type, data):
+        pass
+
+
+class ReprContado:
+    """Cuenta cuántas veces se formatea"""
+
+    def __init__(self):
+        self.formateos = 0
+
+    def __repr__(self):
+        self.formateos += 1
+        return "ReprContado()"
+
+
+class TestHistogramaLatencia(unittest.TestCase):
+
+    def test_percentiles_por_cubeta(self):
+        histograma = HistogramaLatencia()
+        for _ in range(98):
+            histograma.registrar(0.0008)
+        histograma.registrar(0.02)
+        histograma.registrar(3.0)
+
+        datos = histograma.como_dict()
+        self.assertEqual(datos["llamadas"], 100)
+        self.assertAlmostEqual(datos["p50_ms"], 1.0)
+        self.assertAlmostEqual(datos["p99_ms"], 25.0)
+        self.assertAlmostEqual(datos["max_ms"], 3000.0)
+        self.assertEqual(datos["cubetas"], {"<=1ms": 98, "<=25ms": 1, "<=5s": 1})
+
+    def test_percentil_no_supera_el_maximo(self):
+        histograma = HistogramaLatencia()
+        histograma.registrar(0.0012)
+        self.assertAlmostEqual(histograma.percentil(99), 0.0012)
+        self.assertEqual(HistogramaLatencia().percentil(50), 0.0)
+
+
+class TestLatenciasObservadores(unittest.TestCase):
+
+    def test_por_observador_y_evento(self):
+        subject = Subject()
+        subject.attach(ObservadorPrueba())
+        subject.attach(StatisticsObserver())
+
+        for _ in range(3):
+            subject.notify("usuario_registrado", {})
+        subject.notify("usuario_login", {})
+
+        datos = subject.latencias.como_dict()
+        self.assertEqual(datos["observadores"]["ObservadorPrueba"]["usuario_registrado"]["llamadas"], 3)
+        self.assertEqual(datos["observadores"]["ObservadorPrueba"]["usuario_login"]["llamadas"], 1)
+        self.assertNotIn("usuario_login", datos["observadores"]["StatisticsObserver"])
+        self.assertEqual(datos["despachos"]["usuario_registrado"]["llamadas"], 3)
+        self.assertIn("StatisticsObserver", subject.latencias.informe())
+
+    def test_con_despacho_paralelo(self):
+        subject = Subject()
+        despacho = DespachoParalelo(hilos=2)
+        self.addCleanup(despacho.cerrar)
+        subject._despacho = despacho
+        subject.attach(ObservadorPrueba(concurrente=True))
+        subject.attach(LoggingObserver())
+
+        subject.notify("usuario_login", {})
+        observadores = subject.latencias.como_dict()["observadores"]
+        self.assertEqual(observadores["ObservadorPrueba"]["usuario_login"]["llamadas"], 1)
+        self.assertEqual(observadores["LoggingObserver"]["usuario_login"]["llamadas"], 1)
+
+    def test_avisos_por_umbral(self):
+        latencias = LatenciasObservadores(umbral_lento=0.05, umbral_despacho=0.1)
+        with self.assertLogs("api.observer_metrics", level="WARNING") as logs:
+            latencias.registrar("Lento", "evento", 0.01)
+            latencias.registrar("Lento", "evento", 0.2)
+            latencias.registrar_despacho("evento", 0.05, 2)
+            latencias.registrar_despacho("evento", 0.3, 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("Lento", logs.output[0])
+        self.assertIn("Despacho lento", logs.output[1])
+
+    def test_informe_marca_filas_lentas(self):
+        latencias = LatenciasObservadores(umbral_lento=None)
+        latencias.registrar("Rapido", "evento", 0.0001)
+        latencias.registrar("Lento", "evento", 0.3)
+        lineas = informe_latencias(latencias.como_dict(), umbral_ms=100).splitlines()
+        self.assertTrue(lineas[1].startswith("Lento") and lineas[1].endswith("LENTO"))
+        self.assertFalse(lineas[2].endswith("LENTO"))
+
+
+class TestLogsPerezosos(unittest.TestCase):
+
+    def test_sin_info_no_se_formatean_los_datos(self):
+        datos = ReprContado()
+        logger = logging.getLogger("api.observers")
+        nivel = logger.level
+        logger.setLevel(logging.WARNING)
+        self.addCleanup(logger.setLevel, nivel)
+
+        LoggingObserver().update("evento", {"objeto": datos})
+        StatisticsObserver().update("usuario_registrado", {"objeto": datos})
+        self.assertEqual(datos.formateos, 0)
+
+        logger.setLevel(logging.INFO)
+        with self.assertLogs("api.observers", level="INFO"):
+            LoggingObserver().update("evento", {"objeto": datos})
+        self.assertEqual(datos.formateos, 1)
+
+
+class TestLatenciaObservadoresAPI(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(nombre="Test", correo="test@example.com", contraseña="x")
+        self.admin = Usuario.objects.create(nombre="Admin", correo="admin@example.com", contraseña="x",
+                                            es_admin=True)
+
+    def test_requiere_token(self):
+        self.assertEqual(Client().get(reverse("latencia-observadores")).status_code, 401)
+
+    def test_solo_administradores(self):
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {crear_token_acceso(self.usuario.id)}")
+        self.assertEqual(client.get(reverse("latencia-observadores")).status_code, 403)
+
+    def test_latencias_del_proceso(self):
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {crear_token_acceso(self.usuario.id)}")
+        client.post(reverse("chatbot"), {"mensaje": "Estoy muy triste"}, content_type="application/json")
+
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {crear_token_acceso(self.admin.id)}")
+        respuesta = client.get(reverse("latencia-observadores"))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("evaluacion_completada", respuesta.json()["latencias"]["despachos"])
+
+    def test_comando(self):
+        salida = StringIO()
+        manager = get_event_manager()
+        antes = manager.latencias_observadores()
+        with mock.patch("django.core.mail.send_mail") as send_mail, \
+                self.settings(NOTIFICACIONES_EMAIL={"HABILITADO": True}):
+            call_command("latencia_observadores", "--eventos", "5", "--umbral-ms", "1000", stdout=salida)
+
+        self.assertIn("StatisticsObserver", salida.getvalue())
+        self.assertIn("despacho 'evaluacion_completada'", salida.getvalue())
+        # Aislado: ni emails ni métricas del EventManager del proceso
+        send_mail.assert_not_called()
+        self.assertEqual(manager.latencias_observadores(), antes)
@@ -2,8 +2,12 @@
 Tests unitarios para el patrón Observer
 """
 
+import threading
+import time
 import unittest
 from datetime import datetime
+from api.alert_limiter import LimitadorAlertas
+from api.event_bus import BusEventos
 from api.observers import (
     Observer,
     Subject,
@@ -69,6 +73,44 @@ class TestSubject(unittest.TestCase):
         self.assertEqual(self.observer1.events_received[0]['data'], test_data)
 
 
+    def test_routing_por_tipo_de_evento(self):
+        """Cada evento llega solo a los observadores suscritos y a los que reciben todos"""
+        alertas = TestObserver()
+        alertas.event_types = frozenset({"analisis_estres_alto"})
+        self.subject.attach(self.observer1)
+        self.subject.attach(alertas)
+        
+        self.subject.notify("usuario_login", {})
+        self.subject.notify("analisis_estres_alto", {})
+        
+        self.assertEqual([e['event_type'] for e in self.observer1.events_received],
+                         ["usuario_login", "analisis_estres_alto"])
+        self.assertEqual([e['event_type'] for e in alertas.events_received], ["analisis_estres_alto"])
+        self.assertEqual(self.subject.observadores_de("analisis_estres_alto"), (self.observer1, alertas))
+    
+    def test_evento_sin_suscriptores(self):
+        """Un evento sin suscriptores no llama a ningún observador"""
+        alertas = TestObserver()
+        alertas.event_types = frozenset({"analisis_estres_alto"})
+        self.subject.attach(alertas)
+        
+        self.subject.notify("usuario_login", {})
+        self.assertEqual(alertas.events_received, [])
+        self.assertEqual(self.subject.observadores_de("usuario_login"), ())
+    
+    def test_tabla_tras_detach(self):
+        alertas = TestObserver()
+        alertas.event_types = frozenset({"analisis_estres_alto"})
+        self.subject.attach(alertas)
+        self.subject.attach(self.observer1)
+        self.subject.detach(self.observer1)
+        
+        self.assertEqual(self.subject.observadores_de("analisis_estres_alto"), (alertas,))
+        self.assertEqual(self.subject.observadores_de("usuario_login"), ())
+        self.subject.detach(alertas)
+        self.assertEqual(self.subject.observadores_de("analisis_estres_alto"), ())
+
+
 class TestEventManager(unittest.TestCase):
     """Tests para EventManager (Singleton)"""
     
@@ -83,6 +125,15 @@ class TestEventManager(unittest.TestCase):
         manager = get_event_manager()
         self.assertGreater(len(manager._observers), 0)
     
+    def test_default_observers_routing(self):
+        """Los observadores por defecto solo reciben los eventos que declaran"""
+        manager = get_event_manager()
+        alertas = [o for o in manager.observadores_de("analisis_estres_alto") if isinstance(o, AlertObserver)]
+        self.assertEqual(len(alertas), 1)
+        login = [type(o) for o in manager.observadores_de("usuario_login") if type(o) in (
+            LoggingObserver, StatisticsObserver, EmailNotificationObserver, AlertObserver)]
+        self.assertEqual(login, [LoggingObserver])
+    
     def test_usuario_registrado_event(self):
         """Probar evento usuario_registrado"""
         manager = get_event_manager()
@@ -144,6 +195,169 @@ class TestEventManager(unittest.TestCase):
         self.assertEqual(len(estres_alto_events), 1)
 
 
+class SlowObserver(Observer):
+    """Observador de prueba que espera a que se le permita continuar"""
+    
+    def __init__(self):
+        self.continuar = threading.Event()
+        self.events_received = []
+    
+    def update(self, event_type: str, data: dict) -> None:
+        self.continuar.wait(5)
+        self.events_received.append(event_type)
+
+
+class TestBusEventos(unittest.TestCase):
+    """Tests para la cola de eventos asíncrona"""
+    
+    def setUp(self):
+        self.subject = Subject()
+        self.observer = SlowObserver()
+        self.subject.attach(self.observer)
+    
+    def crear_bus(self, **opciones):
+        bus = BusEventos(self.subject._despachar, **opciones)
+        self.addCleanup(bus.cerrar, 5)
+        self.addCleanup(self.observer.continuar.set)
+        return bus
+    
+    def esperar_despacho(self, bus):
+        """Espera a que el hilo tome el primer evento y se quede en el observador"""
+        limite = time.monotonic() + 5
+        while bus.metricas()["profundidad"] and time.monotonic() < limite:
+            time.sleep(0.001)
+    
+    def test_publicar_no_espera_al_observador(self):
+        """publicar vuelve enseguida aunque el observador sea lento"""
+        bus = self.crear_bus()
+        inicio = time.monotonic()
+        self.assertTrue(bus.publicar("evento", {}))
+        self.assertLess(time.monotonic() - inicio, 1)
+        self.assertEqual(self.observer.events_received, [])
+        
+        self.observer.continuar.set()
+        self.assertTrue(bus.esperar_vacia(5))
+        self.assertEqual(self.observer.events_received, ["evento"])
+    
+    def test_descartar_nuevo(self):
+        bus = self.crear_bus(tam_cola=2, desborde="descartar_nuevo")
+        bus.publicar("e0", {})
+        self.esperar_despacho(bus)
+        with self.assertLogs("api.event_bus", level="WARNING"):
+            resultados = [bus.publicar(f"e{i}", {}) for i in range(1, 5)]
+        self.assertEqual(resultados, [True, True, False, False])
+        
+        self.observer.continuar.set()
+        bus.esperar_vacia(5)
+        self.assertEqual(self.observer.events_received, ["e0", "e1", "e2"])
+        self.assertEqual(bus.metricas()["descartados"], 2)
+    
+    def test_descartar_antiguo(self):
+        bus = self.crear_bus(tam_cola=2, desborde="descartar_antiguo")
+        bus.publicar("e0", {})
+        self.esperar_despacho(bus)
+        with self.assertLogs("api.event_bus", level="WARNING"):
+            for i in range(1, 5):
+                self.assertTrue(bus.publicar(f"e{i}", {}))
+        
+        self.observer.continuar.set()
+        bus.esperar_vacia(5)
+        self.assertEqual(self.observer.events_received, ["e0", "e3", "e4"])
+    
+    def test_bloquear_con_espera_maxima(self):
+        """Con la cola llena se espera hueco; si no llega, se descarta el evento"""
+        bus = self.crear_bus(tam_cola=1, desborde="bloquear", espera_bloqueo=0.05)
+        bus.publicar("e0", {})
+        self.esperar_despacho(bus)
+        bus.publicar("e1", {})
+        
+        inicio = time.monotonic()
+        with self.assertLogs("api.event_bus", level="WARNING"):
+            self.assertFalse(bus.publicar("e2", {}))
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.05)
+        
+        # Cuando el observador avanza, el que publica encuentra hueco
+        threading.Timer(0.05, self.observer.continuar.set).start()
+        bus.espera_bloqueo = 5
+        self.assertTrue(bus.publicar("e3", {}))
+        bus.esperar_vacia(5)
+        self.assertEqual(self.observer.events_received, ["e0", "e1", "e3"])
+    
+    def test_cerrar_despacha_lo_pendiente(self):
+        bus = self.crear_bus(hilos=2)
+        for i in range(10):
+            bus.publicar(f"e{i}", {})
+        self.observer.continuar.set()
+        self.assertTrue(bus.cerrar(5))
+        self.assertEqual(sorted(self.observer.events_received), sorted(f"e{i}" for i in range(10)))
+        
+        # Después de cerrar se despacha en el hilo que publica
+        bus.publicar("tarde", {})
+        self.assertEqual(self.observer.events_received[-1], "tarde")
+    
+    def test_metricas(self):
+        bus = self.crear_bus(tam_cola=10)
+        bus.publicar("e0", {})
+        self.esperar_despacho(bus)
+        bus.publicar("e1", {})
+        time.sleep(0.02)
+        
+        metricas = bus.metricas()
+        self.assertEqual(metricas["profundidad"], 1)
+        self.assertEqual(metricas["capacidad"], 10)
+        self.assertGreaterEqual(metricas["retraso_actual_ms"], 20)
+        
+        self.observer.continuar.set()
+        bus.esperar_vacia(5)
+        metricas = bus.metricas()
+        self.assertEqual((metricas["publicados"], metricas["despachados"], metricas["profundidad"]), (2, 2, 0))
+        self.assertGreaterEqual(metricas["retraso_max_ms"], 20)
+    
+    def test_politica_desconocida(self):
+        with self.assertRaises(ValueError):
+            BusEventos(self.subject._despachar, desborde="ignorar")
+
+
+class TestEventManagerAsincrono(unittest.TestCase):
+    """Tests del despacho asíncrono en EventManager"""
+    
+    def setUp(self):
+        self.manager = get_event_manager()
+        self.manager.configurar_despacho("asincrono", tam_cola=100)
+        self.addCleanup(self.manager.configurar_despacho, "sincrono")
+        self.observer = SlowObserver()
+        self.manager.attach(self.observer)
+        self.addCleanup(self.manager.detach, self.observer)
+        self.addCleanup(self.observer.continuar.set)
+        # Sin alertas de otros tests: AlertObserver emite la suya
+        self.manager.configurar_alertas(LimitadorAlertas())
+    
+    def test_evaluacion_sin_esperar_a_los_observadores(self):
+        inicio = time.monotonic()
+        self.manager.evaluacion_completada(
+            usuario_id=7,
+            usuario_data={"id": 7, "nombre": "Test", "correo": "test@example.com"},
+            emocion="ansiedad",
+            nivel_estres=8,
+            recomendacion="Respira"
+        )
+        self.assertLess(time.monotonic() - inicio, 1)
+        self.assertEqual(self.observer.events_received, [])
+        
+        self.observer.continuar.set()
+        self.assertTrue(self.manager.esperar_eventos(5))
+        self.assertEqual(self.observer.events_received,
+                         ["evaluacion_completada", "analisis_estres_alto", "alerta_emitida"])
+        self.assertEqual(self.manager.metricas_despacho()["despachados"], 3)
+    
+    def test_volver_a_sincrono_despacha_lo_pendiente(self):
+        self.manager.usuario_login({"nombre": "Test"})
+        self.observer.continuar.set()
+        self.manager.configurar_despacho("sincrono")
+        self.assertEqual(self.observer.events_received, ["usuario_login"])
+        self.assertIsNone(self.manager.metricas_despacho())
+
+
 class TestStatisticsObserver(unittest.TestCase):
     """Tests para StatisticsObserver"""
     
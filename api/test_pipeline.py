@@ -0,0 +1,107 @@
+"""
+Tests unitarios para el pipeline de análisis
+"""
+
+import unittest
+from unittest import mock
+
+from api.emotion_library import AnalisisEmocional, EmotionLibrary
+from api.lexicon import CompiledLexicon
+from api.pipeline import ORDEN, EtapaCacheada, Normalizar, PipelineAnalisis, Recomendar
+
+TEXTOS = [
+    "Hoy me siento muy ansioso y preocupado por el trabajo, no puedo dormir",
+    "No estoy triste. Estoy muy pero muy feliz",
+    "gracias",
+    "Me encanta este día, ¡qué alegría!",
+]
+
+
+class NormalizarJerga(Normalizar):
+    """Normalización de prueba que expande una abreviatura."""
+
+    def __call__(self, texto, contexto):
+        return super().__call__(texto, contexto).replace("depre", "deprimido")
+
+
+class RecomendarFija(Recomendar):
+
+    def __call__(self, analisis, contexto):
+        return analisis.con_recomendacion("Recomendación de prueba")
+
+
+class TestPipelineAnalisis(unittest.TestCase):
+
+    def test_mismo_resultado_que_las_funciones_de_la_libreria(self):
+        """Las etapas por defecto equivalen a tokenizar, puntuar y agregar directamente"""
+        lexico = EmotionLibrary.LEXICO
+        pipeline = PipelineAnalisis()
+        for texto in TEXTOS:
+            with self.subTest(texto=texto):
+                palabras, cortes = EmotionLibrary.REGLAS_MODIFICADORES.tokenizar(texto)
+                esperado = AnalisisEmocional(lexico, EmotionLibrary._puntuar_tokens(palabras, lexico, cortes), len(palabras))
+                self.assertEqual(dict(pipeline.ejecutar(texto, lexico)), dict(esperado))
+                self.assertEqual(dict(EmotionLibrary.detectar_emociones(texto, lexico)), dict(esperado))
+
+    def test_reemplazar_etapas(self):
+        """Una etapa sustituida se usa en detectar_emociones"""
+        pipeline = PipelineAnalisis().reemplazar("normalizar", NormalizarJerga()).reemplazar("recomendar", RecomendarFija())
+        with mock.patch.object(EmotionLibrary, "PIPELINE", pipeline):
+            resultado = EmotionLibrary.detectar_emociones("Hoy estoy depre")
+        self.assertEqual(resultado["emocion_principal"], "tristeza")
+        self.assertEqual(resultado["recomendacion"], "Recomendación de prueba")
+
+    def test_etapas_desconocidas(self):
+        with self.assertRaises(ValueError):
+            PipelineAnalisis({"traducir": Normalizar()})
+
+    def test_cache_de_tokenizacion(self):
+        """Los textos repetidos reutilizan la tokenización, con el mismo resultado"""
+        pipeline = PipelineAnalisis().cachear("tokenizar", max_entradas=2)
+        sin_cache = PipelineAnalisis()
+
+        for texto in TEXTOS[:2] * 3:
+            self.assertEqual(dict(pipeline.ejecutar(texto)), dict(sin_cache.ejecutar(texto)))
+
+        self.assertIsInstance(pipeline.etapas["tokenizar"], EtapaCacheada)
+        self.assertEqual(pipeline.estadisticas_cache(), {"tokenizar": {"aciertos": 4, "fallos": 2, "entradas": 2}})
+
+    def test_cache_por_version_del_lexico(self):
+        """Con otro léxico no se reutiliza lo cacheado"""
+        otro = CompiledLexicon({"tristeza": {"palabras": ["gris"], "color": "🔵", "nivel_base": -2}}, {}, [])
+        pipeline = PipelineAnalisis().cachear("emparejar")
+
+        pipeline.ejecutar("un día gris", EmotionLibrary.LEXICO)
+        resultado = pipeline.ejecutar("un día gris", otro)
+        self.assertEqual(resultado["emocion_principal"], "tristeza")
+        self.assertEqual(pipeline.estadisticas_cache()["emparejar"]["aciertos"], 0)
+
+    def test_perfil_por_etapa(self):
+        """perfilar cronometra cada etapa de una carga de trabajo"""
+        pipeline = PipelineAnalisis()
+        perfil = pipeline.perfilar(TEXTOS + ["   "])
+
+        datos = perfil.como_dict()
+        self.assertEqual(tuple(datos), ORDEN)
+        self.assertTrue(all(etapa["llamadas"] == len(TEXTOS) for etapa in datos.values()))
+        self.assertAlmostEqual(sum(etapa["porcentaje"] for etapa in datos.values()), 100, places=3)
+        self.assertIn("emparejar", perfil.informe())
+
+    def test_perfil_no_afecta_a_otros_analisis(self):
+        """Los análisis ejecutados mientras se perfila no se cronometran"""
+        pipeline = PipelineAnalisis()
+        textos = iter(TEXTOS)
+        perfil = pipeline.perfilar(texto for texto in textos if pipeline.ejecutar("me siento triste"))
+        self.assertTrue(all(etapa["llamadas"] == len(TEXTOS) for etapa in perfil.como_dict().values()))
+        self.assertFalse(hasattr(pipeline, "perfil"))
+
+    def test_recomendar_no_modifica_su_entrada(self):
+        """recomendar retorna un análisis nuevo"""
+        palabras, cortes = EmotionLibrary.REGLAS_MODIFICADORES.tokenizar("estoy muy triste")
+        lexico = EmotionLibrary.LEXICO
+        agregado = AnalisisEmocional(lexico, EmotionLibrary._puntuar_tokens(palabras, lexico, cortes), len(palabras))
+        recomendado = RecomendarFija()(agregado, None)
+        self.assertIsNot(recomendado, agregado)
+        self.assertEqual(recomendado["recomendacion"], "Recomendación de prueba")
+        self.assertNotEqual(agregado["recomendacion"], "Recomendación de prueba")
+        self.assertEqual(recomendado["nivel_estres"], agregado["nivel_estres"])
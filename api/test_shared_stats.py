@@ -0,0 +1,150 @@
+"""
+Tests unitarios para las estadísticas compartidas entre workers
+"""
+
+import threading
+import unittest
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from api.auth_utils import crear_token_acceso
+from api.models import EstadisticaGlobal, Usuario
+from api.observers import StatisticsObserver, get_event_manager
+from api.shared_stats import ContadoresProceso, EstadisticasCompartidas, resumen_estadisticas
+
+
+def evaluacion(emocion, nivel_estres):
+    return {"usuario_id": 1, "emocion": emocion, "nivel_estres": nivel_estres}
+
+
+class TestContadoresProceso(unittest.TestCase):
+
+    def test_suma_de_todos_los_hilos(self):
+        contadores = ContadoresProceso()
+
+        def sumar():
+            for _ in range(1000):
+                contadores.sumar("total_analisis")
+                contadores.sumar("suma_estres", 2)
+
+        hilos = [threading.Thread(target=sumar) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        contadores.sumar("total_analisis")
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(contadores.totales(), {"total_analisis": 4001, "suma_estres": 8000})
+        # Los diccionarios de los hilos terminados se pliegan
+        self.assertEqual(len(contadores._hilos), 1)
+        self.assertEqual(contadores.totales(), {"total_analisis": 4001, "suma_estres": 8000})
+
+    def test_pendientes_desde_el_ultimo_volcado(self):
+        contadores = ContadoresProceso()
+        contadores.sumar("total_usuarios", 3)
+        pendientes = contadores.pendientes()
+        self.assertEqual(pendientes, {"total_usuarios": 3})
+
+        contadores.confirmar(pendientes)
+        self.assertEqual(contadores.pendientes(), {})
+        contadores.sumar("total_usuarios")
+        self.assertEqual(contadores.pendientes(), {"total_usuarios": 1})
+
+    def test_resumen(self):
+        resumen = resumen_estadisticas({
+            "total_analisis": 4, "suma_estres": 22, "emocion:ansiedad": 3, "emocion:alegría": 1,
+        })
+        self.assertEqual(resumen["nivel_estres_promedio"], 5.5)
+        self.assertEqual(resumen["emociones_detectadas"], {"alegría": 1, "ansiedad": 3})
+        self.assertEqual(resumen_estadisticas({})["nivel_estres_promedio"], 0)
+
+
+class TestEstadisticasCompartidas(TestCase):
+
+    def worker(self):
+        """Un StatisticsObserver con sus contadores, como el de cada worker de gunicorn"""
+        compartidas = EstadisticasCompartidas(intervalo=3600)
+        self.addCleanup(compartidas.cerrar, 5)
+        return StatisticsObserver(compartidas)
+
+    def test_suma_entre_workers(self):
+        worker1, worker2 = self.worker(), self.worker()
+        worker1.update("usuario_registrado", {})
+        worker1.update("evaluacion_completada", evaluacion("ansiedad", 8))
+        worker1.update("analisis_estres_alto", evaluacion("ansiedad", 8))
+        worker2.update("evaluacion_completada", evaluacion("ansiedad", 4))
+        worker2.update("evaluacion_completada", evaluacion("alegría", 0))
+
+        self.assertTrue(worker1.compartidas.volcar())
+        self.assertTrue(worker2.compartidas.volcar())
+
+        resumen = resumen_estadisticas(worker1.compartidas.leer())
+        estres = resumen.pop("estres")
+        self.assertEqual((estres["total"], estres["p50"], estres["distribucion"][8]), (3, 4, 1))
+        self.assertEqual(resumen, {
+            "total_usuarios": 1,
+            "total_analisis": 3,
+            "emociones_detectadas": {"alegría": 1, "ansiedad": 2},
+            "nivel_estres_promedio": 4,
+            "alertas_estres_alto": 1,
+        })
+        # Cada worker sigue contando solo lo suyo en stats
+        self.assertEqual(worker2.stats["total_analisis"], 2)
+
+    def test_solo_se_vuelcan_diferencias(self):
+        worker = self.worker()
+        worker.update("evaluacion_completada", evaluacion("tristeza", 6))
+        worker.compartidas.volcar()
+        with self.assertNumQueries(0):
+            worker.compartidas.volcar()
+
+        worker.update("evaluacion_completada", evaluacion("tristeza", 2))
+        worker.compartidas.volcar()
+        self.assertEqual(EstadisticaGlobal.objects.get(clave="total_analisis").valor, 2)
+        self.assertEqual(EstadisticaGlobal.objects.get(clave="suma_estres").valor, 8)
+
+    def test_cerrar_vuelca_lo_pendiente(self):
+        worker = self.worker()
+        worker.update("usuario_registrado", {})
+        worker.compartidas.cerrar(5)
+        self.assertEqual(EstadisticaGlobal.objects.get(clave="total_usuarios").valor, 1)
+
+
+class TestEstadisticasAPI(TestCase):
+
+    def setUp(self):
+        self.admin = Usuario.objects.create(nombre="Admin", correo="admin@example.com",
+                                            contraseña="123456", es_admin=True)
+        self.usuario = Usuario.objects.create(nombre="Test", correo="test@example.com", contraseña="123456")
+        self.url = reverse("estadisticas")
+
+    def cliente(self, usuario):
+        return Client(HTTP_AUTHORIZATION=f"Bearer {crear_token_acceso(usuario.id)}")
+
+    def test_solo_administradores(self):
+        self.assertEqual(Client().get(self.url).status_code, 401)
+        self.assertEqual(self.cliente(self.usuario).get(self.url).status_code, 403)
+        respuesta = self.cliente(self.admin).get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()["alcance"], "proceso")
+
+    def test_estadisticas_de_todo_el_despliegue(self):
+        manager = get_event_manager()
+        compartidas = EstadisticasCompartidas(intervalo=3600)
+        manager.configurar_estadisticas(compartidas)
+        self.addCleanup(manager.configurar_estadisticas, None)
+
+        # Lo que otro worker ya volcó
+        EstadisticaGlobal.objects.create(clave="total_analisis", valor=3)
+        EstadisticaGlobal.objects.create(clave="suma_estres", valor=9)
+        EstadisticaGlobal.objects.create(clave="emocion:tristeza", valor=3)
+
+        manager.evaluacion_completada(self.usuario.id, {"nombre": "Test"}, "ansiedad", 7, "Respira")
+
+        datos = self.cliente(self.admin).get(self.url).json()
+        self.assertEqual(datos["alcance"], "despliegue")
+        self.assertEqual(datos["total_analisis"], 4)
+        self.assertEqual(datos["emociones_detectadas"], {"ansiedad": 1, "tristeza": 3})
+        self.assertEqual(datos["nivel_estres_promedio"], 4)
+        self.assertEqual(datos["alertas_estres_alto"], 1)
@@ -0,0 +1,149 @@
+"""
+Tests unitarios para los histogramas y ventanas de estrés
+"""
+
+import unittest
+
+from django.test import TestCase
+
+from api.models import CubetaEstres
+from api.observers import StatisticsObserver
+from api.shared_stats import EstadisticasCompartidas
+from api.stress_stats import HistogramaEstres, VentanasEstres, nivel_discreto
+
+
+class Reloj:
+
+    def __init__(self, ahora=1_000_000.0):
+        self.ahora = ahora
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestHistogramaEstres(unittest.TestCase):
+
+    def test_percentiles_exactos(self):
+        histograma = HistogramaEstres()
+        for nivel in range(10):
+            histograma.registrar(nivel, 10)
+        histograma.registrar(10, 1)
+
+        self.assertEqual(histograma.total, 101)
+        self.assertEqual((histograma.percentil(50), histograma.percentil(90), histograma.percentil(99)), (5, 9, 9))
+        self.assertEqual(histograma.percentil(100), 10)
+
+    def test_fusionar(self):
+        worker1, worker2 = HistogramaEstres(), HistogramaEstres()
+        worker1.registrar(2, 3)
+        worker2.registrar(8)
+        worker1.fusionar(worker2)
+        self.assertEqual(worker1.como_dict()["distribucion"], [0, 0, 3, 0, 0, 0, 0, 0, 1, 0, 0])
+        self.assertEqual(worker1.media(), 3.5)
+
+    def test_vacio(self):
+        datos = HistogramaEstres().como_dict()
+        self.assertEqual((datos["total"], datos["media"], datos["p99"]), (0, None, None))
+
+    def test_nivel_discreto(self):
+        self.assertEqual([nivel_discreto(n) for n in (-1, 3.4, 6.6, "7", 12)], [0, 3, 7, 7, 10])
+
+
+class TestVentanasEstres(unittest.TestCase):
+
+    def setUp(self):
+        self.reloj = Reloj()
+        self.ventanas = VentanasEstres(reloj=self.reloj)
+
+    def test_cada_ventana_ve_su_periodo(self):
+        self.ventanas.registrar("ansiedad", 8)
+        self.reloj.ahora += 400
+        self.ventanas.registrar("alegría", 1)
+        self.ventanas.registrar("alegría", 2)
+
+        cinco_minutos = self.ventanas.resumen("5m")
+        self.assertEqual(cinco_minutos["estres"]["total"], 2)
+        self.assertEqual(list(cinco_minutos["emociones"]), ["alegría"])
+        self.assertAlmostEqual(cinco_minutos["emociones"]["alegría"]["por_minuto"], 2 / 5)
+
+        una_hora = self.ventanas.resumen("1h")
+        self.assertEqual(una_hora["estres"]["distribucion"][8], 1)
+        self.assertEqual(una_hora["estres"]["p99"], 8)
+
+        self.reloj.ahora += 86400
+        self.assertEqual(self.ventanas.resumen("24h")["estres"]["total"], 0)
+
+    def test_memoria_fija(self):
+        """Tras dos días de eventos, cada anillo sigue teniendo el mismo número de intervalos"""
+        for _ in range(2 * 24 * 60):
+            self.reloj.ahora += 60
+            self.ventanas.registrar("tristeza", 5)
+
+        self.assertEqual([len(anillo) for anillo in self.ventanas._anillos.values()], [30, 60, 96])
+        self.assertEqual(self.ventanas.resumen("1h")["estres"]["total"], 60)
+        # El intervalo de 15 min en curso aún no está completo
+        self.assertTrue(95 * 15 < self.ventanas.resumen("24h")["estres"]["total"] <= 96 * 15)
+
+    def test_pendientes_y_confirmar(self):
+        self.ventanas.registrar("ansiedad", 8)
+        pendientes = self.ventanas.pendientes()
+        self.assertEqual(sorted(ancho for ancho, *_ in pendientes), [10, 60, 900])
+
+        self.ventanas.confirmar(pendientes)
+        self.assertEqual(self.ventanas.pendientes(), [])
+        self.ventanas.registrar("ansiedad", 8)
+        self.assertEqual([delta for *_, delta in self.ventanas.pendientes()], [1, 1, 1])
+
+
+class TestVentanasCompartidas(TestCase):
+
+    def setUp(self):
+        self.reloj = Reloj()
+
+    def worker(self):
+        compartidas = EstadisticasCompartidas(intervalo=3600)
+        compartidas.ventanas = VentanasEstres(reloj=self.reloj)
+        self.addCleanup(compartidas.cerrar, 5)
+        return StatisticsObserver(compartidas)
+
+    def evaluar(self, worker, emocion, nivel_estres):
+        worker.update("evaluacion_completada", {"emocion": emocion, "nivel_estres": nivel_estres})
+
+    def test_fusion_entre_workers(self):
+        worker1, worker2 = self.worker(), self.worker()
+        for nivel in (2, 3, 9):
+            self.evaluar(worker1, "ansiedad", nivel)
+        self.evaluar(worker2, "alegría", 1)
+        worker1.compartidas.volcar()
+        worker2.compartidas.volcar()
+
+        # Una consulta por ventana, sin importar cuántos eventos haya
+        with self.assertNumQueries(3):
+            ventanas = worker1.compartidas.leer_ventanas()
+        self.assertEqual(ventanas["5m"]["estres"]["total"], 4)
+        self.assertEqual(ventanas["5m"]["estres"]["p50"], 2)
+        self.assertEqual(ventanas["24h"]["emociones"]["ansiedad"]["evaluaciones"], 3)
+
+    def test_se_borran_los_intervalos_fuera_de_ventana(self):
+        worker = self.worker()
+        self.evaluar(worker, "ansiedad", 8)
+        worker.compartidas.volcar()
+        self.assertEqual(CubetaEstres.objects.filter(ancho=10).count(), 1)
+
+        self.reloj.ahora += 301
+        self.evaluar(worker, "ansiedad", 8)
+        worker.compartidas.volcar()
+        self.assertEqual(CubetaEstres.objects.filter(ancho=10).count(), 1)
+        self.assertEqual(CubetaEstres.objects.filter(ancho=60).count(), 2)
+        self.assertEqual(worker.compartidas.leer_ventanas()["5m"]["estres"]["total"], 1)
+
+
+class TestPromedioSinDeriva(unittest.TestCase):
+
+    def test_promedio_como_suma_entre_total(self):
+        observer = StatisticsObserver()
+        for _ in range(100000):
+            observer.update("evaluacion_completada", {"emocion": "calma", "nivel_estres": 1})
+        observer.update("evaluacion_completada", {"emocion": "calma", "nivel_estres": 2})
+        self.assertEqual(observer.stats["nivel_estres_promedio"], 100002 / 100001)
+        self.assertEqual(observer.histograma_estres.percentil(99), 1)
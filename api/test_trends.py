@@ -0,0 +1,137 @@
+"""
+Tests unitarios para los detectores de tendencia de estrés
+"""
+
+import unittest
+
+from django.test import TestCase
+
+from api.models import TendenciaUsuario, Usuario
+from api.observers import Observer, RecommendationObserver, get_event_manager
+from api.trends import (
+    CUSUM, ESTRES_ALTO_CONSISTENTE, EWMA, RACHA_EMOCION, DetectorTendencias, TendenciasUsuarios, crear_tendencias,
+)
+from api.user_history import HistorialUsuarios
+
+
+class ObservadorTendencias(Observer):
+
+    event_types = frozenset({"tendencia_detectada"})
+
+    def __init__(self):
+        self.eventos = []
+
+    def update(self, event_type, data):
+        self.eventos.append(data)
+
+
+class TestDetectorTendencias(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = DetectorTendencias(emociones=["tristeza", "ansiedad"])
+        self.estado = self.detector.estado_inicial()
+
+    def aplicar(self, *evaluaciones):
+        return [self.detector.actualizar(self.estado, emocion, nivel) for emocion, nivel in evaluaciones]
+
+    def test_ewma_avisa_al_cruzar_el_umbral(self):
+        detectadas = self.aplicar(("calma", 9), ("calma", 9), ("calma", 9), ("calma", 2), ("calma", 2),
+                                  ("calma", 10), ("calma", 10))
+        self.assertEqual([EWMA in d for d in detectadas], [False, True, False, False, False, False, True])
+
+    def test_cusum_detecta_subidas_moderadas_antes_que_la_media(self):
+        detectadas = self.aplicar(*[("calma", 7)] * 4)
+        self.assertEqual(detectadas[3], [CUSUM])
+        self.assertLess(self.estado.ewma, 7)
+        self.assertEqual(self.estado.cusum, 0)
+
+    def test_rachas(self):
+        detectadas = self.aplicar(("tristeza", 8), ("tristeza", 9), ("tristeza", 8), ("tristeza", 9))
+        self.assertIn(RACHA_EMOCION, detectadas[2])
+        self.assertIn(ESTRES_ALTO_CONSISTENTE, detectadas[2])
+        # Solo se avisa una vez por racha
+        self.assertNotIn(RACHA_EMOCION, detectadas[3])
+        self.assertNotIn(ESTRES_ALTO_CONSISTENTE, detectadas[3])
+
+        self.assertEqual(self.aplicar(("alegría", 3), ("alegría", 3), ("alegría", 3)), [[], [], []])
+
+    def test_estado_de_tamano_fijo(self):
+        self.aplicar(*[("ansiedad", 6)] * 1000)
+        self.assertEqual(self.estado.eventos, 1000)
+        self.assertFalse(hasattr(self.estado, "__dict__"))
+
+
+class TestTendenciasUsuarios(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(nombre="Ana", correo="ana@example.com", contraseña="123456")
+
+    def tendencias(self, **opciones):
+        tendencias = TendenciasUsuarios(DetectorTendencias(emociones=["tristeza"]), intervalo=3600, **opciones)
+        self.addCleanup(tendencias.cerrar, 5)
+        return tendencias
+
+    def test_sobrevive_a_un_reinicio(self):
+        antes = self.tendencias(persistir=True)
+        antes.procesar(self.usuario.id, "tristeza", 6)
+        antes.procesar(self.usuario.id, "tristeza", 6)
+        antes.procesar(999999, "tristeza", 6)  # usuario que no existe: no se guarda
+        self.assertTrue(antes.volcar())
+        self.assertEqual(TendenciaUsuario.objects.get().racha, 2)
+
+        despues = self.tendencias(persistir=True)
+        self.assertEqual(despues.procesar(self.usuario.id, "tristeza", 6), [RACHA_EMOCION])
+        despues.volcar()
+        fila = TendenciaUsuario.objects.get()
+        self.assertEqual((fila.racha, fila.eventos), (3, 3))
+
+    def test_expulsado_sin_guardar_conserva_su_estado(self):
+        tendencias = self.tendencias(persistir=True, max_usuarios=1)
+        tendencias.procesar(self.usuario.id, "tristeza", 6)
+        tendencias.procesar(self.usuario.id, "tristeza", 6)
+        tendencias.procesar(999999, "calma", 2)
+        self.assertIsNone(tendencias.estado(self.usuario.id))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tendencias.procesar(self.usuario.id, "tristeza", 6), [RACHA_EMOCION])
+
+    def test_sin_persistir_no_consulta_la_base_de_datos(self):
+        tendencias = self.tendencias()
+        with self.assertNumQueries(0):
+            tendencias.procesar(self.usuario.id, "tristeza", 6)
+            tendencias.cerrar()
+
+    def test_crear_tendencias(self):
+        tendencias = crear_tendencias({"UMBRAL_CUSUM": 3, "PERSISTIR": True, "INTERVALO_S": 1})
+        self.assertEqual((tendencias.detector.umbral_cusum, tendencias.persistir, tendencias.intervalo), (3, True, 1))
+
+
+class TestTendenciaDetectada(unittest.TestCase):
+
+    def test_recommendation_observer_publica_tendencias(self):
+        publicados = []
+        observer = RecommendationObserver(HistorialUsuarios(cargar=None), TendenciasUsuarios(),
+                                          publicar=lambda event_type, data: publicados.append((event_type, data)))
+        with self.assertLogs("api.observers", level="WARNING"):
+            for nivel in (8, 9, 8):
+                observer.update("evaluacion_completada", {"usuario_id": 1, "emocion": "ansiedad",
+                                                          "nivel_estres": nivel})
+
+        tendencias = [data["tendencia"] for event_type, data in publicados]
+        self.assertEqual({event_type for event_type, _ in publicados}, {"tendencia_detectada"})
+        self.assertIn(ESTRES_ALTO_CONSISTENTE, tendencias)
+        self.assertIn(RACHA_EMOCION, tendencias)
+        self.assertEqual(publicados[-1][1]["estado"]["racha_alta"], 3)
+
+    def test_evento_del_event_manager(self):
+        manager = get_event_manager()
+        observador = ObservadorTendencias()
+        manager.attach(observador)
+        self.addCleanup(manager.detach, observador)
+
+        with self.assertLogs("api.observers", level="WARNING"):
+            for _ in range(3):
+                manager.evaluacion_completada(424242, {"id": 424242, "nombre": "Luis"}, "miedo", 9, "Respira")
+
+        self.assertIn(ESTRES_ALTO_CONSISTENTE, [data["tendencia"] for data in observador.eventos])
+        self.assertEqual(observador.eventos[0]["usuario"]["nombre"], "Luis")
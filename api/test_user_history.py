@@ -0,0 +1,167 @@
+"""
+Tests unitarios para el historial acotado de RecommendationObserver
+"""
+
+import os
+import random
+import tracemalloc
+import unittest
+
+from django.test import TestCase
+
+from api.models import EvaluacionEmocional, Usuario
+from api.observers import RecommendationObserver
+from api.trends import DetectorTendencias, TendenciasUsuarios
+from api.user_history import HistorialUsuarios, medir_costes
+
+# El millón de eventos tarda ~45 s con tracemalloc activo; por defecto se usa
+# una carga menor con el mismo patrón (CARGA_HISTORIAL_EVENTOS=1000000 para la completa)
+EVENTOS_CARGA = int(os.getenv("CARGA_HISTORIAL_EVENTOS", "100000"))
+
+
+class Reloj:
+
+    def __init__(self):
+        self.ahora = 1_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestHistorialUsuarios(unittest.TestCase):
+
+    def setUp(self):
+        self.reloj = Reloj()
+
+    def historial(self, usuarios=10, por_usuario=5, ttl=None):
+        coste_usuario, coste_registro = medir_costes(por_usuario)
+        presupuesto = usuarios * (coste_usuario + por_usuario * coste_registro)
+        return HistorialUsuarios(por_usuario=por_usuario, presupuesto=presupuesto, ttl=ttl,
+                                 cargar=None, reloj=self.reloj)
+
+    def test_anillo_por_usuario(self):
+        historial = self.historial()
+        for nivel in range(8):
+            ultimos = historial.agregar(1, "tristeza", nivel)
+
+        self.assertEqual([nivel for _, nivel, _ in ultimos], [3, 4, 5, 6, 7])
+        self.assertEqual(historial.historial(1), ultimos)
+        self.assertEqual(historial.metricas()["bytes_estimados"], historial.coste_usuario + 5 * historial.coste_registro)
+
+    def test_expulsa_al_menos_usado(self):
+        historial = self.historial(usuarios=2, por_usuario=2)
+        for usuario in ("a", "b"):
+            historial.agregar(usuario, "calma", 1)
+            historial.agregar(usuario, "calma", 2)
+        historial.agregar("a", "calma", 3)
+        historial.agregar("c", "calma", 4)
+
+        self.assertIn("a", historial)
+        self.assertNotIn("b", historial)
+        self.assertEqual(historial.expulsados_lru, 1)
+
+    def test_expulsa_a_los_inactivos(self):
+        historial = self.historial(ttl=60)
+        historial.agregar("a", "calma", 1)
+        self.reloj.ahora += 30
+        historial.agregar("b", "calma", 1)
+        self.reloj.ahora += 45
+        historial.agregar("c", "calma", 1)
+
+        self.assertEqual([usuario in historial for usuario in "abc"], [False, True, True])
+        self.assertEqual(historial.expulsados_ttl, 1)
+
+    def test_rehidrata_sin_duplicar_la_evaluacion_actual(self):
+        cargas = []
+
+        def cargar(usuario_id, limite):
+            cargas.append((usuario_id, limite))
+            return [("tristeza", 8, 1.0), ("ansiedad", 9, 2.0), ("ansiedad", 8, 3.0)]
+
+        historial = HistorialUsuarios(por_usuario=5, cargar=cargar)
+        ultimos = historial.agregar(7, "ansiedad", 8)
+        historial.agregar(7, "calma", 2)
+
+        self.assertEqual([nivel for _, nivel, _ in ultimos], [8, 9, 8])
+        self.assertEqual(cargas, [(7, 6)])
+        self.assertEqual(historial.rehidratados, 1)
+
+    def test_fallo_al_rehidratar(self):
+        def cargar(usuario_id, limite):
+            raise RuntimeError("base de datos caída")
+
+        historial = HistorialUsuarios(cargar=cargar)
+        with self.assertLogs("api.user_history", level="ERROR"):
+            self.assertEqual(len(historial.agregar(1, "calma", 1)), 1)
+
+    def test_estimacion_igual_a_la_memoria_medida(self):
+        """Los costes calculados con sys.getsizeof estiman bien la memoria que mide tracemalloc"""
+        tracemalloc.start()
+        try:
+            antes = tracemalloc.get_traced_memory()[0]
+            historial = HistorialUsuarios(cargar=None)
+            for numero in range(40_000):
+                historial.agregar(10**6 + numero % 2000, "calma", numero % 11)
+            usados = tracemalloc.get_traced_memory()[0] - antes
+        finally:
+            tracemalloc.stop()
+
+        estimados = historial.metricas()["bytes_estimados"]
+        self.assertAlmostEqual(estimados / usados, 1, delta=0.1)
+
+    def test_memoria_plana_bajo_carga(self):
+        """Con tracemalloc: tras llenar el presupuesto, la memoria no crece con los eventos"""
+        presupuesto = 2**20
+        historial = HistorialUsuarios(presupuesto=presupuesto, cargar=lambda usuario_id, limite: [])
+        aleatorio = random.Random(7)
+        emociones = ("tristeza", "ansiedad", "alegría", "calma", "enojo")
+        calentamiento = EVENTOS_CARGA // 10
+
+        tracemalloc.start()
+        try:
+            for numero in range(EVENTOS_CARGA):
+                if numero == calentamiento:
+                    tras_calentar = tracemalloc.get_traced_memory()[0]
+                historial.agregar(aleatorio.randrange(50_000), emociones[numero % 5], numero % 11)
+            final, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertLessEqual(historial.metricas()["bytes_estimados"], presupuesto)
+        self.assertLess(abs(final - tras_calentar), presupuesto * 0.05)
+        self.assertLess(pico, presupuesto * 1.5)
+        self.assertGreater(historial.expulsados_lru, EVENTOS_CARGA // 2)
+
+
+class TestRecommendationObserver(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(nombre="Ana", correo="ana@example.com", contraseña="123456")
+        for nivel in (8, 9, 8):
+            EvaluacionEmocional.objects.create(usuario=self.usuario, texto="...", emocion="ansiedad",
+                                               nivel_estres=nivel, recomendacion="Respira")
+        self.publicados = []
+
+    def observer(self, **opciones):
+        return RecommendationObserver(HistorialUsuarios(por_usuario=5), TendenciasUsuarios(DetectorTendencias(**opciones)),
+                                      publicar=lambda event_type, data: self.publicados.append(data))
+
+    def test_sin_tendencia_no_consulta_la_base_de_datos(self):
+        observer = self.observer()
+        with self.assertNumQueries(0):
+            observer.update("evaluacion_completada", {"usuario_id": self.usuario.id, "emocion": "ansiedad",
+                                                      "nivel_estres": 8})
+        self.assertEqual(len(observer.historial.historial(self.usuario.id)), 1)
+
+    def test_rehidrata_al_detectar_una_tendencia(self):
+        observer = self.observer(racha_minima=1)
+        # La última fila es la evaluación que se notifica
+        with self.assertLogs("api.observers", level="WARNING"), self.assertNumQueries(1):
+            observer.update("evaluacion_completada", {"usuario_id": self.usuario.id, "emocion": "ansiedad",
+                                                      "nivel_estres": 8})
+            observer.update("evaluacion_completada", {"usuario_id": self.usuario.id, "emocion": "calma",
+                                                      "nivel_estres": 2})
+
+        self.assertEqual([registro["nivel_estres"] for registro in self.publicados[0]["historial"]], [8, 9, 8])
+        self.assertEqual(observer.historial.rehidratados, 1)
+        self.assertEqual([nivel for _, nivel, _ in observer.historial.historial(self.usuario.id)], [8, 9, 8, 2])
@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework import status
 from .models import Usuario, EvaluacionEmocional
 from .auth_utils import crear_token_acceso
+from .emotion_library import EmotionLibrary
 
 class EvaluacionEmocionalTests(TestCase):
 
@@ -18,6 +19,11 @@ class EvaluacionEmocionalTests(TestCase):
         response = self.client.post(url, data, content_type='application/json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertIn('emocion', response.json())
+
+    def test_evaluacion_registra_version_del_lexico(self):
+        url = reverse('evaluaciones')
+        response = self.client.post(url, {"texto": "Estoy triste"}, content_type='application/json')
+        self.assertEqual(response.json()["version_lexico"], EmotionLibrary.lexico_actual().version)
     
     def test_get_evaluaciones_filtradas(self):
         # Crear evaluación manual
@@ -26,3 +32,34 @@ class EvaluacionEmocionalTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.json()), 1)
+
+
+class ChatbotTests(TestCase):
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(nombre="ChatUser", correo="chat@example.com", contraseña="123456")
+        self.token = crear_token_acceso(self.usuario.id)
+        self.client = Client(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_estado_de_conversacion_acumulado(self):
+        url = reverse('chatbot')
+        self.client.post(url, {"mensaje": "Estoy muy triste"}, content_type='application/json')
+        response = self.client.post(url, {"mensaje": "gracias por escucharme"}, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        conversacion = response.json()["analisis"]["conversacion"]
+        self.assertEqual(conversacion["mensajes"], 2)
+        self.assertEqual(conversacion["emocion"], "tristeza")
+
+    def test_estado_separado_por_usuario(self):
+        """Dos usuarios con la misma sesión del navegador no comparten la conversación"""
+        url = reverse('chatbot')
+        self.client.post(url, {"mensaje": "Estoy muy triste"}, content_type='application/json')
+
+        otro = Usuario.objects.create(nombre="Otro", correo="otro@example.com", contraseña="123456")
+        response = self.client.post(url, {"mensaje": "me siento feliz"}, content_type='application/json',
+                                    HTTP_AUTHORIZATION=f'Bearer {crear_token_acceso(otro.id)}')
+
+        conversacion = response.json()["analisis"]["conversacion"]
+        self.assertEqual(conversacion["mensajes"], 1)
+        self.assertEqual(conversacion["emocion"], "alegría")
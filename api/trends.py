@@ -0,0 +1,270 @@
+"""
+Detección incremental de tendencias de estrés por usuario.
+
+Cada evaluación actualiza unos pocos números del estado del usuario
+(``EstadoTendencia``), en O(1) y sin mirar su historial:
+
+    ewma            media móvil exponencial del estrés; se avisa cuando sube
+                    por encima de ``umbral_ewma``
+    cusum           suma acumulada de lo que el estrés pasa de ``objetivo +
+                    holgura`` (nunca baja de 0); se avisa cuando llega a
+                    ``umbral_cusum``, y vuelve a 0. Detecta subidas sostenidas
+                    moderadas que la media tarda en reflejar
+    racha           evaluaciones seguidas con la misma emoción estresante; se
+                    avisa al llegar a ``racha_minima``
+    racha_alta      evaluaciones seguidas con estrés mayor que 7; se avisa al
+                    llegar a ``racha_minima`` (el antiguo "estrés alto consistente")
+
+``TendenciasUsuarios`` guarda el estado de cada usuario en memoria (con un
+máximo de usuarios, LRU) y, con ``persistir``, lo recupera de la base de
+datos la primera vez que lo necesita y escribe los estados modificados cada
+``intervalo`` segundos desde un hilo de fondo (modelo TendenciaUsuario), de
+modo que sobreviven a los reinicios.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+EWMA = "ewma"
+CUSUM = "cusum"
+RACHA_EMOCION = "racha_emocion"
+ESTRES_ALTO_CONSISTENTE = "estres_alto_consistente"
+
+
+class EstadoTendencia:
+    """Estado de los detectores de un usuario."""
+
+    __slots__ = ("ewma", "cusum", "emocion", "racha", "racha_alta", "eventos")
+
+    def __init__(self, ewma: float, cusum: float = 0.0, emocion: str = "", racha: int = 0,
+                 racha_alta: int = 0, eventos: int = 0):
+        self.ewma = ewma
+        self.cusum = cusum
+        self.emocion = emocion
+        self.racha = racha
+        self.racha_alta = racha_alta
+        self.eventos = eventos
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class DetectorTendencias:
+    """
+    Reglas de detección (ver el docstring del módulo).
+
+    Args:
+        alfa: Peso de la última evaluación en la media móvil
+        objetivo: Estrés de referencia (y valor inicial de la media)
+        holgura: Margen sobre el objetivo que no acumula en la CUSUM
+        umbral_ewma, umbral_cusum: Umbrales de aviso
+        racha_minima: Evaluaciones seguidas para avisar de una racha
+        emociones: Emociones cuyas rachas se avisan (por defecto las estresantes)
+    """
+
+    def __init__(self, alfa: float = 0.3, objetivo: float = 5.0, holgura: float = 0.5,
+                 umbral_ewma: float = 7.0, umbral_cusum: float = 6.0, racha_minima: int = 3,
+                 emociones: Optional[Iterable[str]] = None):
+        if emociones is None:
+            from .emotion_library import EmotionLibrary
+
+            emociones = EmotionLibrary.EMOCIONES_ESTRESANTES
+        self.alfa = alfa
+        self.objetivo = objetivo
+        self.holgura = holgura
+        self.umbral_ewma = umbral_ewma
+        self.umbral_cusum = umbral_cusum
+        self.racha_minima = racha_minima
+        self.emociones = frozenset(emociones)
+
+    def estado_inicial(self) -> EstadoTendencia:
+        return EstadoTendencia(ewma=self.objetivo)
+
+    def actualizar(self, estado: EstadoTendencia, emocion: str, nivel_estres: float) -> List[str]:
+        """Aplica una evaluación al estado y retorna los tipos de tendencia detectados."""
+        detectadas = []
+
+        anterior = estado.ewma
+        estado.ewma = self.alfa * nivel_estres + (1 - self.alfa) * anterior
+        if anterior < self.umbral_ewma <= estado.ewma:
+            detectadas.append(EWMA)
+
+        estado.cusum = max(0.0, estado.cusum + nivel_estres - self.objetivo - self.holgura)
+        if estado.cusum >= self.umbral_cusum:
+            detectadas.append(CUSUM)
+            estado.cusum = 0.0
+
+        if emocion == estado.emocion:
+            estado.racha += 1
+        else:
+            estado.emocion = emocion
+            estado.racha = 1
+        if estado.racha == self.racha_minima and emocion in self.emociones:
+            detectadas.append(RACHA_EMOCION)
+
+        estado.racha_alta = estado.racha_alta + 1 if nivel_estres > 7 else 0
+        if estado.racha_alta == self.racha_minima:
+            detectadas.append(ESTRES_ALTO_CONSISTENTE)
+
+        estado.eventos += 1
+        return detectadas
+
+
+class TendenciasUsuarios:
+    """
+    Estados de los detectores por usuario, con persistencia opcional.
+
+    Args:
+        detector: Reglas de detección
+        max_usuarios: Estados en memoria (se expulsa el usado hace más tiempo)
+        persistir: Recuperar y guardar los estados en la base de datos
+        intervalo: Segundos entre escrituras de los estados modificados
+        alias: Base de datos (alias de DATABASES)
+    """
+
+    def __init__(self, detector: Optional[DetectorTendencias] = None, max_usuarios: int = 50_000,
+                 persistir: bool = False, intervalo: float = 5.0, alias: str = "default"):
+        self.detector = detector or DetectorTendencias()
+        self.max_usuarios = max_usuarios
+        self.persistir = persistir
+        self.intervalo = intervalo
+        self.alias = alias
+        self._lock = threading.Lock()
+        self._estados: "OrderedDict[Any, EstadoTendencia]" = OrderedDict()
+        # Estados modificados desde la última escritura (aunque ya no estén en _estados)
+        self._sucios: Dict[Any, EstadoTendencia] = {}
+        self._lock_volcado = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.escrituras = 0
+        self.errores = 0
+
+    def procesar(self, usuario_id: Any, emocion: str, nivel_estres: float) -> List[str]:
+        """Aplica una evaluación del usuario y retorna las tendencias detectadas."""
+        with self._lock:
+            estado = self._estados.get(usuario_id)
+            if estado is not None:
+                self._estados.move_to_end(usuario_id)
+
+        if estado is None:
+            # Fuera del lock: puede consultar la base de datos
+            cargado = self._cargar(usuario_id)
+            with self._lock:
+                estado = self._estados.get(usuario_id)
+                if estado is None:
+                    estado = self._estados[usuario_id] = cargado
+                    while len(self._estados) > self.max_usuarios:
+                        self._estados.popitem(last=False)
+
+        with self._lock:
+            detectadas = self.detector.actualizar(estado, emocion, nivel_estres)
+            if self.persistir and usuario_id is not None:
+                self._sucios[usuario_id] = estado
+        if self.persistir and self._hilo is None:
+            self._arrancar()
+        return detectadas
+
+    def estado(self, usuario_id: Any) -> Optional[EstadoTendencia]:
+        with self._lock:
+            return self._estados.get(usuario_id)
+
+    def _cargar(self, usuario_id: Any) -> EstadoTendencia:
+        with self._lock:
+            # Expulsado de memoria pero aún sin escribir
+            sucio = self._sucios.get(usuario_id)
+        if sucio is not None:
+            return sucio
+        if not self.persistir or usuario_id is None:
+            return self.detector.estado_inicial()
+
+        from .models import TendenciaUsuario
+
+        try:
+            fila = TendenciaUsuario.objects.using(self.alias).filter(usuario_id=usuario_id).first()
+        except Exception as e:
+            logger.error("No se pudo recuperar la tendencia del usuario %s: %r", usuario_id, e)
+            fila = None
+        if fila is None:
+            return self.detector.estado_inicial()
+        return EstadoTendencia(fila.ewma, fila.cusum, fila.emocion, fila.racha, fila.racha_alta, fila.eventos)
+
+    def _arrancar(self) -> None:
+        # Como en BusEventos: el hilo se crea con el primer evento, ya en el worker
+        with self._lock:
+            if self._hilo is None and not self._parar.is_set():
+                self._hilo = threading.Thread(target=self._bucle, name="tendencias", daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        try:
+            while not self._parar.wait(self.intervalo):
+                self.volcar()
+        finally:
+            connections[self.alias].close()
+
+    def volcar(self) -> bool:
+        """Escribe los estados modificados (un INSERT ... ON CONFLICT). Retorna False si falló."""
+        from .models import TendenciaUsuario, Usuario
+
+        with self._lock_volcado:
+            with self._lock:
+                sucios, self._sucios = self._sucios, {}
+                filas = {usuario_id: EstadoTendencia(**estado.como_dict()) for usuario_id, estado in sucios.items()}
+            if not filas:
+                return True
+
+            try:
+                # Los eventos pueden traer usuarios que ya no existen
+                existentes = set(Usuario.objects.using(self.alias).filter(id__in=list(filas))
+                                 .values_list("id", flat=True))
+                TendenciaUsuario.objects.using(self.alias).bulk_create(
+                    [TendenciaUsuario(usuario_id=usuario_id, **estado.como_dict())
+                     for usuario_id, estado in filas.items() if usuario_id in existentes],
+                    update_conflicts=True,
+                    unique_fields=["usuario"],
+                    update_fields=list(EstadoTendencia.__slots__) + ["actualizado"],
+                )
+            except Exception as e:
+                self.errores += 1
+                logger.error("No se pudieron guardar %d tendencias: %r", len(filas), e)
+                with self._lock:
+                    # Se reintentan en la siguiente escritura, salvo los modificados entre tanto
+                    for usuario_id, estado in sucios.items():
+                        self._sucios.setdefault(usuario_id, estado)
+                return False
+
+            self.escrituras += 1
+            return True
+
+    def cerrar(self, timeout: Optional[float] = None) -> bool:
+        """Detiene el hilo y escribe los estados pendientes."""
+        self._parar.set()
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
+        return self.volcar() if self.persistir else True
+
+
+def crear_tendencias(config: Optional[Dict[str, Any]]) -> TendenciasUsuarios:
+    """TendenciasUsuarios según ``settings.TENDENCIAS``."""
+    config = config or {}
+    detector = DetectorTendencias(
+        alfa=config.get("ALFA", 0.3),
+        objetivo=config.get("OBJETIVO", 5.0),
+        holgura=config.get("HOLGURA", 0.5),
+        umbral_ewma=config.get("UMBRAL_EWMA", 7.0),
+        umbral_cusum=config.get("UMBRAL_CUSUM", 6.0),
+        racha_minima=config.get("RACHA_MINIMA", 3),
+    )
+    return TendenciasUsuarios(
+        detector,
+        max_usuarios=config.get("MAX_USUARIOS", 50_000),
+        persistir=config.get("PERSISTIR", False),
+        intervalo=config.get("INTERVALO_S", 5),
+    )
@@ -0,0 +1,247 @@
+"""
+Historial reciente de evaluaciones por usuario, con memoria acotada.
+
+RecommendationObserver vive en el EventManager (un singleton por proceso), así
+que un historial que crece con cada evaluación crece con todo el tráfico del
+worker. ``HistorialUsuarios`` lo acota por tres lados:
+
+    - cada usuario guarda como mucho ``por_usuario`` registros (un anillo:
+      el más antiguo sale al entrar uno nuevo);
+    - la memoria estimada de todos los usuarios no pasa de ``presupuesto``
+      bytes: se expulsa al usuario usado hace más tiempo (LRU);
+    - los usuarios sin actividad en ``ttl`` segundos se expulsan igualmente.
+
+Cada registro es una tupla (emoción, nivel de estrés, timestamp) en una lista
+por usuario (un deque reserva bloques de 64 huecos, unas 5 veces más que una
+lista de 20). La memoria se estima con el coste por usuario y por registro
+que ``medir_costes`` calcula con ``sys.getsizeof`` sobre esas estructuras.
+Cuando llega una evaluación de un usuario que no está en memoria, su
+historial se recarga de la base de datos (``cargar_evaluaciones``, sus
+últimas filas de EvaluacionEmocional) antes de añadirla.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Registro = Tuple[str, int, float]
+
+
+def cargar_evaluaciones(usuario_id: Any, limite: int) -> List[Registro]:
+    """Últimas ``limite`` evaluaciones de un usuario, de la más antigua a la más reciente."""
+    from .models import EvaluacionEmocional
+
+    filas = (EvaluacionEmocional.objects.filter(usuario_id=usuario_id)
+             .order_by("-id").values_list("emocion", "nivel_estres", "fecha")[:limite])
+    return [(emocion, nivel_estres, fecha.timestamp()) for emocion, nivel_estres, fecha in reversed(filas)]
+
+
+class _Entrada:
+    # completa: ya incluye lo anterior de la base de datos (o no hay de dónde cargarlo)
+    __slots__ = ("registros", "ultimo_uso", "completa")
+
+    def __init__(self, registros: List[Registro], ultimo_uso: float, completa: bool = True):
+        self.registros = registros
+        self.ultimo_uso = ultimo_uso
+        self.completa = completa
+
+
+@lru_cache(maxsize=None)
+def medir_costes(por_usuario: int, muestra: int = 1024) -> Tuple[int, int]:
+    """
+    Bytes por usuario (entrada, lista vacía, clave y hueco en el OrderedDict) y
+    por registro (tupla, timestamp y hueco en la lista, con su reserva) de un
+    historial con anillos de ``por_usuario``, calculados con ``sys.getsizeof``
+    sobre las mismas estructuras. El hueco en el OrderedDict se promedia sobre
+    ``muestra`` usuarios.
+    """
+    ahora = time.time()
+    usuarios = OrderedDict((10**6 + numero, None) for numero in range(muestra))
+    hueco_usuario = (sys.getsizeof(usuarios) - sys.getsizeof(OrderedDict())) / muestra
+    # Ids fuera de la caché de enteros pequeños, como los reales
+    entrada = _Entrada([], ahora)
+    coste_usuario = (sys.getsizeof(entrada) + sys.getsizeof(entrada.registros)
+                     + sys.getsizeof(10**6) + hueco_usuario)
+
+    # Un anillo lleno tras dar la vuelta, como los de agregar
+    registros: List[Registro] = []
+    for nivel in range(2 * por_usuario):
+        registros.append(("tristeza", nivel % 11, time.time()))
+        if len(registros) > por_usuario:
+            del registros[0]
+    hueco_registro = (sys.getsizeof(registros) - sys.getsizeof([])) / por_usuario
+    coste_registro = sys.getsizeof(registros[0]) + sys.getsizeof(ahora) + hueco_registro
+
+    return max(1, round(coste_usuario)), max(1, round(coste_registro))
+
+
+class HistorialUsuarios:
+    """
+    Últimas evaluaciones de cada usuario, con expulsión LRU y por inactividad.
+
+    Args:
+        por_usuario: Registros que se guardan de cada usuario
+        presupuesto: Bytes (estimados) de todos los usuarios juntos
+        ttl: Segundos sin actividad tras los que se expulsa a un usuario (None = sin límite)
+        cargar: Función (usuario_id, límite) que recupera el historial de un
+            usuario expulsado (None = empieza vacío)
+        reloj: Función que da el timestamp actual (para tests)
+    """
+
+    def __init__(self, por_usuario: int = 20, presupuesto: int = 16 * 2**20, ttl: Optional[float] = 86400,
+                 cargar: Optional[Callable[[Any, int], List[Registro]]] = cargar_evaluaciones,
+                 reloj: Callable[[], float] = time.time):
+        if por_usuario < 1:
+            raise ValueError("por_usuario debe ser al menos 1")
+        self.coste_usuario, self.coste_registro = medir_costes(por_usuario)
+        if presupuesto < self.coste_usuario + por_usuario * self.coste_registro:
+            raise ValueError("presupuesto debe dar para un usuario")
+
+        self.por_usuario = por_usuario
+        self.presupuesto = presupuesto
+        self.ttl = ttl
+        self.cargar = cargar
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        # Del usado hace más tiempo al más reciente
+        self._usuarios: "OrderedDict[Any, _Entrada]" = OrderedDict()
+        self._bytes = 0
+        # Los inactivos se buscan como mucho una vez por segundo
+        self._proxima_revision = 0.0
+
+        self.rehidratados = 0
+        self.expulsados_lru = 0
+        self.expulsados_ttl = 0
+
+    def agregar(self, usuario_id: Any, emocion: str, nivel_estres: int, rehidratar: bool = True) -> List[Registro]:
+        """
+        Añade una evaluación y retorna el historial del usuario con ella. Con
+        ``rehidratar`` False, un usuario que no está en memoria empieza vacío sin
+        consultar la base de datos; ``historial(..., completar=True)`` lo
+        completa después si hace falta.
+        """
+        ahora = self._reloj()
+        nuevo = (emocion, nivel_estres, ahora)
+
+        with self._lock:
+            entrada = self._usuarios.get(usuario_id)
+            if entrada is not None:
+                return self._anotar(usuario_id, entrada, nuevo, ahora)
+
+        # Fuera del lock: puede consultar la base de datos
+        registros = self._rehidratar(usuario_id, emocion, nivel_estres) if rehidratar else []
+        with self._lock:
+            # Otro hilo pudo cargarlo entre tanto: se usa el suyo
+            entrada = self._usuarios.get(usuario_id)
+            if entrada is None:
+                completa = rehidratar or self.cargar is None or usuario_id is None
+                entrada = self._usuarios[usuario_id] = _Entrada(registros, ahora, completa)
+                self._bytes += self.coste_usuario + len(registros) * self.coste_registro
+            return self._anotar(usuario_id, entrada, nuevo, ahora)
+
+    def _anotar(self, usuario_id: Any, entrada: _Entrada, nuevo: Registro, ahora: float) -> List[Registro]:
+        # Se llama con el lock tomado
+        self._usuarios.move_to_end(usuario_id)
+        registros = entrada.registros
+        registros.append(nuevo)
+        if len(registros) > self.por_usuario:
+            del registros[0]
+        else:
+            self._bytes += self.coste_registro
+        entrada.ultimo_uso = ahora
+        self._expulsar(ahora, usuario_id)
+        return list(registros)
+
+    def _rehidratar(self, usuario_id: Any, emocion: str, nivel_estres: int) -> List[Registro]:
+        if self.cargar is None or usuario_id is None:
+            return []
+        try:
+            registros = self.cargar(usuario_id, self.por_usuario + 1)
+        except Exception as e:
+            logger.error("No se pudo recuperar el historial del usuario %s: %r", usuario_id, e)
+            return []
+        self.rehidratados += 1
+        # Las vistas guardan la evaluación antes de notificarla: si es la última
+        # fila, no se cuenta dos veces
+        if registros and registros[-1][:2] == (emocion, nivel_estres):
+            registros = registros[:-1]
+        return list(registros[-(self.por_usuario - 1):]) if self.por_usuario > 1 else []
+
+    def _expulsar(self, ahora: float, actual: Any) -> None:
+        # Se llama con el lock tomado. El orden LRU es también el de inactividad,
+        # así que basta mirar el principio
+        usuarios = self._usuarios
+        if self.ttl is not None and ahora >= self._proxima_revision:
+            self._proxima_revision = ahora + 1
+            while usuarios:
+                usuario_id, entrada = next(iter(usuarios.items()))
+                if ahora - entrada.ultimo_uso <= self.ttl or usuario_id == actual:
+                    break
+                del usuarios[usuario_id]
+                self._bytes -= self.coste_usuario + len(entrada.registros) * self.coste_registro
+                self.expulsados_ttl += 1
+
+        while self._bytes > self.presupuesto:
+            usuario_id, entrada = usuarios.popitem(last=False)
+            self._bytes -= self.coste_usuario + len(entrada.registros) * self.coste_registro
+            self.expulsados_lru += 1
+
+    def historial(self, usuario_id: Any, completar: bool = False) -> List[Registro]:
+        """
+        Historial en memoria de un usuario (vacío si no está). Con ``completar``,
+        si se creó sin rehidratar, se sustituye una vez por sus últimas filas de
+        la base de datos, que ya incluyen las evaluaciones anotadas desde entonces.
+        """
+        with self._lock:
+            entrada = self._usuarios.get(usuario_id)
+            if entrada is None:
+                return []
+            if entrada.completa or not completar:
+                return list(entrada.registros)
+            entrada.completa = True
+
+        # Fuera del lock: consulta la base de datos
+        try:
+            registros = self.cargar(usuario_id, self.por_usuario)
+        except Exception as e:
+            logger.error("No se pudo recuperar el historial del usuario %s: %r", usuario_id, e)
+            registros = []
+        with self._lock:
+            self.rehidratados += 1
+            if registros and self._usuarios.get(usuario_id) is entrada:
+                self._bytes += (len(registros) - len(entrada.registros)) * self.coste_registro
+                entrada.registros = list(registros)
+            return list(entrada.registros)
+
+    def __contains__(self, usuario_id: Any) -> bool:
+        return usuario_id in self._usuarios
+
+    def __len__(self) -> int:
+        return len(self._usuarios)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "usuarios": len(self._usuarios),
+                "bytes_estimados": self._bytes,
+                "presupuesto": self.presupuesto,
+                "rehidratados": self.rehidratados,
+                "expulsados_lru": self.expulsados_lru,
+                "expulsados_ttl": self.expulsados_ttl,
+            }
+
+
+def crear_historial(config: Optional[Dict[str, Any]]) -> HistorialUsuarios:
+    """HistorialUsuarios según ``settings.HISTORIAL_USUARIOS``."""
+    config = config or {}
+    return HistorialUsuarios(
+        por_usuario=config.get("POR_USUARIO", 20),
+        presupuesto=config.get("PRESUPUESTO_MB", 16) * 2**20,
+        ttl=config.get("TTL_S", 86400),
+    )
@@ -10,7 +10,9 @@ import re
 from .models import Usuario, EvaluacionEmocional
 from .serializers import UsuarioSerializer, EvaluacionEmocionalSerializer
 from .ia import analizar_texto, obtener_analisis_completo
-from .auth_decorators import requiere_token
+from .accumulator import EmotionAccumulator
+from .emotion_library import EmotionLibrary
+from .auth_decorators import requiere_admin, requiere_token
 from .observers import get_event_manager
 from django.shortcuts import render
 
@@ -146,14 +148,18 @@ class EvaluacionEmocionalView(APIView):
     def post(self, request):
         texto = request.data.get("texto", "")
 
-        emocion, nivel_estres, recomendacion = analizar_texto(texto)
+        analisis = obtener_analisis_completo(texto)
+        emocion = analisis["emocion_principal"]
+        nivel_estres = int(round(analisis["nivel_estres"]))
+        recomendacion = analisis["recomendacion"]
 
         data = {
             "usuario": request.usuario.id,
             "texto": texto,
             "emocion": emocion,
             "nivel_estres": nivel_estres,
-            "recomendacion": recomendacion
+            "recomendacion": recomendacion,
+            "version_lexico": analisis["version_lexico"]
         }
 
         serializer = EvaluacionEmocionalSerializer(data=data)
@@ -234,7 +240,95 @@ class ChatbotView(APIView):
     """
     API para el chatbot emocional.
     Recibe mensajes del usuario y retorna análisis emocional + respuesta.
+    La respuesta se basa en el estado acumulado de la conversación, que se
+    guarda compacto en la sesión, con una clave por usuario: el token, y no
+    la cookie de sesión, es el que identifica al usuario.
     """
+
+    CLAVE_SESION = "acumulador_emocional:{}"
+
+    # Textos de la respuesta empática, armados una sola vez al importar
+    RESPUESTAS_INICIALES = {
+        "alegría": "¡Me alegra mucho escuchar eso! 😊 Tu energía positiva es contagiosa.",
+        "tristeza": "Entiendo que estés pasando por un momento difícil. 💙 Aquí estoy para escucharte.",
+        "ansiedad": "Detecté algo de preocupación en tu mensaje. Respira profundo, esto es importante. 🧘",
+        "enojo": "Parece que hay frustración. Está bien sentir esto. 💪 Hablemos al respecto.",
+        "calma": "Noto que te sientes en paz. ¡Que bonito! Mantén esa armonía. ✨",
+        "esperanza": "Veo optimismo en tus palabras. ¡Excelente! Confía en ti. 🎯",
+        "soledad": "No estás solo/a. Muchas personas sienten lo mismo. Te estoy escuchando. 🤝",
+        "culpa": "Es humano sentir culpa. Lo importante es aprender y crecer. 🌱",
+        "confusión": "Veo que hay incertidumbre. No te preocupes, lo aclararemos juntos. 💭",
+        "amor": "¡Qué hermoso sentir amor! 💕 Eso llena el corazón de significado.",
+        "orgullo": "¡Estás muy orgulloso de ti! Eso es saludable. Mantén esa confianza. 👑",
+        "vergüenza": "Entiendo tu vergüenza, pero no te define. Eres más que un momento. 💙",
+        "miedo": "Es normal tener miedo. El valor es enfrentarlo a pesar del miedo. 💪",
+        "gratitud": "¡Qué actitud tan hermosa! La gratitud transforma todo. 🙏",
+        "frustración": "Tu frustración es válida. A veces necesitamos reconocerla antes de avanzar. 💫",
+        "nostalgia": "Es bonito recordar. Aprecia esos momentos y crea nuevos. 📷",
+        "admiración": "Tu admiración te inspira. Deja que te motive a crecer. ⭐",
+        "disgusto": "Es válido alejarte de lo que te causa malestar. 🛡️",
+        "sorpresa": "¡Qué inesperado! Los giros en la vida pueden traer oportunidades. 🎁",
+        "vacío": "Ese vacío que sientes pide ser llenado de significado. Busquemos juntos. 🌟",
+        "alivio": "¡Qué bien se siente aliviarse! Disfruta este descanso. 😌",
+        "resentimiento": "El resentimiento pesa. El perdón puede liberarte. 🕊️",
+        "compasión": "¡Qué corazón compasivo tienes! Extiende eso hacia ti también. 💚",
+        "neutral": "Gracias por compartir conmigo. Aquí estoy para apoyarte. 👂"
+    }
+
+    PREFIJOS_RESPUESTA = {
+        emocion: f"{respuesta_base}\n\n📋 Mi recomendación: "
+        for emocion, respuesta_base in RESPUESTAS_INICIALES.items()
+    }
+    PREFIJO_RESPUESTA_GENERICO = "Te entiendo perfectamente.\n\n📋 Mi recomendación: "
+
+    # SESIÓN DE APOYO según nivel de estrés
+    SESION_ESTRES_CRITICO = (
+        "\n\n⚠️ SESIÓN DE APOYO - ESTRÉS CRÍTICO"
+        "\nTu nivel de estrés es muy alto. Aquí te ofrezco apoyo inmediato:"
+        "\n\n🧘 Técnica de respiración 4-4-4:"
+        "\n  1. Inhala profundamente por la nariz durante 4 segundos"
+        "\n  2. Sostén la respiración durante 4 segundos"
+        "\n  3. Exhala lentamente por la boca durante 4 segundos"
+        "\n  4. Repite 5-10 veces"
+        "\n\n💪 Acciones para ahora:"
+        "\n  • Tómate 5 minutos de pausa"
+        "\n  • Camina o muévete suavemente"
+        "\n  • Bebe agua"
+        "\n\n⚠️ Recursos de urgencia:"
+        "\n  Si la situación empeora, busca ayuda profesional de inmediato"
+        "\n  Línea de crisis: Disponible 24/7"
+    )
+
+    SESION_ESTRES_MODERADO = (
+        "\n\n⚡ SESIÓN DE APOYO - ESTRÉS MODERADO"
+        "\nTu nivel de estrés es moderado. Aquí hay acciones que pueden ayudarte:"
+        "\n\n🧘 Técnicas de relajación:"
+        "\n  • Meditación guiada (10 minutos)"
+        "\n  • Ejercicio físico ligero (yoga, caminata)"
+        "\n  • Música relajante o sonidos de la naturaleza"
+        "\n\n🤝 Apoyo social:"
+        "\n  • Conecta con un amigo cercano"
+        "\n  • Comparte tus sentimientos con alguien de confianza"
+        "\n  • Considera hablar con un terapeuta"
+        "\n\n📝 Estrategias de autocuidado:"
+        "\n  • Crea una rutina diaria de autosanación"
+        "\n  • Establece límites saludables"
+        "\n  • Dedica tiempo a actividades que disfrutes"
+    )
+
+    SESION_BIENESTAR = (
+        "\n\n✅ SESIÓN DE APOYO - BIENESTAR SOSTENIBLE"
+        "\nTu nivel de estrés está bajo. Mantén este bienestar:"
+        "\n\n🌟 Clave para mantener la paz:"
+        "\n  • Continúa con las actividades que te hacen feliz"
+        "\n  • Cultiva conexiones positivas"
+        "\n  • Practica gratitud diariamente"
+        "\n  • Cuida tu sueño y alimentación"
+        "\n\n💡 Para prevenir crisis futuras:"
+        "\n  • Identifica tus disparadores emocionales"
+        "\n  • Construye una red de apoyo sólida"
+        "\n  • Desarrolla habilidades de resiliencia"
+    )
     
     @requiere_token
     def post(self, request):
@@ -254,12 +348,19 @@ class ChatbotView(APIView):
         # Obtener análisis completo
         analisis_completo = obtener_analisis_completo(mensaje)
 
-        # Generar respuesta empática del chatbot
+        # Actualizar el estado de la conversación con el mensaje nuevo
+        clave_sesion = self.CLAVE_SESION.format(request.usuario.id)
+        acumulador = EmotionAccumulator.desde_texto(request.session.get(clave_sesion))
+        acumulador.agregar_analisis(analisis_completo, mensaje)
+        request.session[clave_sesion] = acumulador.a_texto()
+        conversacion = acumulador.resumen()
+
+        # Generar respuesta empática del chatbot a partir de la conversación
         respuesta = self._generar_respuesta_empatica(
             mensaje,
-            analisis_completo["emocion_principal"],
-            analisis_completo["nivel_estres"],
-            analisis_completo["recomendacion"]
+            conversacion["emocion_principal"],
+            conversacion["nivel_estres"],
+            EmotionLibrary.recomendacion_para(conversacion["emocion_principal"], conversacion["nivel_estres"])
         )
 
         # Guardar evaluación
@@ -269,7 +370,8 @@ class ChatbotView(APIView):
                 texto=mensaje,
                 emocion=analisis_completo["emocion_principal"],
                 nivel_estres=int(round(analisis_completo["nivel_estres"])),
-                recomendacion=analisis_completo["recomendacion"]
+                recomendacion=analisis_completo["recomendacion"],
+                version_lexico=analisis_completo["version_lexico"]
             )
             
             # 🔥 PATRÓN OBSERVER: Notificar evaluación completada
@@ -303,89 +405,55 @@ class ChatbotView(APIView):
                 "emocion": analisis_completo["emocion_principal"],
                 "emoji": analisis_completo["emojis"],
                 "confianza": int(analisis_completo["confianza"]),
-                "nivel_estres": int(round(analisis_completo["nivel_estres"]))
+                "nivel_estres": int(round(analisis_completo["nivel_estres"])),
+                "conversacion": {
+                    "emocion": conversacion["emocion_principal"],
+                    "nivel_estres": int(round(conversacion["nivel_estres"])),
+                    "mensajes": conversacion["mensajes"]
+                }
             }
         }, status=200)
 
     def _generar_respuesta_empatica(self, mensaje, emocion, nivel_estres, recomendacion):
         """Genera una respuesta empática basada en la emoción detectada con sesiones de apoyo."""
-        
-        respuestas_iniciales = {
-            "alegría": "¡Me alegra mucho escuchar eso! 😊 Tu energía positiva es contagiosa.",
-            "tristeza": "Entiendo que estés pasando por un momento difícil. 💙 Aquí estoy para escucharte.",
-            "ansiedad": "Detecté algo de preocupación en tu mensaje. Respira profundo, esto es importante. 🧘",
-            "enojo": "Parece que hay frustración. Está bien sentir esto. 💪 Hablemos al respecto.",
-            "calma": "Noto que te sientes en paz. ¡Que bonito! Mantén esa armonía. ✨",
-            "esperanza": "Veo optimismo en tus palabras. ¡Excelente! Confía en ti. 🎯",
-            "soledad": "No estás solo/a. Muchas personas sienten lo mismo. Te estoy escuchando. 🤝",
-            "culpa": "Es humano sentir culpa. Lo importante es aprender y crecer. 🌱",
-            "confusión": "Veo que hay incertidumbre. No te preocupes, lo aclararemos juntos. 💭",
-            "amor": "¡Qué hermoso sentir amor! 💕 Eso llena el corazón de significado.",
-            "orgullo": "¡Estás muy orgulloso de ti! Eso es saludable. Mantén esa confianza. 👑",
-            "vergüenza": "Entiendo tu vergüenza, pero no te define. Eres más que un momento. 💙",
-            "miedo": "Es normal tener miedo. El valor es enfrentarlo a pesar del miedo. 💪",
-            "gratitud": "¡Qué actitud tan hermosa! La gratitud transforma todo. 🙏",
-            "frustración": "Tu frustración es válida. A veces necesitamos reconocerla antes de avanzar. 💫",
-            "nostalgia": "Es bonito recordar. Aprecia esos momentos y crea nuevos. 📷",
-            "admiración": "Tu admiración te inspira. Deja que te motive a crecer. ⭐",
-            "disgusto": "Es válido alejarte de lo que te causa malestar. 🛡️",
-            "sorpresa": "¡Qué inesperado! Los giros en la vida pueden traer oportunidades. 🎁",
-            "vacío": "Ese vacío que sientes pide ser llenado de significado. Busquemos juntos. 🌟",
-            "alivio": "¡Qué bien se siente aliviarse! Disfruta este descanso. 😌",
-            "resentimiento": "El resentimiento pesa. El perdón puede liberarte. 🕊️",
-            "compasión": "¡Qué corazón compasivo tienes! Extiende eso hacia ti también. 💚",
-            "neutral": "Gracias por compartir conmigo. Aquí estoy para apoyarte. 👂"
-        }
+        prefijo = self.PREFIJOS_RESPUESTA.get(emocion, self.PREFIJO_RESPUESTA_GENERICO)
 
-        respuesta_base = respuestas_iniciales.get(emocion, "Te entiendo perfectamente.")
-        
-        # Agregar recomendación personalizada
-        respuesta_completa = f"{respuesta_base}\n\n📋 Mi recomendación: {recomendacion}"
-        
-        # SESIÓN DE APOYO según nivel de estrés
         if nivel_estres > 7:
-            respuesta_completa += "\n\n⚠️ SESIÓN DE APOYO - ESTRÉS CRÍTICO"
-            respuesta_completa += "\nTu nivel de estrés es muy alto. Aquí te ofrezco apoyo inmediato:"
-            respuesta_completa += "\n\n🧘 Técnica de respiración 4-4-4:"
-            respuesta_completa += "\n  1. Inhala profundamente por la nariz durante 4 segundos"
-            respuesta_completa += "\n  2. Sostén la respiración durante 4 segundos"
-            respuesta_completa += "\n  3. Exhala lentamente por la boca durante 4 segundos"
-            respuesta_completa += "\n  4. Repite 5-10 veces"
-            respuesta_completa += "\n\n💪 Acciones para ahora:"
-            respuesta_completa += "\n  • Tómate 5 minutos de pausa"
-            respuesta_completa += "\n  • Camina o muévete suavemente"
-            respuesta_completa += "\n  • Bebe agua"
-            respuesta_completa += "\n\n⚠️ Recursos de urgencia:"
-            respuesta_completa += "\n  Si la situación empeora, busca ayuda profesional de inmediato"
-            respuesta_completa += "\n  Línea de crisis: Disponible 24/7"
-            
+            sesion = self.SESION_ESTRES_CRITICO
         elif nivel_estres > 5:
-            respuesta_completa += "\n\n⚡ SESIÓN DE APOYO - ESTRÉS MODERADO"
-            respuesta_completa += "\nTu nivel de estrés es moderado. Aquí hay acciones que pueden ayudarte:"
-            respuesta_completa += "\n\n🧘 Técnicas de relajación:"
-            respuesta_completa += "\n  • Meditación guiada (10 minutos)"
-            respuesta_completa += "\n  • Ejercicio físico ligero (yoga, caminata)"
-            respuesta_completa += "\n  • Música relajante o sonidos de la naturaleza"
-            respuesta_completa += "\n\n🤝 Apoyo social:"
-            respuesta_completa += "\n  • Conecta con un amigo cercano"
-            respuesta_completa += "\n  • Comparte tus sentimientos con alguien de confianza"
-            respuesta_completa += "\n  • Considera hablar con un terapeuta"
-            respuesta_completa += "\n\n📝 Estrategias de autocuidado:"
-            respuesta_completa += "\n  • Crea una rutina diaria de autosanación"
-            respuesta_completa += "\n  • Establece límites saludables"
-            respuesta_completa += "\n  • Dedica tiempo a actividades que disfrutes"
-            
+            sesion = self.SESION_ESTRES_MODERADO
         else:
-            respuesta_completa += "\n\n✅ SESIÓN DE APOYO - BIENESTAR SOSTENIBLE"
-            respuesta_completa += "\nTu nivel de estrés está bajo. Mantén este bienestar:"
-            respuesta_completa += "\n\n🌟 Clave para mantener la paz:"
-            respuesta_completa += "\n  • Continúa con las actividades que te hacen feliz"
-            respuesta_completa += "\n  • Cultiva conexiones positivas"
-            respuesta_completa += "\n  • Practica gratitud diariamente"
-            respuesta_completa += "\n  • Cuida tu sueño y alimentación"
-            respuesta_completa += "\n\n💡 Para prevenir crisis futuras:"
-            respuesta_completa += "\n  • Identifica tus disparadores emocionales"
-            respuesta_completa += "\n  • Construye una red de apoyo sólida"
-            respuesta_completa += "\n  • Desarrolla habilidades de resiliencia"
-
-        return respuesta_completa
+            sesion = self.SESION_BIENESTAR
+
+        return "".join((prefijo, recomendacion, sesion))
+
+
+# =============================
+#   MÉTRICAS DE OBSERVADORES
+# =============================
+class LatenciaObservadoresView(APIView):
+    """
+    Latencia por observador y tipo de evento, circuitos, cola y registro de
+    eventos de este proceso (solo administradores).
+    """
+
+    @requiere_admin
+    def get(self, request):
+        event_manager = get_event_manager()
+        return Response({
+            "latencias": event_manager.latencias_observadores(),
+            "circuitos": event_manager.estado_observadores(),
+            "cola": event_manager.metricas_despacho(),
+            "registro": event_manager.metricas_registro_eventos(),
+        })
+
+
+# =============================
+#   ESTADÍSTICAS
+# =============================
+class EstadisticasView(APIView):
+    """Estadísticas de StatisticsObserver sumadas entre todos los workers (solo administradores)."""
+
+    @requiere_admin
+    def get(self, request):
+        return Response(get_event_manager().estadisticas_globales())
@@ -0,0 +1,9 @@
+"""
+Benchmarks del motor de emociones de MindCare-AI.
+Se ejecutan desde la raíz del repositorio, por ejemplo:
+
+    python -m benchmarks.bench_lexicon
+
+La suite completa, con baselines en JSON y modo de comparación, se ejecuta con
+``python -m benchmarks`` (ver ``benchmarks/__main__.py``).
+"""
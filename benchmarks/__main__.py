@@ -0,0 +1,59 @@
+"""
+Ejecuta la suite de benchmarks:
+
+    python -m benchmarks                                  # muestra resultados
+    python -m benchmarks --guardar baseline.json          # guarda una baseline
+    python -m benchmarks --comparar baseline.json         # falla si hay regresiones
+    python -m benchmarks --comparar baseline.json --umbral 0.1 --rapido --sin-vistas
+"""
+
+import argparse
+import os
+import sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks del motor de emociones")
+    parser.add_argument("--guardar", metavar="RUTA", help="guarda los resultados como baseline JSON")
+    parser.add_argument("--comparar", metavar="RUTA", help="compara con una baseline JSON")
+    parser.add_argument("--umbral", type=float, default=0.25,
+                        help="empeoramiento tolerado por métrica (fracción, por defecto 0.25)")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--rapido", action="store_true", help="menos muestras (más ruido)")
+    parser.add_argument("--sin-vistas", action="store_true", help="no medir las vistas de Django")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
+    import django
+    django.setup()
+
+    from . import suite
+
+    # Cargar la baseline antes de medir para fallar pronto si no es válida
+    baseline = suite.cargar(args.comparar) if args.comparar else None
+    resultado = suite.ejecutar(semilla=args.semilla, rapido=args.rapido, vistas=not args.sin_vistas)
+
+    for nombre, metrica in resultado["metricas"].items():
+        linea = f"{nombre:<28}{metrica['valor']:>14,.2f} {metrica['unidad']}"
+        if baseline and nombre in baseline["metricas"]:
+            linea += f"   (baseline {baseline['metricas'][nombre]['valor']:,.2f})"
+        print(linea)
+
+    if args.guardar:
+        suite.guardar(resultado, args.guardar)
+        print(f"\nBaseline guardada en {args.guardar}")
+
+    if baseline:
+        regresiones = suite.comparar(resultado, baseline, args.umbral)
+        if regresiones:
+            print(f"\nRegresiones por encima del {args.umbral:.0%}:")
+            for nombre, base, actual, empeoramiento in regresiones:
+                print(f"  {nombre}: {base:,.2f} -> {actual:,.2f} (+{empeoramiento:.0%})")
+            return 1
+        print(f"\nSin regresiones por encima del {args.umbral:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Asignaciones de memoria y latencia del camino de resultado por petición:
+análisis (leído como lo hace api/ia.py), recomendación y respuesta del chatbot.
+
+    python -m benchmarks.bench_asignaciones
+
+Requiere Django configurado (usa mindcare.settings por defecto).
+
+Referencia en un núcleo (pico de bytes por llamada / µs por llamada):
+
+    operación                    antes           después
+    analizar                     3972 / 24.6     1985 / 20.2
+    _generar_recomendacion       2968 / 8.6       560 / 0.7
+    _generar_respuesta_empatica  3574 / 2.7      2728 / 0.4
+
+En la respuesta del chatbot casi todo lo que queda es el propio texto devuelto.
+"""
+
+import os
+import timeit
+import tracemalloc
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindcare.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.emotion_library import EmotionLibrary  # noqa: E402
+from api.views import ChatbotView  # noqa: E402
+
+MENSAJE = "Hoy me siento muy ansioso y preocupado por el trabajo, no puedo dormir"
+
+
+def analizar():
+    resultado = EmotionLibrary.detectar_emociones(MENSAJE)
+    return resultado["emocion_principal"], int(round(resultado["nivel_estres"])), resultado["recomendacion"]
+
+
+def recomendar():
+    return EmotionLibrary._generar_recomendacion("ansiedad", 5.4)
+
+
+def responder(vista=ChatbotView()):
+    return vista._generar_respuesta_empatica(MENSAJE, "ansiedad", 8.2, "Respira profundo.")
+
+
+def pico_por_llamada(funcion, repeticiones=200):
+    """Pico de memoria asignada (bytes) durante una llamada, promediado."""
+    funcion()
+    total = 0
+    tracemalloc.start()
+    for _ in range(repeticiones):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        total += pico - base
+    tracemalloc.stop()
+    return total / repeticiones
+
+
+def latencia(funcion, numero=5000):
+    return min(timeit.repeat(funcion, number=numero, repeat=5)) / numero * 1e6
+
+
+def main():
+    print(f"{'operación':<28}{'bytes/llamada':>15}{'µs/llamada':>12}")
+    for nombre, funcion in (("analizar (ia.analizar_texto)", analizar),
+                            ("_generar_recomendacion", recomendar),
+                            ("_generar_respuesta_empatica", responder)):
+        print(f"{nombre:<28}{pico_por_llamada(funcion):>15.0f}{latencia(funcion):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Pico de memoria y tiempo del análisis por trozos frente al análisis del texto
+completo en memoria, para entradas de distintos tamaños.
+
+    python -m benchmarks.bench_flujo
+
+El texto de entrada ya está en memoria en ambos casos (se mide lo que asigna
+el análisis, no la lectura). Referencia en un núcleo, trozos de 64 KB:
+
+    entrada      completo KB   trozos KB  completo s  trozos s
+    111 KB             1,451         963       0.020     0.029
+    1116 KB           14,516       1,029       0.206     0.238
+    5586 KB           72,629       1,029       1.030     1.100
+"""
+
+import time
+import tracemalloc
+from unittest import mock
+
+from api.emotion_library import EmotionLibrary
+from api.streaming import analizar_flujo
+
+from .corpus import GeneradorCorpus
+
+
+def texto_completo(texto):
+    # Sin el desvío automático a análisis por trozos de detectar_emociones
+    with mock.patch.object(EmotionLibrary, "LIMITE_FLUJO", float("inf")):
+        return EmotionLibrary.detectar_emociones(texto)
+
+
+def medir(funcion, texto):
+    """(pico de memoria en KB, segundos) de una llamada."""
+    tracemalloc.start()
+    try:
+        funcion(texto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    inicio = time.perf_counter()
+    funcion(texto)
+    return pico / 1024, time.perf_counter() - inicio
+
+
+def main():
+    generador = GeneradorCorpus(semilla=5)
+    print(f"{'entrada':<12}{'completo KB':>14}{'trozos KB':>12}{'completo s':>12}{'trozos s':>10}")
+    for tokens in (20_000, 200_000, 1_000_000):
+        texto = generador.texto(tokens)
+        memoria_completo, tiempo_completo = medir(texto_completo, texto)
+        memoria_trozos, tiempo_trozos = medir(analizar_flujo, texto)
+        print(f"{f'{len(texto) // 1024} KB':<12}{memoria_completo:>14,.0f}{memoria_trozos:>12,.0f}"
+              f"{tiempo_completo:>12.3f}{tiempo_trozos:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
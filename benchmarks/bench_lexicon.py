@@ -0,0 +1,94 @@
+"""
+Benchmark antes/después del léxico compilado de EmotionLibrary.
+
+Compara el recorrido original (emoción × token × lista de palabras) con el
+léxico compilado en una sola pasada, sobre textos cortos y largos, y mide el
+autómata de frases con un léxico sintético de decenas de miles de frases.
+
+    python -m benchmarks.bench_lexicon
+"""
+
+import re
+import timeit
+
+from api.emotion_library import EmotionLibrary
+from api.lexicon import tokenizar
+from api.phrase_matcher import PhraseAutomaton
+
+
+def detectar_emociones_original(texto):
+    """Bucle de puntuación previo al índice invertido (solo la parte de matching)."""
+    palabras = re.findall(r'\b\w+\b', texto.lower().strip())
+    emociones_encontradas = {}
+
+    for emocion, datos in EmotionLibrary.EMOTIONS_DICT.items():
+        puntuacion = 0
+        contador_palabras = 0
+
+        for i, palabra in enumerate(palabras):
+            if palabra in datos["palabras"]:
+                intensidad = 1.0
+                if i > 0 and palabras[i-1] in EmotionLibrary.INTENSIFIERS:
+                    intensidad *= EmotionLibrary.INTENSIFIERS[palabras[i-1]]
+                if i > 0 and palabras[i-1] in EmotionLibrary.NEGATORS:
+                    intensidad *= -0.5
+                puntuacion += intensidad * abs(datos["nivel_base"])
+                contador_palabras += 1
+
+        if contador_palabras > 0:
+            emociones_encontradas[emocion] = {
+                "puntuacion": puntuacion,
+                "palabras_detectadas": contador_palabras,
+                "intensidad": min((puntuacion / contador_palabras) * 1.2, 10)
+            }
+
+    return emociones_encontradas
+
+
+TEXTO_CORTO = "Hoy me siento muy estresado y un poco triste por el trabajo"
+TEXTO_LARGO = " ".join([
+    "Últimamente no duermo bien, tengo ansiedad y miedo al futuro.",
+    "A veces me siento feliz con mi familia pero luego vuelve la tristeza.",
+    "Estoy cansado, frustrado y muy preocupado por todo lo que pasa.",
+    "Intento mantener la calma y la esperanza aunque sea difícil.",
+] * 50)
+
+
+def medir(funcion, texto, repeticiones):
+    """Retorna el tiempo medio por llamada en microsegundos."""
+    tiempos = timeit.repeat(lambda: funcion(texto), number=repeticiones, repeat=5)
+    return min(tiempos) / repeticiones * 1e6
+
+
+def medir_automata_grande(total_frases=50000):
+    """Construcción y recorrido del autómata con un léxico sintético grande."""
+    frases = [
+        tuple("t%d" % ((i * 7 + j) % 5000) for j in range(1 + i % 3))
+        for i in range(total_frases)
+    ]
+    construccion = min(timeit.repeat(lambda: PhraseAutomaton(frases), number=1, repeat=3))
+    automata = PhraseAutomaton(frases)
+    tokens = tokenizar(TEXTO_LARGO)
+    recorrido = medir(lambda t: sum(1 for _ in automata.buscar(t)), tokens, 20)
+    print(f"\nautómata con {total_frases} frases: construcción {construccion * 1e3:.0f} ms, "
+          f"recorrido de {len(tokens)} tokens {recorrido:.0f} µs")
+
+
+def main():
+    casos = [
+        ("corto", TEXTO_CORTO, 2000),
+        ("largo", TEXTO_LARGO, 20),
+    ]
+
+    print(f"{'texto':<8}{'tokens':>8}{'antes (µs)':>14}{'después (µs)':>16}{'mejora':>10}")
+    for nombre, texto, repeticiones in casos:
+        tokens = len(re.findall(r'\b\w+\b', texto.lower()))
+        antes = medir(detectar_emociones_original, texto, repeticiones)
+        despues = medir(EmotionLibrary.detectar_emociones, texto, repeticiones)
+        print(f"{nombre:<8}{tokens:>8}{antes:>14.1f}{despues:>16.1f}{antes / despues:>9.1f}x")
+
+    medir_automata_grande()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark del léxico empaquetado (mmap) frente al léxico compilado en memoria,
+con un léxico sintético de formas flexionadas.
+
+    python -m benchmarks.bench_lexicon_empaquetado [total_formas]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from api.emotion_library import EmotionLibrary
+from api.lexicon import CompiledLexicon, tokenizar
+from api.packed_lexicon import PackedLexicon, escribir_artefacto
+
+SUFIJOS = ["", "s", "a", "as", "ito", "ita", "ísimo", "ísima", "mente", "ado", "ada", "ando"]
+
+
+def generar_lexico(total_formas, semilla=11):
+    """Amplía EMOTIONS_DICT con formas sintéticas hasta ``total_formas`` palabras."""
+    rng = random.Random(semilla)
+    emociones = {e: dict(d, palabras=list(d["palabras"])) for e, d in EmotionLibrary.EMOTIONS_DICT.items()}
+    nombres = list(emociones)
+    base = [p for d in EmotionLibrary.EMOTIONS_DICT.values() for p in d["palabras"]]
+    while sum(len(d["palabras"]) for d in emociones.values()) < total_formas:
+        forma = rng.choice(base) + rng.choice(SUFIJOS) + str(rng.randrange(1000))
+        emociones[rng.choice(nombres)]["palabras"].append(forma)
+    return emociones
+
+
+def medir_carga(construir):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    lexico = construir()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lexico, segundos, pico
+
+
+def main(argv):
+    total_formas = int(argv[0]) if argv else 100000
+    emociones = generar_lexico(total_formas)
+
+    compilado, t_compilado, m_compilado = medir_carga(
+        lambda: CompiledLexicon(emociones, EmotionLibrary.INTENSIFIERS, EmotionLibrary.NEGATORS)
+    )
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "lexicon.bin")
+        resumen = escribir_artefacto(compilado, ruta)
+        empaquetado, t_empaquetado, m_empaquetado = medir_carga(lambda: PackedLexicon(ruta))
+
+        tokens = tokenizar("hoy me siento muy feliz pero también un poco triste y preocupado " * 20)
+        for nombre, lexico in (("compilado", compilado), ("empaquetado", empaquetado)):
+            inicio = time.perf_counter()
+            for _ in range(200):
+                EmotionLibrary._puntuar_tokens(tokens, lexico)
+            print(f"{nombre:<12} puntuar {len(tokens)} tokens: {(time.perf_counter() - inicio) / 200 * 1e6:.0f} µs")
+        empaquetado.cerrar()
+
+    print(f"{total_formas} formas, artefacto de {resumen['bytes'] / 1e6:.1f} MB")
+    print(f"compilado:   carga {t_compilado * 1e3:.0f} ms, memoria Python {m_compilado / 1e6:.1f} MB por worker")
+    print(f"empaquetado: carga {t_empaquetado * 1e3:.1f} ms, memoria Python {m_empaquetado / 1e6:.3f} MB por worker "
+          f"(el fichero se comparte vía page cache)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+"""
+Benchmark de analizar_multiples: recorrido texto a texto frente al motor NumPy,
+y escalado del pool de procesos con distinto número de workers.
+
+    python -m benchmarks.bench_lote [workers ...]
+"""
+
+import random
+import sys
+import time
+
+from api.emotion_library import EmotionLibrary
+
+
+def analizar_multiples_texto_a_texto(textos):
+    """Implementación previa: detectar_emociones por texto y promedios en Python."""
+    resultados = [EmotionLibrary.detectar_emociones(t) for t in textos]
+
+    emociones_promedio = {}
+    for resultado in resultados:
+        for emocion, datos in resultado["emociones"].items():
+            if emocion not in emociones_promedio:
+                emociones_promedio[emocion] = []
+            emociones_promedio[emocion].append(datos["intensidad"])
+
+    for emocion in emociones_promedio:
+        emociones_promedio[emocion] = sum(emociones_promedio[emocion]) / len(emociones_promedio[emocion])
+
+    nivel_estres_promedio = sum(r["nivel_estres"] for r in resultados) / len(resultados)
+
+    return {
+        "analisis_total": len(resultados),
+        "emociones_promedio": emociones_promedio,
+        "nivel_estres_promedio": nivel_estres_promedio,
+        "tendencia": "positiva" if nivel_estres_promedio < 4 else "negativa" if nivel_estres_promedio > 6 else "neutral"
+    }
+
+
+RELLENO = ["hoy", "el", "trabajo", "con", "mi", "familia", "y", "pero", "que", "me", "siento", "estoy", "porque", "todo"]
+
+
+def generar_textos(total, semilla=7):
+    """Mensajes de chat de 10-20 tokens mezclando léxico, modificadores y relleno."""
+    rng = random.Random(semilla)
+    lexico = list(EmotionLibrary.LEXICO.indice)
+    modificadores = list(EmotionLibrary.INTENSIFIERS) + EmotionLibrary.NEGATORS
+    textos = []
+    for _ in range(total):
+        palabras = [rng.choice(RELLENO) for _ in range(rng.randint(8, 16))]
+        for _ in range(rng.randint(1, 3)):
+            palabras.insert(rng.randrange(len(palabras) + 1), rng.choice(lexico))
+        if rng.random() < 0.4:
+            palabras.insert(rng.randrange(len(palabras) + 1), rng.choice(modificadores))
+        textos.append(" ".join(palabras))
+    return textos
+
+
+def medir(funcion, textos):
+    """Retorna textos por segundo (mejor de 3)."""
+    mejor = float("inf")
+    for _ in range(3):
+        inicio = time.perf_counter()
+        funcion(textos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return len(textos) / mejor
+
+
+def main(argv):
+    textos = generar_textos(20000)
+    antes = medir(analizar_multiples_texto_a_texto, textos)
+    despues = medir(EmotionLibrary.analizar_multiples, textos)
+    print(f"{len(textos)} textos: texto a texto {antes:,.0f} textos/s, "
+          f"NumPy {despues:,.0f} textos/s ({despues / antes:.1f}x)")
+
+    textos = generar_textos(200000)
+    for workers in [int(w) for w in argv] or [1, 2, 4]:
+        rendimiento = medir(lambda t: EmotionLibrary.analizar_multiples(t, workers=workers), textos)
+        print(f"{len(textos)} textos, {workers} workers: {rendimiento:,.0f} textos/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Generador de corpus sintético en español para los benchmarks.
+
+Los textos mezclan frases de EMOTIONS_DICT, intensificadores y negadores
+(colocados justo antes de una frase emocional, como en un mensaje real) y
+palabras de relleno. Con la misma semilla se obtiene siempre el mismo corpus.
+"""
+
+import random
+from typing import List, Optional
+
+from api.emotion_library import EmotionLibrary
+
+RELLENO = [
+    "hoy", "el", "la", "los", "las", "un", "una", "trabajo", "con", "mi", "mis",
+    "familia", "y", "pero", "que", "me", "siento", "estoy", "porque", "todo",
+    "casa", "amigos", "semana", "ayer", "mañana", "noche", "día", "escuela",
+    "cuando", "después", "antes", "siempre", "también", "otra", "vez", "algo",
+    "para", "por", "en", "de", "se", "lo", "le", "su", "sus", "como", "más",
+    "creo", "pienso", "quiero", "tengo", "hago", "digo", "hablé", "pasó",
+]
+
+
+class GeneradorCorpus:
+    """
+    Genera textos de longitud controlada (en tokens) con una semilla fija.
+
+    Args:
+        semilla: Semilla del generador aleatorio
+        proporcion_emociones: Probabilidad de que cada inserción sea una frase del léxico
+        proporcion_modificadores: Probabilidad de anteponer un intensificador o negador
+            a una frase emocional
+    """
+
+    def __init__(self, semilla: int = 7, proporcion_emociones: float = 0.15,
+                 proporcion_modificadores: float = 0.3):
+        self._rng = random.Random(semilla)
+        self.proporcion_emociones = proporcion_emociones
+        self.proporcion_modificadores = proporcion_modificadores
+
+        self.frases = sorted({
+            frase for datos in EmotionLibrary.EMOTIONS_DICT.values() for frase in datos["palabras"]
+        })
+        self.intensificadores = list(EmotionLibrary.INTENSIFIERS)
+        self.negadores = list(EmotionLibrary.NEGATORS)
+
+    def texto(self, tokens: int) -> str:
+        """Un texto de exactamente ``tokens`` palabras."""
+        rng = self._rng
+        palabras: List[str] = []
+
+        while len(palabras) < tokens:
+            if rng.random() < self.proporcion_emociones:
+                if rng.random() < self.proporcion_modificadores:
+                    modificadores = self.negadores if rng.random() < 0.4 else self.intensificadores
+                    palabras.extend(rng.choice(modificadores).split())
+                palabras.extend(rng.choice(self.frases).split())
+            else:
+                palabras.append(rng.choice(RELLENO))
+
+        return " ".join(palabras[:tokens])
+
+    def textos(self, total: int, minimo: int = 10, maximo: Optional[int] = None) -> List[str]:
+        """``total`` textos con longitudes uniformes entre ``minimo`` y ``maximo`` tokens."""
+        maximo = minimo if maximo is None else maximo
+        return [self.texto(self._rng.randint(minimo, maximo)) for _ in range(total)]
+
+
+def generar_corpus(total: int, minimo: int = 10, maximo: Optional[int] = None,
+                   semilla: int = 7) -> List[str]:
+    """Atajo para ``GeneradorCorpus(semilla).textos(total, minimo, maximo)``."""
+    return GeneradorCorpus(semilla).textos(total, minimo, maximo)
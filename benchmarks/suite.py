@@ -0,0 +1,217 @@
+"""
+Suite de benchmarks del motor de emociones con baselines en JSON.
+
+Mide latencia por texto (percentiles) a distintas longitudes, rendimiento de
+``analizar_multiples``, pico de memoria y peticiones por segundo de las vistas.
+Cada métrica indica si es mejor un valor menor o mayor, lo que permite comparar
+una ejecución con una baseline guardada y detectar regresiones.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from api.emotion_library import EmotionLibrary
+
+from .corpus import GeneradorCorpus
+
+FORMATO = 1
+
+# Longitudes (tokens) y número de textos medidos en cada una
+LONGITUDES = {10: 2000, 100: 500, 1000: 100, 10000: 20}
+LONGITUDES_RAPIDO = {10: 200, 100: 50, 1000: 10, 10000: 3}
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil ``p`` (0-100) por interpolación lineal."""
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def _metrica(valor: float, unidad: str, mejor: str) -> Dict[str, Any]:
+    return {"valor": round(valor, 3), "unidad": unidad, "mejor": mejor}
+
+
+def _mejor_de(repeticiones: int, funcion: Callable[[], Any]) -> float:
+    """Menor tiempo (s) de varias ejecuciones."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def _pico_memoria(funcion: Callable[[], Any]) -> float:
+    """Pico de memoria asignada durante ``funcion`` (KB)."""
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1024
+
+
+def medir_latencia(generador: GeneradorCorpus, longitudes: Dict[int, int]) -> Dict[str, Dict[str, Any]]:
+    """Percentiles p50/p90/p99 de ``detectar_emociones`` por longitud de texto."""
+    metricas = {}
+    for tokens, muestras in longitudes.items():
+        textos = generador.textos(muestras, tokens)
+        EmotionLibrary.detectar_emociones(textos[0])
+
+        tiempos = []
+        for texto in textos:
+            inicio = time.perf_counter_ns()
+            EmotionLibrary.detectar_emociones(texto)
+            tiempos.append((time.perf_counter_ns() - inicio) / 1000)
+
+        for p in (50, 90, 99):
+            metricas[f"latencia_{tokens}_p{p}"] = _metrica(percentil(tiempos, p), "µs", "menor")
+    return metricas
+
+
+def medir_lote(generador: GeneradorCorpus, total: int) -> Dict[str, Dict[str, Any]]:
+    """Textos por segundo de ``analizar_multiples`` y su pico de memoria."""
+    textos = generador.textos(total, 10, 20)
+    segundos = _mejor_de(3, lambda: EmotionLibrary.analizar_multiples(textos))
+    return {
+        "lote_textos_por_s": _metrica(total / segundos, "textos/s", "mayor"),
+        "lote_memoria_pico": _metrica(_pico_memoria(lambda: EmotionLibrary.analizar_multiples(textos)), "KB", "menor"),
+    }
+
+
+def medir_memoria_texto_largo(generador: GeneradorCorpus, tokens: int = 10000) -> Dict[str, Dict[str, Any]]:
+    """Pico de memoria de ``detectar_emociones`` sobre un texto largo."""
+    texto = generador.texto(tokens)
+    return {
+        f"memoria_pico_{tokens}": _metrica(_pico_memoria(lambda: EmotionLibrary.detectar_emociones(texto)), "KB", "menor"),
+    }
+
+
+def medir_vistas(generador: GeneradorCorpus, peticiones: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Peticiones por segundo de /api/analizar-texto/ y /api/chatbot/.
+
+    Requiere Django configurado. El chatbot escribe en la base de datos, así que
+    se usa una base de datos de pruebas que se destruye al terminar.
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from django.urls import reverse
+
+    from api.auth_utils import crear_token_acceso
+    from api.models import Usuario
+
+    mensajes = generador.textos(peticiones, 10, 20)
+    metricas = {}
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        # Los observadores escriben cada evento por consola; no se mide eso
+        logging.disable(logging.CRITICAL)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cliente = Client()
+            url = reverse("analizar-texto")
+            segundos = _mejor_de(3, lambda: [
+                cliente.post(url, {"texto": mensaje}, content_type="application/json") for mensaje in mensajes
+            ])
+            metricas["vista_analizar_por_s"] = _metrica(peticiones / segundos, "peticiones/s", "mayor")
+
+            usuario = Usuario.objects.create(nombre="Benchmark", correo="benchmark@example.com", contraseña="x")
+            cliente = Client(HTTP_AUTHORIZATION=f"Bearer {crear_token_acceso(usuario.id)}")
+            url = reverse("chatbot")
+            segundos = _mejor_de(3, lambda: [
+                cliente.post(url, {"mensaje": mensaje}, content_type="application/json") for mensaje in mensajes
+            ])
+            metricas["vista_chatbot_por_s"] = _metrica(peticiones / segundos, "peticiones/s", "mayor")
+    finally:
+        logging.disable(logging.NOTSET)
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+    return metricas
+
+
+def ejecutar(semilla: int = 7, rapido: bool = False, vistas: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta la suite completa y retorna el resultado listo para guardarse en JSON.
+
+    Args:
+        semilla: Semilla del corpus
+        rapido: Menos muestras (para comprobaciones rápidas; más ruido)
+        vistas: Incluir las vistas (requiere Django configurado)
+    """
+    generador = GeneradorCorpus(semilla)
+    metricas: Dict[str, Dict[str, Any]] = {}
+    metricas.update(medir_latencia(generador, LONGITUDES_RAPIDO if rapido else LONGITUDES))
+    metricas.update(medir_lote(generador, 2000 if rapido else 20000))
+    metricas.update(medir_memoria_texto_largo(generador))
+    if vistas:
+        metricas.update(medir_vistas(generador, 50 if rapido else 300))
+
+    return {
+        "formato": FORMATO,
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "semilla": semilla,
+            "rapido": rapido,
+            "version_lexico": EmotionLibrary.LEXICO.version,
+        },
+        "metricas": metricas,
+    }
+
+
+def comparar(actual: Dict[str, Any], baseline: Dict[str, Any],
+             umbral: float = 0.25) -> List[Tuple[str, float, float, float]]:
+    """
+    Compara dos ejecuciones métrica a métrica.
+
+    Una métrica empeora cuando se aleja de la baseline más de ``umbral``
+    (fracción) en la dirección mala. Las métricas que solo están en una de las
+    dos ejecuciones se ignoran.
+
+    Returns:
+        list: (métrica, valor baseline, valor actual, empeoramiento) de cada regresión
+    """
+    regresiones = []
+    for nombre, base in baseline["metricas"].items():
+        metrica = actual["metricas"].get(nombre)
+        if metrica is None or base["valor"] <= 0 or metrica["valor"] <= 0:
+            continue
+
+        if base["mejor"] == "menor":
+            empeoramiento = metrica["valor"] / base["valor"] - 1
+        else:
+            empeoramiento = base["valor"] / metrica["valor"] - 1
+
+        if empeoramiento > umbral:
+            regresiones.append((nombre, base["valor"], metrica["valor"], empeoramiento))
+    return regresiones
+
+
+def guardar(resultado: Dict[str, Any], ruta: str) -> None:
+    with open(ruta, "w", encoding="utf-8") as fichero:
+        json.dump(resultado, fichero, ensure_ascii=False, indent=2)
+
+
+def cargar(ruta: str) -> Dict[str, Any]:
+    with open(ruta, encoding="utf-8") as fichero:
+        resultado = json.load(fichero)
+    if resultado.get("formato") != FORMATO:
+        raise ValueError(f"Formato de baseline no soportado: {ruta}")
+    return resultado
@@ -0,0 +1,56 @@
+"""
+Tests unitarios para el generador de corpus y la comparación de baselines
+"""
+
+import unittest
+
+from api.lexicon import tokenizar
+from benchmarks.corpus import GeneradorCorpus, generar_corpus
+from benchmarks.suite import comparar, percentil
+
+
+class TestGeneradorCorpus(unittest.TestCase):
+
+    def test_misma_semilla_mismo_corpus(self):
+        self.assertEqual(generar_corpus(20, 10, 50, semilla=3), generar_corpus(20, 10, 50, semilla=3))
+        self.assertNotEqual(generar_corpus(20, 10, 50, semilla=3), generar_corpus(20, 10, 50, semilla=4))
+
+    def test_longitud_en_tokens(self):
+        """Cada texto tiene exactamente el número de tokens pedido"""
+        generador = GeneradorCorpus()
+        for tokens in (10, 1000, 10000):
+            with self.subTest(tokens=tokens):
+                self.assertEqual(len(tokenizar(generador.texto(tokens))), tokens)
+
+    def test_contiene_emociones(self):
+        from api.emotion_library import EmotionLibrary
+        resultado = EmotionLibrary.detectar_emociones(GeneradorCorpus().texto(200))
+        self.assertNotEqual(resultado["emocion_principal"], "neutral")
+
+
+class TestComparar(unittest.TestCase):
+
+    def resultado(self, **valores):
+        direcciones = {"latencia": "menor", "rendimiento": "mayor"}
+        return {"metricas": {
+            nombre: {"valor": valor, "unidad": "", "mejor": direcciones[nombre]}
+            for nombre, valor in valores.items()
+        }}
+
+    def test_percentil(self):
+        self.assertEqual(percentil([1, 2, 3, 4, 5], 50), 3)
+        self.assertAlmostEqual(percentil([0, 10], 90), 9)
+
+    def test_detecta_regresiones_segun_direccion(self):
+        base = self.resultado(latencia=100, rendimiento=1000)
+
+        self.assertEqual(comparar(self.resultado(latencia=110, rendimiento=950), base, 0.2), [])
+        regresiones = comparar(self.resultado(latencia=130, rendimiento=700), base, 0.2)
+        self.assertEqual([r[0] for r in regresiones], ["latencia", "rendimiento"])
+
+    def test_mejoras_no_son_regresiones(self):
+        base = self.resultado(latencia=100, rendimiento=1000)
+        self.assertEqual(comparar(self.resultado(latencia=10, rendimiento=5000), base, 0.1), [])
+
+    def test_metricas_nuevas_se_ignoran(self):
+        self.assertEqual(comparar(self.resultado(latencia=500), self.resultado(rendimiento=10), 0.1), [])
@@ -52,6 +52,169 @@ SIMPLE_JWT = {
 }
 
 
+# Caché en proceso de análisis emocionales (api/analysis_cache.py)
+ANALISIS_CACHE = {
+    'HABILITADO': os.getenv('ANALISIS_CACHE_HABILITADO', 'false').lower() == 'true',
+    'MAX_ENTRADAS': 2048,
+    'MAX_BYTES': 8 * 1024 * 1024,
+}
+
+# Léxico empaquetado (api/packed_lexicon.py): generar con
+#   python manage.py compilar_lexico /ruta/lexicon.bin
+# y exportar LEXICO_EMPAQUETADO=/ruta/lexicon.bin antes de arrancar los workers.
+# Sin la variable se usa el léxico definido en EmotionLibrary.
+
+# Léxico editable sin reiniciar (api/lexicon_registry.py): FUENTE "bd" usa la
+# fila activa más reciente de la tabla Lexico; "fichero" usa RUTA (JSON fuente
+# o artefacto empaquetado). Se comprueba cada INTERVALO segundos. El fichero se
+# actualiza sustituyéndolo (compilar_lexico lo hace con os.replace, o escribir
+# un temporal y "mv"), nunca reescribiéndolo en su sitio: los workers tienen el
+# artefacto mapeado en memoria y truncarlo los tumba con SIGBUS.
+LEXICO_DINAMICO = {
+    'FUENTE': os.getenv('LEXICO_FUENTE') or None,
+    'RUTA': os.getenv('LEXICO_RUTA', ''),
+    'INTERVALO': int(os.getenv('LEXICO_INTERVALO', '60')),
+}
+
+# Cascada de analizadores (api/analyzers.py): el léxico responde cuando su
+# confianza llega a UMBRAL_CONFIANZA; los demás textos van a RESPALDO (nombre
+# registrado o ruta "modulo.Clase", creado con OPCIONES) en lotes de hasta
+# LOTE_MAXIMO textos, esperando como mucho ESPERA_MAXIMA_MS a que se llenen.
+# Sin RESPALDO solo se usa el léxico.
+ANALIZADORES = {
+    'RESPALDO': os.getenv('ANALIZADOR_RESPALDO', ''),
+    'OPCIONES': {},
+    'UMBRAL_CONFIANZA': 35,
+    'LOTE_MAXIMO': 16,
+    'ESPERA_MAXIMA_MS': 10,
+    'TIEMPO_MAXIMO_MS': 2000,
+}
+
+# Etapas de detectar_emociones (api/pipeline.py). CACHE_ETAPAS: etapas con
+# caché propia, con su número máximo de entradas; útil con mensajes cortos muy
+# repetidos: {'tokenizar': 4096, 'emparejar': 4096}. DIFUSO: tolerancia a
+# erratas ("ansiosoo" -> "ansioso"); las frases con palabras corregidas puntúan
+# multiplicadas por PESO.
+PIPELINE_ANALISIS = {
+    'CACHE_ETAPAS': {},
+    'DIFUSO': {
+        'HABILITADO': os.getenv('ANALISIS_DIFUSO_HABILITADO', 'false').lower() == 'true',
+        'PESO': 0.7,
+        'LARGO_DISTANCIA_2': 8,
+    },
+}
+
+# Despacho de eventos a los observadores (api/observers.py, api/event_bus.py).
+# "sincrono": dentro de la petición. "asincrono": cola de TAM_COLA eventos que
+# despachan HILOS hilos de fondo. DESBORDE con la cola llena: "bloquear" (como
+# mucho ESPERA_BLOQUEO_MS), "descartar_antiguo" o "descartar_nuevo". Al
+# terminar el proceso se despacha lo pendiente durante ESPERA_CIERRE_MS.
+EVENTOS = {
+    'MODO': os.getenv('EVENTOS_MODO', 'sincrono'),
+    'TAM_COLA': int(os.getenv('EVENTOS_TAM_COLA', '1000')),
+    'HILOS': int(os.getenv('EVENTOS_HILOS', '1')),
+    'DESBORDE': os.getenv('EVENTOS_DESBORDE', 'bloquear'),
+    'ESPERA_BLOQUEO_MS': 1000,
+    'ESPERA_CIERRE_MS': 5000,
+}
+
+# Entrega de cada evento a sus observadores (api/observer_dispatch.py): los
+# observadores de E/S (email) se ejecutan a la vez en un pool de HILOS hilos
+# (0 = todos uno detrás de otro, sin timeouts). Un observador que falla o
+# supera TIMEOUT_MS FALLOS_MAX veces seguidas deja de recibir eventos durante
+# REINTENTO_S segundos. Las llamadas a un observador que superan
+# UMBRAL_LENTO_MS, y los despachos completos que superan UMBRAL_DESPACHO_MS,
+# se avisan en el log (api/observer_metrics.py).
+OBSERVADORES = {
+    'HILOS': int(os.getenv('OBSERVADORES_HILOS', '4')),
+    'TIMEOUT_MS': int(os.getenv('OBSERVADORES_TIMEOUT_MS', '2000')),
+    'FALLOS_MAX': 5,
+    'REINTENTO_S': 30,
+    'UMBRAL_LENTO_MS': 100,
+    'UMBRAL_DESPACHO_MS': 250,
+}
+
+# Registro de eventos (modelo EventLog, api/event_log.py): DatabaseObserver
+# deja cada evento en un buffer de TAM_MAX eventos y un hilo con su propia
+# conexión los guarda con un INSERT por cada TAM_LOTE eventos o cada
+# INTERVALO_MS, lo que ocurra antes. Al terminar el proceso se guarda lo
+# pendiente durante ESPERA_CIERRE_MS.
+REGISTRO_EVENTOS = {
+    'HABILITADO': os.getenv('REGISTRO_EVENTOS_HABILITADO', 'false').lower() == 'true',
+    'TAM_LOTE': int(os.getenv('REGISTRO_EVENTOS_TAM_LOTE', '100')),
+    'INTERVALO_MS': int(os.getenv('REGISTRO_EVENTOS_INTERVALO_MS', '500')),
+    'TAM_MAX': 10000,
+    'ESPERA_CIERRE_MS': 5000,
+}
+
+# Estadísticas de StatisticsObserver (api/shared_stats.py). Con COMPARTIDAS,
+# cada worker vuelca sus contadores cada INTERVALO_S segundos a la base de
+# datos y /api/estadisticas/ sirve la suma de todos; sin ella, solo las del
+# proceso que atiende la petición. Incluye percentiles del estrés y ritmo por
+# emoción en los últimos 5 min, 1 h y 24 h (api/stress_stats.py).
+ESTADISTICAS = {
+    'COMPARTIDAS': os.getenv('ESTADISTICAS_COMPARTIDAS', 'false').lower() == 'true',
+    'INTERVALO_S': int(os.getenv('ESTADISTICAS_INTERVALO_S', '5')),
+}
+
+# Historial de RecommendationObserver (api/user_history.py): las últimas
+# POR_USUARIO evaluaciones de cada usuario, que acompañan a cada evento
+# "tendencia_detectada", en como mucho PRESUPUESTO_MB por proceso (se expulsa
+# al usuario usado hace más tiempo) y expulsando a los inactivos TTL_S
+# segundos. Un usuario expulsado se recarga de la base de datos cuando se le
+# detecta una tendencia.
+HISTORIAL_USUARIOS = {
+    'POR_USUARIO': 20,
+    'PRESUPUESTO_MB': int(os.getenv('HISTORIAL_PRESUPUESTO_MB', '16')),
+    'TTL_S': 86400,
+}
+
+# Detectores de tendencia de RecommendationObserver (api/trends.py): media
+# móvil exponencial del estrés (peso ALFA, aviso al superar UMBRAL_EWMA),
+# CUSUM sobre OBJETIVO + HOLGURA (aviso al llegar a UMBRAL_CUSUM) y rachas de
+# RACHA_MINIMA evaluaciones. Cada aviso es un evento "tendencia_detectada".
+# Con PERSISTIR (por defecto), el estado de cada usuario se guarda cada
+# INTERVALO_S segundos y sobrevive a los reinicios; en memoria hay como mucho
+# MAX_USUARIOS. Los tests no persisten (mindcare/test_runner.py).
+TENDENCIAS = {
+    'ALFA': 0.3,
+    'OBJETIVO': 5.0,
+    'HOLGURA': 0.5,
+    'UMBRAL_EWMA': 7.0,
+    'UMBRAL_CUSUM': 6.0,
+    'RACHA_MINIMA': 3,
+    'PERSISTIR': os.getenv('TENDENCIAS_PERSISTIR', 'true').lower() == 'true',
+    'INTERVALO_S': 5,
+    'MAX_USUARIOS': 50000,
+}
+
+# Limitación de AlertObserver (api/alert_limiter.py): cada usuario recibe como
+# mucho CAPACIDAD alertas seguidas y recupera una cada RECARGA_S segundos; una
+# alerta de la misma severidad que otra de hace menos de VENTANA_DEDUP_S
+# segundos se suprime. Una alerta más grave se emite siempre, y la siguiente
+# alerta emitida indica cuántas se suprimieron. En memoria hay como mucho
+# MAX_USUARIOS, y los inactivos se expulsan.
+ALERTAS = {
+    'CAPACIDAD': int(os.getenv('ALERTAS_CAPACIDAD', '3')),
+    'RECARGA_S': int(os.getenv('ALERTAS_RECARGA_S', '60')),
+    'VENTANA_DEDUP_S': int(os.getenv('ALERTAS_VENTANA_DEDUP_S', '300')),
+    'MAX_USUARIOS': 100000,
+}
+
+# Emails de EmailNotificationObserver. Sin HABILITADO solo se registran en el
+# log. El envío usa la configuración SMTP de Django (EMAIL_HOST, EMAIL_PORT...).
+NOTIFICACIONES_EMAIL = {
+    'HABILITADO': os.getenv('EMAILS_HABILITADOS', 'false').lower() == 'true',
+    'REMITENTE': os.getenv('EMAIL_REMITENTE', ''),
+}
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'false').lower() == 'true'
+# Sin timeout, un servidor SMTP colgado retendría un hilo del pool para siempre
+EMAIL_TIMEOUT = 10
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -104,6 +267,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mindcare.wsgi.application'
 
+# Igual que el de Django, sin persistir las tendencias de estrés
+TEST_RUNNER = 'mindcare.test_runner.MindcareTestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
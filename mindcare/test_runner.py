@@ -0,0 +1,23 @@
+"""
+Runner de tests de MindCare-AI.
+
+Igual que el de Django, pero los detectores de tendencia del EventManager no
+persisten su estado: el hilo de escritura competiría con las transacciones de
+los tests por la base de datos. Los tests de persistencia instalan sus propias
+``TendenciasUsuarios``.
+"""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class MindcareTestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        from api.observers import get_event_manager
+        from api.trends import crear_tendencias
+
+        config = {**getattr(settings, "TENDENCIAS", {}), "PERSISTIR": False}
+        get_event_manager().configurar_tendencias(crear_tendencias(config))
@@ -10,7 +10,9 @@ from api.views import (
     login_page,
     registro_page,
     chatbot_page,
-    ChatbotView
+    ChatbotView,
+    LatenciaObservadoresView,
+    EstadisticasView
 )
 
 urlpatterns = [
@@ -31,4 +33,6 @@ urlpatterns = [
     path('api/evaluaciones/', EvaluacionEmocionalView.as_view(), name="evaluaciones"),
     path('api/analizar-texto/', AnalizarTextoView.as_view(), name="analizar-texto"),
     path('api/chatbot/', ChatbotView.as_view(), name="chatbot"),
+    path('api/observadores/latencias/', LatenciaObservadoresView.as_view(), name="latencia-observadores"),
+    path('api/estadisticas/', EstadisticasView.as_view(), name="estadisticas"),
 ]